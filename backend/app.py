@@ -35,8 +35,6 @@ except ImportError:
         MAGIC_AVAILABLE = False
         logger.warning("❌ Détection MIME désactivée - uploads CSV uniquement")
 
-import numpy as np
-import pandas as pd
 from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, status, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
@@ -60,10 +58,6 @@ from database_encrypted import (
     verify_encrypted_db, rollback_migration
 )
 from audit_logger import get_audit_logger, AuditEventType
-from export_engine import (
-    ExportManager, ExportRequest, ExportFilters, ExportFormat, 
-    ExportScope, ExportJob
-)
 
 # Chargement des variables d'environnement
 load_dotenv()
@@ -379,38 +373,22 @@ class CustomProvision(Base):
 # Create tables
 Base.metadata.create_all(bind=engine)
 
-# Import routers
+# Import routers (core routers, loaded with the application)
 from routers.auth import router as auth_router
 # from routers.cache import router as cache_router
 from routers.config import router as config_router
 from routers.fixed_expenses import router as fixed_expenses_router
 from routers.provisions import router as provisions_router
 from routers.transactions import router as transactions_router
-from routers.import_export import router as import_export_router
 from routers.analytics import router as analytics_router
-from routers.tag_automation import router as tag_automation_router
 from routers.tags import router as tags_router
-from routers.classification import router as classification_router
-from routers.intelligent_tags import router as intelligent_tags_router  # New intelligent tag system
-from routers.auto_tagging import router as auto_tagging_router  # Batch auto-tagging system
 # from routers.intelligence import router as intelligence_router  # Temporarily disabled due to syntax error
-from routers.research import router as research_router
-from routers.ml_tagging import router as ml_tagging_router  # ML-based tagging with confidence scoring
-from routers.ml_feedback import router as ml_feedback_router  # ML feedback learning system
-from routers.ml_enhanced_classification import router as ml_enhanced_classification_router  # Enhanced ML classification
 from routers.balance import router as balance_router  # Account balance management
 from routers.tag_categories import router as tag_categories_router  # Tag-category mappings persistence
 from routers.custom_categories import router as custom_categories_router  # User-defined custom categories
 from routers.budgets import router as budgets_router  # Category budget management for variance analysis
-from routers.ai import router as ai_router  # AI-powered budget analysis with OpenRouter
-from routers.predictions import router as predictions_router  # ML predictions and anomaly detection
-from routers.smart_import import router as smart_import_router  # Smart multi-format file import (CSV, XLSX, PDF)
-from routers.import_advisor import router as import_advisor_router  # AI-powered post-import analysis
-from routers.coach import router as coach_router  # AI budget coaching tips and insights
 from routers.gamification import router as gamification_router  # Gamification system (achievements, challenges)
-from routers.receipts import router as receipts_router  # OCR receipt scanning and transaction creation
-from routers.pdf_export import router as pdf_export_router  # PDF monthly report generation
-from routers.unified_tagging import router as unified_tagging_router  # Consolidated ML tagging (v4.2)
+from routers.debug import router as debug_router  # Sampled query profiler (/debug/perf)
 
 # Include routers with their prefixes
 app.include_router(auth_router, tags=["authentication"])
@@ -419,31 +397,41 @@ app.include_router(config_router, tags=["configuration"])
 app.include_router(fixed_expenses_router, tags=["fixed-expenses"])
 app.include_router(provisions_router, tags=["provisions"])
 app.include_router(transactions_router, tags=["transactions"])
-app.include_router(import_export_router, tags=["import-export"])
 app.include_router(analytics_router, tags=["analytics"])
-app.include_router(tag_automation_router, tags=["tag-automation"])
 app.include_router(tags_router, tags=["tags"])
-app.include_router(classification_router, prefix="/expense-classification", tags=["intelligent-classification"])
-app.include_router(intelligent_tags_router, tags=["intelligent-tags"])  # New intelligent tag system
-app.include_router(auto_tagging_router, tags=["auto-tagging"])  # Batch auto-tagging system
 # app.include_router(intelligence_router, tags=["intelligence"])  # Temporarily disabled
-app.include_router(research_router, tags=["web-research"])
-app.include_router(ml_tagging_router, tags=["ml-tagging"])  # ML-based tagging with confidence scoring
-app.include_router(ml_feedback_router, tags=["ml-feedback"])  # ML feedback learning system
-app.include_router(ml_enhanced_classification_router, tags=["ml-enhanced-classification"])  # Enhanced ML classification
 app.include_router(balance_router, tags=["account-balance"])  # Account balance management
 app.include_router(tag_categories_router, tags=["tag-categories"])  # Tag-category mappings persistence
 app.include_router(custom_categories_router, tags=["custom-categories"])  # User-defined custom categories
 app.include_router(budgets_router, tags=["category-budgets"])  # Category budget management for variance analysis
-app.include_router(ai_router, tags=["ai-analysis"])  # AI-powered budget analysis with OpenRouter
-app.include_router(predictions_router, tags=["ml-predictions"])  # ML budget predictions and anomaly detection
-app.include_router(smart_import_router, tags=["smart-import"])  # Smart multi-format file import
-app.include_router(import_advisor_router, tags=["import-advisor"])  # AI-powered post-import analysis
-app.include_router(coach_router, tags=["ai-coach"])  # AI budget coaching tips and insights
 app.include_router(gamification_router, tags=["gamification"])  # Gamification system (achievements, challenges)
-app.include_router(receipts_router, tags=["receipts"])  # OCR receipt scanning and transaction creation
-app.include_router(pdf_export_router, tags=["pdf-export"])  # PDF monthly report generation
-app.include_router(unified_tagging_router, tags=["tags-unified"])  # Consolidated ML tagging v4.2
+app.include_router(debug_router, tags=["debug"])  # Sampled query profiler
+
+# Routers pulling heavy optional dependencies (pandas/Excel, PDF, OCR, ML, aiohttp/httpx
+# clients): imported on the first request under their prefix, when /openapi.json is
+# built, or by the background warm-up (LAZY_ROUTERS=false to load everything at boot)
+from middleware.lazy_routers import LazyRouterMiddleware, LazyRouterRegistry
+
+lazy_routers = LazyRouterRegistry(app)
+lazy_routers.register("routers.import_export", ("/import", "/imports", "/export"), tags=["import-export"])
+lazy_routers.register("routers.tag_automation", ("/tag-automation",), tags=["tag-automation"])
+lazy_routers.register("routers.classification", ("/expense-classification",), prefix="/expense-classification", tags=["intelligent-classification"])
+lazy_routers.register("routers.intelligent_tags", ("/api/intelligent-tags",), tags=["intelligent-tags"])  # New intelligent tag system
+lazy_routers.register("routers.auto_tagging", ("/api/auto-tag",), tags=["auto-tagging"])  # Batch auto-tagging system
+lazy_routers.register("routers.research", ("/research",), tags=["web-research"])
+lazy_routers.register("routers.ml_tagging", ("/api/ml-tagging",), tags=["ml-tagging"])  # ML-based tagging with confidence scoring
+lazy_routers.register("routers.ml_feedback", ("/api/ml-feedback",), tags=["ml-feedback"])  # ML feedback learning system
+lazy_routers.register("routers.ml_enhanced_classification", ("/api/ml-classification",), tags=["ml-enhanced-classification"])  # Enhanced ML classification
+lazy_routers.register("routers.ai", ("/ai",), tags=["ai-analysis"])  # AI-powered budget analysis with OpenRouter
+lazy_routers.register("routers.predictions", ("/predictions",), tags=["ml-predictions"])  # ML budget predictions and anomaly detection
+lazy_routers.register("routers.smart_import", ("/smart-import",), tags=["smart-import"])  # Smart multi-format file import
+lazy_routers.register("routers.import_advisor", ("/import-advisor",), tags=["import-advisor"])  # AI-powered post-import analysis
+lazy_routers.register("routers.coach", ("/coach",), tags=["ai-coach"])  # AI budget coaching tips and insights
+lazy_routers.register("routers.receipts", ("/receipts",), tags=["receipts"])  # OCR receipt scanning and transaction creation
+lazy_routers.register("routers.pdf_export", ("/export/pdf",), tags=["pdf-export"])  # PDF monthly report generation
+lazy_routers.register("routers.unified_tagging", ("/api/tags",), tags=["tags-unified"])  # Consolidated ML tagging v4.2
+lazy_routers.install_openapi_hook()
+app.add_middleware(LazyRouterMiddleware, registry=lazy_routers)
 
 # Configure CORS middleware after all routes are defined
 # This ensures CORS preflight requests are handled correctly for all endpoints
@@ -454,22 +442,35 @@ app.add_middleware(
     allow_methods=settings.cors.allow_methods,
     allow_headers=settings.cors.allow_headers,
     max_age=settings.cors.max_age,
-    expose_headers=["Content-Type", "Authorization", "X-Total-Count", "X-Pagination", "*"],  # Expose all headers for debugging
+    expose_headers=["Content-Type", "Authorization", "X-Total-Count", "X-Pagination", "X-DB-Queries", "X-DB-Time", "*"],  # Expose all headers for debugging
 )
 
 # Configure rate limiting middleware for security
-from middleware.security import RateLimitMiddleware, SecurityHeadersMiddleware, set_rate_limiter
+from middleware.security import RateLimiter, RateLimitMiddleware, SecurityHeadersMiddleware, set_rate_limiter
+from middleware.rate_limit_backends import create_rate_limit_backend
 
-rate_limit_middleware = RateLimitMiddleware(
-    app,
+rate_limiter = RateLimiter(
     requests_per_minute=int(os.getenv("RATE_LIMIT_PER_MINUTE", "60")),
     auth_requests_per_minute=int(os.getenv("RATE_LIMIT_AUTH_PER_MINUTE", "10")),
-    burst_size=int(os.getenv("RATE_LIMIT_BURST_SIZE", "10")),
+    # Unset: bucket capacity = the per-minute budget (no tighter than the old window)
+    burst_size=int(os.environ["RATE_LIMIT_BURST_SIZE"]) if os.getenv("RATE_LIMIT_BURST_SIZE") else None,
+    backend=create_rate_limit_backend(),  # RATE_LIMIT_BACKEND=redis to share limits across workers
 )
+if os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true":
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
 app.add_middleware(SecurityHeadersMiddleware)
-set_rate_limiter(rate_limit_middleware)
+set_rate_limiter(rate_limiter)
 logger.info("✅ Rate limiting and security headers middleware enabled")
 
+# Sampled query profiling with per-route attribution (QUERY_PROFILER_* env vars)
+# and per-request statement counts: X-DB-Queries / X-DB-Time, N+1 detection
+from middleware.query_profiler import QueryProfilerMiddleware
+from models.database import engine as models_engine, read_engine as models_read_engine
+from services.query_performance import QUERY_REQUEST_STATS_ENABLED, install_query_profiler
+
+if install_query_profiler(engine, models_engine, models_read_engine).enabled or QUERY_REQUEST_STATS_ENABLED:
+    app.add_middleware(QueryProfilerMiddleware)
+
 # ============================================================================
 # STARTUP EVENT: Pre-train ML models in background for instant predictions
 # ============================================================================
@@ -510,6 +511,71 @@ async def startup_event():
     ml_thread.start()
     logger.info("🔄 ML pre-training started in background thread")
 
+    # Import the lazy routers (ML, OCR, PDF, Excel...) once the worker is already serving
+    if lazy_routers.has_pending() and os.getenv("LAZY_ROUTERS_WARMUP", "true").lower() == "true":
+        lazy_routers.warm_up_in_background(delay_seconds=float(os.getenv("LAZY_ROUTERS_WARMUP_DELAY", "5")))
+        logger.info("🔄 Lazy router warm-up scheduled")
+
+    # Warm the OCR process pool so the first receipt scan doesn't load the model
+    from services.ocr_service import is_ocr_available
+    if is_ocr_available() and os.getenv("OCR_WARMUP", "true").lower() == "true":
+        import asyncio
+        from services.ocr_worker_pool import get_ocr_pool
+        app.state.ocr_warmup_task = asyncio.create_task(get_ocr_pool().warm_up())
+        logger.info("🔄 OCR pool warm-up started")
+
+    # Start the CPU process pool used for batch classification
+    if os.getenv("CPU_POOL_WARMUP", "false").lower() == "true":
+        import asyncio
+        from services.executors import get_executors
+        app.state.cpu_warmup_task = asyncio.create_task(get_executors().warm_up())
+        logger.info("🔄 CPU pool warm-up started")
+
+    # Resume batch auto-tagging jobs interrupted by a restart, once the worker is serving
+    import asyncio
+    app.state.batch_resume_task = asyncio.create_task(resume_batch_jobs())
+
+async def resume_batch_jobs():
+    """Resume batch auto-tagging jobs interrupted by a restart (BATCH_JOB_RESUME)"""
+    import asyncio
+    import importlib
+    from models.database import BATCH_JOB_ACTIVE_STATUSES, BatchJob, SessionLocal as JobsSession
+    try:
+        # services.batch_processor pulls the whole classification stack: only import it
+        # (off the event loop) when there is something to resume
+        db = JobsSession()
+        try:
+            if db.query(BatchJob.id).filter(BatchJob.status.in_(BATCH_JOB_ACTIVE_STATUSES)).first() is None:
+                return
+        finally:
+            db.close()
+        batch_processor = await asyncio.get_running_loop().run_in_executor(
+            None, importlib.import_module, "services.batch_processor"
+        )
+        if not batch_processor.BATCH_JOB_RESUME:
+            return
+        resumed = await batch_processor.get_batch_processor().resume_interrupted_jobs()
+        if resumed:
+            logger.info(f"🔄 Resumed {len(resumed)} interrupted batch job(s)")
+    except Exception as e:
+        logger.warning(f"⚠️ Could not resume batch jobs: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Application shutdown event"""
+    from services.ocr_worker_pool import shutdown_ocr_pool
+    from services.web_research_service import close_research_session
+    from services.executors import shutdown_executors
+    from services.ai_cache import flush_ai_cache_hits
+    from services.research_executor import flush_research_usage
+    from services.ai_analysis import close_llm_http_client
+    shutdown_ocr_pool()
+    shutdown_executors()
+    flush_ai_cache_hits()
+    flush_research_usage()
+    await close_research_session()
+    await close_llm_http_client()
+
 # Add compatibility routes for existing endpoints that don't have prefixes
 @app.post("/token", response_model=Token)
 async def legacy_token_endpoint(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db_session)):
@@ -667,12 +733,11 @@ async def legacy_unified_classify(payload: dict, current_user = Depends(get_curr
 async def legacy_unified_batch_classify(payload: dict, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
     """Legacy unified batch classify endpoint for frontend compatibility"""
     try:
-        from routers.classification import unified_batch_classify
-        from models.schemas import BatchUnifiedClassificationRequest
+        from routers.classification import unified_batch_classify_transactions, BatchUnifiedClassificationRequest
         
         # Convert dict payload to Pydantic model
         request_data = BatchUnifiedClassificationRequest(**payload)
-        return await unified_batch_classify(request=request_data, current_user=current_user, db=db)
+        return await unified_batch_classify_transactions(request=request_data, current_user=current_user, db=db)
     except Exception as e:
         logger.error(f"Error in legacy_unified_batch_classify: {str(e)}")
         # Return fallback batch classification
@@ -19,8 +19,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Database imports for user lookup
-from models.database import get_db as get_db_session
+from models.database import get_read_db
 from sqlalchemy.orm import Session
+from services.auth_cache import AuthenticatedUser, get_auth_cache, token_digest
 
 # Logging sécurisé
 logger = logging.getLogger(__name__)
@@ -198,38 +199,55 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db_session)) -> "User":
-    """Dépendance FastAPI pour récupérer l'utilisateur actuel depuis le token JWT"""
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_read_db)) -> AuthenticatedUser:
+    """
+    Dépendance FastAPI pour récupérer l'utilisateur actuel depuis le token JWT
+
+    Un token déjà vérifié (clé: digest SHA-256) n'est ni redécodé ni revalidé
+    jusqu'à son `exp`, et l'utilisateur vient du cache principal (TTL court,
+    invalidé à chaque modification de la ligne users).
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        token = credentials.credentials
-        
-        # Validate JWT key consistency before attempting decode
-        if not validate_jwt_key_consistency():
-            logger.error("Token JWT invalide: Clé JWT a changé depuis l'initialisation")
-            raise credentials_exception
-        
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            logger.warning("Token JWT invalide: sub claim manquant")
+    cache = get_auth_cache()
+    token = credentials.credentials
+    digest = token_digest(token)
+    username = cache.get_token(digest)
+    
+    if username is None:
+        try:
+            # Validate JWT key consistency before attempting decode
+            if not validate_jwt_key_consistency():
+                logger.error("Token JWT invalide: Clé JWT a changé depuis l'initialisation")
+                raise credentials_exception
+            
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username = payload.get("sub")
+            if username is None:
+                logger.warning("Token JWT invalide: sub claim manquant")
+                raise credentials_exception
+            token_data = TokenData(username=username)
+        except JWTError as e:
+            logger.error(f"Token JWT invalide: {type(e).__name__} - {e}")
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError as e:
-        logger.error(f"Token JWT invalide: {type(e).__name__} - {e}")
-        raise credentials_exception
+        cache.put_token(digest, token_data.username, payload.get("exp"))
+    
+    principal = cache.get_principal(username)
+    if principal is not None:
+        return principal
     
     # Use database lookup instead of fake_users_db
     from models.user import get_user_by_username
-    user = get_user_by_username(db, username=token_data.username)
+    user = get_user_by_username(db, username=username)
     if user is None:
         raise credentials_exception
-    return user
+    principal = AuthenticatedUser.from_user(user)
+    cache.put_principal(principal)
+    return principal
 
 # SÉCURITÉ: Fonction pour générer un nouveau secret
 def generate_secret_key():
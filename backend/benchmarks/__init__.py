@@ -0,0 +1,11 @@
+"""
+Reproducible benchmark suite for the Budget Famille API (offline, SQLite)
+
+- datagen: synthetic household data (N years x M transactions per month)
+- scenarios: the hot endpoints (/summary, /transactions, /tags, import,
+  auto-tag-month, analytics) as repeatable requests
+- harness: runs the scenarios against the ASGI app, p50/p95/p99 and SQL
+  statement counts, JSON baselines and regression comparison
+
+Entry point: scripts/run_benchmarks.py
+"""
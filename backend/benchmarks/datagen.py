@@ -0,0 +1,179 @@
+"""
+Synthetic household data for the benchmark suite
+
+Deterministic for a given DatasetSpec (seeded random): the same spec always
+produces the same rows, so timings of two runs are comparable.
+
+Each month holds:
+- the recurring lines of a household (rent, energy, telecom, subscriptions,
+  insurance) with stable amounts, tagged and classified FIXED
+- two salaries (positive amounts)
+- card / transfer expenses spread over ~20 merchant families with realistic
+  bank labels ("CB CARREFOUR MARKET 12/03", "PRLV SEPA EDF CLIENTS..."), a
+  share of them left untagged for auto-tagging
+"""
+
+import csv
+import datetime as dt
+import random
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# (label, amount, tag) paid every month
+RECURRING = [
+    ("VIR PERMANENT LOYER SCI LES TILLEULS", -1150.00, "loyer"),
+    ("PRLV SEPA EDF CLIENTS PARTICULIERS", -96.40, "électricité"),
+    ("PRLV SEPA ORANGE SA", -39.99, "internet"),
+    ("PRLV SEPA FREE MOBILE", -19.99, "téléphone"),
+    ("PRLV SEPA NETFLIX.COM", -13.49, "abonnement"),
+    ("PRLV SEPA SPOTIFY", -10.99, "abonnement"),
+    ("PRLV SEPA MAIF ASSURANCE", -62.15, "assurance"),
+    ("PRLV SEPA MUTUELLE HARMONIE", -84.30, "mutuelle"),
+    ("PRLV SEPA CRECHE LES PETITS LOUPS", -310.00, "enfants"),
+]
+SALARIES = [("VIR SALAIRE ACME INDUSTRIES", 2850.0), ("VIR SALAIRE CHU DE NANTES", 2240.0)]
+
+# tag: (merchants, label prefixes, (min amount, max amount))
+MERCHANTS: Dict[str, tuple] = {
+    "courses": (["CARREFOUR MARKET", "LECLERC DRIVE", "INTERMARCHE", "LIDL", "MONOPRIX", "BIOCOOP"],
+                ["CB ", "CARTE "], (8, 160)),
+    "boulangerie": (["BOULANGERIE PAUL", "MAISON KAYSER", "BOULANGERIE DU MARCHE"], ["CB "], (2, 18)),
+    "restaurant": (["RESTAURANT LE ZINC", "SUSHI SHOP", "BURGER KING", "PIZZERIA DA LUIGI"], ["CB "], (12, 90)),
+    "transport": (["SNCF INTERNET", "TOTAL ACCESS", "ESSO EXPRESS", "RATP NAVIGO", "UBER"], ["CB ", "CARTE "], (4, 120)),
+    "santé": (["PHARMACIE DU CENTRE", "CABINET DR MARTIN", "LABORATOIRE CERBALLIANCE"], ["CB "], (5, 80)),
+    "loisirs": (["FNAC", "CINEMA PATHE", "DECATHLON", "CULTURA"], ["CB ", "CARTE "], (9, 140)),
+    "vêtements": (["ZARA", "KIABI", "H&M", "UNIQLO"], ["CB "], (15, 120)),
+    "maison": (["IKEA", "LEROY MERLIN", "CASTORAMA", "BUT"], ["CB ", "CARTE "], (10, 350)),
+    "cadeaux": (["AMAZON EU", "NATURE ET DECOUVERTES", "ETSY"], ["CB ", "PAIEMENT PAR CARTE "], (10, 90)),
+    "enfants": (["JOUE CLUB", "OKAIDI", "CANTINE SCOLAIRE"], ["CB ", "PRLV "], (6, 75)),
+}
+
+# Share of variable expenses imported without tags (auto-tag-month has work to do)
+UNTAGGED_SHARE = 0.2
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    years: int = 2
+    per_month: int = 200  # transactions per month, recurring lines and salaries included
+    end_month: str = "2025-06"
+    seed: int = 42
+
+    @property
+    def months(self) -> List[str]:
+        year, month = map(int, self.end_month.split("-"))
+        months = []
+        for _ in range(self.years * 12):
+            months.append(f"{year:04d}-{month:02d}")
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        return months[::-1]
+
+    @property
+    def rows(self) -> int:
+        return self.years * 12 * self.per_month
+
+    def as_dict(self) -> dict:
+        return dict(asdict(self), rows=self.rows)
+
+
+PROFILES = {
+    "small": DatasetSpec(years=2, per_month=200),
+    "medium": DatasetSpec(years=3, per_month=800),
+    "large": DatasetSpec(years=5, per_month=3000),
+}
+
+
+def _month_rows(rng: random.Random, month: str, per_month: int) -> Iterator[dict]:
+    year, month_number = map(int, month.split("-"))
+    day = lambda: dt.date(year, month_number, rng.randint(1, 28))
+
+    for label, amount, tag in RECURRING:
+        yield {"date_op": dt.date(year, month_number, 5), "label": label, "amount": amount, "tags": tag,
+               "expense_type": "FIXED", "category": tag}
+    for label, amount in SALARIES:
+        yield {"date_op": dt.date(year, month_number, 27), "label": label, "amount": amount, "tags": "",
+               "expense_type": "VARIABLE", "category": "revenus"}
+
+    tags = list(MERCHANTS)
+    for _ in range(max(0, per_month - len(RECURRING) - len(SALARIES))):
+        tag = rng.choice(tags)
+        merchants, prefixes, (low, high) = MERCHANTS[tag]
+        date_op = day()
+        label = f"{rng.choice(prefixes)}{rng.choice(merchants)} {date_op:%d/%m}"
+        if rng.random() < 0.3:
+            label += f" {rng.choice(['PARIS', 'NANTES', 'LYON', 'RENNES'])}"
+        yield {"date_op": date_op, "label": label, "amount": -round(rng.uniform(low, high), 2),
+               "tags": "" if rng.random() < UNTAGGED_SHARE else tag, "expense_type": "VARIABLE", "category": tag}
+
+
+def generate_rows(spec: DatasetSpec) -> Iterator[dict]:
+    """Transaction mappings of the dataset, month by month"""
+    rng = random.Random(spec.seed)
+    for month in spec.months:
+        for row in _month_rows(rng, month, spec.per_month):
+            yield dict(
+                row,
+                month=month,
+                account_label="Compte Joint",
+                category_parent="Dépenses" if row["amount"] < 0 else "Revenus",
+                is_expense=row["amount"] < 0,
+                exclude=False,
+            )
+
+
+def write_import_csv(path: str, spec: DatasetSpec, month: str) -> int:
+    """Bank export (CSV, import format) of one month of the dataset; returns the row count"""
+    rows = [row for row in generate_rows(spec) if row["month"] == month]
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["dateOp", "label", "amount", "accountLabel", "accountNum", "category", "categoryParent"])
+        for row in rows:
+            writer.writerow([f"{row['date_op']:%d/%m/%Y}", row["label"], f"{row['amount']:.2f}", row["account_label"],
+                             "00012345678", row["category"], row["category_parent"]])
+    return len(rows)
+
+
+def build_database(path: str, spec: DatasetSpec, batch_size: int = 20000) -> int:
+    """
+    Create a SQLite database at `path` with the full schema and the dataset.
+
+    The data generation triggers and the search index are installed after the
+    bulk insert (backfill), as migrate_schema does on an existing database.
+    Returns the number of transactions.
+    """
+    from models.database import (
+        Base, FixedLine, Transaction, create_data_generation_triggers, create_transaction_search_index,
+        ensure_default_config
+    )
+    from services.import_service import assign_row_ids
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    count = 0
+    with Session() as db:
+        ensure_default_config(db)
+        db.add_all([
+            FixedLine(label=label.replace("PRLV SEPA ", "").title(), amount=-amount, freq="mensuelle", category=tag)
+            for label, amount, tag in RECURRING[:4]
+        ])
+        batch = []
+        for row in generate_rows(spec):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                db.bulk_insert_mappings(Transaction, assign_row_ids(batch))
+                count, batch = count + len(batch), []
+        if batch:
+            db.bulk_insert_mappings(Transaction, assign_row_ids(batch))
+            count += len(batch)
+        db.commit()
+
+    with engine.begin() as conn:
+        create_data_generation_triggers(conn)
+        create_transaction_search_index(conn)
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    return count
@@ -0,0 +1,214 @@
+"""
+Benchmark harness: run scenarios against the ASGI app, record, compare
+
+Requests go through httpx's ASGI transport (no network, no server), with the
+full middleware stack. Per scenario the report keeps latency percentiles and
+the SQL statement count of each request (X-DB-Queries header set by
+middleware/query_profiler).
+
+Reports are plain JSON; compare_reports() flags a regression when
+- a latency (p50, p95) grew by more than `tolerance` AND by more than
+  `min_delta_ms` (both: small endpoints are noisy in relative terms, big ones
+  in absolute terms); p95 only when both runs have MIN_TAIL_SAMPLES samples,
+  below that it is the slowest request
+- the statement count grew (deterministic: any increase is flagged)
+- a scenario that used to succeed now returns errors
+"""
+
+import asyncio
+import datetime as dt
+import json
+import platform
+import sqlite3
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from benchmarks.datagen import DatasetSpec
+from benchmarks.scenarios import Scenario
+
+REPORT_VERSION = 1
+LATENCY_METRICS = ("p50_ms", "p95_ms")
+MIN_TAIL_SAMPLES = 20
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(durations_ms: Sequence[float], queries: Sequence[int], errors: int = 0,
+              first_error: Optional[str] = None) -> Dict:
+    summary = {
+        "samples": len(durations_ms),
+        "p50_ms": round(percentile(durations_ms, 50), 3),
+        "p95_ms": round(percentile(durations_ms, 95), 3),
+        "p99_ms": round(percentile(durations_ms, 99), 3),
+        "mean_ms": round(statistics.fmean(durations_ms), 3) if durations_ms else 0.0,
+        "min_ms": round(min(durations_ms), 3) if durations_ms else 0.0,
+        "max_ms": round(max(durations_ms), 3) if durations_ms else 0.0,
+        "queries_p50": int(statistics.median(queries)) if queries else None,
+        "queries_max": max(queries) if queries else None,
+        "errors": errors,
+    }
+    if first_error:
+        summary["first_error"] = first_error
+    return summary
+
+
+async def run_scenario(client, scenario: Scenario, iterations: int, warmup: int = 1, concurrency: int = 1) -> Dict:
+    """Run `warmup` unmeasured then `iterations` measured requests, `concurrency` at a time"""
+    durations, queries, errors, first_error = [], [], 0, None
+
+    async def one(measure: bool):
+        nonlocal errors, first_error
+        if scenario.before is not None:
+            scenario.before()
+        started = time.perf_counter()
+        response = await client.request(scenario.method, scenario.path, **scenario.request_kwargs())
+        await response.aread()
+        elapsed = (time.perf_counter() - started) * 1000
+        if not measure:
+            return
+        durations.append(elapsed)
+        if response.status_code >= 400:
+            errors += 1
+            first_error = first_error or f"{response.status_code}: {response.text[:200]}"
+        count = response.headers.get("x-db-queries")
+        if count is not None:
+            queries.append(int(count))
+
+    for _ in range(warmup):
+        await one(measure=False)
+    remaining = iterations
+    while remaining > 0:
+        batch = min(concurrency, remaining)
+        await asyncio.gather(*(one(measure=True) for _ in range(batch)))
+        remaining -= batch
+    return summarize(durations, queries, errors, first_error)
+
+
+async def run_suite(app, scenarios: List[Scenario], iterations: int, warmup: int = 1, concurrency: int = 1,
+                    progress=None) -> Dict[str, Dict]:
+    import httpx
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for scenario in scenarios:
+            results[scenario.name] = await run_scenario(client, scenario, iterations, warmup, concurrency)
+            if progress:
+                progress(scenario, results[scenario.name])
+    return results
+
+
+def build_report(spec: DatasetSpec, results: Dict[str, Dict], iterations: int, warmup: int,
+                 concurrency: int, label: str = "") -> Dict:
+    return {
+        "version": REPORT_VERSION,
+        "label": label,
+        "created_at": dt.datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "dataset": spec.as_dict(),
+        "settings": {"iterations": iterations, "warmup": warmup, "concurrency": concurrency},
+        "scenarios": results,
+    }
+
+
+def save_report(report: Dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2, ensure_ascii=False, sort_keys=False)
+        handle.write("\n")
+
+
+def load_report(path: str) -> Dict:
+    with open(path, encoding="utf-8") as handle:
+        report = json.load(handle)
+    if report.get("version") != REPORT_VERSION:
+        raise ValueError(f"{path}: unsupported report version {report.get('version')}")
+    return report
+
+
+@dataclass
+class Finding:
+    scenario: str
+    metric: str
+    baseline: Optional[float]
+    current: Optional[float]
+    kind: str  # regression | improvement | info
+
+    @property
+    def change_pct(self) -> Optional[float]:
+        if not self.baseline or self.current is None:
+            return None
+        return (self.current - self.baseline) / self.baseline * 100
+
+
+def compare_reports(baseline: Dict, current: Dict, tolerance: float = 0.25,
+                    min_delta_ms: float = 2.0) -> List[Finding]:
+    """Regressions / improvements of `current` against `baseline` (see module docstring)"""
+    findings = []
+    if baseline.get("dataset") != current.get("dataset"):
+        findings.append(Finding("*", "dataset differs from the baseline's", None, None, "info"))
+
+    for name, base in baseline["scenarios"].items():
+        cur = current["scenarios"].get(name)
+        if cur is None:
+            findings.append(Finding(name, "not run", None, None, "info"))
+            continue
+        for metric in LATENCY_METRICS:
+            if metric != "p50_ms" and min(base["samples"], cur["samples"]) < MIN_TAIL_SAMPLES:
+                continue
+            delta = cur[metric] - base[metric]
+            if abs(delta) <= min_delta_ms:
+                continue
+            if delta > base[metric] * tolerance:
+                findings.append(Finding(name, metric, base[metric], cur[metric], "regression"))
+            elif -delta > base[metric] * tolerance:
+                findings.append(Finding(name, metric, base[metric], cur[metric], "improvement"))
+        if base.get("queries_p50") is not None and cur.get("queries_p50") is not None:
+            if cur["queries_p50"] > base["queries_p50"]:
+                findings.append(Finding(name, "queries_p50", base["queries_p50"], cur["queries_p50"], "regression"))
+            elif cur["queries_p50"] < base["queries_p50"]:
+                findings.append(Finding(name, "queries_p50", base["queries_p50"], cur["queries_p50"], "improvement"))
+        if cur.get("errors") and not base.get("errors"):
+            findings.append(Finding(name, "errors", base.get("errors", 0), cur["errors"], "regression"))
+
+    for name in current["scenarios"].keys() - baseline["scenarios"].keys():
+        findings.append(Finding(name, "not in baseline", None, None, "info"))
+    return findings
+
+
+def format_results(results: Dict[str, Dict]) -> str:
+    lines = [f"  {'scenario':<26} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'errors':>7}"]
+    for name, result in results.items():
+        queries = "-" if result["queries_p50"] is None else str(result["queries_p50"])
+        lines.append(f"  {name:<26} {result['p50_ms']:>7.1f}ms {result['p95_ms']:>7.1f}ms "
+                     f"{result['p99_ms']:>7.1f}ms {queries:>8} {result['errors']:>7}")
+    for name, result in results.items():
+        if result.get("first_error"):
+            lines.append(f"  ! {name}: {result['first_error']}")
+    return "\n".join(lines)
+
+
+def format_findings(findings: List[Finding]) -> str:
+    if not findings:
+        return "  no significant change"
+    lines = []
+    for finding in sorted(findings, key=lambda f: ("regression", "improvement", "info").index(f.kind)):
+        if finding.baseline is None and finding.current is None:
+            lines.append(f"  [{finding.kind}] {finding.scenario}: {finding.metric}")
+            continue
+        change = f" ({finding.change_pct:+.0f}%)" if finding.change_pct is not None else ""
+        lines.append(f"  [{finding.kind}] {finding.scenario} {finding.metric}: "
+                     f"{finding.baseline} -> {finding.current}{change}")
+    return "\n".join(lines)
@@ -0,0 +1,97 @@
+"""
+Benchmark scenarios: the hot endpoints of the API as repeatable requests
+
+Every scenario can run any number of times against the same database:
+writes are idempotent (import of a month it already holds, in replace mode
+or in upsert mode where every row is then unchanged, auto-tag-month in
+dry-run), so iteration N measures the same work as
+iteration 1.
+
+The analytics endpoints serve repeated requests from the calculation cache
+(0 SQL statements): each one also has a "_cold" variant that clears that
+cache before every request, so the computation itself stays measured.
+"""
+
+import os
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.datagen import DatasetSpec, write_import_csv
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    params: Dict = field(default_factory=dict)
+    # Built per request: {"files": ...} / {"json": ...}
+    body: Optional[Callable[[], Dict]] = None
+    description: str = ""
+    # Run before every request, outside the timing (e.g. clear a cache)
+    before: Optional[Callable[[], None]] = None
+
+    def request_kwargs(self) -> Dict:
+        kwargs = {"params": self.params}
+        if self.body is not None:
+            kwargs.update(self.body())
+        return kwargs
+
+
+def clear_calculation_cache() -> None:
+    from services.calculations import clear_calculation_cache as clear
+    clear()
+
+
+def cold(scenario: Scenario) -> Scenario:
+    """Variant of a cached scenario computed on every request"""
+    return replace(scenario, name=f"{scenario.name}_cold", before=clear_calculation_cache,
+                   description=f"{scenario.description} (calculation cache cleared)".strip())
+
+
+def build_scenarios(spec: DatasetSpec, workdir: str) -> List[Scenario]:
+    """Scenarios for a dataset; `workdir` receives the import file"""
+    months = spec.months
+    month = months[-1]
+    # Explicit months: "lastN" windows are relative to today, not to the dataset
+    last = lambda n: ",".join(months[-n:])
+    import_month = months[-2] if len(months) > 1 else month
+    import_file = os.path.join(workdir, f"import-{import_month}.csv")
+    write_import_csv(import_file, spec, import_month)
+
+    def import_body():
+        with open(import_file, "rb") as handle:
+            return {"files": {"file": (os.path.basename(import_file), handle.read(), "text/csv")}}
+
+    analytics = [
+        Scenario("analytics_kpis", "GET", "/analytics/kpis", {"months": last(6)}),
+        Scenario("analytics_trends", "GET", "/analytics/trends", {"months": last(12)}),
+        Scenario("analytics_categories", "GET", "/analytics/categories", {"month": month}),
+        Scenario("analytics_anomalies", "GET", "/analytics/anomalies", {"month": month}),
+        Scenario("analytics_patterns", "GET", "/analytics/patterns", {"months": last(3)}),
+    ]
+
+    return [
+        Scenario("summary", "GET", "/summary", {"month": month}, description="Dashboard summary of a month"),
+        Scenario("transactions_page", "GET", "/transactions", {"month": month, "limit": 50},
+                 description="First page of a month"),
+        Scenario("transactions_tag_filter", "GET", "/transactions", {"month": month, "tag": "courses", "limit": 50},
+                 description="Month filtered on one tag"),
+        Scenario("transactions_all", "GET", "/transactions/all", {"month": month},
+                 description="Whole month (export / charts)"),
+        Scenario("transactions_search", "GET", "/transactions/search", {"q": "carrefour", "limit": 50},
+                 description="Full-text search over every month"),
+        Scenario("tags_list", "GET", "/tags", description="Tags with statistics"),
+        Scenario("tags_search", "GET", "/tags/search", {"query": "cour"}, description="Tag autocomplete"),
+        Scenario("import_csv", "POST", "/import", {"mode": "replace"}, body=import_body,
+                 description=f"Re-import of {import_month} (replace)"),
+        Scenario("import_csv_upsert", "POST", "/import", {"mode": "upsert"}, body=import_body,
+                 description=f"Incremental re-import of {import_month} (upsert, row_id diff)"),
+        Scenario("import_csv_upsert_delete", "POST", "/import", {"mode": "upsert", "delete_missing": "true"},
+                 body=import_body, description=f"Incremental re-import of {import_month} (upsert + delete_missing)"),
+        Scenario("auto_tag_month", "POST", "/transactions/auto-tag-month", {"month": month, "dry_run": "true"},
+                 description="Auto-tagging preview of a month"),
+        *analytics,
+        *(cold(scenario) for scenario in analytics),
+        Scenario("analytics_variance", "GET", "/analytics/variance", {"month": month}),
+    ]
@@ -16,6 +16,9 @@ from sqlalchemy.pool import StaticPool
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
+# SQL query budgets: @pytest.mark.query_budget / query_budget fixture
+pytest_plugins = ["pytest_query_budget"]
+
 # Exclude legacy test files at root level (not in tests/ folder)
 # These files have missing fixtures or import obsolete modules
 collect_ignore = [f for f in os.listdir(backend_dir) if f.startswith("test_") and f.endswith(".py")]
@@ -2,9 +2,9 @@
 Database dependencies for Budget Famille v2.3
 """
 from sqlalchemy.orm import Session
-from models.database import get_db
+from models.database import get_db, get_read_db, get_write_db
 
-# Re-export get_db for use in routers
+# Re-export get_db (writer session), get_read_db (read pool) and get_write_db for use in routers
 def get_database() -> Session:
     """
     Get database session
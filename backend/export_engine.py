@@ -12,9 +12,11 @@ from datetime import datetime, date, timedelta
 from typing import List, Dict, Any, Optional, Union, BinaryIO
 from pathlib import Path
 import tempfile
+import shutil
 import os
 
 import pandas as pd
+from sqlalchemy import and_, case, func
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse, FileResponse
@@ -42,6 +44,22 @@ from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Taille des paquets lus depuis la base pour les exports en flux
+EXCEL_CHUNK_SIZE = int(os.getenv("EXCEL_EXPORT_CHUNK_SIZE", "2000"))
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def iter_file_chunks(fileobj: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Lit un fichier par morceaux pour StreamingResponse, puis le ferme"""
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
 # ================= MODÈLES D'EXPORT =================
 
 class ExportFormat(str, Enum):
@@ -109,7 +127,8 @@ class BaseExporter:
             return query
             
         # Import local pour éviter les dépendances circulaires
-        from app import Transaction
+        from models.database import Transaction
+        from services.transaction_search import tag_clause
         
         if filters.months:
             query = query.filter(Transaction.month.in_(filters.months))
@@ -129,13 +148,13 @@ class BaseExporter:
         if filters.tags:
             # Recherche dans les tags (format CSV dans la DB)
             for tag in filters.tags:
-                query = query.filter(Transaction.tags.contains(tag))
+                query = query.filter(tag_clause(self.db, tag))
         
         return query
     
     def get_filtered_data(self, filters: ExportFilters) -> Dict[str, Any]:
         """Récupère les données filtrées pour export"""
-        from app import Transaction, Config, FixedLine, ImportMetadata
+        from models.database import Transaction, Config, FixedLine, ImportMetadata
         
         data = {}
         
@@ -203,61 +222,94 @@ class CSVExporter(BaseExporter):
         return output
 
 class ExcelExporter(BaseExporter):
-    """Exporteur Excel multi-onglets"""
-    
-    def export(self, filters: ExportFilters, options: Dict[str, Any] = None) -> io.BytesIO:
-        """Exporte en Excel avec onglets multiples"""
+    """
+    Exporteur Excel multi-onglets en mémoire constante.
+
+    Le classeur est écrit avec xlsxwriter en mode `constant_memory` dans un
+    fichier temporaire : chaque ligne est vidée sur disque dès que la suivante
+    est écrite. Les transactions sont lues par paquets de EXCEL_CHUNK_SIZE
+    lignes et les onglets Synthèse / Analytics viennent d'agrégats SQL, si bien
+    que la mémoire reste bornée quel que soit le nombre de lignes exportées.
+    """
+
+    TRANSACTION_HEADERS = ['Date', 'Mois', 'Libellé', 'Catégorie', 'Catégorie Parent',
+                           'Montant', 'Compte', 'Dépense', 'Exclu', 'Tags', 'Import ID']
+
+    def export(self, filters: ExportFilters, options: Dict[str, Any] = None) -> BinaryIO:
+        """
+        Exporte en Excel avec onglets multiples.
+
+        Retourne un fichier temporaire positionné au début (supprimé à sa
+        fermeture) : le lire par morceaux avec iter_file_chunks().
+        """
         if not XLSX_AVAILABLE:
             raise HTTPException(status_code=500, detail="Module xlsxwriter non disponible")
-        
+
         options = options or {}
-        data = self.get_filtered_data(filters)
-        
-        output = io.BytesIO()
-        
-        with xlsxwriter.Workbook(output, {'in_memory': True}) as workbook:
-            # Styles
-            header_format = workbook.add_format({
-                'bold': True,
-                'bg_color': '#366092',
-                'font_color': 'white',
-                'border': 1
-            })
-            
-            currency_format = workbook.add_format({'num_format': '#,##0.00 €'})
-            date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
-            percent_format = workbook.add_format({'num_format': '0.00%'})
-            
-            # Onglet Transactions
-            self._create_transactions_sheet(workbook, data['transactions'], header_format, currency_format, date_format)
-            
-            # Onglet Synthèse par mois
-            self._create_summary_sheet(workbook, data, header_format, currency_format)
-            
-            # Onglet Configuration
-            self._create_config_sheet(workbook, data['config'], data['fixed_lines'], header_format, currency_format, percent_format)
-            
-            # Onglet Analytics (si demandé)
-            if options.get('include_analytics', True):
-                self._create_analytics_sheet(workbook, data, header_format, currency_format)
-        
+        output = tempfile.TemporaryFile(suffix='.xlsx')
+
+        try:
+            # constant_memory : les lignes doivent être écrites dans l'ordre, onglet par onglet
+            with xlsxwriter.Workbook(output, {'constant_memory': True}) as workbook:
+                # Styles
+                header_format = workbook.add_format({
+                    'bold': True,
+                    'bg_color': '#366092',
+                    'font_color': 'white',
+                    'border': 1
+                })
+
+                currency_format = workbook.add_format({'num_format': '#,##0.00 €'})
+                date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
+                percent_format = workbook.add_format({'num_format': '0.00%'})
+
+                # Onglet Transactions
+                nb_transactions = self._create_transactions_sheet(
+                    workbook, filters, header_format, currency_format, date_format
+                )
+
+                # Onglet Synthèse par mois
+                self._create_summary_sheet(workbook, filters, header_format, currency_format)
+
+                # Onglet Configuration
+                self._create_config_sheet(workbook, header_format, currency_format, percent_format)
+
+                # Onglet Analytics (si demandé)
+                if options.get('include_analytics', True):
+                    self._create_analytics_sheet(workbook, filters, header_format, currency_format)
+        except Exception:
+            output.close()
+            raise
+
         output.seek(0)
-        self.logger.info(f"Export Excel généré avec {len(data['transactions'])} transactions")
+        self.logger.info(f"Export Excel généré avec {nb_transactions} transactions")
         return output
-    
-    def _create_transactions_sheet(self, workbook, transactions, header_format, currency_format, date_format):
-        """Crée l'onglet des transactions"""
+
+    def _iter_transactions(self, filters: ExportFilters):
+        """Transactions filtrées, lues par paquets (colonnes seules, pas d'objets ORM)"""
+        from models.database import Transaction
+
+        query = self.db.query(
+            Transaction.date_op, Transaction.month, Transaction.label,
+            Transaction.category, Transaction.category_parent, Transaction.amount,
+            Transaction.account_label, Transaction.is_expense, Transaction.exclude,
+            Transaction.tags, Transaction.import_id
+        )
+        query = self.apply_filters(query, filters)
+        return query.order_by(Transaction.date_op.desc(), Transaction.id.desc()).yield_per(EXCEL_CHUNK_SIZE)
+
+    def _create_transactions_sheet(self, workbook, filters, header_format, currency_format, date_format) -> int:
+        """Crée l'onglet des transactions et retourne le nombre de lignes écrites"""
         worksheet = workbook.add_worksheet('Transactions')
-        
-        headers = ['Date', 'Mois', 'Libellé', 'Catégorie', 'Catégorie Parent', 
-                  'Montant', 'Compte', 'Dépense', 'Exclu', 'Tags', 'Import ID']
-        
+        headers = self.TRANSACTION_HEADERS
+
         # En-têtes
         for col, header in enumerate(headers):
             worksheet.write(0, col, header, header_format)
-        
+
         # Données
-        for row, tx in enumerate(transactions, 1):
+        row = 0
+        for row, tx in enumerate(self._iter_transactions(filters), 1):
             worksheet.write(row, 0, tx.date_op, date_format)
             worksheet.write(row, 1, tx.month)
             worksheet.write(row, 2, tx.label or '')
@@ -269,64 +321,65 @@ class ExcelExporter(BaseExporter):
             worksheet.write(row, 8, 'Oui' if tx.exclude else 'Non')
             worksheet.write(row, 9, tx.tags or '')
             worksheet.write(row, 10, tx.import_id or '')
-        
+
         # Auto-ajustement des colonnes
-        worksheet.autofilter(0, 0, len(transactions), len(headers) - 1)
+        worksheet.autofilter(0, 0, row, len(headers) - 1)
         worksheet.freeze_panes(1, 0)
-    
-    def _create_summary_sheet(self, workbook, data, header_format, currency_format):
-        """Crée l'onglet de synthèse par mois"""
+        return row
+
+    def _create_summary_sheet(self, workbook, filters, header_format, currency_format):
+        """Crée l'onglet de synthèse par mois (agrégat SQL par mois)"""
+        from models.database import Transaction
+
         worksheet = workbook.add_worksheet('Synthèse Mensuelle')
-        
-        # Calculer les synthèses par mois
-        monthly_summary = {}
-        for tx in data['transactions']:
-            month = tx.month
-            if month not in monthly_summary:
-                monthly_summary[month] = {
-                    'revenus': 0,
-                    'depenses': 0,
-                    'transactions': 0,
-                    'depenses_excl': 0
-                }
-            
-            monthly_summary[month]['transactions'] += 1
-            if tx.is_expense:
-                if tx.exclude:
-                    monthly_summary[month]['depenses_excl'] += abs(tx.amount or 0)
-                else:
-                    monthly_summary[month]['depenses'] += abs(tx.amount or 0)
-            else:
-                monthly_summary[month]['revenus'] += tx.amount or 0
-        
+
+        amount = func.coalesce(Transaction.amount, 0)
+        is_expense = Transaction.is_expense == True
+        is_excluded = func.coalesce(Transaction.exclude, False) == True
+
+        query = self.db.query(
+            Transaction.month,
+            func.sum(case((is_expense, 0), else_=amount)).label('revenus'),
+            func.sum(case((and_(is_expense, ~is_excluded), func.abs(amount)), else_=0)).label('depenses'),
+            func.sum(case((and_(is_expense, is_excluded), func.abs(amount)), else_=0)).label('depenses_excl'),
+            func.count(Transaction.id).label('transactions')
+        )
+        query = self.apply_filters(query, filters)
+        monthly_summary = query.group_by(Transaction.month).order_by(Transaction.month).all()
+
         headers = ['Mois', 'Revenus', 'Dépenses', 'Dépenses Exclues', 'Net', 'Nb Transactions']
-        
+
         # En-têtes
         for col, header in enumerate(headers):
             worksheet.write(0, col, header, header_format)
-        
+
         # Données
-        for row, (month, summary) in enumerate(sorted(monthly_summary.items()), 1):
-            net = summary['revenus'] - summary['depenses']
-            worksheet.write(row, 0, month)
-            worksheet.write(row, 1, summary['revenus'], currency_format)
-            worksheet.write(row, 2, summary['depenses'], currency_format)
-            worksheet.write(row, 3, summary['depenses_excl'], currency_format)
+        for row, summary in enumerate(monthly_summary, 1):
+            net = summary.revenus - summary.depenses
+            worksheet.write(row, 0, summary.month)
+            worksheet.write(row, 1, summary.revenus, currency_format)
+            worksheet.write(row, 2, summary.depenses, currency_format)
+            worksheet.write(row, 3, summary.depenses_excl, currency_format)
             worksheet.write(row, 4, net, currency_format)
-            worksheet.write(row, 5, summary['transactions'])
-        
+            worksheet.write(row, 5, summary.transactions)
+
         worksheet.autofilter(0, 0, len(monthly_summary), len(headers) - 1)
-    
-    def _create_config_sheet(self, workbook, config, fixed_lines, header_format, currency_format, percent_format):
+
+    def _create_config_sheet(self, workbook, header_format, currency_format, percent_format):
         """Crée l'onglet de configuration"""
+        from models.database import Config, FixedLine
+
+        config = self.db.query(Config).first()
+        fixed_lines = self.db.query(FixedLine).filter(FixedLine.active == True).all()
+
         worksheet = workbook.add_worksheet('Configuration')
-        
+
         row = 0
-        
+
         # Configuration générale
         worksheet.write(row, 0, 'CONFIGURATION GÉNÉRALE', header_format)
         row += 2
-        
+
         config_items = [
             ('Membre 1', config.member1 if config else ''),
             ('Membre 2', config.member2 if config else ''),
@@ -338,7 +391,7 @@ class ExcelExporter(BaseExporter):
             ('Prêt Égal', 'Oui' if config and config.loan_equal else 'Non'),
             ('Montant Prêt', config.loan_amount if config else 0),
         ]
-        
+
         for label, value in config_items:
             worksheet.write(row, 0, label)
             if isinstance(value, (int, float)) and 'Revenus' in label or 'Montant' in label:
@@ -348,18 +401,18 @@ class ExcelExporter(BaseExporter):
             else:
                 worksheet.write(row, 1, value)
             row += 1
-        
+
         row += 2
-        
+
         # Lignes fixes
         worksheet.write(row, 0, 'CHARGES FIXES', header_format)
         row += 2
-        
+
         fixed_headers = ['Libellé', 'Montant', 'Fréquence', 'Mode Répartition', 'Part 1', 'Part 2']
         for col, header in enumerate(fixed_headers):
             worksheet.write(row, col, header, header_format)
         row += 1
-        
+
         for line in fixed_lines:
             worksheet.write(row, 0, line.label or '')
             worksheet.write(row, 1, line.amount or 0, currency_format)
@@ -368,33 +421,40 @@ class ExcelExporter(BaseExporter):
             worksheet.write(row, 4, line.split1 or 0, percent_format)
             worksheet.write(row, 5, line.split2 or 0, percent_format)
             row += 1
-    
-    def _create_analytics_sheet(self, workbook, data, header_format, currency_format):
-        """Crée l'onglet d'analytics"""
+
+    def _create_analytics_sheet(self, workbook, filters, header_format, currency_format):
+        """Crée l'onglet d'analytics (agrégat SQL par catégorie)"""
+        from models.database import Transaction
+
         worksheet = workbook.add_worksheet('Analytics')
-        
-        # Analytics par catégorie
-        category_analysis = {}
-        for tx in data['transactions']:
-            if tx.is_expense and not tx.exclude and tx.amount:
-                cat = tx.category or 'Autre'
-                if cat not in category_analysis:
-                    category_analysis[cat] = {'amount': 0, 'count': 0}
-                category_analysis[cat]['amount'] += abs(tx.amount)
-                category_analysis[cat]['count'] += 1
-        
+
+        category = func.coalesce(func.nullif(Transaction.category, ''), 'Autre')
+        total = func.sum(func.abs(Transaction.amount))
+
+        query = self.db.query(
+            category.label('category'),
+            total.label('amount'),
+            func.count(Transaction.id).label('count')
+        ).filter(
+            Transaction.is_expense == True,
+            func.coalesce(Transaction.exclude, False) == False,
+            Transaction.amount != 0
+        )
+        query = self.apply_filters(query, filters)
+        category_analysis = query.group_by(category).order_by(total.desc()).all()
+
         worksheet.write(0, 0, 'ANALYSE PAR CATÉGORIE', header_format)
-        
+
         headers = ['Catégorie', 'Montant Total', 'Nb Transactions', 'Montant Moyen']
         for col, header in enumerate(headers):
             worksheet.write(2, col, header, header_format)
-        
+
         row = 3
-        for cat, data_cat in sorted(category_analysis.items(), key=lambda x: x[1]['amount'], reverse=True):
-            avg = data_cat['amount'] / data_cat['count'] if data_cat['count'] > 0 else 0
-            worksheet.write(row, 0, cat)
-            worksheet.write(row, 1, data_cat['amount'], currency_format)
-            worksheet.write(row, 2, data_cat['count'])
+        for data_cat in category_analysis:
+            avg = data_cat.amount / data_cat.count if data_cat.count > 0 else 0
+            worksheet.write(row, 0, data_cat.category)
+            worksheet.write(row, 1, data_cat.amount, currency_format)
+            worksheet.write(row, 2, data_cat.count)
             worksheet.write(row, 3, avg, currency_format)
             row += 1
 
@@ -704,7 +764,8 @@ class ZIPExporter(BaseExporter):
                     elif format_type == ExportFormat.EXCEL:
                         exporter = ExcelExporter(self.db, self.user_id)
                         content = exporter.export(filters, options.get('excel_options', {}))
-                        zipf.writestr(f"{folder_name}/budget_complet.xlsx", content.getvalue())
+                        with content, zipf.open(f"{folder_name}/budget_complet.xlsx", 'w') as dest:
+                            shutil.copyfileobj(content, dest, STREAM_CHUNK_SIZE)
                     
                     elif format_type == ExportFormat.PDF:
                         exporter = PDFExporter(self.db, self.user_id)
@@ -788,7 +849,7 @@ class ExportManager:
                 
                 filename = f"budget_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
                 return StreamingResponse(
-                    io.BytesIO(content.getvalue()),
+                    iter_file_chunks(content),
                     media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                     headers={"Content-Disposition": f"attachment; filename={filename}"}
                 )
@@ -59,9 +59,15 @@ capture_output = True
 # PERFORMANCE TUNING
 # ============================================================================
 
-# Preload application
+# Preload application: the master imports the app once and workers are forked
+# from it, sharing its memory copy-on-write (scripts/profile_startup.py --preload).
+# Recycled workers (max_requests) are forked again and do not re-import anything.
 preload_app = True
 
+# Import the lazy routers (ML, OCR, PDF, Excel) in the master before forking so
+# that workers share them instead of each importing them on first use
+PRELOAD_LAZY_ROUTERS = os.getenv('PRELOAD_LAZY_ROUTERS', 'true').lower() == 'true'
+
 # Threading
 threads = int(os.getenv('THREADS', '2'))
 
@@ -74,6 +80,16 @@ max_worker_memory = int(os.getenv('MAX_WORKER_MEMORY', '200000'))  # KB
 
 def when_ready(server):
     """Called when the server is started."""
+    if server.cfg.preload_app:
+        import gc
+        import sys
+        app_module = sys.modules.get("app")
+        if PRELOAD_LAZY_ROUTERS and app_module is not None:
+            result = app_module.lazy_routers.warm_up()
+            server.log.info("Lazy routers preloaded in master: %s in %ss", result["loaded"], result["seconds"])
+        # Objects created so far are never collected in the workers: a GC pass
+        # would otherwise touch (and copy) every shared page
+        gc.freeze()
     server.log.info("Budget Famille API server is ready. Listening at: %s", server.address)
 
 def worker_int(worker):
@@ -86,6 +102,14 @@ def pre_fork(server, worker):
 
 def post_fork(server, worker):
     """Called after worker processes are forked."""
+    if server.cfg.preload_app:
+        # SQLite connections opened by the master (schema migration at import)
+        # must not be shared with the worker: drop them without closing
+        import sys
+        for module_name in ("app", "models.database"):
+            module = sys.modules.get(module_name)
+            if module is not None and hasattr(module, "engine"):
+                module.engine.dispose(close=False)
     server.log.info("Worker spawned (pid: %s)", worker.pid)
 
 def pre_exec(server):
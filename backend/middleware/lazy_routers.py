@@ -0,0 +1,173 @@
+"""
+Lazy router loading for Budget Famille API
+
+Routers whose modules pull in heavy optional dependencies (ML, OCR, PDF,
+Excel, LLM/web clients) are registered by path prefix instead of being
+imported with app.py. A router is imported and included on the first
+request under one of its prefixes, when the OpenAPI schema is built, or
+by warm_up() (background thread after startup, gunicorn master before fork).
+
+LAZY_ROUTERS=false restores eager loading (every router imported at boot).
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+LAZY_ROUTERS_ENABLED = os.getenv("LAZY_ROUTERS", "true").lower() == "true"
+
+
+@dataclass
+class LazyRouter:
+    """A router module mounted on first use"""
+    module: str
+    path_prefixes: Tuple[str, ...]
+    include_kwargs: Dict[str, Any] = field(default_factory=dict)
+    loaded: bool = False
+    load_seconds: float = 0.0
+    error: Optional[str] = None
+
+    def matches(self, path: str) -> bool:
+        for prefix in self.path_prefixes:
+            prefix = prefix.rstrip("/")
+            if path == prefix or path.startswith(prefix + "/"):
+                return True
+        return False
+
+
+class LazyRouterRegistry:
+    """Registered lazy routers of one FastAPI application"""
+
+    def __init__(self, app, enabled: bool = LAZY_ROUTERS_ENABLED):
+        self.app = app
+        self.enabled = enabled
+        self._routers: List[LazyRouter] = []
+        self._lock = threading.RLock()
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    def register(self, module: str, path_prefixes: Tuple[str, ...], **include_kwargs) -> LazyRouter:
+        """Declare `module.router`, served under `path_prefixes` once loaded"""
+        entry = LazyRouter(module=module, path_prefixes=tuple(path_prefixes), include_kwargs=include_kwargs)
+        self._routers.append(entry)
+        if not self.enabled:
+            self._load(entry)
+        return entry
+
+    def has_pending(self) -> bool:
+        return any(not entry.loaded and entry.error is None for entry in self._routers)
+
+    def pending_for(self, path: str) -> List[LazyRouter]:
+        """Routers not loaded yet that may serve `path` (lock-free fast path)"""
+        return [entry for entry in self._routers if not entry.loaded and entry.error is None and entry.matches(path)]
+
+    def failed_for(self, path: str) -> List[LazyRouter]:
+        """Routers that failed to import for `path` (none if another loaded router serves it)"""
+        matching = [entry for entry in self._routers if entry.matches(path)]
+        if any(entry.loaded for entry in matching):
+            return []
+        return [entry for entry in matching if entry.error is not None]
+
+    def load_for_path(self, path: str) -> int:
+        return sum(self._load(entry) for entry in self.pending_for(path))
+
+    def load_all(self) -> int:
+        """Import every pending router (OpenAPI generation, warm-up)"""
+        return sum(self._load(entry) for entry in self._routers if not entry.loaded and entry.error is None)
+
+    def _load(self, entry: LazyRouter) -> bool:
+        with self._lock:
+            if entry.loaded or entry.error is not None:
+                return False
+            started = time.perf_counter()
+            try:
+                module = importlib.import_module(entry.module)
+                self.app.include_router(module.router, **entry.include_kwargs)
+            except Exception as e:
+                entry.error = f"{type(e).__name__}: {e}"
+                logger.error(f"❌ Lazy router {entry.module} failed to load: {entry.error}")
+                return False
+            entry.load_seconds = time.perf_counter() - started
+            entry.loaded = True
+            logger.info(f"📦 Router {entry.module} loaded in {entry.load_seconds * 1000:.0f}ms")
+            return True
+
+    def install_openapi_hook(self) -> None:
+        """Load every router before the (cached) OpenAPI schema is generated"""
+        default_openapi = self.app.openapi
+
+        def openapi_with_lazy_routers():
+            if self.app.openapi_schema is None:
+                self.load_all()
+            return default_openapi()
+
+        self.app.openapi = openapi_with_lazy_routers
+
+    def warm_up(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        loaded = self.load_all()
+        return {"loaded": loaded, "seconds": round(time.perf_counter() - started, 3)}
+
+    def warm_up_in_background(self, delay_seconds: float = 0.0) -> threading.Thread:
+        """Load pending routers in a daemon thread once the worker is serving"""
+        if self._warmup_thread is not None:
+            return self._warmup_thread
+
+        def run():
+            if delay_seconds:
+                time.sleep(delay_seconds)
+            result = self.warm_up()
+            if result["loaded"]:
+                logger.info(f"✅ {result['loaded']} lazy router(s) warmed up in {result['seconds']}s")
+
+        self._warmup_thread = threading.Thread(target=run, name="lazy-router-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "registered": len(self._routers),
+            "loaded": sum(1 for entry in self._routers if entry.loaded),
+            "failed": sum(1 for entry in self._routers if entry.error is not None),
+            "routers": {
+                entry.module: {
+                    "loaded": entry.loaded,
+                    "load_ms": round(entry.load_seconds * 1000, 1),
+                    "error": entry.error,
+                }
+                for entry in self._routers
+            },
+        }
+
+
+class LazyRouterMiddleware:
+    """Pure ASGI middleware: mounts pending routers before the request is routed"""
+
+    def __init__(self, app, registry: LazyRouterRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            if self.registry.pending_for(path):
+                # Import off the event loop: a heavy router can take hundreds of ms
+                await asyncio.get_running_loop().run_in_executor(None, self.registry.load_for_path, path)
+            if scope["type"] == "http" and self.registry.failed_for(path):
+                response = JSONResponse(
+                    {"detail": "Service temporairement indisponible (module non chargé)"},
+                    status_code=503
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,58 @@
+"""
+Query profiler middleware for Budget Famille API
+
+Publishes the current request in a contextvar so that SQL statements are
+attributed to the route that issued them (see services/query_performance),
+reports the request's statement count / time in response headers and flags
+N+1 query patterns.
+"""
+
+import os
+
+from services.query_performance import (
+    QUERY_N_PLUS_ONE_THRESHOLD, RequestProfile, current_request_profile, get_query_profiler
+)
+
+# Les en-têtes X-DB-* exposent le coût SQL de chaque route : activés par défaut en développement seulement
+QUERY_HEADERS_ENABLED = os.getenv(
+    "QUERY_HEADERS_ENABLED",
+    "true" if os.getenv("ENVIRONMENT", "development").lower() == "development" else "false"
+).lower() == "true"
+
+
+class QueryProfilerMiddleware:
+    """Pure ASGI middleware: one contextvar set/reset per HTTP request"""
+
+    def __init__(
+        self,
+        app,
+        add_headers: bool = QUERY_HEADERS_ENABLED,
+        n_plus_one_threshold: int = QUERY_N_PLUS_ONE_THRESHOLD
+    ):
+        self.app = app
+        self.add_headers = add_headers
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.add_headers:
+                # Statements issued while the body streams are not included
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(profile.query_count).encode()))
+                headers.append((b"x-db-time", f"{profile.query_time_us / 1000:.2f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = current_request_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_profile.reset(token)
+            if profile.query_count > self.n_plus_one_threshold:
+                get_query_profiler().record_request(profile, self.n_plus_one_threshold)
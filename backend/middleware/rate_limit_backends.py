@@ -0,0 +1,258 @@
+"""
+Rate limiting storage backends for Budget Famille API
+
+Both backends implement GCRA (generic cell rate algorithm): one timestamp
+per client ("theoretical arrival time") instead of a deque of requests,
+which gives a smooth sliding-window limit in O(1) time and memory per key.
+`burst` is the bucket capacity: requests a client may send back to back
+(default: the whole window's budget), then one per emission interval.
+
+- RedisRateLimitBackend: atomic Lua script, shared by every gunicorn worker
+- InMemoryRateLimitBackend: per-process fallback, bounded LRU + periodic sweep
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+RATE_LIMIT_SWEEP_SECONDS = float(os.getenv("RATE_LIMIT_SWEEP_SECONDS", "60"))
+
+
+def _capacity(limit: int, burst: Optional[int]) -> int:
+    """Bucket capacity: `burst` within [1, limit], the whole budget when unset"""
+    return limit if burst is None else max(1, min(burst, limit))
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of a rate limit check"""
+    allowed: bool
+    retry_after: float = 0.0
+    blocked: bool = False
+
+
+class InMemoryRateLimitBackend:
+    """
+    Per-process GCRA limiter with bounded storage.
+
+    Keys are kept in LRU order and capped at `max_keys`; entries whose state
+    is back to "idle" are swept every `sweep_interval` seconds, so memory does
+    not grow with the number of distinct client IPs.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, sweep_interval: float = RATE_LIMIT_SWEEP_SECONDS):
+        self.max_keys = max(1, max_keys)
+        self.sweep_interval = sweep_interval
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+        self._failures: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._blocked: Dict[str, float] = {}
+        self._failure_window = 0.0
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.stats = {"checks": 0, "rejected": 0, "evictions": 0, "swept": 0}
+
+    def acquire(self, key: str, limit: int, window_seconds: float, burst: Optional[int] = None) -> RateLimitDecision:
+        now = time.monotonic()
+        interval = window_seconds / limit
+        tolerance = interval * _capacity(limit, burst)
+        with self._lock:
+            self.stats["checks"] += 1
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+            blocked_until = self._blocked.get(key)
+            if blocked_until is not None:
+                if blocked_until > now:
+                    self.stats["rejected"] += 1
+                    return RateLimitDecision(False, blocked_until - now, blocked=True)
+                del self._blocked[key]
+
+            tat = max(self._tat.get(key, now), now)
+            new_tat = tat + interval
+            allow_at = new_tat - tolerance
+            if allow_at > now:
+                self.stats["rejected"] += 1
+                return RateLimitDecision(False, allow_at - now)
+
+            self._tat[key] = new_tat
+            self._tat.move_to_end(key)
+            if len(self._tat) > self.max_keys:
+                self._tat.popitem(last=False)
+                self.stats["evictions"] += 1
+            return RateLimitDecision(True)
+
+    def record_failure(self, key: str, window_seconds: float) -> int:
+        """Count a failure in a fixed window starting at the first failure"""
+        now = time.monotonic()
+        with self._lock:
+            started, count = self._failures.get(key, (now, 0))
+            if now - started >= window_seconds:
+                started, count = now, 0
+            self._failures[key] = (started, count + 1)
+            self._failures.move_to_end(key)
+            if len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+                self.stats["evictions"] += 1
+            self._failure_window = window_seconds
+            return count + 1
+
+    def block(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._blocked[key] = time.monotonic() + seconds
+            if len(self._blocked) > self.max_keys:
+                self._blocked.pop(next(iter(self._blocked)))
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._tat.pop(key, None)
+            self._failures.pop(key, None)
+            self._blocked.pop(key, None)
+
+    def _sweep(self, now: float) -> None:
+        """Drop idle clients (must hold the lock)"""
+        idle = [key for key, tat in self._tat.items() if tat <= now]
+        for key in idle:
+            del self._tat[key]
+        stale = [key for key, (started, _) in self._failures.items() if now - started >= self._failure_window]
+        for key in stale:
+            del self._failures[key]
+        expired = [key for key, until in self._blocked.items() if until <= now]
+        for key in expired:
+            del self._blocked[key]
+        self.stats["swept"] += len(idle) + len(stale) + len(expired)
+        self._next_sweep = now + self.sweep_interval
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "backend": "memory",
+            "tracked_keys": len(self._tat),
+            "tracked_failures": len(self._failures),
+            "blocked": len(self._blocked),
+            "max_keys": self.max_keys,
+        }
+
+
+# KEYS[1] = GCRA state, KEYS[2] = block flag
+# ARGV[1] = emission interval (ms), ARGV[2] = burst tolerance (ms, capacity x interval)
+# Returns {allowed, retry_after_ms, blocked}
+_GCRA_LUA = """
+local block_ttl = redis.call('PTTL', KEYS[2])
+if block_ttl > 0 then
+    return {0, block_ttl, 1}
+end
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - tolerance
+if allow_at > now then
+    return {0, allow_at - now, 0}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return {1, 0, 0}
+"""
+
+# KEYS[1] = failure counter, ARGV[1] = window (ms)
+_FAILURE_LUA = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    GCRA limiter stored in Redis, shared by all workers.
+
+    Each check is one EVALSHA round trip (block flag + GCRA update run
+    atomically server-side, using the Redis clock). Keys expire on their own
+    once a client is idle. On Redis errors the check is delegated to the
+    in-process fallback instead of failing requests.
+    """
+
+    def __init__(self, client, key_prefix: str = "ratelimit:", fallback: Optional[InMemoryRateLimitBackend] = None):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.fallback = fallback or InMemoryRateLimitBackend()
+        self._gcra = client.register_script(_GCRA_LUA)
+        self._failure = client.register_script(_FAILURE_LUA)
+        self.stats = {"checks": 0, "rejected": 0, "errors": 0}
+
+    def acquire(self, key: str, limit: int, window_seconds: float, burst: Optional[int] = None) -> RateLimitDecision:
+        self.stats["checks"] += 1
+        interval_ms = window_seconds * 1000 / limit
+        try:
+            allowed, retry_ms, blocked = self._gcra(
+                keys=[f"{self.key_prefix}gcra:{key}", f"{self.key_prefix}block:{key}"],
+                args=[interval_ms, interval_ms * _capacity(limit, burst)]
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Redis rate limiter unavailable, using in-process fallback: {e}")
+            return self.fallback.acquire(key, limit, window_seconds, burst)
+        if int(allowed):
+            return RateLimitDecision(True)
+        self.stats["rejected"] += 1
+        return RateLimitDecision(False, int(retry_ms) / 1000, blocked=bool(int(blocked)))
+
+    def record_failure(self, key: str, window_seconds: float) -> int:
+        try:
+            return int(self._failure(keys=[f"{self.key_prefix}fail:{key}"], args=[int(window_seconds * 1000)]))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Redis rate limiter unavailable, using in-process fallback: {e}")
+            return self.fallback.record_failure(key, window_seconds)
+
+    def block(self, key: str, seconds: float) -> None:
+        try:
+            self.client.set(f"{self.key_prefix}block:{key}", 1, px=int(seconds * 1000))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Redis rate limiter unavailable, using in-process fallback: {e}")
+            self.fallback.block(key, seconds)
+
+    def reset(self, key: str) -> None:
+        try:
+            self.client.delete(*(f"{self.key_prefix}{kind}:{key}" for kind in ("gcra", "fail", "block")))
+        except Exception as e:
+            logger.warning(f"Redis rate limiter reset failed: {e}")
+        self.fallback.reset(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "backend": "redis", "fallback": self.fallback.get_stats()}
+
+
+def create_rate_limit_backend(backend: str = RATE_LIMIT_BACKEND):
+    """Build the configured backend; falls back to memory when Redis is unreachable"""
+    if backend == "redis":
+        try:
+            from services.redis_cache import get_redis_cache, RedisCacheService
+            from config.settings import settings
+
+            cache = get_redis_cache()
+            if isinstance(cache, RedisCacheService):
+                limiter = RedisRateLimitBackend(
+                    cache.get_sync_client(), key_prefix=f"{settings.redis.key_prefix}ratelimit:"
+                )
+                logger.info("✅ Rate limiter using shared Redis backend")
+                return limiter
+        except Exception as e:
+            logger.warning(f"⚠️ Redis rate limiter unavailable ({e})")
+        logger.warning("⚠️ Rate limiter falling back to per-process memory backend")
+    return InMemoryRateLimitBackend()
@@ -3,174 +3,148 @@ Security middleware for Budget Famille API
 Implements rate limiting, request validation, and security headers
 """
 
-import time
+import math
 import logging
 from typing import Dict, Optional
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
 from fastapi import Request, Response, HTTPException, status
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from middleware.rate_limit_backends import create_rate_limit_backend
+
 logger = logging.getLogger(__name__)
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimiter:
     """
-    Rate limiting middleware with sliding window algorithm
-    Implements progressive backoff for authentication endpoints
+    Rate limiting policy (GCRA per client IP) on top of a pluggable backend
+    Implements progressive blocking for authentication endpoints
+
+    `burst_size` caps the requests a client can send back to back (bucket
+    capacity, at most the per-minute budget); the rest of the budget is
+    refilled at requests_per_minute / 60 per second. Unset, the whole
+    per-minute budget can be spent at once, as with the sliding window.
     """
     
     def __init__(
         self,
-        app,
         requests_per_minute: int = 60,
         auth_requests_per_minute: int = 10,
-        burst_size: int = 10,
-        window_minutes: int = 5
+        burst_size: Optional[int] = None,
+        window_minutes: int = 5,
+        max_auth_failures: int = 5,
+        block_minutes: int = 15,
+        backend=None
     ):
-        super().__init__(app)
         self.requests_per_minute = requests_per_minute
         self.auth_requests_per_minute = auth_requests_per_minute
         self.burst_size = burst_size
         self.window_minutes = window_minutes
+        self.max_auth_failures = max_auth_failures
+        self.block_minutes = block_minutes
         
-        # Storage for rate limiting (in production, use Redis)
-        self.request_counts: Dict[str, deque] = defaultdict(deque)
-        self.auth_failures: Dict[str, deque] = defaultdict(deque)
-        self.blocked_ips: Dict[str, datetime] = {}
+        # Shared (Redis) or bounded in-process storage
+        self.backend = backend or create_rate_limit_backend()
         
         # Authentication endpoints that need stricter limits
-        self.auth_endpoints = {
+        self.auth_endpoints = (
             "/token", "/api/v1/auth/token", "/api/v1/auth/login"
-        }
+        )
     
-    def _get_client_ip(self, request: Request) -> str:
-        """Extract client IP with proxy support"""
-        # Check for forwarded headers (load balancer/proxy)
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
-        
-        real_ip = request.headers.get("X-Real-IP")
-        if real_ip:
-            return real_ip
-        
-        # Fallback to direct connection
-        if request.client:
-            return request.client.host
-        
-        return "unknown"
-    
-    def _is_blocked(self, client_ip: str) -> bool:
-        """Check if IP is temporarily blocked"""
-        if client_ip in self.blocked_ips:
-            block_time = self.blocked_ips[client_ip]
-            if datetime.now() - block_time < timedelta(minutes=15):
-                return True
-            else:
-                # Remove expired block
-                del self.blocked_ips[client_ip]
-        return False
-    
-    def _cleanup_old_requests(self, client_ip: str):
-        """Remove requests older than the window"""
-        cutoff = time.time() - (self.window_minutes * 60)
-        
-        # Clean general requests
-        requests = self.request_counts[client_ip]
-        while requests and requests[0] < cutoff:
-            requests.popleft()
-        
-        # Clean auth failures
-        failures = self.auth_failures[client_ip]
-        while failures and failures[0] < cutoff:
-            failures.popleft()
-    
-    def _is_auth_endpoint(self, path: str) -> bool:
+    def is_auth_endpoint(self, path: str) -> bool:
         """Check if endpoint is authentication-related"""
         return any(auth_path in path for auth_path in self.auth_endpoints)
     
-    def _check_rate_limit(self, client_ip: str, path: str) -> Optional[Response]:
-        """Check if request should be rate limited"""
-        current_time = time.time()
+    def check(self, client_ip: str, path: str) -> Optional[Response]:
+        """Return a 429 response if the request must be rejected, None otherwise"""
+        if self.is_auth_endpoint(path):
+            decision = self.backend.acquire(f"auth:{client_ip}", self.auth_requests_per_minute, 60, self.burst_size)
+            detail = "Authentication rate limit exceeded"
+        else:
+            decision = self.backend.acquire(client_ip, self.requests_per_minute, 60, self.burst_size)
+            detail = "Rate limit exceeded"
         
-        # Clean old requests
-        self._cleanup_old_requests(client_ip)
+        if decision.allowed:
+            return None
         
-        # Check if IP is blocked
-        if self._is_blocked(client_ip):
+        if decision.blocked:
             logger.warning(f"Blocked IP attempted request: {client_ip}")
-            return JSONResponse(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={
-                    "detail": "IP temporarily blocked due to excessive requests",
-                    "retry_after": 900  # 15 minutes
-                }
-            )
-        
-        # Check auth endpoint limits
-        if self._is_auth_endpoint(path):
-            auth_failures = len(self.auth_failures[client_ip])
-            if auth_failures >= 5:  # 5 failed auth attempts
-                self.blocked_ips[client_ip] = datetime.now()
-                logger.warning(f"IP blocked due to auth failures: {client_ip}")
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={
-                        "detail": "Too many authentication failures",
-                        "retry_after": 900
-                    }
-                )
-            
-            # Check auth rate limit
-            requests = len(self.request_counts[client_ip])
-            if requests >= self.auth_requests_per_minute:
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={
-                        "detail": "Authentication rate limit exceeded",
-                        "retry_after": 60
-                    }
-                )
-        else:
-            # Check general rate limit
-            requests = len(self.request_counts[client_ip])
-            if requests >= self.requests_per_minute:
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={
-                        "detail": "Rate limit exceeded",
-                        "retry_after": 60
-                    }
-                )
-        
-        # Record this request
-        self.request_counts[client_ip].append(current_time)
-        return None
+            detail = "IP temporarily blocked due to excessive requests"
+        retry_after = max(1, math.ceil(decision.retry_after))
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": detail, "retry_after": retry_after},
+            headers={"Retry-After": str(retry_after)}
+        )
     
     def record_auth_failure(self, client_ip: str):
         """Record authentication failure for progressive blocking"""
-        self.auth_failures[client_ip].append(time.time())
+        failures = self.backend.record_failure(client_ip, self.window_minutes * 60)
         logger.info(f"Auth failure recorded for IP: {client_ip}")
+        if failures >= self.max_auth_failures:
+            self.backend.block(client_ip, self.block_minutes * 60)
+            self.backend.block(f"auth:{client_ip}", self.block_minutes * 60)
+            logger.warning(f"IP blocked due to auth failures: {client_ip}")
     
-    async def dispatch(self, request: Request, call_next):
-        client_ip = self._get_client_ip(request)
-        path = request.url.path
+    def get_stats(self) -> Dict:
+        return self.backend.get_stats()
+
+
+class RateLimitMiddleware:
+    """
+    Rate limiting middleware (pure ASGI: no request/response objects are
+    built for allowed requests, keeping the overhead to a few microseconds)
+    """
+    
+    def __init__(self, app, limiter: Optional[RateLimiter] = None, **limiter_kwargs):
+        self.app = app
+        self.limiter = limiter or RateLimiter(**limiter_kwargs)
+    
+    @staticmethod
+    def _get_client_ip(scope) -> str:
+        """Extract client IP with proxy support"""
+        real_ip = None
+        for name, value in scope.get("headers", ()):
+            # Check for forwarded headers (load balancer/proxy)
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+            if name == b"x-real-ip":
+                real_ip = value.decode("latin-1")
+        if real_ip:
+            return real_ip
+        
+        # Fallback to direct connection
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+    
+    def record_auth_failure(self, client_ip: str):
+        self.limiter.record_auth_failure(client_ip)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        client_ip = self._get_client_ip(scope)
+        path = scope["path"]
         
         # Check rate limits
-        rate_limit_response = self._check_rate_limit(client_ip, path)
-        if rate_limit_response:
-            return rate_limit_response
+        rate_limit_response = self.limiter.check(client_ip, path)
+        if rate_limit_response is not None:
+            await rate_limit_response(scope, receive, send)
+            return
         
-        # Process request
-        response = await call_next(request)
+        if not self.limiter.is_auth_endpoint(path):
+            await self.app(scope, receive, send)
+            return
         
         # Record auth failures for rate limiting
-        if self._is_auth_endpoint(path) and response.status_code == 401:
-            self.record_auth_failure(client_ip)
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] == 401:
+                self.limiter.record_auth_failure(client_ip)
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_wrapper)
 
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
@@ -257,11 +231,11 @@ class RequestValidationMiddleware(BaseHTTPMiddleware):
 # Global instance for auth failure recording
 rate_limiter = None
 
-def get_rate_limiter() -> Optional[RateLimitMiddleware]:
+def get_rate_limiter() -> Optional[RateLimiter]:
     """Get the global rate limiter instance"""
     return rate_limiter
 
-def set_rate_limiter(limiter: RateLimitMiddleware):
+def set_rate_limiter(limiter: RateLimiter):
     """Set the global rate limiter instance"""
     global rate_limiter
     rate_limiter = limiter
\ No newline at end of file
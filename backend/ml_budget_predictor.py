@@ -7,17 +7,31 @@ Suggestions de budget intelligent et alertes prédictives fin de mois
 import numpy as np
 import pandas as pd
 import sqlite3
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Any
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
+from itertools import combinations
 import logging
 from collections import defaultdict
 import json
 
 logger = logging.getLogger(__name__)
 
+HOLIDAY_MONTHS = (7, 8, 12)
+# Seuil des valeurs singulières de LinearRegression (sklearn, tol=1e-6): même solution de norme minimale
+LSTSQ_RCOND = 1e-6
+# Nombre de transactions supposé pour le mois prédit
+DEFAULT_TRANSACTION_COUNT = 10
+
+
+def _interaction_features(X: np.ndarray) -> np.ndarray:
+    """PolynomialFeatures(degree=2, interaction_only=True) sur la dernière dimension de X"""
+    n_features = X.shape[-1]
+    columns = [np.ones(X.shape[:-1])] + [X[..., i] for i in range(n_features)]
+    columns += [X[..., i] * X[..., j] for i, j in combinations(range(n_features), 2)]
+    return np.stack(columns, axis=-1)
+
+
 @dataclass
 class BudgetPrediction:
     category: str
@@ -60,6 +74,7 @@ class BudgetIntelligenceSystem:
     
     def __init__(self):
         self.category_models = {}  # Modèles de prédiction par catégorie
+        self._models = None  # Mêmes modèles en tableaux NumPy (une ligne par catégorie)
         self.historical_data = None
         self.monthly_budgets = {}  # Budgets configurés par catégorie
         
@@ -116,166 +131,239 @@ class BudgetIntelligenceSystem:
         return monthly_summary
     
     def _train_category_models(self):
-        """Entraîne les modèles de prédiction par catégorie"""
-        categories = self.historical_data['category'].unique()
-        
-        for category in categories:
-            if pd.isna(category) or category == '':
-                continue
-                
-            category_data = self.historical_data[
-                self.historical_data['category'] == category
-            ].copy()
-            
-            if len(category_data) < self.config['min_historical_months']:
-                logger.debug(f"Insufficient data for category {category}: {len(category_data)} months")
-                continue
-            
-            # Préparation des features
-            category_data['month_index'] = range(len(category_data))
-            category_data.sort_values('year_month', inplace=True)
-            
-            # Features pour le modèle
-            X = category_data[['month_index', 'month_numeric', 'is_holiday_month', 'transaction_count']].values
-            y = category_data['total_spent'].values
-            
-            # Modèle avec features polynomiales pour capturer les tendances
-            poly_features = PolynomialFeatures(degree=2, interaction_only=True)
-            X_poly = poly_features.fit_transform(X)
-            
-            model = LinearRegression()
-            model.fit(X_poly, y)
-            
-            # Calcul des métriques de performance
-            predictions = model.predict(X_poly)
-            mse = np.mean((y - predictions) ** 2)
-            r2_score = model.score(X_poly, y)
-            
+        """
+        Entraîne les modèles de prédiction de toutes les catégories en un seul calcul batché.
+
+        L'historique est pivoté en matrice (catégorie × mois); chaque catégorie garde
+        ses mois avec données (month_index = rang du mois), avec les features
+        [month_index, month_numeric, is_holiday_month, transaction_count] et leurs
+        interactions de degré 2. Les moindres carrés avec intercept (équivalent de
+        LinearRegression sur PolynomialFeatures) sont résolus pour toutes les
+        catégories par un pseudo-inverse empilé; les mois absents sont des lignes
+        nulles après centrage et ne changent pas la solution.
+        """
+        self.category_models = {}
+        self._models = None
+
+        data = self.historical_data
+        data = data[data['category'].notna() & (data['category'] != '')]
+        if data.empty:
+            logger.info("Successfully trained 0 category models")
+            return
+
+        totals = data.pivot(index='category', columns='year_month', values='total_spent')
+        counts = data.pivot(index='category', columns='year_month', values='transaction_count')
+
+        spent = totals.to_numpy(dtype=float)
+        present = ~np.isnan(spent)
+        data_points = present.sum(axis=1)
+        trained = data_points >= self.config['min_historical_months']
+        for category, points in zip(totals.index[~trained], data_points[~trained]):
+            logger.debug(f"Insufficient data for category {category}: {points} months")
+        if not trained.any():
+            logger.info("Successfully trained 0 category models")
+            return
+
+        categories = totals.index[trained].tolist()
+        present, data_points = present[trained], data_points[trained]
+        weights = present.astype(float)
+        n = data_points.astype(float)
+        y = np.where(present, spent[trained], 0.0)
+
+        # Features (catégorie × mois × feature)
+        month_numeric = np.broadcast_to(totals.columns.month.to_numpy(dtype=float), y.shape)
+        X = np.stack([
+            np.cumsum(present, axis=1) - 1.0,
+            month_numeric,
+            np.isin(month_numeric, HOLIDAY_MONTHS).astype(float),
+            np.nan_to_num(counts.to_numpy(dtype=float)[trained]),
+        ], axis=-1)
+        X_poly = _interaction_features(X)
+
+        # Centrage sur les mois présents, puis moindres carrés de norme minimale pour toutes les catégories
+        X_mean = np.einsum('cmf,cm->cf', X_poly, weights) / n[:, None]
+        y_mean = (y * weights).sum(axis=1) / n
+        X_centered = (X_poly - X_mean[:, None, :]) * weights[..., None]
+        y_centered = (y - y_mean[:, None]) * weights
+        coefficients = np.einsum('cfm,cm->cf', np.linalg.pinv(X_centered, rcond=LSTSQ_RCOND), y_centered)
+        intercepts = y_mean - np.einsum('cf,cf->c', X_mean, coefficients)
+
+        # Métriques de performance (mois présents seulement)
+        residuals = (y - np.einsum('cmf,cf->cm', X_poly, coefficients) - intercepts[:, None]) * weights
+        ss_res = (residuals ** 2).sum(axis=1)
+        ss_tot = (y_centered ** 2).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r2_scores = np.where(ss_tot > 0, 1 - ss_res / ss_tot, np.where(ss_res == 0, 1.0, 0.0))
+        mse = ss_res / n
+        monthly_std = np.sqrt(ss_tot / n)
+        trends = self._calculate_trends(y, weights, y_mean)
+
+        self._models = {
+            'categories': categories,
+            'index': {category: i for i, category in enumerate(categories)},
+            'coefficients': coefficients,
+            'intercepts': intercepts,
+            'monthly_average': y_mean,
+            'trends': trends,
+            'r2_scores': r2_scores,
+            # _get_model_prediction: index du prochain mois = len(last_values)
+            'next_month_index': np.minimum(data_points, 3).astype(float),
+        }
+
+        for i, category in enumerate(categories):
+            values = y[i][present[i]]
             self.category_models[category] = {
-                'model': model,
-                'poly_features': poly_features,
-                'monthly_average': np.mean(y),
-                'monthly_std': np.std(y),
-                'trend': self._calculate_trend(y),
-                'mse': mse,
-                'r2_score': r2_score,
-                'data_points': len(y),
-                'last_values': y[-3:].tolist() if len(y) >= 3 else y.tolist()
+                'coefficients': coefficients[i],
+                'intercept': float(intercepts[i]),
+                'monthly_average': float(y_mean[i]),
+                'monthly_std': float(monthly_std[i]),
+                'trend': trends[i],
+                'mse': float(mse[i]),
+                'r2_score': float(r2_scores[i]),
+                'data_points': int(data_points[i]),
+                'last_values': values[-3:].tolist()
             }
-        
+
         logger.info(f"Successfully trained {len(self.category_models)} category models")
-    
-    def _calculate_trend(self, values: np.ndarray) -> str:
-        """Calcule la tendance (croissante/décroissante/stable)"""
-        if len(values) < 2:
-            return 'stable'
-        
-        # Régression linéaire simple pour détecter la tendance
-        x = np.arange(len(values))
-        coefficients = np.polyfit(x, values, 1)
-        slope = coefficients[0]
-        
-        # Calcul du pourcentage de changement
-        avg_value = np.mean(values)
-        slope_percentage = (slope / avg_value) if avg_value != 0 else 0
-        
-        if abs(slope_percentage) < self.config['trend_sensitivity']:
-            return 'stable'
-        elif slope_percentage > 0:
-            return 'increasing'
-        else:
-            return 'decreasing'
-    
-    def predict_month_end(self, current_date: datetime, 
-                         current_spending: Dict[str, float]) -> List[BudgetPrediction]:
+
+    def _calculate_trends(self, y: np.ndarray, weights: np.ndarray, y_mean: np.ndarray) -> np.ndarray:
         """
-        Prédit les dépenses de fin de mois pour chaque catégorie
+        Calcule la tendance (croissante/décroissante/stable) de chaque catégorie:
+        pente de la régression linéaire des dépenses sur le rang du mois, rapportée à la moyenne
+        """
+        n = weights.sum(axis=1)
+        x = np.cumsum(weights, axis=1) - 1.0
+        x_centered = (x - ((n - 1) / 2)[:, None]) * weights
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slopes = (x_centered * (y - y_mean[:, None])).sum(axis=1) / (x_centered ** 2).sum(axis=1)
+            slope_percentage = np.where(y_mean != 0, slopes / y_mean, 0.0)
+        slope_percentage = np.where(n >= 2, slope_percentage, 0.0)
+
+        trends = np.full(len(y), 'stable', dtype=object)
+        significant = np.abs(slope_percentage) >= self.config['trend_sensitivity']
+        trends[significant & (slope_percentage > 0)] = 'increasing'
+        trends[significant & (slope_percentage < 0)] = 'decreasing'
+        return trends
+
+    def _project_month_end(self, current_date: datetime,
+                           current_spending: Dict[str, float]) -> Dict[str, Any]:
+        """
+        Projections de fin de mois de toutes les catégories en opérations vectorielles:
+        70% extrapolation linéaire + 30% modèle historique, extrapolation seule sans modèle
         """
-        predictions = []
-        
         # Calcul des jours restants dans le mois
         last_day_of_month = (current_date.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
         days_remaining = (last_day_of_month - current_date).days
         days_in_month = last_day_of_month.day
         progress_ratio = (days_in_month - days_remaining) / days_in_month
-        
-        for category, current_spent in current_spending.items():
-            if category not in self.category_models:
-                # Extrapolation simple pour catégories sans modèle
-                if progress_ratio > 0:
-                    predicted_total = current_spent / progress_ratio
-                else:
-                    predicted_total = current_spent
-                
+
+        categories = list(current_spending)
+        current = np.array([current_spending[category] for category in categories], dtype=float)
+        monthly_average = current.copy()
+        model_prediction = np.zeros(len(categories))
+        r2_scores = np.zeros(len(categories))
+        trends = np.full(len(categories), 'unknown', dtype=object)
+
+        model_rows = np.array(
+            [self._models['index'].get(category, -1) if self._models else -1 for category in categories],
+            dtype=int
+        )
+        has_model = model_rows >= 0
+        if has_model.any():
+            rows = model_rows[has_model]
+            monthly_average[has_model] = self._models['monthly_average'][rows]
+            r2_scores[has_model] = self._models['r2_scores'][rows]
+            trends[has_model] = self._models['trends'][rows]
+            model_prediction[has_model] = self._predict_models(rows, current_date)
+
+        if progress_ratio > 0:
+            linear_prediction = current / progress_ratio
+        else:
+            linear_prediction = monthly_average  # = dépense actuelle sans modèle
+        predicted = np.where(has_model, 0.7 * linear_prediction + 0.3 * model_prediction, linear_prediction)
+
+        # Confiance basée sur la performance du modèle, réduite en début de mois
+        confidence = np.minimum(0.95, 0.5 + r2_scores * 0.4)
+        if progress_ratio < 0.3:
+            confidence *= 0.8
+        confidence = np.where(has_model, confidence, 0.5)
+
+        return {
+            'categories': categories,
+            'current': current,
+            'predicted': predicted,
+            'monthly_average': monthly_average,
+            'trends': trends,
+            'confidence': confidence,
+            'has_model': has_model,
+            'progress_ratio': progress_ratio,
+            'days_remaining': days_remaining,
+            # Ordre des prédictions: montant prévu décroissant (tri stable)
+            'order': np.argsort(-predicted, kind='stable'),
+        }
+
+    def predict_month_end(self, current_date: datetime,
+                         current_spending: Dict[str, float]) -> List[BudgetPrediction]:
+        """
+        Prédit les dépenses de fin de mois pour chaque catégorie
+        """
+        projection = self._project_month_end(current_date, current_spending)
+        predictions = []
+
+        for i in projection['order']:
+            category = projection['categories'][i]
+            current_spent = current_spending[category]
+            predicted = float(projection['predicted'][i])
+
+            if not projection['has_model'][i]:
                 predictions.append(BudgetPrediction(
                     category=category,
                     current_spent=current_spent,
-                    predicted_month_end=predicted_total,
+                    predicted_month_end=predicted,
                     monthly_average=current_spent,
                     trend_direction='unknown',
                     confidence=0.5,
                     recommendation=f"Données insuffisantes pour {category}"
                 ))
                 continue
-            
-            model_info = self.category_models[category]
-            monthly_avg = model_info['monthly_average']
-            
-            # Prédiction basée sur le modèle + extrapolation du spending actuel
-            model_prediction = self._get_model_prediction(category, current_date)
-            
-            # Combinaison: 70% extrapolation linéaire + 30% modèle historique
-            if progress_ratio > 0:
-                linear_prediction = current_spent / progress_ratio
-            else:
-                linear_prediction = monthly_avg
-            
-            combined_prediction = 0.7 * linear_prediction + 0.3 * model_prediction
-            
-            # Calcul de la confiance basée sur la performance du modèle
-            confidence = min(0.95, 0.5 + model_info['r2_score'] * 0.4)
-            if progress_ratio < 0.3:  # Début de mois, moins fiable
-                confidence *= 0.8
-            
-            # Génération de la recommandation
-            recommendation = self._generate_category_recommendation(
-                category, current_spent, combined_prediction, monthly_avg, 
-                model_info['trend'], progress_ratio
-            )
-            
+
+            monthly_avg = float(projection['monthly_average'][i])
+            trend = projection['trends'][i]
             predictions.append(BudgetPrediction(
                 category=category,
                 current_spent=current_spent,
-                predicted_month_end=combined_prediction,
+                predicted_month_end=predicted,
                 monthly_average=monthly_avg,
-                trend_direction=model_info['trend'],
-                confidence=confidence,
-                recommendation=recommendation
+                trend_direction=trend,
+                confidence=float(projection['confidence'][i]),
+                recommendation=self._generate_category_recommendation(
+                    category, current_spent, predicted, monthly_avg, trend, projection['progress_ratio']
+                )
             ))
-        
-        return sorted(predictions, key=lambda x: x.predicted_month_end, reverse=True)
-    
+
+        return predictions
+
+    def _predict_models(self, rows: np.ndarray, target_date: datetime) -> np.ndarray:
+        """Prédictions du modèle ML (mois suivant l'historique) pour les lignes `rows` des modèles"""
+        month_numeric = target_date.month
+        X_new = np.column_stack([
+            self._models['next_month_index'][rows],
+            np.full(len(rows), month_numeric, dtype=float),
+            np.full(len(rows), 1.0 if month_numeric in HOLIDAY_MONTHS else 0.0),
+            np.full(len(rows), DEFAULT_TRANSACTION_COUNT, dtype=float),
+        ])
+        predictions = np.einsum(
+            'kf,kf->k', _interaction_features(X_new), self._models['coefficients'][rows]
+        ) + self._models['intercepts'][rows]
+        return np.maximum(0, predictions)  # Pas de dépenses négatives
+
     def _get_model_prediction(self, category: str, target_date: datetime) -> float:
         """Obtient la prédiction du modèle ML pour une catégorie"""
         if category not in self.category_models:
             return 0.0
-        
-        model_info = self.category_models[category]
-        model = model_info['model']
-        poly_features = model_info['poly_features']
-        
-        # Préparation des features pour la prédiction
-        month_index = len(model_info['last_values'])  # Index du prochain mois
-        month_numeric = target_date.month
-        is_holiday_month = 1 if month_numeric in [7, 8, 12] else 0
-        avg_transaction_count = 10  # Valeur par défaut
-        
-        X_new = np.array([[month_index, month_numeric, is_holiday_month, avg_transaction_count]])
-        X_new_poly = poly_features.transform(X_new)
-        
-        prediction = model.predict(X_new_poly)[0]
-        return max(0, prediction)  # Pas de dépenses négatives
-    
+        row = self._models['index'][category]
+        return float(self._predict_models(np.array([row]), target_date)[0])
+
     def _generate_category_recommendation(self, category: str, current_spent: float, 
                                         predicted_total: float, monthly_avg: float,
                                         trend: str, progress_ratio: float) -> str:
@@ -307,72 +395,74 @@ class BudgetIntelligenceSystem:
         
         return base_msg + trend_msg + action_msg
     
-    def generate_alerts(self, current_date: datetime, 
+    def generate_alerts(self, current_date: datetime,
                        current_spending: Dict[str, float]) -> List[BudgetAlert]:
         """
         Génère les alertes de dépassement et anomalies
         """
-        alerts = []
-        predictions = self.predict_month_end(current_date, current_spending)
-        
-        # Calcul des jours restants
-        last_day = (current_date.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        days_remaining = (last_day - current_date).days
-        
-        for prediction in predictions:
-            category = prediction.category
-            current = prediction.current_spent
-            predicted = prediction.predicted_month_end
-            avg = prediction.monthly_average
-            
-            # Alerte dépassement budgétaire
-            budget_limit = self.monthly_budgets.get(category, avg * 1.1)  # 110% de la moyenne par défaut
-            
-            if predicted > budget_limit:
-                severity = 'high' if predicted > budget_limit * 1.2 else 'medium'
-                alerts.append(BudgetAlert(
-                    alert_type='overspend_risk',
-                    category=category,
-                    severity=severity,
-                    message=f"Risque de dépassement: {predicted:.0f}€ prévu vs budget {budget_limit:.0f}€",
-                    current_amount=current,
-                    predicted_amount=predicted,
-                    threshold=budget_limit,
-                    days_remaining=days_remaining
-                ))
-            
-            # Alerte pic inhabituel
-            if current > avg * 1.5 and days_remaining > 10:
-                alerts.append(BudgetAlert(
-                    alert_type='unusual_spike',
-                    category=category,
-                    severity='medium',
-                    message=f"Pic de dépenses inhabituel: {current:.0f}€ vs moyenne {avg:.0f}€",
-                    current_amount=current,
-                    predicted_amount=predicted,
-                    threshold=avg * 1.2,
-                    days_remaining=days_remaining
-                ))
-            
-            # Alerte tendance préoccupante
-            if prediction.trend_direction == 'increasing' and predicted > avg * 1.3:
-                alerts.append(BudgetAlert(
-                    alert_type='category_trend',
-                    category=category,
-                    severity='low',
-                    message=f"Tendance croissante confirmée: +{((predicted/avg-1)*100):.0f}% vs moyenne",
-                    current_amount=current,
-                    predicted_amount=predicted,
-                    threshold=avg,
-                    days_remaining=days_remaining
-                ))
-        
-        # Tri par sévérité
+        projection = self._project_month_end(current_date, current_spending)
+        categories = projection['categories']
+        current = projection['current']
+        predicted = projection['predicted']
+        avg = projection['monthly_average']
+        days_remaining = projection['days_remaining']
+
+        # Alerte dépassement budgétaire: budget configuré, sinon 110% de la moyenne
+        budgets = np.array([self.monthly_budgets.get(category, np.nan) for category in categories], dtype=float)
+        budget_limit = np.where(np.isnan(budgets), avg * 1.1, budgets)
+        overspend = predicted > budget_limit
+        # Alerte pic inhabituel
+        spike = (current > avg * 1.5) & (days_remaining > 10)
+        # Alerte tendance préoccupante
+        rising = (projection['trends'] == 'increasing') & (predicted > avg * 1.3)
+
+        # Tri par sévérité, puis ordre des prédictions et type d'alerte (comme un tri stable)
         severity_order = {'high': 3, 'medium': 2, 'low': 1}
-        alerts.sort(key=lambda x: severity_order.get(x.severity, 0), reverse=True)
-        
+        rank = np.empty(len(categories), dtype=int)
+        rank[projection['order']] = np.arange(len(categories))
+        overspend_severity = np.where(predicted > budget_limit * 1.2, 'high', 'medium')
+        candidates = [
+            (rows, alert_type, severities)
+            for alert_type, rows, severities in (
+                ('overspend_risk', np.flatnonzero(overspend), overspend_severity[overspend]),
+                ('unusual_spike', np.flatnonzero(spike), np.full(spike.sum(), 'medium')),
+                ('category_trend', np.flatnonzero(rising), np.full(rising.sum(), 'low')),
+            )
+        ]
+        rows = np.concatenate([c[0] for c in candidates])
+        types = np.concatenate([np.full(len(c[0]), position) for position, c in enumerate(candidates)])
+        severities = np.concatenate([c[2] for c in candidates]).astype(object)
+        levels = np.array([severity_order[severity] for severity in severities], dtype=int)
+        ordered = np.lexsort((types, rank[rows], -levels))
+
+        alerts = []
+        for k in ordered:
+            i = rows[k]
+            category = categories[i]
+            current_amount, predicted_amount, average = float(current[i]), float(predicted[i]), float(avg[i])
+            alert_type = candidates[types[k]][1]
+            if alert_type == 'overspend_risk':
+                threshold = float(budget_limit[i])
+                message = f"Risque de dépassement: {predicted_amount:.0f}€ prévu vs budget {threshold:.0f}€"
+            elif alert_type == 'unusual_spike':
+                threshold = average * 1.2
+                message = f"Pic de dépenses inhabituel: {current_amount:.0f}€ vs moyenne {average:.0f}€"
+            else:
+                threshold = average
+                message = f"Tendance croissante confirmée: +{((predicted_amount/average-1)*100):.0f}% vs moyenne"
+            alerts.append(BudgetAlert(
+                alert_type=alert_type,
+                category=category,
+                severity=severities[k],
+                message=message,
+                current_amount=current_amount,
+                predicted_amount=predicted_amount,
+                threshold=threshold,
+                days_remaining=days_remaining
+            ))
+
         return alerts
-    
+
     def generate_smart_recommendations(self, current_spending: Dict[str, float]) -> List[SmartRecommendation]:
         """
         Génère des recommandations intelligentes d'optimisation budgétaire
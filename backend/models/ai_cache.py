@@ -3,7 +3,7 @@ AI Cache Models for Budget App
 SQLAlchemy models for caching AI responses
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime
 from sqlalchemy.sql import func
 from datetime import datetime
 
@@ -18,18 +18,18 @@ class AICache(Base):
     """Cache for AI API responses to reduce costs and latency"""
     __tablename__ = "ai_cache"
     
+    # Mirrors the ai_cache table created by the migration in models/database.py
     id = Column(Integer, primary_key=True, index=True)
     cache_key = Column(String(255), unique=True, index=True, nullable=False)
-    cache_type = Column(String(50))  # "classification", "suggestion", "research"
-    input_hash = Column(String(64))  # SHA256 hash of input
-    input_text = Column(Text)
-    response_text = Column(Text)
-    model_used = Column(String(50))
-    confidence = Column(Float)
-    hit_count = Column(Integer, default=0)
+    cache_type = Column(String(50), nullable=False)  # "import", "tip", "coach", "variance", "daily"
+    response_data = Column(Text, nullable=False)  # JSON payload
     created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
-    expires_at = Column(DateTime)
+    expires_at = Column(DateTime, nullable=False)
+    hit_count = Column(Integer, default=0)
+    last_accessed = Column(DateTime)
+    user_id = Column(String(100))
+    month = Column(String(7))
+    is_valid = Column(Boolean, default=True)
     
     def is_expired(self) -> bool:
         if self.expires_at is None:
@@ -2,6 +2,8 @@
 Database models and connection management for Budget API
 """
 import logging
+import os
+import threading
 from typing import Optional, Generator, Dict
 from datetime import datetime
 from sqlalchemy import (
@@ -10,13 +12,22 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship
 from sqlalchemy.sql import func
-from sqlalchemy.engine import Engine
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool, StaticPool
 
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Rows examined per index by the boot-time ANALYZE (PRAGMA analysis_limit, 0 = full scan)
+DB_ANALYSIS_LIMIT = int(os.getenv("DB_ANALYSIS_LIMIT", "1000"))
+# Read-only connections per worker (WAL: readers run concurrently with the writer).
+# 0 = previous behaviour, a single connection shared by every session
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "4"))
+# Seconds a session waits for the writer (lock or connection) or a reader before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
 # Database setup
 Base = declarative_base()
 
@@ -48,41 +59,146 @@ def create_database_engine() -> Engine:
     return _create_standard_engine()
 
 
-def _create_standard_engine() -> Engine:
-    """Create standard SQLite engine with connection pooling"""
-    engine = create_engine(
-        settings.database.database_url,
+def _is_file_database(url) -> bool:
+    """True for an on-disk SQLite database (in-memory ones live in a single connection)"""
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:") \
+        and "mode=memory" not in str(url)
+
+
+def _use_read_pool() -> bool:
+    return DB_READ_POOL_SIZE > 0 and _is_file_database(settings.database.database_url)
+
+
+def _engine_options(**overrides) -> dict:
+    options = dict(
         future=True,
         echo=settings.database.echo_sql,
-        connect_args={
-            "check_same_thread": False,
-            "timeout": settings.database.connection_timeout
-        },
         pool_pre_ping=settings.database.pool_pre_ping,
         pool_recycle=settings.database.pool_recycle,
-        poolclass=StaticPool
     )
-    logger.info("📁 Using standard SQLite database")
+    options.update(overrides)
+    return options
+
+
+def _create_standard_engine() -> Engine:
+    """
+    Create the standard SQLite engine (the writer).
+
+    With the read pool enabled, every write of the worker goes through one
+    connection: sessions queue on the pool (DB_POOL_TIMEOUT) instead of
+    interleaving their transactions on a shared connection. pysqlite opens
+    the transaction with BEGIN IMMEDIATE at the first INSERT/UPDATE/DELETE,
+    so the write lock is taken up front (busy timeout applies across
+    workers) rather than upgraded mid-transaction, and reads done before
+    the first write take no lock.
+    """
+    connect_args = {
+        "check_same_thread": False,
+        "timeout": settings.database.connection_timeout
+    }
+    if not _use_read_pool():
+        engine = create_engine(settings.database.database_url, connect_args=connect_args,
+                               **_engine_options(poolclass=StaticPool))
+        logger.info("📁 Using standard SQLite database")
+        return engine
+
+    engine = create_engine(
+        settings.database.database_url,
+        connect_args=dict(connect_args, isolation_level="IMMEDIATE"),
+        **_engine_options(poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=DB_POOL_TIMEOUT)
+    )
+    logger.info("📁 Using standard SQLite database (single writer connection)")
     return engine
 
 
-# Global engine instance
+def create_read_engine(write_engine: Engine) -> Engine:
+    """
+    Engine of the read sessions: a bounded pool of query_only connections
+    on the same file. Falls back to the writer when the read pool is
+    disabled, for in-memory databases and for the encrypted database.
+    """
+    if not _use_read_pool() or str(write_engine.url) != str(make_url(settings.database.database_url)):
+        return write_engine
+
+    read_engine = create_engine(
+        settings.database.database_url,
+        connect_args={"check_same_thread": False, "timeout": settings.database.connection_timeout},
+        **_engine_options(poolclass=QueuePool, pool_size=DB_READ_POOL_SIZE, max_overflow=0,
+                          pool_timeout=DB_POOL_TIMEOUT)
+    )
+
+    @event.listens_for(read_engine, "connect")
+    def _set_query_only(dbapi_connection, connection_record):
+        # After set_sqlite_pragma (Engine-level listeners run first): a write
+        # through a read session fails instead of racing the writer
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    logger.info(f"📖 SQLite read pool: {DB_READ_POOL_SIZE} connections")
+    return read_engine
+
+
+# Process-wide lock of the request write sessions (get_write_db). They take it
+# before their first query, in the dependency's worker thread: a request that
+# waits for the writer waits there, not on the pool checkout of its first
+# query (on the event loop for an async route). It also keeps two write
+# sessions from interleaving their transactions on the StaticPool fallback
+_write_lock = threading.Lock()
+
+
+class WriteSession(Session):
+    """Session of the writer engine: gives the write lock back when it is closed"""
+
+    _holds_write_lock = False
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            # An AI route closing its session before awaiting the LLM frees the writer early
+            if self._holds_write_lock:
+                self._holds_write_lock = False
+                _write_lock.release()
+
+
+# Global engine instances: `engine` writes (and stays the default for scripts,
+# migrations and background jobs), `read_engine` serves the read-only endpoints
 engine = create_database_engine()
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+read_engine = create_read_engine(engine)
+SessionLocal = sessionmaker(class_=WriteSession, autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Export DATABASE_URL for background tasks that need their own session
 DATABASE_URL = settings.database.database_url
 
 
-def get_db() -> Generator[Session, None, None]:
-    """Database session dependency"""
+def get_write_db() -> Generator[Session, None, None]:
+    """Database session dependency (writer connection, one request at a time per worker)"""
+    if not _write_lock.acquire(timeout=DB_POOL_TIMEOUT):
+        raise exc.TimeoutError(f"Writer session not available after {DB_POOL_TIMEOUT}s")
     db = SessionLocal()
+    db._holds_write_lock = True
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """Database session dependency for endpoints that never write (read pool, query_only)"""
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 
+# Historical name, used by most routers: the writer session
+get_db = get_write_db
+
+
 # Database Models
 
 class User(Base):
@@ -198,6 +314,11 @@ class Transaction(Base):
         Index('idx_transactions_expense_category_month', 'is_expense', 'category', 'month'),
         Index('idx_transactions_expense_type_month', 'expense_type', 'is_expense', 'month'),  # New index for filtering by type
         Index('idx_transactions_confidence_expense_type', 'confidence_score', 'expense_type', 'month'),  # AI confidence filtering
+
+        # Keyset pagination of a month's list, one per sort (services/transaction_pagination.py)
+        Index('idx_transactions_month_date_id', 'month', 'date_op', 'id'),
+        Index('idx_transactions_month_amount_id', 'month', 'amount', 'id'),
+        Index('idx_transactions_month_label_id', 'month', 'label', 'id'),
     )
 
 
@@ -715,6 +836,219 @@ class CustomCategory(Base):
     )
 
 
+class BatchJob(Base):
+    """
+    Persisted batch auto-tagging job.
+
+    Progress and results live in the database so that any worker can report
+    them, and a job interrupted by a restart is resumed from its last
+    completed chunk (see BatchJobChunk). The owning worker refreshes
+    `heartbeat_at`; a job whose heartbeat is stale can be claimed by another.
+    """
+    __tablename__ = "batch_jobs"
+
+    id = Column(String(36), primary_key=True)  # UUID
+    job_type = Column(String(50), default="auto_tagging", nullable=False)
+    month = Column(String(7), nullable=False, index=True)
+    status = Column(String(20), default="initiated", nullable=False, index=True)  # initiated, processing, completed, failed, cancelled
+    parameters = Column(Text, nullable=False)  # JSON: BatchAutoTagRequest
+    created_by = Column(String(100), nullable=True)
+
+    # Progress counters (sums of completed chunks)
+    total_transactions = Column(Integer, default=0)
+    processed_transactions = Column(Integer, default=0)
+    tagged_transactions = Column(Integer, default=0)
+    skipped_low_confidence = Column(Integer, default=0)
+    skipped_already_tagged = Column(Integer, default=0)
+    errors_count = Column(Integer, default=0)
+    current_operation = Column(String(200), default="")
+    errors = Column(Text, nullable=True)  # JSON list of job-level errors
+    performance_metrics = Column(Text, nullable=True)  # JSON, measured on completion
+
+    # Ownership
+    worker_id = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True, index=True)
+
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+
+# Statuses of a job that still has chunks to process
+BATCH_JOB_ACTIVE_STATUSES = ("initiated", "processing")
+
+
+class BatchJobChunk(Base):
+    """
+    Checkpoint of a batch job: one transaction id range.
+
+    A chunk's tag updates and its checkpoint are committed together, so a
+    completed chunk is never processed twice.
+    """
+    __tablename__ = "batch_job_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(36), ForeignKey("batch_jobs.id", ondelete="CASCADE"), nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    first_transaction_id = Column(Integer, nullable=False)
+    last_transaction_id = Column(Integer, nullable=False)
+    transaction_count = Column(Integer, default=0)
+    status = Column(String(20), default="pending", nullable=False)  # pending, done
+
+    results = Column(Text, nullable=True)  # JSON list of BatchTransactionResult
+    tagged = Column(Integer, default=0)
+    skipped_low_confidence = Column(Integer, default=0)
+    skipped_already_tagged = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
+    web_research_count = Column(Integer, default=0)
+    cache_hits = Column(Integer, default=0)
+    cache_lookups = Column(Integer, default=0)
+    processing_ms = Column(Integer, default=0)
+    completed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('idx_batch_job_chunk', 'job_id', 'chunk_index', unique=True),
+    )
+
+
+class MonthDataGeneration(Base):
+    """
+    Monotonic data generation counter per month.
+    Bumped by SQLite triggers on every transaction write of the month (and on
+    config / fixed lines / provisions writes under the global '*' key), so that
+    caches of derived month data can be keyed by (month, generation).
+    """
+    __tablename__ = "month_data_generations"
+
+    month = Column(String(7), primary_key=True)  # YYYY-MM, '' for undated rows, '*' for global settings
+    generation = Column(Integer, nullable=False, default=0)
+
+
+GLOBAL_GENERATION_KEY = "*"
+
+
+class MonthTagSpending(Base):
+    """
+    Expense aggregate per (month, tag): sum of |amount| and transaction count.
+    Derived from transactions by services/tag_spending.py, refreshed for a month
+    only when its data generation moved (see MonthTagSpendingRefresh).
+    """
+    __tablename__ = "month_tag_spending"
+
+    month = Column(String(7), primary_key=True)
+    tag = Column(String, primary_key=True)  # lower-cased tag, category or 'non-categorise'
+    total = Column(Float, nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+
+class MonthTagSpendingRefresh(Base):
+    """Month data generation the month_tag_spending rows of a month were computed at"""
+    __tablename__ = "month_tag_spending_refresh"
+
+    month = Column(String(7), primary_key=True)
+    generation = Column(Integer, nullable=False)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+
+def _generation_bump_sql(month_expr: str, condition: str = "1") -> str:
+    return (
+        "INSERT INTO month_data_generations(month, generation) "
+        f"SELECT {month_expr}, 1 WHERE {condition} "
+        "ON CONFLICT(month) DO UPDATE SET generation = generation + 1;"
+    )
+
+
+def create_data_generation_triggers(conn) -> None:
+    """Create the triggers maintaining month_data_generations (idempotent)"""
+    statements = [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_transactions_generation_insert AFTER INSERT ON transactions
+            BEGIN {_generation_bump_sql("COALESCE(NEW.month, '')")} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_transactions_generation_update AFTER UPDATE ON transactions
+            BEGIN
+                {_generation_bump_sql("COALESCE(NEW.month, '')")}
+                {_generation_bump_sql("COALESCE(OLD.month, '')", "OLD.month IS NOT NEW.month")}
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_transactions_generation_delete AFTER DELETE ON transactions
+            BEGIN {_generation_bump_sql("COALESCE(OLD.month, '')")} END""",
+    ]
+    for table in ("config", "fixed_lines", "custom_provisions"):
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            statements.append(
+                f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_generation_{operation.lower()} AFTER {operation} ON {table}
+                    BEGIN {_generation_bump_sql(f"'{GLOBAL_GENERATION_KEY}'")} END"""
+            )
+    for sql in statements:
+        conn.exec_driver_sql(sql)
+
+
+TRANSACTION_SEARCH_TABLE = "transactions_fts"
+
+# Payment-type prefixes stripped from a label to get its merchant (same list as
+# routers/transactions.normalize_label_for_matching, plus the CB/virement forms)
+MERCHANT_LABEL_PREFIXES = (
+    "PAIEMENT PAR CARTE ", "PAIEMENT CB ", "CARTE ", "CB ", "PRELEVEMENT ", "PRLV SEPA ", "PRLV ",
+    "VIREMENT ", "VIR SEPA ", "VIR ", "AVOIR ", "CHQ ", "RETRAIT DAB ", "RETRAIT ",
+)
+
+
+def _merchant_sql(label_expr: str) -> str:
+    """SQL expression for the merchant part of a label (plain SQL: raw sqlite3 writers fire the triggers too)"""
+    cases = " ".join(
+        f"WHEN upper({label_expr}) LIKE '{prefix}%' THEN trim(substr({label_expr}, {len(prefix) + 1}))"
+        for prefix in MERCHANT_LABEL_PREFIXES
+    )
+    return f"(CASE {cases} ELSE COALESCE({label_expr}, '') END)"
+
+
+def _search_row_sql(row: str) -> str:
+    return (
+        f"INSERT INTO {TRANSACTION_SEARCH_TABLE}(rowid, label, merchant, tags) "
+        f"VALUES ({row}.id, COALESCE({row}.label, ''), {_merchant_sql(f'{row}.label')}, COALESCE({row}.tags, ''));"
+    )
+
+
+def create_transaction_search_index(conn) -> None:
+    """
+    Create the FTS5 index over transaction labels, merchants and tags (idempotent).
+
+    Case and accent insensitive (unicode61, remove_diacritics 2), with prefix
+    indexes for 2 and 3 characters; kept in sync by triggers and backfilled
+    from the transactions table when first created.
+    """
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TRANSACTION_SEARCH_TABLE,)
+    ).first()
+    conn.exec_driver_sql(
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TRANSACTION_SEARCH_TABLE} USING fts5(
+            label, merchant, tags, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )"""
+    )
+    statements = [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_transactions_search_insert AFTER INSERT ON transactions
+            BEGIN {_search_row_sql("NEW")} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_transactions_search_update AFTER UPDATE OF id, label, tags ON transactions
+            BEGIN
+                DELETE FROM {TRANSACTION_SEARCH_TABLE} WHERE rowid = OLD.id;
+                {_search_row_sql("NEW")}
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_transactions_search_delete AFTER DELETE ON transactions
+            BEGIN DELETE FROM {TRANSACTION_SEARCH_TABLE} WHERE rowid = OLD.id; END""",
+    ]
+    for sql in statements:
+        conn.exec_driver_sql(sql)
+    if not exists:
+        rebuild_transaction_search_index(conn)
+
+
+def rebuild_transaction_search_index(conn) -> None:
+    """Refill the FTS index from the transactions table"""
+    conn.exec_driver_sql(f"DELETE FROM {TRANSACTION_SEARCH_TABLE}")
+    conn.exec_driver_sql(
+        f"INSERT INTO {TRANSACTION_SEARCH_TABLE}(rowid, label, merchant, tags) "
+        f"SELECT id, COALESCE(label, ''), {_merchant_sql('label')}, COALESCE(tags, '') FROM transactions"
+    )
+
+
 # Database events for optimization
 
 @event.listens_for(Engine, "connect")
@@ -791,6 +1125,9 @@ def migrate_schema():
                 "CREATE INDEX IF NOT EXISTS idx_transactions_expense_category_month ON transactions(is_expense, category, month)",
                 "CREATE INDEX IF NOT EXISTS idx_transactions_expense_type_month ON transactions(expense_type, is_expense, month)",
                 "CREATE INDEX IF NOT EXISTS idx_transactions_confidence_expense_type ON transactions(confidence_score, expense_type, month)",
+                "CREATE INDEX IF NOT EXISTS idx_transactions_month_date_id ON transactions(month, date_op, id)",
+                "CREATE INDEX IF NOT EXISTS idx_transactions_month_amount_id ON transactions(month, amount, id)",
+                "CREATE INDEX IF NOT EXISTS idx_transactions_month_label_id ON transactions(month, label, id)",
                 
                 # Fixed lines performance indexes
                 "CREATE INDEX IF NOT EXISTS idx_fixed_lines_active_freq ON fixed_lines(active, freq)",
@@ -1176,8 +1513,26 @@ def migrate_schema():
 
                 logger.info("✅ Table ai_cache created with performance indexes")
 
-            # Analyze query performance statistics
+            # Month data generation triggers (cache keys for derived month data). Required:
+            # the PDF cache, the pagination totals, month_tag_spending and the suggestion
+            # ETags trust these counters, and would serve stale data without the triggers
             try:
+                create_data_generation_triggers(conn)
+                logger.info("✅ Month data generation triggers installed")
+            except Exception as e:
+                raise RuntimeError(f"Could not create data generation triggers: {e}") from e
+
+            # Full-text index over labels / merchants / tags (services/transaction_search.py)
+            try:
+                create_transaction_search_index(conn)
+                logger.info("✅ Transaction search index (FTS5) installed")
+            except Exception as e:
+                logger.warning(f"Could not create transaction search index: {e}")
+
+            # Analyze query performance statistics (approximate: bounded rows per index,
+            # so the cost no longer grows with the database on every worker boot)
+            try:
+                conn.exec_driver_sql(f"PRAGMA analysis_limit={DB_ANALYSIS_LIMIT}")
                 conn.exec_driver_sql("ANALYZE")
                 logger.info("Database statistics updated for query optimizer")
             except Exception as e:
@@ -1205,7 +1560,8 @@ def ensure_default_config(db: Session):
 
 def get_database_info():
     """Get comprehensive database information for monitoring and performance analysis"""
-    with engine.connect() as conn:
+    # Read engine: monitoring only reads, and never waits on a pending write
+    with read_engine.connect() as conn:
         # Get table sizes and performance metrics
         tables_info = {}
         index_info = {}
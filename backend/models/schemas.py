@@ -30,18 +30,22 @@ class PaginatedResponse(GenericModel, Generic[T]):
             )
     """
     items: List[T] = Field(description="List of items for the current page")
-    total: int = Field(ge=0, description="Total number of items across all pages")
+    total: Optional[int] = Field(ge=0, description="Total number of items across all pages (None when not requested)")
     page: int = Field(ge=1, default=1, description="Current page number (1-indexed)")
     limit: int = Field(ge=1, le=500, default=50, description="Number of items per page")
-    pages: int = Field(ge=0, description="Total number of pages")
+    pages: Optional[int] = Field(ge=0, description="Total number of pages (None when total is not computed)")
     has_next: bool = Field(description="Whether there are more pages after this one")
     has_prev: bool = Field(description="Whether there are pages before this one")
+    next_cursor: Optional[str] = Field(default=None, description="Opaque cursor of the next page (keyset pagination)")
 
     def __init__(self, **data):
         # Calculate pages, has_next, has_prev if not provided
         if 'pages' not in data and 'total' in data and 'limit' in data:
-            data['pages'] = (data['total'] + data['limit'] - 1) // data['limit'] if data['limit'] > 0 else 0
-        if 'has_next' not in data and 'page' in data and 'pages' in data:
+            if data['total'] is None:
+                data['pages'] = None
+            else:
+                data['pages'] = (data['total'] + data['limit'] - 1) // data['limit'] if data['limit'] > 0 else 0
+        if 'has_next' not in data and 'page' in data and data.get('pages') is not None:
             data['has_next'] = data['page'] < data['pages']
         if 'has_prev' not in data and 'page' in data:
             data['has_prev'] = data['page'] > 1
@@ -56,7 +60,8 @@ class PaginatedResponse(GenericModel, Generic[T]):
                 "limit": 50,
                 "pages": 3,
                 "has_next": True,
-                "has_prev": False
+                "has_prev": False,
+                "next_cursor": "eyJzIjoiZGF0ZSIsImQiOjEsInYiOiIyMDI1LTAzLTE0IiwiaSI6NDIsInAiOjF9"
             }
         }
 
@@ -362,6 +367,7 @@ class ImportResponse(BaseModel):
     duplicates_info: Dict[str, Any]
     validation_errors: List[str]
     message: str
+    diff_summary: Optional[Dict[str, Any]] = None  # Only set in "upsert" import mode
 
 # Analytics Schemas
 class MonthlyTrend(BaseModel):
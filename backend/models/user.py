@@ -8,11 +8,12 @@ import secrets
 import logging
 from datetime import datetime, timedelta
 from typing import Optional, List, Tuple
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, event
 from sqlalchemy.sql import func
 import bcrypt
 
-from models.database import Base
+from models.database import Base, User as DatabaseUser
+from services.auth_cache import invalidate_principal
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +55,15 @@ class User(Base):
     backup_codes = Column(Text, nullable=True)  # JSON array of backup codes
 
 
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+@event.listens_for(DatabaseUser, "after_update")
+@event.listens_for(DatabaseUser, "after_delete")
+def _invalidate_cached_principal(mapper, connection, target):
+    """A changed users row (lock, password, deactivation...) must not be served from the auth cache"""
+    invalidate_principal(target.username)
+
+
 class UserSession(Base):
     """User session tracking for security monitoring"""
     __tablename__ = "user_sessions"
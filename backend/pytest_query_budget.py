@@ -0,0 +1,105 @@
+"""
+Pytest plugin - SQL query budgets
+Fails a test when the code under test issues more statements than declared,
+so that query-count regressions (N+1 loops) are caught before shipping.
+
+Declare a budget for a whole test with the marker:
+
+    @pytest.mark.query_budget(max_queries=5, max_repeats=1)
+    def test_list_tags(client): ...
+
+or for one block with the fixture:
+
+    def test_summary(client, query_budget):
+        with query_budget(max_queries=3):
+            client.get("/summary?month=2025-01")
+
+`max_repeats` bounds how many times one statement shape may run: it is the
+N+1 guard. Counting listens on every SQLAlchemy engine, so requests served
+by TestClient in its own thread are included.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Optional
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.query_performance import normalize_sql
+
+
+class QueryCounter:
+    """Collects the statements executed by any engine while active"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(Engine, "after_cursor_execute", self._after_cursor_execute)
+        return False
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def shapes(self) -> Counter:
+        return Counter(normalize_sql(statement) for statement in self.statements)
+
+    def check(self, max_queries: Optional[int] = None, max_repeats: Optional[int] = None) -> Optional[str]:
+        """Return a failure report if the budget is exceeded, None otherwise"""
+        problems = []
+        if max_queries is not None and self.count > max_queries:
+            problems.append(f"{self.count} queries executed, budget is {max_queries}")
+        if max_repeats is not None:
+            for pattern, count in self.shapes().most_common():
+                if count <= max_repeats:
+                    break
+                problems.append(f"N+1: {count}x (max {max_repeats}) {pattern[:200]}")
+        if not problems:
+            return None
+        listing = "\n".join(f"  {count:4d}x {pattern[:200]}" for pattern, count in self.shapes().most_common(10))
+        return "Query budget exceeded:\n- " + "\n- ".join(problems) + "\nStatements by shape:\n" + listing
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries=None, max_repeats=None): fail if the test exceeds this SQL budget"
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        yield
+        return
+
+    with QueryCounter() as counter:
+        outcome = yield
+    report = counter.check(*marker.args, **marker.kwargs)
+    if report and outcome.excinfo is None:
+        pytest.fail(report, pytrace=False)
+
+
+@pytest.fixture
+def query_budget():
+    """Context manager factory: `with query_budget(max_queries=3): ...`"""
+
+    @contextmanager
+    def budget(max_queries: Optional[int] = None, max_repeats: Optional[int] = None):
+        with QueryCounter() as counter:
+            yield counter
+        report = counter.check(max_queries, max_repeats)
+        if report:
+            pytest.fail(report, pytrace=False)
+
+    return budget
@@ -17,6 +17,8 @@ from sqlalchemy.orm import Session
 from dependencies.auth import get_current_user
 from dependencies.database import get_db
 from services.ai_analysis import get_ai_service
+from services.executors import run_db
+from services.data_generation import get_data_generation, get_month_generations
 from services.chat_memory import get_chat_memory, MessageRole, ChatSession
 from models.database import Transaction, CategoryBudget
 
@@ -98,6 +100,51 @@ class AIStatusResponse(BaseModel):
 
 # Endpoints
 
+async def _read_then_close(db: Session, fn, *args):
+    """
+    Run fn(db, *args) in the DB executor and close the session: the LLM
+    calls that follow can take seconds and must not hold a connection.
+    """
+    def call():
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+    return await run_db(call)
+
+
+def _month_budget_context(db: Session, month: str) -> Dict[str, Any]:
+    """Income, expenses and spending per category of a month (chat context)"""
+    transactions = db.query(Transaction).filter(
+        Transaction.month == month,
+        Transaction.exclude == False
+    ).all()
+
+    total_income = sum(abs(tx.amount) for tx in transactions if tx.amount > 0)
+    total_expenses = sum(abs(tx.amount) for tx in transactions if tx.amount < 0)
+
+    # Category breakdown
+    categories = {}
+    for tx in transactions:
+        if tx.amount >= 0:
+            continue
+
+        tags = [t.strip().lower() for t in (tx.tags or "").split(",") if t.strip()]
+        if not tags:
+            tags = [tx.category.lower()] if tx.category else ["non-categorise"]
+
+        for tag in tags:
+            if tag not in categories:
+                categories[tag] = 0
+            categories[tag] += abs(tx.amount)
+
+    return {
+        "month": month,
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "categories": categories
+    }
+
 @router.get("/status", response_model=AIStatusResponse)
 def get_ai_status(
     current_user = Depends(get_current_user)
@@ -168,19 +215,22 @@ async def explain_variance(
     # Get variance data by calling the analytics endpoint logic
     from routers.analytics import get_variance_analysis
 
-    try:
+    def read_variance(db: Session):
         variance_data = get_variance_analysis(
             month=request.month,
             current_user=current_user,
             db=db
         )
-        variance_dict = variance_data.model_dump()
+        return variance_data.model_dump(), get_data_generation(db, request.month)
+
+    try:
+        variance_dict, data_generation = await _read_then_close(db, read_variance)
     except Exception as e:
         logger.error(f"Error getting variance data: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting variance data: {str(e)}")
 
-    # Generate AI explanation
-    explanation = await ai_service.explain_variance(variance_dict)
+    # Generate AI explanation (cached until the month's data changes)
+    explanation = await ai_service.explain_variance(variance_dict, data_generation=data_generation)
 
     return AIExplanationResponse(
         explanation=explanation,
@@ -214,50 +264,59 @@ async def suggest_savings(
     import datetime as dt
     from dateutil.relativedelta import relativedelta
 
-    today = dt.datetime.now()
-    months_data = []
-    total_spending = 0
-
-    for i in range(request.months_history):
-        month_date = today - relativedelta(months=i)
-        month_str = month_date.strftime("%Y-%m")
-
-        # Get transactions for this month and category
-        transactions = db.query(Transaction).filter(
-            Transaction.month == month_str,
-            Transaction.amount < 0,
-            Transaction.exclude == False
-        ).all()
-
-        # Filter by tag/category
-        category_lower = request.category.lower()
-        month_amount = 0
-        month_transactions = []
-
-        for tx in transactions:
-            tags = [t.strip().lower() for t in (tx.tags or "").split(",") if t.strip()]
-            if not tags:
-                tags = [tx.category.lower()] if tx.category else []
-
-            if category_lower in tags:
-                month_amount += abs(tx.amount)
-                month_transactions.append({
-                    "label": tx.label,
-                    "amount": abs(tx.amount),
-                    "date": tx.date_op.isoformat() if tx.date_op else None
-                })
-
-        months_data.append({
-            "month": month_str,
-            "amount": month_amount,
-            "transactions": month_transactions
-        })
-        total_spending += month_amount
+    def read_history(db: Session):
+        today = dt.datetime.now()
+        months_data = []
+        total_spending = 0
+
+        for i in range(request.months_history):
+            month_date = today - relativedelta(months=i)
+            month_str = month_date.strftime("%Y-%m")
+
+            # Get transactions for this month and category
+            transactions = db.query(Transaction).filter(
+                Transaction.month == month_str,
+                Transaction.amount < 0,
+                Transaction.exclude == False
+            ).all()
+
+            # Filter by tag/category
+            category_lower = request.category.lower()
+            month_amount = 0
+            month_transactions = []
+
+            for tx in transactions:
+                tags = [t.strip().lower() for t in (tx.tags or "").split(",") if t.strip()]
+                if not tags:
+                    tags = [tx.category.lower()] if tx.category else []
+
+                if category_lower in tags:
+                    month_amount += abs(tx.amount)
+                    month_transactions.append({
+                        "label": tx.label,
+                        "amount": abs(tx.amount),
+                        "date": tx.date_op.isoformat() if tx.date_op else None
+                    })
+
+            months_data.append({
+                "month": month_str,
+                "amount": month_amount,
+                "transactions": month_transactions
+            })
+            total_spending += month_amount
+
+        generations = get_month_generations(db, [m["month"] for m in months_data])
+        return months_data, total_spending, generations
+
+    months_data, total_spending, generations = await _read_then_close(db, read_history)
 
     avg_spending = total_spending / request.months_history if request.months_history > 0 else 0
 
-    # Generate AI suggestions
-    suggestions = await ai_service.suggest_savings(request.category, months_data)
+    # Generate AI suggestions (cached until one of the months' data changes)
+    suggestions = await ai_service.suggest_savings(
+        request.category, months_data,
+        data_generation=".".join(str(generation) for generation in generations.values())
+    )
 
     return AISavingsResponse(
         category=request.category,
@@ -289,29 +348,15 @@ async def generate_monthly_summary(
         )
 
     # Get month data
-    transactions = db.query(Transaction).filter(
-        Transaction.month == request.month,
-        Transaction.exclude == False
-    ).all()
+    def read_month(db: Session):
+        return _month_budget_context(db, request.month), get_data_generation(db, request.month)
 
-    income = sum(abs(tx.amount) for tx in transactions if tx.amount > 0)
-    expenses = sum(abs(tx.amount) for tx in transactions if tx.amount < 0)
-    savings = income - expenses
+    budget_context, data_generation = await _read_then_close(db, read_month)
 
-    # Calculate category breakdown
-    category_spending = {}
-    for tx in transactions:
-        if tx.amount >= 0:
-            continue
-
-        tags = [t.strip().lower() for t in (tx.tags or "").split(",") if t.strip()]
-        if not tags:
-            tags = [tx.category.lower()] if tx.category else ["non-categorise"]
-
-        for tag in tags:
-            if tag not in category_spending:
-                category_spending[tag] = 0
-            category_spending[tag] += abs(tx.amount)
+    income = budget_context["total_income"]
+    expenses = budget_context["total_expenses"]
+    savings = income - expenses
+    category_spending = budget_context["categories"]
 
     # Sort by amount
     top_categories = [
@@ -329,8 +374,8 @@ async def generate_monthly_summary(
         "anomalies": []  # Could be enhanced with anomaly detection
     }
 
-    # Generate AI summary
-    summary = await ai_service.monthly_summary(month_data)
+    # Generate AI summary (cached until the month's data changes)
+    summary = await ai_service.monthly_summary(month_data, data_generation=data_generation)
 
     return AIMonthlySummaryResponse(
         month=request.month,
@@ -367,41 +412,17 @@ async def ask_question(
     import datetime as dt
     month = request.month or dt.datetime.now().strftime("%Y-%m")
 
-    # Get transactions for context
-    transactions = db.query(Transaction).filter(
-        Transaction.month == month,
-        Transaction.exclude == False
-    ).all()
-
-    total_income = sum(abs(tx.amount) for tx in transactions if tx.amount > 0)
-    total_expenses = sum(abs(tx.amount) for tx in transactions if tx.amount < 0)
-
-    # Category breakdown
-    categories = {}
-    for tx in transactions:
-        if tx.amount >= 0:
-            continue
+    # Build context from the month's transactions
+    def read_context(db: Session):
+        return _month_budget_context(db, month), get_data_generation(db, month)
 
-        tags = [t.strip().lower() for t in (tx.tags or "").split(",") if t.strip()]
-        if not tags:
-            tags = [tx.category.lower()] if tx.category else ["non-categorise"]
-
-        for tag in tags:
-            if tag not in categories:
-                categories[tag] = 0
-            categories[tag] += abs(tx.amount)
-
-    # Build context
-    budget_context = {
-        "month": month,
-        "total_income": total_income,
-        "total_expenses": total_expenses,
-        "categories": categories
-    }
+    budget_context, data_generation = await _read_then_close(db, read_context)
 
     # Get AI answer
     try:
-        answer = await ai_service.answer_question(request.question, budget_context)
+        answer = await ai_service.answer_question(
+            request.question, budget_context, data_generation=data_generation
+        )
         logger.info(f"AI answer received, length: {len(answer)}")
     except Exception as e:
         logger.error(f"Error calling AI service: {e}")
@@ -464,37 +485,8 @@ async def stream_chat(
     import datetime as dt
     month = request.month or dt.datetime.now().strftime("%Y-%m")
 
-    # Get transactions for context
-    transactions = db.query(Transaction).filter(
-        Transaction.month == month,
-        Transaction.exclude == False
-    ).all()
-
-    total_income = sum(abs(tx.amount) for tx in transactions if tx.amount > 0)
-    total_expenses = sum(abs(tx.amount) for tx in transactions if tx.amount < 0)
-
-    # Category breakdown
-    categories = {}
-    for tx in transactions:
-        if tx.amount >= 0:
-            continue
-
-        tags = [t.strip().lower() for t in (tx.tags or "").split(",") if t.strip()]
-        if not tags:
-            tags = [tx.category.lower()] if tx.category else ["non-categorise"]
-
-        for tag in tags:
-            if tag not in categories:
-                categories[tag] = 0
-            categories[tag] += abs(tx.amount)
-
-    # Build context
-    budget_context = {
-        "month": month,
-        "total_income": total_income,
-        "total_expenses": total_expenses,
-        "categories": categories
-    }
+    # Build context from the month's transactions
+    budget_context = await _read_then_close(db, _month_budget_context, month)
 
     async def event_generator():
         """Generate SSE events from AI stream."""
@@ -628,7 +620,7 @@ async def create_chat_session(
     month = request.month or dt.datetime.now().strftime("%Y-%m")
 
     # Build financial context
-    financial_context = _build_financial_context(db, month)
+    financial_context = await _read_then_close(db, _build_financial_context, month)
 
     # Create session
     session = memory.create_session(
@@ -740,7 +732,7 @@ async def session_chat(
     session = memory.get_or_create_session(
         user_id=current_user.username,
         session_id=session_id,
-        financial_context=_build_financial_context(db, month)
+        financial_context=await _read_then_close(db, _build_financial_context, month)
     )
 
     # Add user message to history
@@ -805,7 +797,7 @@ async def session_chat_stream(
     session = memory.get_or_create_session(
         user_id=current_user.username,
         session_id=session_id,
-        financial_context=_build_financial_context(db, month)
+        financial_context=await _read_then_close(db, _build_financial_context, month)
     )
 
     # Add user message to history
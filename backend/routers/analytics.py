@@ -9,7 +9,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
 from auth import get_current_user
-from dependencies.database import get_db
+from dependencies.database import get_db, get_read_db
 from audit_logger import get_audit_logger
 
 logger = logging.getLogger(__name__)
@@ -30,13 +30,13 @@ from services.calculations import (
     calculate_kpi_summary, calculate_monthly_trends, calculate_category_breakdown,
     detect_anomalies, calculate_spending_patterns
 )
-from dateutil.relativedelta import relativedelta
+from services.tag_spending import get_month_tag_spending, get_top_transactions_by_tag, previous_month
 
 @router.get("/kpis", response_model=KPISummary)
 def get_kpi_summary(
     months: str = "last3",  # "last3", "last6", "last12", "2024-01,2024-02" 
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get KPI summary for specified period
@@ -78,7 +78,7 @@ def get_kpi_summary(
 def get_monthly_trends(
     months: str = "last6",
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get monthly trend analysis
@@ -110,7 +110,7 @@ def get_monthly_trends(
 def get_category_breakdown(
     month: str,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get category breakdown for a specific month
@@ -130,7 +130,7 @@ def get_category_breakdown(
 def get_anomalies(
     month: str,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get anomaly detection for a specific month
@@ -151,7 +151,7 @@ def get_anomalies(
 def get_spending_patterns(
     months: str = "last3",
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get spending patterns by day of week
@@ -183,7 +183,7 @@ def get_spending_patterns(
 @router.get("/available-months")
 def get_available_months(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get list of available months for analysis
@@ -259,55 +259,12 @@ def get_variance_analysis(
                 # Default budget only if no month-specific exists
                 budget_map[b.category.lower()] = b.budget_amount
 
-        # Get all expense transactions for the month
-        transactions = db.query(Transaction).filter(
-            Transaction.month == month,
-            Transaction.amount < 0,
-            Transaction.exclude == False
-        ).all()
-
-        # Group spending by tag/category
-        spending_by_category = {}
-        transactions_by_category = {}
-
-        for tx in transactions:
-            # Get tags, or use category if no tags
-            tags = [t.strip().lower() for t in (tx.tags or "").split(",") if t.strip()]
-            if not tags:
-                tags = [tx.category.lower()] if tx.category else ["non-categorise"]
-
-            for tag in tags:
-                if tag not in spending_by_category:
-                    spending_by_category[tag] = 0
-                    transactions_by_category[tag] = []
-
-                spending_by_category[tag] += abs(tx.amount)
-                transactions_by_category[tag].append({
-                    "id": tx.id,
-                    "label": tx.label,
-                    "amount": abs(tx.amount),
-                    "date": tx.date_op.isoformat() if tx.date_op else None
-                })
-
-        # Get previous month for comparison
-        month_date = dt.datetime.strptime(month, "%Y-%m")
-        prev_month = (month_date - relativedelta(months=1)).strftime("%Y-%m")
-
-        prev_transactions = db.query(Transaction).filter(
-            Transaction.month == prev_month,
-            Transaction.amount < 0,
-            Transaction.exclude == False
-        ).all()
-
-        prev_spending_by_category = {}
-        for tx in prev_transactions:
-            tags = [t.strip().lower() for t in (tx.tags or "").split(",") if t.strip()]
-            if not tags:
-                tags = [tx.category.lower()] if tx.category else ["non-categorise"]
-            for tag in tags:
-                if tag not in prev_spending_by_category:
-                    prev_spending_by_category[tag] = 0
-                prev_spending_by_category[tag] += abs(tx.amount)
+        # Spending per tag for the month and the previous one (month_tag_spending aggregate)
+        prev_month = previous_month(month)
+        spending = get_month_tag_spending(db, [month, prev_month])
+        spending_by_category = spending[month]
+        prev_spending_by_category = spending[prev_month]
+        top_by_category = get_top_transactions_by_tag(db, month, limit=3)
 
         # Build category variance list
         category_variances = []
@@ -322,7 +279,7 @@ def get_variance_analysis(
 
         for category in all_categories:
             budgeted = budget_map.get(category, 0)
-            actual = spending_by_category.get(category, 0)
+            actual, transaction_count = spending_by_category.get(category, (0, 0))
             variance = actual - budgeted
             variance_pct = (variance / budgeted * 100) if budgeted > 0 else 0
 
@@ -347,12 +304,10 @@ def get_variance_analysis(
                     severity="critical" if variance_pct > 50 else "warning"
                 ))
 
-            # Get top 3 transactions
-            cat_transactions = transactions_by_category.get(category, [])
-            top_transactions = sorted(cat_transactions, key=lambda x: x["amount"], reverse=True)[:3]
+            top_transactions = top_by_category.get(category, [])
 
             # Compare to last month
-            prev_amount = prev_spending_by_category.get(category, 0)
+            prev_amount = prev_spending_by_category.get(category, (0, 0))[0]
             if prev_amount > 0:
                 change_pct = (actual - prev_amount) / prev_amount * 100
                 if change_pct > 0:
@@ -371,7 +326,7 @@ def get_variance_analysis(
                 status=status,
                 top_transactions=top_transactions,
                 vs_last_month=vs_last_month,
-                transaction_count=len(cat_transactions)
+                transaction_count=transaction_count
             ))
 
             if budgeted > 0:
@@ -33,6 +33,7 @@ from models.schemas import (
     BatchResultsResponse, BatchErrorResponse
 )
 from services.batch_processor import get_batch_processor, BatchProcessor
+from services.executors import run_db
 
 logger = logging.getLogger(__name__)
 
@@ -87,11 +88,11 @@ async def initiate_batch_auto_tagging(
         logger.info(f"Batch auto-tagging requested by {current_user.username} for month {request.month}")
         
         # Validate month has transactions
-        transaction_count = db.query(Transaction).filter(
+        transaction_count = await run_db(lambda: db.query(Transaction).filter(
             Transaction.month == request.month,
             Transaction.is_expense == True,
             Transaction.exclude == False
-        ).count()
+        ).count())
         
         if transaction_count == 0:
             logger.warning(f"No transactions found for month {request.month}")
@@ -171,7 +172,7 @@ async def get_batch_progress(
         logger.debug(f"Progress requested for batch {batch_id} by {current_user.username}")
         
         batch_processor = get_batch_processor()
-        progress = batch_processor.get_batch_progress(batch_id)
+        progress = await run_db(batch_processor.get_batch_progress, batch_id)
         
         return progress
         
@@ -247,7 +248,7 @@ async def get_batch_results(
         logger.info(f"Results requested for batch {batch_id} by {current_user.username}")
         
         batch_processor = get_batch_processor()
-        results = batch_processor.get_batch_results(batch_id)
+        results = await run_db(batch_processor.get_batch_results, batch_id)
         
         # Optionally filter out transaction details for performance
         if not include_transactions:
@@ -311,7 +312,7 @@ async def get_service_statistics(
         logger.debug(f"Service statistics requested by {current_user.username}")
         
         batch_processor = get_batch_processor()
-        statistics = batch_processor.get_service_statistics()
+        statistics = await run_db(batch_processor.get_service_statistics)
         
         # Add additional context for monitoring
         enhanced_statistics = {
@@ -364,22 +365,19 @@ async def cancel_batch_operation(
         
         batch_processor = get_batch_processor()
         
-        # Check if batch exists and is active
-        if batch_id not in batch_processor.active_batches:
-            if batch_id in batch_processor.completed_batches:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Cannot cancel completed batch operation"
-                )
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Batch operation {batch_id} not found"
-                )
-        
-        # Mark batch for cancellation
-        batch_state = batch_processor.active_batches[batch_id]
-        batch_state.status = "cancelled"
+        # Mark batch for cancellation (the owning worker stops before its next chunk)
+        try:
+            cancelled = await run_db(batch_processor.cancel_batch, batch_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Batch operation {batch_id} not found"
+            )
+        if not cancelled:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot cancel completed batch operation"
+            )
         
         logger.info(f"Batch {batch_id} marked for cancellation")
         
@@ -420,7 +418,7 @@ async def health_check():
     """
     try:
         batch_processor = get_batch_processor()
-        stats = batch_processor.get_service_statistics()
+        stats = await run_db(batch_processor.get_service_statistics)
         
         # Determine health status based on metrics
         active_batches = stats.get("active_batches", 0)
@@ -23,7 +23,7 @@ router = APIRouter(
 )
 
 # Import models and schemas
-from models.database import CategoryBudget, Transaction
+from models.database import CategoryBudget
 from models.schemas import (
     CategoryBudgetCreate,
     CategoryBudgetUpdate,
@@ -31,6 +31,7 @@ from models.schemas import (
     CategoryBudgetSuggestion,
     BudgetSuggestionsResponse
 )
+from services.tag_spending import get_month_tag_spending, month_range
 
 
 @router.get("/categories", response_model=List[CategoryBudgetResponse])
@@ -240,33 +241,11 @@ def get_budget_suggestions(
     start_date = today - relativedelta(months=months_history)
     start_month = start_date.strftime("%Y-%m")
 
-    # Get all transactions in the date range, grouped by tag
-    # Only expenses (amount < 0), not excluded
-    transactions = db.query(Transaction).filter(
-        Transaction.month >= start_month,
-        Transaction.month <= end_month,
-        Transaction.amount < 0,
-        Transaction.exclude == False
-    ).all()
-
-    # Group by tag and month
+    # Spending per (month, tag) over the window: at most one aggregate row per month and tag
     tag_monthly_spending = {}  # {tag: {month: total}}
-
-    for tx in transactions:
-        # Use tags if available, otherwise use category
-        tags = [t.strip().lower() for t in (tx.tags or "").split(",") if t.strip()]
-        if not tags:
-            tags = [tx.category.lower()] if tx.category else ["non-categorise"]
-
-        for tag in tags:
-            if tag not in tag_monthly_spending:
-                tag_monthly_spending[tag] = {}
-
-            month = tx.month
-            if month not in tag_monthly_spending[tag]:
-                tag_monthly_spending[tag][month] = 0
-
-            tag_monthly_spending[tag][month] += abs(tx.amount)
+    for month, tags in get_month_tag_spending(db, month_range(start_month, end_month)).items():
+        for tag, (total, _count) in tags.items():
+            tag_monthly_spending.setdefault(tag, {})[month] = total
 
     # Calculate suggestions for each tag
     suggestions = []
@@ -276,14 +255,12 @@ def get_budget_suggestions(
         if not monthly_data:
             continue
 
-        amounts = list(monthly_data.values())
+        # Most recent month first (the trend compares the 3 latest months to the older ones)
+        sorted_months = sorted(monthly_data.keys(), reverse=True)
+        amounts = [monthly_data[m] for m in sorted_months]
         months_with_data = len(amounts)
 
-        # Calculate averages
-        avg_all = sum(amounts) / len(amounts) if amounts else 0
-
         # Get last 3 months specifically
-        sorted_months = sorted(monthly_data.keys(), reverse=True)
         last_3_months = sorted_months[:3]
         avg_3_months = sum(monthly_data.get(m, 0) for m in last_3_months) / min(3, len(last_3_months))
 
@@ -3,13 +3,16 @@ Classification API Router for intelligent expense classification
 Provides endpoints for ML-based classification of expense tags as FIXED vs VARIABLE
 """
 
+import hashlib
+import json
 import logging
+import os
 import time
 import re
 from datetime import datetime
 from collections import Counter
 from typing import List, Dict, Optional, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from pydantic import Field
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
@@ -17,13 +20,18 @@ from pydantic import BaseModel, Field
 
 from auth import get_current_user
 from models.database import get_db, Transaction
+from services.transaction_search import tag_clause
 from services.expense_classification import (
     get_expense_classification_service, 
     evaluate_classification_performance,
     ClassificationResult,
     batch_classify_transactions,
-    AutoSuggestionEngine
+    AutoSuggestionEngine,
+    TransactionSuggestion,
+    get_classifier_model
 )
+from services.data_generation import get_data_fingerprint
+from services.ml_feedback_learning import get_feedback_model_registry
 
 def get_auto_suggestion_engine(db: Session) -> AutoSuggestionEngine:
     """Get the auto-suggestion engine instance with continuous learning"""
@@ -135,6 +143,7 @@ class PerformanceMetrics(BaseModel):
     target_fpr: float
     meets_targets: bool
     performance_grade: str
+    cache_stats: Optional[Dict[str, Any]] = None
 
 class AutoSuggestionRequest(BaseModel):
     """Request model for auto-suggestions"""
@@ -762,7 +771,7 @@ def override_classification(
         
         # Update all transactions with this tag to the new classification
         transactions_updated = db.query(Transaction).filter(
-            Transaction.tags.contains(request.tag_name),
+            tag_clause(db, request.tag_name),
             Transaction.exclude == False
         ).update(
             {"expense_type": request.expense_type},
@@ -843,6 +852,9 @@ def evaluate_performance(
                 detail=results['error']
             )
         
+        # Shared classification cache: hits / misses / evictions of the current model
+        results['cache_stats'] = get_classifier_model().get_info()
+        
         return PerformanceMetrics(**results)
         
     except HTTPException:
@@ -988,7 +1000,7 @@ def apply_classification_suggestions(
                     try:
                         # Update transactions with this tag
                         updated = db.query(Transaction).filter(
-                            Transaction.tags.contains(tag_name),
+                            tag_clause(db, tag_name),
                             Transaction.exclude == False
                         ).update(
                             {"expense_type": result.expense_type},
@@ -1010,7 +1022,7 @@ def apply_classification_suggestions(
                 
                 try:
                     updated = db.query(Transaction).filter(
-                        Transaction.tags.contains(tag_name),
+                        tag_clause(db, tag_name),
                         Transaction.exclude == False
                     ).update(
                         {"expense_type": expense_type},
@@ -2502,6 +2514,100 @@ async def classification_system_health(
 
 # ===== ENHANCED AI TRIGGERING ENDPOINTS =====
 
+# Transactions per prefetch / bulk request (one page of the transactions list)
+PREFETCH_MAX_TRANSACTIONS = int(os.getenv("CLASSIFICATION_PREFETCH_MAX", "200"))
+# Bump when the suggestion payloads change: clients' ETags stop matching
+SUGGESTIONS_PAYLOAD_VERSION = 1
+
+
+def _confidence_indicator(confidence: float) -> str:
+    return "high" if confidence >= 0.8 else "medium" if confidence >= 0.6 else "low"
+
+
+def _suggestion_payload(item: TransactionSuggestion, include_explanations: bool = True) -> Dict[str, Any]:
+    """Entry of /bulk-suggestions and /transactions/prefetch-suggestions"""
+    result = item.result
+    if result is None:
+        return {
+            "suggested_type": "VARIABLE",
+            "confidence_score": 0.3,
+            "explanation": "Pas de tags disponibles - classification par défaut",
+            "contributing_factors": [],
+            "keyword_matches": [],
+            "needs_user_input": True
+        }
+    return {
+        "suggested_type": result.expense_type,
+        "confidence_score": result.confidence,
+        "explanation": result.primary_reason if include_explanations else "",
+        "contributing_factors": result.contributing_factors[:3] if include_explanations else [],
+        "keyword_matches": result.keyword_matches[:3] if include_explanations else [],
+        "tag_analyzed": item.tag_name,
+        "historical_transactions": item.history_count,
+        "auto_apply_recommended": result.confidence >= 0.8,
+        "needs_user_input": result.confidence < 0.6
+    }
+
+
+def _hover_payload(item: TransactionSuggestion) -> Dict[str, Any]:
+    """Tooltip entry of /transactions/hover-preview (and 'preview' of the prefetch)"""
+    result = item.result
+    if result is None:
+        return {
+            "preview_text": "Cliquer pour analyser",
+            "confidence_indicator": "low",
+            "suggested_type": "unknown"
+        }
+    confidence_text = "élevée" if result.confidence >= 0.8 else "moyenne" if result.confidence >= 0.6 else "faible"
+    type_text = "FIXE" if result.expense_type == "FIXED" else "VARIABLE"
+    return {
+        "preview_text": f"{type_text} (confiance {confidence_text})",
+        "confidence_indicator": _confidence_indicator(result.confidence),
+        "suggested_type": result.expense_type.lower(),
+        "confidence_score": result.confidence,
+        "main_reason": result.primary_reason[:50] + "..." if len(result.primary_reason) > 50 else result.primary_reason
+    }
+
+
+def _load_suggestions(
+    db: Session,
+    transaction_ids: List[int],
+    current_user,
+    include_excluded: bool = True
+) -> Dict[int, TransactionSuggestion]:
+    """Read the transactions of a page in one query and classify them with shared history lookups"""
+    query = db.query(Transaction).filter(
+        Transaction.id.in_(transaction_ids),
+        Transaction.user_id == current_user.id if hasattr(Transaction, 'user_id') else True
+    )
+    if not include_excluded:
+        query = query.filter(Transaction.exclude == False)
+    classification_service = get_expense_classification_service(db)
+    return classification_service.suggest_for_transactions(query.all())
+
+
+def _suggestions_etag(db: Session, transaction_ids: List[int]) -> str:
+    """
+    ETag of the suggestions of a page: the ids, the data fingerprint and the
+    model generations. Any write (transactions, tags, config) changes it, as
+    a tag's history spans every month; so does a retrain (new classifier
+    generation) or feedback written by any worker (feedback signature).
+    """
+    models = [get_classifier_model().generation, get_feedback_model_registry().get_model(db).signature]
+    key = json.dumps(
+        [SUGGESTIONS_PAYLOAD_VERSION, get_data_fingerprint(db), models, sorted(set(transaction_ids))],
+        default=str
+    )
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return bool(candidates & {"*", etag, f"W/{etag}"})
+
+
 class BulkSuggestionsRequest(BaseModel):
     """Request model for bulk AI suggestions"""
     transaction_ids: List[int] = Field(description="List of transaction IDs to get suggestions for")
@@ -2529,127 +2635,52 @@ async def get_bulk_ai_suggestions(
 ):
     """
     NOUVEAU: Suggestions IA en lot optimisées
-    
-    Retourne les suggestions IA pour plusieurs transactions simultanément
-    avec cache optimisé et traitement en parallèle.
-    
+
+    Retourne les suggestions IA pour plusieurs transactions simultanément:
+    une requête pour les transactions, une requête UNION ALL pour
+    l'historique de tous les tags de la page (au lieu d'une par ligne).
+
     Performance cible: <2 secondes pour 50 transactions
     """
-    import time
     start_time = time.time()
-    
+
     try:
-        if len(request.transaction_ids) > 100:
+        if len(request.transaction_ids) > PREFETCH_MAX_TRANSACTIONS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Maximum 100 transactions per bulk request"
+                detail=f"Maximum {PREFETCH_MAX_TRANSACTIONS} transactions per bulk request"
             )
-        
-        classification_service = get_expense_classification_service(db)
-        suggestions = {}
-        errors = []
-        cache_hits = 0
-        
-        # Get transactions in batch
-        transactions = db.query(Transaction).filter(
-            Transaction.id.in_(request.transaction_ids),
-            Transaction.user_id == current_user.id if hasattr(Transaction, 'user_id') else True,
-            Transaction.exclude == False
-        ).all()
-        
-        transaction_dict = {tx.id: tx for tx in transactions}
-        
-        # Process suggestions with timeout protection
-        for tx_id in request.transaction_ids:
-            try:
-                # Check processing time limit
-                if (time.time() - start_time) * 1000 > request.max_processing_time_ms:
-                    errors.append({
-                        "transaction_id": str(tx_id),
-                        "error": "Processing timeout reached"
-                    })
-                    break
-                
-                transaction = transaction_dict.get(tx_id)
-                if not transaction:
-                    errors.append({
-                        "transaction_id": str(tx_id),
-                        "error": "Transaction not found"
-                    })
-                    continue
-                
-                # Extract tag for classification
-                tag_name = ""
-                if transaction.tags and transaction.tags.strip():
-                    tags = [t.strip() for t in transaction.tags.split(',') if t.strip()]
-                    if tags:
-                        tag_name = tags[0]
-                
-                if not tag_name and transaction.label:
-                    tag_name = transaction.label.lower()[:50]
-                
-                if not tag_name:
-                    suggestions[tx_id] = {
-                        "suggested_type": "VARIABLE",
-                        "confidence_score": 0.3,
-                        "explanation": "Pas de tags disponibles - classification par défaut",
-                        "contributing_factors": [],
-                        "keyword_matches": [],
-                        "needs_user_input": True
-                    }
-                    continue
-                
-                # Classify with cache support
-                result = classification_service.classify_expense(
-                    tag_name=tag_name,
-                    transaction_amount=float(transaction.amount or 0),
-                    transaction_description=transaction.label or "",
-                    use_cache=request.use_cache
-                )
-                
-                # Track cache usage (simplified)
-                if request.use_cache:
-                    cache_hits += 1
-                
-                suggestions[tx_id] = {
-                    "suggested_type": result.expense_type,
-                    "confidence_score": result.confidence,
-                    "explanation": result.primary_reason if request.include_explanations else "",
-                    "contributing_factors": result.contributing_factors[:3] if request.include_explanations else [],
-                    "keyword_matches": result.keyword_matches[:3] if request.include_explanations else [],
-                    "tag_analyzed": tag_name,
-                    "auto_apply_recommended": result.confidence >= 0.8,
-                    "needs_user_input": result.confidence < 0.6
-                }
-                
-            except Exception as e:
-                logger.error(f"Error processing transaction {tx_id}: {e}")
-                errors.append({
-                    "transaction_id": str(tx_id),
-                    "error": str(e)
-                })
-        
+
+        items = _load_suggestions(db, request.transaction_ids, current_user, include_excluded=False)
+        suggestions = {
+            tx_id: _suggestion_payload(item, request.include_explanations) for tx_id, item in items.items()
+        }
+        errors = [
+            {"transaction_id": str(tx_id), "error": "Transaction not found"}
+            for tx_id in request.transaction_ids if tx_id not in items
+        ]
+
         processing_time = (time.time() - start_time) * 1000
-        cache_hit_rate = cache_hits / len(request.transaction_ids) if request.transaction_ids else 0
-        
+
         # Count confidence levels
         high_confidence = sum(1 for s in suggestions.values() if s["confidence_score"] >= 0.8)
         medium_confidence = sum(1 for s in suggestions.values() if 0.6 <= s["confidence_score"] < 0.8)
         low_confidence = sum(1 for s in suggestions.values() if s["confidence_score"] < 0.6)
-        
+
         logger.info(f"🚀 Bulk suggestions: {len(suggestions)} processed in {processing_time:.1f}ms")
-        
+
         return BulkSuggestionsResponse(
             suggestions=suggestions,
             processing_time_ms=round(processing_time, 1),
-            cache_hit_rate=round(cache_hit_rate, 2),
+            # Results are computed, not cached: conditional requests go through /transactions/prefetch-suggestions
+            cache_hit_rate=0.0,
             suggestions_count=len(suggestions),
             high_confidence_count=high_confidence,
             medium_confidence_count=medium_confidence,
             low_confidence_count=low_confidence,
             errors=errors
         )
-        
+
     except HTTPException:
         raise
     except Exception as e:
@@ -2659,6 +2690,68 @@ async def get_bulk_ai_suggestions(
             detail=f"Bulk suggestions failed: {str(e)}"
         )
 
+class PrefetchSuggestionsResponse(BaseModel):
+    """Response model for the suggestions prefetch of a transactions page"""
+    suggestions: Dict[int, Dict[str, Any]]  # transaction_id -> bulk suggestion data + "preview" (hover)
+    missing: List[int]
+    processing_time_ms: float
+
+@router.get("/transactions/prefetch-suggestions", response_model=PrefetchSuggestionsResponse)
+def prefetch_transaction_suggestions(
+    request: Request,
+    response: Response,
+    ids: List[int] = Query(..., description="Transaction ids of the displayed page"),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Suggestions and hover previews of a whole transactions page, in one response
+
+    The UI loads it with the page and serves row hovers and the suggestion
+    column from it, instead of one instant-suggestion / hover-preview call
+    per row. The ETag changes with the ids and the data fingerprint; a
+    request with a matching If-None-Match gets a 304 without any
+    classification work. Plain def: the fingerprint query and the
+    classification run in the threadpool, not on the event loop.
+    """
+    start_time = time.time()
+
+    if len(ids) > PREFETCH_MAX_TRANSACTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Maximum {PREFETCH_MAX_TRANSACTIONS} transactions per prefetch"
+        )
+
+    try:
+        etag = _suggestions_etag(db, ids)
+        # no-cache: the browser keeps the body but revalidates it on every use
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        items = _load_suggestions(db, ids, current_user)
+        suggestions = {}
+        for tx_id, item in items.items():
+            suggestions[tx_id] = _suggestion_payload(item)
+            suggestions[tx_id]["preview"] = _hover_payload(item)
+
+        processing_time = (time.time() - start_time) * 1000
+        logger.debug(f"📦 Suggestions prefetch: {len(suggestions)} transactions in {processing_time:.1f}ms")
+
+        response.headers.update(headers)
+        return PrefetchSuggestionsResponse(
+            suggestions=suggestions,
+            missing=[tx_id for tx_id in dict.fromkeys(ids) if tx_id not in items],
+            processing_time_ms=round(processing_time, 1)
+        )
+
+    except Exception as e:
+        logger.error(f"Error in suggestions prefetch: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Suggestions prefetch failed: {str(e)}"
+        )
+
 class InstantSuggestionRequest(BaseModel):
     """Request model for instant AI suggestion"""
     transaction_id: int = Field(description="Transaction ID to analyze")
@@ -2687,41 +2780,25 @@ async def get_instant_ai_suggestion(
 ):
     """
     NOUVEAU: Suggestion IA instantanée optimisée
-    
+
     Analyse une transaction spécifique avec réponse ultra-rapide (<100ms).
-    Idéal pour les boutons dédiés par ligne et hover interactions.
-    
+    Pour une page entière, préférer /transactions/prefetch-suggestions
+    (même classification, une seule requête).
+
     Performance cible: <100ms response time
     """
-    import time
     start_time = time.time()
-    
+
     try:
-        # Get transaction
-        transaction = db.query(Transaction).filter(
-            Transaction.id == transaction_id,
-            Transaction.user_id == current_user.id if hasattr(Transaction, 'user_id') else True
-        ).first()
-        
-        if not transaction:
+        item = _load_suggestions(db, [transaction_id], current_user).get(transaction_id)
+
+        if not item:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Transaction {transaction_id} not found"
             )
-        
-        classification_service = get_expense_classification_service(db)
-        
-        # Extract tag
-        tag_name = ""
-        if transaction.tags and transaction.tags.strip():
-            tags = [t.strip() for t in transaction.tags.split(',') if t.strip()]
-            if tags:
-                tag_name = tags[0]
-        
-        if not tag_name and transaction.label:
-            tag_name = transaction.label.lower()[:50]
-        
-        if not tag_name:
+
+        if item.result is None:
             processing_time = (time.time() - start_time) * 1000
             return InstantSuggestionResponse(
                 transaction_id=transaction_id,
@@ -2733,21 +2810,14 @@ async def get_instant_ai_suggestion(
                 cache_used=False,
                 auto_apply_safe=False
             )
-        
-        # Fast classification with cache
-        result = classification_service.classify_expense(
-            tag_name=tag_name,
-            transaction_amount=float(transaction.amount or 0),
-            transaction_description=transaction.label or "",
-            use_cache=not force_refresh
-        )
-        
-        processing_time = (time.time() - start_time) * 1000
-        
+
+        result = item.result
+
         # Get similar transactions if requested
         similar_transactions = None
         if include_similar:
-            history = classification_service.get_historical_transactions(tag_name, limit=5)
+            classification_service = get_expense_classification_service(db)
+            history = classification_service.get_historical_transactions(item.tag_name, limit=5)
             similar_transactions = [
                 {
                     "label": h.get("label", ""),
@@ -2757,9 +2827,11 @@ async def get_instant_ai_suggestion(
                 }
                 for h in history[:3]  # Top 3 similar
             ]
-        
+
+        processing_time = (time.time() - start_time) * 1000
+
         logger.info(f"⚡ Instant suggestion for transaction {transaction_id}: {result.expense_type} ({result.confidence:.2f}) in {processing_time:.1f}ms")
-        
+
         return InstantSuggestionResponse(
             transaction_id=transaction_id,
             suggested_type=result.expense_type,
@@ -2767,11 +2839,11 @@ async def get_instant_ai_suggestion(
             explanation=result.primary_reason,
             quick_factors=result.contributing_factors[:3],
             processing_time_ms=round(processing_time, 1),
-            cache_used=not force_refresh,
+            cache_used=False,
             similar_transactions=similar_transactions,
             auto_apply_safe=result.confidence >= 0.85
         )
-        
+
     except HTTPException:
         raise
     except Exception as e:
@@ -2799,85 +2871,34 @@ async def get_hover_preview_suggestions(
 ):
     """
     NOUVEAU: Suggestions IA au survol (hover)
-    
+
     Analyses rapides pour affichage en tooltip au survol des lignes.
-    Optimisé pour la réactivité de l'interface utilisateur.
-    
+    Les lignes d'une page déjà chargée via /transactions/prefetch-suggestions
+    n'ont pas besoin de cet appel ('preview' de chaque suggestion).
+
     Performance cible: <200ms pour 10 transactions
     """
-    import time
     start_time = time.time()
-    
+
     try:
         if len(request.transaction_ids) > 10:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Maximum 10 transactions for hover preview"
             )
-        
-        classification_service = get_expense_classification_service(db)
-        previews = {}
-        
-        # Get transactions
-        transactions = db.query(Transaction).filter(
-            Transaction.id.in_(request.transaction_ids),
-            Transaction.user_id == current_user.id if hasattr(Transaction, 'user_id') else True
-        ).all()
-        
-        for transaction in transactions:
-            try:
-                # Quick tag extraction
-                tag_name = ""
-                if transaction.tags and transaction.tags.strip():
-                    tag_name = transaction.tags.split(',')[0].strip()
-                elif transaction.label:
-                    tag_name = transaction.label.lower()[:30]
-                
-                if not tag_name:
-                    previews[transaction.id] = {
-                        "preview_text": "Cliquer pour analyser",
-                        "confidence_indicator": "low",
-                        "suggested_type": "unknown"
-                    }
-                    continue
-                
-                # Fast lightweight classification
-                result = classification_service.classify_expense(
-                    tag_name=tag_name,
-                    transaction_amount=float(transaction.amount or 0),
-                    transaction_description="",  # Skip description for speed
-                    use_cache=True
-                )
-                
-                # Create preview
-                confidence_text = "élevée" if result.confidence >= 0.8 else "moyenne" if result.confidence >= 0.6 else "faible"
-                type_text = "FIXE" if result.expense_type == "FIXED" else "VARIABLE"
-                
-                previews[transaction.id] = {
-                    "preview_text": f"{type_text} (confiance {confidence_text})",
-                    "confidence_indicator": "high" if result.confidence >= 0.8 else "medium" if result.confidence >= 0.6 else "low",
-                    "suggested_type": result.expense_type.lower(),
-                    "confidence_score": result.confidence,
-                    "main_reason": result.primary_reason[:50] + "..." if len(result.primary_reason) > 50 else result.primary_reason
-                }
-                
-            except Exception as e:
-                logger.warning(f"Error in hover preview for transaction {transaction.id}: {e}")
-                previews[transaction.id] = {
-                    "preview_text": "Erreur d'analyse",
-                    "confidence_indicator": "error",
-                    "suggested_type": "unknown"
-                }
-        
+
+        items = _load_suggestions(db, request.transaction_ids, current_user)
+        previews = {tx_id: _hover_payload(item) for tx_id, item in items.items()}
+
         processing_time = (time.time() - start_time) * 1000
-        
+
         logger.debug(f"🖱️ Hover preview: {len(previews)} transactions in {processing_time:.1f}ms")
-        
+
         return HoverTriggerResponse(
             previews=previews,
             processing_time_ms=round(processing_time, 1)
         )
-        
+
     except HTTPException:
         raise
     except Exception as e:
@@ -2968,8 +2989,8 @@ async def unified_batch_classify_transactions(
         
         start_time = time.time()
         
-        # Perform batch classification
-        results = unified_service.batch_classify_transactions(
+        # Pattern matching runs on the CPU pool, web research concurrently
+        results = await unified_service.abatch_classify_transactions(
             transactions=request.transactions,
             use_web_research=request.use_web_research,
             include_expense_type=request.include_expense_type
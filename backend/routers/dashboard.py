@@ -11,6 +11,7 @@ from datetime import datetime
 from dependencies.auth import get_current_user
 from dependencies.database import get_db
 from services.redis_cache import get_redis_cache
+from services.executors import run_db
 from models.schemas import (
     DashboardSummaryResponse, 
     SavingsColumnResponse, 
@@ -53,7 +54,12 @@ async def get_dashboard_summary(
     - Colonne Dépenses: Total charges fixes, répartition, nombre de postes
     - Comparaison: Ratio épargne/dépenses, solde disponible
     """
-    cache_key = f"dashboard:summary:{current_user.username}"
+    return await run_db(_build_dashboard_summary, db, current_user.username)
+
+
+def _build_dashboard_summary(db: Session, username: str) -> DashboardSummaryResponse:
+    """Calcul du résumé (bloquant : SQLAlchemy et Redis synchrones)"""
+    cache_key = f"dashboard:summary:{username}"
     
     # Check cache first
     cached_data = redis_cache.get(cache_key)
@@ -129,7 +135,12 @@ async def get_savings_column(
     - Détails par provision dans chaque catégorie
     - Métriques de progression et objectifs
     """
-    cache_key = f"dashboard:savings:{current_user.username}:{category or 'all'}"
+    return await run_db(_build_savings_column, db, current_user.username, category)
+
+
+def _build_savings_column(db: Session, username: str, category: Optional[str]) -> SavingsColumnResponse:
+    """Calcul de la colonne Épargne (bloquant)"""
+    cache_key = f"dashboard:savings:{username}:{category or 'all'}"
     
     cached_data = redis_cache.get(cache_key)
     if cached_data:
@@ -217,7 +228,12 @@ async def get_expenses_column(
     - Détails par ligne de charge dans chaque catégorie
     - Répartition membre1/membre2
     """
-    cache_key = f"dashboard:expenses:{current_user.username}:{category or 'all'}"
+    return await run_db(_build_expenses_column, db, current_user.username, category)
+
+
+def _build_expenses_column(db: Session, username: str, category: Optional[str]) -> ExpensesColumnResponse:
+    """Calcul de la colonne Dépenses (bloquant)"""
+    cache_key = f"dashboard:expenses:{username}:{category or 'all'}"
     
     cached_data = redis_cache.get(cache_key)
     if cached_data:
@@ -309,7 +325,12 @@ async def get_category_drill_down(
     
     Retourne le détail complet d'une catégorie avec tous ses éléments
     """
-    cache_key = f"dashboard:category:{column_type}:{category_name}:{current_user.username}"
+    return await run_db(_build_category_drill_down, db, current_user.username, category_name, column_type)
+
+
+def _build_category_drill_down(db: Session, username: str, category_name: str, column_type: str):
+    """Drill-down catégorie (bloquant)"""
+    cache_key = f"dashboard:category:{column_type}:{category_name}:{username}"
     
     cached_data = redis_cache.get(cache_key)
     if cached_data:
@@ -338,7 +359,12 @@ async def get_detail_drill_down(
     
     Retourne tous les détails d'une provision ou ligne fixe
     """
-    cache_key = f"dashboard:detail:{item_type}:{item_id}:{current_user.username}"
+    return await run_db(_build_detail_drill_down, db, current_user.username, item_type, item_id)
+
+
+def _build_detail_drill_down(db: Session, username: str, item_type: str, item_id: int):
+    """Drill-down détail (bloquant)"""
+    cache_key = f"dashboard:detail:{item_type}:{item_id}:{username}"
     
     cached_data = redis_cache.get(cache_key)
     if cached_data:
@@ -366,7 +392,7 @@ async def invalidate_dashboard_cache(
     """Invalider le cache dashboard pour l'utilisateur actuel"""
     try:
         pattern = f"dashboard:*:{current_user.username}*"
-        deleted_count = redis_cache.delete_pattern(pattern)
+        deleted_count = await run_db(redis_cache.delete_pattern, pattern)
         
         return {
             "message": "Cache dashboard invalidé",
@@ -0,0 +1,39 @@
+"""
+Debug / performance introspection endpoints for Budget Famille API
+"""
+import logging
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from auth import get_current_user
+from services.query_performance import get_query_profiler
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["debug"],
+    responses={404: {"description": "Not found"}}
+)
+
+
+@router.get("/perf", response_model=Dict[str, Any])
+def get_query_profile(
+    limit: int = Query(20, ge=1, le=200, description="Number of queries / routes to return"),
+    reset: bool = Query(False, description="Reset the collected statistics after reading"),
+    current_user = Depends(get_current_user)
+):
+    """
+    Sampled SQL profile: latency percentiles per normalized query and per
+    route (estimated executions = samples / sample_rate). Only normalized
+    SQL is reported, never bound parameters. Reserved to administrators.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    profiler = get_query_profiler()
+    snapshot = profiler.snapshot(limit=limit)
+    if reset:
+        profiler.reset()
+        logger.info(f"Query profile reset by {current_user.username}")
+    return snapshot
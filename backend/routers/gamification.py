@@ -511,34 +511,34 @@ async def track_activity(
 
 
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
-async def get_leaderboard(
+def get_leaderboard(
     limit: int = 10,
     current_user=Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get top users by points."""
-    top_users = db.query(UserPoints).order_by(UserPoints.total_points.desc()).limit(limit).all()
+    """Get top users by points (one query: usernames and achievement counts are joined)."""
+    # UserAchievement has no completion flag: an awarded achievement is stored with progress=100
+    achievements = db.query(
+        UserAchievement.user_id,
+        func.count(UserAchievement.id).label("achievements_count")
+    ).filter(UserAchievement.progress >= 100).group_by(UserAchievement.user_id).subquery()
+
+    top_users = db.query(UserPoints, User.username, achievements.c.achievements_count) \
+        .select_from(UserPoints) \
+        .outerjoin(User, User.id == UserPoints.user_id) \
+        .outerjoin(achievements, achievements.c.user_id == UserPoints.user_id) \
+        .order_by(UserPoints.total_points.desc()).limit(limit).all()
 
-    result = []
-    for i, up in enumerate(top_users, 1):
-        # Get username
-        user = db.query(User).filter(User.id == up.user_id).first()
-
-        # Count achievements
-        achievements_count = db.query(UserAchievement).filter(
-            UserAchievement.user_id == up.user_id,
-            UserAchievement.is_completed == True
-        ).count()
-
-        result.append(LeaderboardEntry(
+    return [
+        LeaderboardEntry(
             rank=i,
-            username=user.username if user else "Unknown",
+            username=username or "Unknown",
             total_points=up.total_points,
             level=up.level,
-            achievements_count=achievements_count
-        ))
-
-    return result
+            achievements_count=achievements_count or 0
+        )
+        for i, (up, username, achievements_count) in enumerate(top_users, 1)
+    ]
 
 
 @router.post("/init-achievements")
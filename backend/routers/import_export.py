@@ -6,7 +6,7 @@ import json
 import logging
 import pandas as pd
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
 from sqlalchemy.orm import Session
 
 from auth import get_current_user
@@ -298,16 +298,29 @@ def preview_import_file(
 
 
 @router.post("/import", response_model=ImportResponse)
-def import_file(file: UploadFile = File(...), current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+def import_file(
+    file: UploadFile = File(...),
+    mode: str = Query("replace", pattern="^(replace|upsert)$", description="replace: annule et remplace les mois détectés, upsert: import incrémental par row_id"),
+    delete_missing: bool = Query(False, description="En mode upsert, supprimer les transactions de la période absentes du fichier"),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
     Import CSV/XLSX file with transactions
 
     Uploads and processes a CSV or XLSX file containing transaction data.
     Performs validation, duplicate detection, and data import.
+
+    **Modes :**
+    - replace (défaut): supprime toutes les transactions des mois détectés puis les réinsère
+    - upsert: compare sur `row_id` (hash stable date/libellé/montant), insère seulement les
+      nouvelles lignes, met à jour les lignes modifiées et conserve tags/classifications.
+      Le résumé des différences est renvoyé dans `diff_summary`.
     """
     import uuid
     import datetime as dt
     from services.smart_parser import get_smart_parser
+    from services.import_service import assign_row_ids, upsert_transactions
 
     logger.info(f"Début import fichier '{file.filename}' par utilisateur: {current_user.username}")
 
@@ -383,25 +396,11 @@ def import_file(file: UploadFile = File(...), current_user = Depends(get_current
         
         db.add(import_meta)
         
-        # ANNULE ET REMPLACE: Supprimer les transactions existantes pour les mois détectés
-        logger.info(f"🔄 Mode ANNULE ET REMPLACE pour les mois: {months_list}")
-        for month in months_list:
-            existing_count = db.query(Transaction).filter(
-                Transaction.month == month
-            ).count()
-            
-            if existing_count > 0:
-                logger.info(f"  ❌ Suppression de {existing_count} transactions existantes pour {month}")
-                db.query(Transaction).filter(
-                    Transaction.month == month
-                ).delete()
-        
-        db.flush()  # Appliquer les suppressions avant d'ajouter les nouvelles
-        
         # IMPORTANT: Sauvegarder les transactions dans la base de données
         transactions_created = 0
         # Dictionnaire pour compter les nouvelles transactions par mois
         new_transactions_by_month = {}
+        diff_summary = None
         
         # Log des colonnes disponibles pour debug
         logger.info(f"Colonnes du CSV: {df.columns.tolist()}")
@@ -425,6 +424,7 @@ def import_file(file: UploadFile = File(...), current_user = Depends(get_current
         if not all([date_col, label_col, amount_col]):
             logger.error(f"Colonnes manquantes! Date: {date_col}, Label: {label_col}, Montant: {amount_col}")
         
+        parsed_rows = []
         for idx, row in df.iterrows():
             try:
                 # Extraire les données avec les colonnes détectées
@@ -443,42 +443,80 @@ def import_file(file: UploadFile = File(...), current_user = Depends(get_current
                     amount_val = amount_val.replace(',', '.').replace(' ', '')
                 amount = float(amount_val) if amount_val else 0.0
                 
-                month = date_op.strftime("%Y-%m")
+                parsed_rows.append({
+                    'date_op': date_op.date(),  # Stocker comme date, pas datetime
+                    'label': str(label_val),
+                    'amount': amount,
+                    'month': date_op.strftime("%Y-%m"),
+                })
+                    
+            except Exception as e:
+                logger.warning(f"Erreur ligne {idx}: {e}")
+                continue
+        
+        # Compter les transactions du fichier par mois
+        for parsed in parsed_rows:
+            new_transactions_by_month[parsed['month']] = new_transactions_by_month.get(parsed['month'], 0) + 1
+        
+        if mode == "upsert":
+            logger.info(f"🔁 Mode UPSERT pour les mois: {months_list} (delete_missing={delete_missing})")
+            diff_summary = upsert_transactions(db, parsed_rows, import_id, delete_missing=delete_missing)
+            transactions_created = diff_summary["inserted"]
+            import_meta.duplicates_count = diff_summary["unchanged"]
+            duplicate_info = {
+                'duplicates_count': diff_summary["unchanged"],
+                'exact_matches': diff_summary["unchanged"]
+            }
+        else:
+            # ANNULE ET REMPLACE: Supprimer les transactions existantes pour les mois détectés
+            logger.info(f"🔄 Mode ANNULE ET REMPLACE pour les mois: {months_list}")
+            for month in months_list:
+                existing_count = db.query(Transaction).filter(
+                    Transaction.month == month
+                ).count()
                 
-                # Pas de vérification de doublons car on fait un ANNULE ET REMPLACE
-                # Créer l'objet Transaction
+                if existing_count > 0:
+                    logger.info(f"  ❌ Suppression de {existing_count} transactions existantes pour {month}")
+                    db.query(Transaction).filter(
+                        Transaction.month == month
+                    ).delete()
+            
+            db.flush()  # Appliquer les suppressions avant d'ajouter les nouvelles
+            
+            # row_id stable pour permettre de futurs imports incrémentaux
+            assign_row_ids(parsed_rows)
+            for parsed in parsed_rows:
                 # is_expense est True si le montant est négatif (dépense)
                 transaction = Transaction(
-                    label=str(label_val),
-                    amount=amount,
-                    date_op=date_op.date(),  # Stocker comme date, pas datetime
-                    month=month,
+                    label=parsed['label'],
+                    amount=parsed['amount'],
+                    date_op=parsed['date_op'],
+                    month=parsed['month'],
+                    row_id=parsed['row_id'],
                     tags="Non classé",  # Tag par défaut
                     category="VARIABLE",
                     category_parent="VARIABLE",
                     exclude=False,
                     expense_type="VARIABLE",
-                    is_expense=(amount < 0),  # Définir is_expense basé sur le signe du montant
+                    is_expense=(parsed['amount'] < 0),  # Définir is_expense basé sur le signe du montant
                     import_id=import_id
                 )
                 db.add(transaction)
                 transactions_created += 1
                 
-                # Compter les nouvelles transactions par mois
-                if month not in new_transactions_by_month:
-                    new_transactions_by_month[month] = 0
-                new_transactions_by_month[month] += 1
-                
                 if transactions_created <= 3:  # Log les 3 premières pour debug
-                    logger.info(f"✅ Transaction créée: {label_val} - {amount}€ - {date_op.strftime('%Y-%m-%d')}")
-                    
-            except Exception as e:
-                logger.warning(f"Erreur ligne {idx}: {e}")
-                continue
+                    logger.info(f"✅ Transaction créée: {parsed['label']} - {parsed['amount']}€ - {parsed['date_op']}")
         
         db.commit()
         
-        logger.info(f"✅ Import terminé: ID={import_id}, {transactions_created} transactions importées (mode ANNULE ET REMPLACE)")
+        if diff_summary is not None:
+            # Seuls les mois réellement modifiés perdent leur cache
+            from services.calculations import invalidate_calculations_for_month
+            for month in diff_summary["months_touched"]:
+                invalidate_calculations_for_month(month)
+            logger.info(f"✅ Import terminé: ID={import_id}, diff={diff_summary}")
+        else:
+            logger.info(f"✅ Import terminé: ID={import_id}, {transactions_created} transactions importées (mode ANNULE ET REMPLACE)")
         
         # Préparation des données de réponse avec le nombre RÉEL de transactions importées
         logger.info(f"DEBUG: Transactions importées par mois: {new_transactions_by_month}")
@@ -517,11 +555,13 @@ def import_file(file: UploadFile = File(...), current_user = Depends(get_current
         
         logger.info(f"DEBUG: months_for_response avec transactions importées: {months_for_response}")
         
-        # Mode ANNULE ET REMPLACE - pas de doublons à signaler
-        duplicate_info['duplicates_count'] = 0
-        duplicate_info['exact_matches'] = 0
-        
-        if transactions_created > 0:
+        if diff_summary is not None:
+            message = (
+                f"Import incrémental réussi : {diff_summary['inserted']} ajoutées, "
+                f"{diff_summary['updated']} modifiées, {diff_summary['deleted']} supprimées, "
+                f"{diff_summary['unchanged']} inchangées"
+            )
+        elif transactions_created > 0:
             message = f"Import réussi : {transactions_created} transactions importées (mode annule et remplace)"
         else:
             message = "Import terminé : aucune transaction trouvée"
@@ -534,7 +574,8 @@ def import_file(file: UploadFile = File(...), current_user = Depends(get_current
             months_detected=months_for_response,
             duplicates_info=duplicate_info,
             validation_errors=[],
-            message=message
+            message=message,
+            diff_summary=diff_summary
         )
         
     except HTTPException:
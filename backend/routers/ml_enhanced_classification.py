@@ -20,8 +20,8 @@ from pydantic import BaseModel, Field
 
 from models.database import get_db, Transaction
 from models.schemas import MLTaggingResult, TransactionTagUpdate, TransactionExpenseTypeUpdate
-from services.ml_feedback_learning import MLFeedbackLearningService
-from services.expense_classification import ExpenseClassificationService
+from services.ml_feedback_learning import get_ml_feedback_learning_service, get_feedback_model_registry
+from services.expense_classification import get_expense_classification_service, get_classifier_model
 
 logger = logging.getLogger(__name__)
 
@@ -91,7 +91,7 @@ async def classify_transaction(
     
     try:
         # Initialize feedback-enhanced learning service
-        ml_service = MLFeedbackLearningService(db)
+        ml_service = get_ml_feedback_learning_service(db)
         
         # Perform classification with feedback integration
         result = ml_service.classify_with_feedback(
@@ -168,8 +168,8 @@ async def classify_transactions_batch(
     
     try:
         # Initialize services
-        ml_service = MLFeedbackLearningService(db) if request.use_feedback_learning else None
-        base_service = ExpenseClassificationService()
+        ml_service = get_ml_feedback_learning_service(db) if request.use_feedback_learning else None
+        base_service = get_expense_classification_service(db)
         
         results = []
         processing_stats = {
@@ -299,7 +299,7 @@ async def apply_classification_to_transaction(
             )
         
         # Classify with feedback learning
-        ml_service = MLFeedbackLearningService(db)
+        ml_service = get_ml_feedback_learning_service(db)
         result = ml_service.classify_with_feedback(
             transaction_label=transaction.label or "",
             amount=transaction.amount or 0.0,
@@ -370,11 +370,15 @@ async def get_feedback_learning_stats(db: Session = Depends(get_db)):
     Get statistics about feedback learning system performance
     """
     try:
-        ml_service = MLFeedbackLearningService(db)
+        ml_service = get_ml_feedback_learning_service(db)
         stats = ml_service.get_pattern_statistics()
         
         return {
             "feedback_patterns": stats,
+            "shared_models": {
+                "classifier": get_classifier_model().get_info(),
+                "feedback": get_feedback_model_registry().get_stats()
+            },
             "system_status": "active" if stats['total_patterns'] > 0 else "learning",
             "recommendation": (
                 "Feedback learning active with good pattern coverage" 
@@ -397,7 +401,7 @@ async def reload_feedback_patterns(db: Session = Depends(get_db)):
     Reload feedback patterns from database (useful after manual feedback entry)
     """
     try:
-        ml_service = MLFeedbackLearningService(db)
+        ml_service = get_ml_feedback_learning_service(db)
         ml_service.reload_patterns()
         
         stats = ml_service.get_pattern_statistics()
@@ -26,6 +26,7 @@ from models.schemas import (
     MLLearningPattern, BatchResultsSummary
 )
 from auth import get_current_user
+from services.ml_feedback_learning import invalidate_feedback_model
 
 logger = logging.getLogger(__name__)
 
@@ -215,6 +216,8 @@ class MLFeedbackService:
             patterns_updated += 1
         
         self.db.commit()
+        # Shared feedback model is rebuilt by the next classification request
+        invalidate_feedback_model()
         
         if patterns_updated > 0:
             logger.info(f"Updated {patterns_updated} learned patterns from feedback")
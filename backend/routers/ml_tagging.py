@@ -19,6 +19,7 @@ from datetime import datetime
 from pydantic import BaseModel, Field, validator
 
 from models.database import get_db, Transaction
+from services.transaction_search import transaction_match_clause
 from services.unified_ml_tagging_service import (
     UnifiedMLTaggingService,
     UnifiedTagSuggestion,
@@ -149,7 +150,7 @@ async def suggest_tag(
             if merchant_clean:
                 # Find similar transactions
                 similar_txs = db.query(Transaction).filter(
-                    Transaction.label.ilike(f"%{merchant_clean[:10]}%")
+                    transaction_match_clause(db, merchant_clean[:10], columns=["label", "merchant"])
                 ).limit(10).all()
                 
                 if similar_txs:
@@ -3,8 +3,9 @@ Receipts Router for Budget Famille v4.1
 OCR-powered receipt scanning and transaction creation
 """
 
+import asyncio
 import logging
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from pydantic import BaseModel
@@ -13,7 +14,8 @@ from sqlalchemy.orm import Session
 from dependencies.auth import get_current_user
 from dependencies.database import get_db
 from models.database import Transaction
-from services.ocr_service import parse_receipt, is_ocr_available, ReceiptData
+from services.ocr_service import is_ocr_available
+from services.ocr_worker_pool import get_ocr_pool, OCRQueueFullError
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +42,7 @@ class ReceiptScanResponse(BaseModel):
     all_amounts: List[float] = []
     raw_text: str = ""
     message: str = ""
+    cached: bool = False
 
 
 class ReceiptCreateRequest(BaseModel):
@@ -62,6 +65,7 @@ class OCRStatusResponse(BaseModel):
     """OCR service status"""
     available: bool
     message: str
+    pool: Optional[Dict[str, Any]] = None
 
 
 # Endpoints
@@ -72,7 +76,8 @@ def get_ocr_status():
     available = is_ocr_available()
     return OCRStatusResponse(
         available=available,
-        message="OCR service ready" if available else "OCR service not available - install easyocr"
+        message="OCR service ready" if available else "OCR service not available - install easyocr",
+        pool=get_ocr_pool().get_stats() if available else None
     )
 
 
@@ -119,8 +124,13 @@ async def scan_receipt(
 
         logger.info(f"Processing image: {file.filename}, size: {len(image_bytes)} bytes")
 
-        # Parse receipt
-        receipt_data: ReceiptData = parse_receipt(image_bytes)
+        # Parse receipt in the OCR process pool (cached by image hash)
+        try:
+            receipt_data, from_cache = await get_ocr_pool().scan(image_bytes)
+        except OCRQueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="OCR processing timed out")
 
         # Build response
         if receipt_data.amount or receipt_data.merchant:
@@ -133,14 +143,16 @@ async def scan_receipt(
                 confidence=round(receipt_data.confidence, 2),
                 all_amounts=receipt_data.all_amounts[:10],  # Limit to 10
                 raw_text=receipt_data.raw_text[:2000],  # Limit text length
-                message="Receipt scanned successfully"
+                message="Receipt scanned successfully",
+                cached=from_cache
             )
         else:
             return ReceiptScanResponse(
                 success=False,
                 raw_text=receipt_data.raw_text[:2000],
                 confidence=round(receipt_data.confidence, 2),
-                message="Could not extract merchant or amount from receipt"
+                message="Could not extract merchant or amount from receipt",
+                cached=from_cache
             )
 
     except HTTPException:
@@ -24,7 +24,9 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
 from models.database import get_db, Transaction, MerchantKnowledgeBase
-from services.web_research_service import WebResearchService, MerchantInfo, get_merchant_from_transaction_label
+from services.web_research_service import MerchantInfo, get_merchant_from_transaction_label
+from services.research_executor import get_research_executor
+from services.executors import run_db
 # Authentication is optional for research endpoints
 def get_current_user_optional():
     """Optional authentication dependency - always returns None for now"""
@@ -154,81 +156,133 @@ def db_model_to_response(db_merchant: MerchantKnowledgeBase) -> MerchantKnowledg
     )
 
 
+def _merchant_session(db: Session) -> Session:
+    """
+    Short-lived session on the request's engine: the lookups of a batch run
+    concurrently in the DB executor and must not share the request session
+    """
+    return Session(bind=db.get_bind())
+
+
+def _use_known_merchant(db: Session, normalized_name: str, uses: int) -> Optional[MerchantKnowledgeBase]:
+    """Knowledge base entry of a merchant, with its usage statistics updated (None if unknown)"""
+    with _merchant_session(db) as session:
+        existing_merchant = session.query(MerchantKnowledgeBase).filter(
+            MerchantKnowledgeBase.normalized_name == normalized_name,
+            MerchantKnowledgeBase.is_active == True
+        ).first()
+        if existing_merchant is None:
+            return None
+        existing_merchant.usage_count += uses
+        existing_merchant.last_used = datetime.now()
+        session.commit()
+        session.refresh(existing_merchant)
+        return existing_merchant
+
+
+def _store_researched_merchant(
+    db: Session,
+    normalized_name: str,
+    merchant_info: MerchantInfo,
+    uses: int
+) -> MerchantKnowledgeBase:
+    """Update the active entry of the merchant with fresh research, or create it"""
+    with _merchant_session(db) as session:
+        existing_merchant = session.query(MerchantKnowledgeBase).filter(
+            MerchantKnowledgeBase.normalized_name == normalized_name,
+            MerchantKnowledgeBase.is_active == True
+        ).first()
+
+        if existing_merchant:
+            # Update existing entry
+            existing_merchant.business_type = merchant_info.business_type
+            existing_merchant.category = merchant_info.category
+            existing_merchant.sub_category = merchant_info.sub_category
+            existing_merchant.city = merchant_info.city
+            existing_merchant.address = merchant_info.address
+            existing_merchant.confidence_score = merchant_info.confidence_score
+            existing_merchant.data_sources = json.dumps(merchant_info.data_sources) if merchant_info.data_sources else None
+            existing_merchant.research_keywords = ",".join(merchant_info.research_keywords) if merchant_info.research_keywords else None
+            existing_merchant.suggested_expense_type = merchant_info.suggested_expense_type
+            existing_merchant.suggested_tags = ",".join(merchant_info.suggested_tags) if merchant_info.suggested_tags else None
+            existing_merchant.website_url = merchant_info.website_url
+            existing_merchant.phone_number = merchant_info.phone_number
+            existing_merchant.description = merchant_info.description
+            existing_merchant.research_duration_ms = merchant_info.research_duration_ms
+            existing_merchant.search_queries_used = json.dumps(merchant_info.search_queries_used) if merchant_info.search_queries_used else None
+            existing_merchant.last_verified = datetime.now()
+            existing_merchant.needs_update = False
+            existing_merchant.usage_count += uses
+            existing_merchant.last_used = datetime.now()
+            merchant = existing_merchant
+        else:
+            # Create new entry
+            merchant = merchant_info_to_db_model(merchant_info, session)
+            merchant.usage_count = uses
+            merchant.last_used = datetime.now()
+            session.add(merchant)
+
+        session.commit()
+        session.refresh(merchant)
+        return merchant
+
+
 async def find_or_research_merchant(
     merchant_name: str, 
     amount: Optional[float],
     force_refresh: bool,
-    db: Session
+    db: Session,
+    uses: int = 1
 ) -> Tuple[MerchantKnowledgeBase, bool]:
     """
     Find merchant in knowledge base or perform new research
     
+    Every database step runs in the DB executor on its own session, closed
+    before the research is awaited: no connection is held during a lookup.
+    
+    Args:
+        uses: number of transactions served by this lookup (usage statistics)
+    
     Returns:
-        tuple: (MerchantKnowledgeBase entry, was_researched_now)
+        tuple: (MerchantKnowledgeBase entry, detached; was_researched_now)
     """
+    executor = get_research_executor()
+    
     # Normalize merchant name for lookup
-    normalized_name = ""
-    async with WebResearchService() as research_service:
-        normalized_name = research_service.normalize_merchant_name(merchant_name)
+    normalized_name = executor.normalize(merchant_name)
     
     if not normalized_name:
         raise HTTPException(status_code=400, detail="Invalid merchant name")
     
     # Check if merchant exists in knowledge base
-    existing_merchant = None
     if not force_refresh:
-        existing_merchant = db.query(MerchantKnowledgeBase).filter(
-            MerchantKnowledgeBase.normalized_name == normalized_name,
-            MerchantKnowledgeBase.is_active == True
-        ).first()
+        existing_merchant = await run_db(_use_known_merchant, db, normalized_name, uses)
+        if existing_merchant:
+            return existing_merchant, False
     
-    if existing_merchant and not force_refresh:
-        # Update usage statistics
-        existing_merchant.usage_count += 1
-        existing_merchant.last_used = datetime.now()
-        db.commit()
-        db.refresh(existing_merchant)
-        return existing_merchant, False
-    
-    # Perform new research
-    async with WebResearchService() as research_service:
-        merchant_info = await research_service.research_merchant(merchant_name, amount)
-    
-    if existing_merchant and force_refresh:
-        # Update existing entry
-        existing_merchant.business_type = merchant_info.business_type
-        existing_merchant.category = merchant_info.category
-        existing_merchant.sub_category = merchant_info.sub_category
-        existing_merchant.city = merchant_info.city
-        existing_merchant.address = merchant_info.address
-        existing_merchant.confidence_score = merchant_info.confidence_score
-        existing_merchant.data_sources = json.dumps(merchant_info.data_sources) if merchant_info.data_sources else None
-        existing_merchant.research_keywords = ",".join(merchant_info.research_keywords) if merchant_info.research_keywords else None
-        existing_merchant.suggested_expense_type = merchant_info.suggested_expense_type
-        existing_merchant.suggested_tags = ",".join(merchant_info.suggested_tags) if merchant_info.suggested_tags else None
-        existing_merchant.website_url = merchant_info.website_url
-        existing_merchant.phone_number = merchant_info.phone_number
-        existing_merchant.description = merchant_info.description
-        existing_merchant.research_duration_ms = merchant_info.research_duration_ms
-        existing_merchant.search_queries_used = json.dumps(merchant_info.search_queries_used) if merchant_info.search_queries_used else None
-        existing_merchant.last_verified = datetime.now()
-        existing_merchant.needs_update = False
-        existing_merchant.usage_count += 1
-        existing_merchant.last_used = datetime.now()
-        
-        db.commit()
-        db.refresh(existing_merchant)
-        return existing_merchant, True
-    else:
-        # Create new entry
-        db_merchant = merchant_info_to_db_model(merchant_info, db)
-        db_merchant.usage_count = 1
-        db_merchant.last_used = datetime.now()
-        
-        db.add(db_merchant)
+    # Perform new research (deduped, rate limited, cached in ResearchCache)
+    merchant_info = await executor.research(merchant_name, amount, force_refresh=force_refresh)
+    
+    merchant = await run_db(_store_researched_merchant, db, normalized_name, merchant_info, uses)
+    return merchant, True
+
+
+def _apply_suggestions(db: Session, transaction_id: int, merchant_kb: MerchantKnowledgeBase) -> None:
+    """Update a transaction with the suggestions of its merchant (optional fields only)"""
+    try:
+        transaction = db.get(Transaction, transaction_id)
+        if transaction is None:
+            return
+        if not transaction.expense_type or transaction.expense_type == "VARIABLE":
+            transaction.expense_type = merchant_kb.suggested_expense_type
+            
+        # Add suggested tags
+        if merchant_kb.suggested_tags and not transaction.tags:
+            transaction.tags = merchant_kb.suggested_tags
+            
         db.commit()
-        db.refresh(db_merchant)
-        return db_merchant, True
+    finally:
+        db.close()
 
 
 @router.post("/enrich/{transaction_id}", response_model=EnrichmentResponse)
@@ -244,8 +298,14 @@ async def enrich_transaction(
     This endpoint performs automatic web research to identify the merchant type
     and provides intelligent suggestions for expense classification and tags.
     """
-    # Get transaction
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    # Get transaction (label and amount only: the session is closed before the research)
+    def load_transaction():
+        try:
+            return db.query(Transaction.label, Transaction.amount).filter(Transaction.id == transaction_id).first()
+        finally:
+            db.close()
+    
+    transaction = await run_db(load_transaction)
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
@@ -270,15 +330,7 @@ async def enrich_transaction(
         
         # Apply suggestions if requested
         if request.include_suggestions and merchant_kb.suggested_expense_type:
-            # Update transaction with suggestions (optional)
-            if not transaction.expense_type or transaction.expense_type == "VARIABLE":
-                transaction.expense_type = merchant_kb.suggested_expense_type
-                
-            # Add suggested tags
-            if merchant_kb.suggested_tags and not transaction.tags:
-                transaction.tags = merchant_kb.suggested_tags
-                
-            db.commit()
+            await run_db(_apply_suggestions, db, transaction_id, merchant_kb)
         
         return EnrichmentResponse(
             transaction_id=transaction_id,
@@ -331,86 +383,85 @@ async def batch_enrich_transactions(
     if len(request.transaction_ids) > 50:
         raise HTTPException(status_code=400, detail="Maximum 50 transactions per batch")
     
-    # Get all transactions
-    transactions = db.query(Transaction).filter(
-        Transaction.id.in_(request.transaction_ids)
-    ).all()
+    # Get all transactions (plain rows: the session is closed before the lookups)
+    def load_transactions():
+        try:
+            return db.query(Transaction.id, Transaction.label, Transaction.amount).filter(
+                Transaction.id.in_(request.transaction_ids)
+            ).all()
+        finally:
+            db.close()
     
-    transaction_dict = {t.id: t for t in transactions}
+    transaction_dict = {t.id: t for t in await run_db(load_transactions)}
     
-    # Process transactions in controlled batches
+    def failure(transaction_id: int, merchant_name: str, error_message: str) -> EnrichmentResponse:
+        return EnrichmentResponse(
+            transaction_id=transaction_id,
+            merchant_name=merchant_name,
+            enrichment_successful=False,
+            business_type=None,
+            suggested_expense_type=None,
+            suggested_tags=[],
+            confidence_score=0.0,
+            research_duration_ms=0,
+            was_cached=False,
+            error_message=error_message
+        )
+    
+    # Group transactions by merchant: each distinct merchant is looked up once
+    executor = get_research_executor()
+    responses: Dict[int, EnrichmentResponse] = {}
+    merchant_groups: Dict[str, List[Tuple[int, str, Any]]] = {}
+    for transaction_id in request.transaction_ids:
+        transaction = transaction_dict.get(transaction_id)
+        if not transaction:
+            responses[transaction_id] = failure(transaction_id, "", "Transaction not found")
+            continue
+        merchant_name = get_merchant_from_transaction_label(transaction.label)
+        normalized_name = executor.normalize(merchant_name) if merchant_name else ""
+        if not normalized_name:
+            responses[transaction_id] = failure(transaction_id, "", "Cannot extract merchant name")
+            continue
+        merchant_groups.setdefault(normalized_name, []).append((transaction_id, merchant_name, transaction))
+    
+    # Process merchants in controlled batches
     semaphore = asyncio.Semaphore(request.max_concurrent)
     
-    async def process_single_transaction(transaction_id: int) -> EnrichmentResponse:
+    async def process_merchant(group: List[Tuple[int, str, Any]]) -> None:
+        _, merchant_name, transaction = group[0]
         async with semaphore:
-            transaction = transaction_dict.get(transaction_id)
-            if not transaction:
-                return EnrichmentResponse(
-                    transaction_id=transaction_id,
-                    merchant_name="",
-                    enrichment_successful=False,
-                    business_type=None,
-                    suggested_expense_type=None,
-                    suggested_tags=[],
-                    confidence_score=0.0,
-                    research_duration_ms=0,
-                    was_cached=False,
-                    error_message="Transaction not found"
-                )
-            
-            merchant_name = get_merchant_from_transaction_label(transaction.label)
-            if not merchant_name:
-                return EnrichmentResponse(
-                    transaction_id=transaction_id,
-                    merchant_name="",
-                    enrichment_successful=False,
-                    business_type=None,
-                    suggested_expense_type=None,
-                    suggested_tags=[],
-                    confidence_score=0.0,
-                    research_duration_ms=0,
-                    was_cached=False,
-                    error_message="Cannot extract merchant name"
-                )
-            
             try:
                 merchant_kb, was_researched = await find_or_research_merchant(
                     merchant_name,
                     transaction.amount,
                     request.force_refresh,
-                    db
-                )
-                
-                return EnrichmentResponse(
-                    transaction_id=transaction_id,
-                    merchant_name=merchant_name,
-                    enrichment_successful=True,
-                    business_type=merchant_kb.business_type,
-                    suggested_expense_type=merchant_kb.suggested_expense_type,
-                    suggested_tags=merchant_kb.suggested_tags.split(",") if merchant_kb.suggested_tags else [],
-                    confidence_score=merchant_kb.confidence_score,
-                    research_duration_ms=merchant_kb.research_duration_ms if was_researched else 0,
-                    was_cached=not was_researched
+                    db,
+                    uses=len(group)
                 )
-                
             except Exception as e:
-                logger.error(f"Error in batch processing transaction {transaction_id}: {e}")
-                return EnrichmentResponse(
-                    transaction_id=transaction_id,
-                    merchant_name=merchant_name,
-                    enrichment_successful=False,
-                    business_type=None,
-                    suggested_expense_type=None,
-                    suggested_tags=[],
-                    confidence_score=0.0,
-                    research_duration_ms=0,
-                    was_cached=False,
-                    error_message=str(e)
-                )
-    
-    # Process all transactions
-    tasks = [process_single_transaction(tid) for tid in request.transaction_ids]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+                logger.error(f"Error in batch processing merchant '{merchant_name}': {e}")
+                for transaction_id, name, _ in group:
+                    responses[transaction_id] = failure(transaction_id, name, str(e))
+                return
+        
+        suggested_tags = merchant_kb.suggested_tags.split(",") if merchant_kb.suggested_tags else []
+        for position, (transaction_id, name, _) in enumerate(group):
+            # Only the first transaction of the group paid for the research
+            researched_here = was_researched and position == 0
+            responses[transaction_id] = EnrichmentResponse(
+                transaction_id=transaction_id,
+                merchant_name=name,
+                enrichment_successful=True,
+                business_type=merchant_kb.business_type,
+                suggested_expense_type=merchant_kb.suggested_expense_type,
+                suggested_tags=suggested_tags,
+                confidence_score=merchant_kb.confidence_score,
+                research_duration_ms=merchant_kb.research_duration_ms if researched_here else 0,
+                was_cached=not researched_here
+            )
+    
+    await asyncio.gather(*(process_merchant(group) for group in merchant_groups.values()))
+    results = [responses[tid] for tid in request.transaction_ids if tid in responses]
     
     # Count results
     for result in results:
@@ -465,7 +516,7 @@ async def research_merchant_manually(
 
 
 @router.get("/knowledge-base", response_model=List[MerchantKnowledgeResponse])
-async def get_knowledge_base(
+def get_knowledge_base(
     limit: int = Query(50, ge=1, le=500, description="Maximum number of results"),
     offset: int = Query(0, ge=0, description="Number of results to skip"),
     business_type: Optional[str] = Query(None, description="Filter by business type"),
@@ -507,7 +558,7 @@ async def get_knowledge_base(
 
 
 @router.put("/knowledge-base/{merchant_id}/verify", response_model=MerchantKnowledgeResponse)
-async def verify_merchant(
+def verify_merchant(
     merchant_id: int,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user_optional)
@@ -536,7 +587,7 @@ async def verify_merchant(
 
 
 @router.delete("/knowledge-base/{merchant_id}")
-async def delete_merchant(
+def delete_merchant(
     merchant_id: int,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user_optional)
@@ -562,7 +613,7 @@ async def delete_merchant(
 
 
 @router.get("/stats")
-async def get_research_stats(
+def get_research_stats(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user_optional)
 ):
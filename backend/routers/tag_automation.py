@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from auth import get_current_user
 from dependencies.database import get_db
 from services.tag_automation import get_tag_automation_service
+from services.transaction_search import tag_clause
 from models.schemas import (
     TagFixedLineMappingResponse, TagFixedLineMappingCreate,
     TagFixedLineMappingUpdate, TagAutomationStats
@@ -258,7 +259,7 @@ async def preview_tag_automation(
         
         # Find a recent transaction with this tag to base the preview on
         sample_transaction = db.query(Transaction).filter(
-            Transaction.tags.contains(tag_name)
+            tag_clause(db, tag_name)
         ).order_by(Transaction.date_op.desc()).first()
         
         if not sample_transaction:
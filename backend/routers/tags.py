@@ -11,7 +11,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_, desc
 
 from auth import get_current_user
-from models.database import get_db, Transaction, LabelTagMapping, TagFixedLineMapping, FixedLine
+from models.database import get_db, get_read_db, Transaction, LabelTagMapping, TagFixedLineMapping, FixedLine
+from services.transaction_search import tag_clause, transaction_match_clause
 from models.schemas import (
     TagOut, TagUpdate, TagStats, TagPatterns, TagDelete, TagsListResponse,
     TxOut, ExpenseTypeConversion
@@ -26,8 +27,14 @@ router = APIRouter(
 )
 
 
-def extract_tags_from_transactions(db: Session) -> Dict[str, Dict[str, Any]]:
-    """Extract all unique tags from transactions and compute statistics"""
+def extract_tags_from_transactions(db: Session, search: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Extract all unique tags from transactions and compute statistics
+
+    search restricts the scan to transactions whose tags match it (full-text
+    index, token prefixes): every tag holding the search as a word prefix keeps
+    complete statistics.
+    """
     tags_data = defaultdict(lambda: {
         'transactions': [],
         'total_amount': 0.0,
@@ -39,11 +46,14 @@ def extract_tags_from_transactions(db: Session) -> Dict[str, Dict[str, Any]]:
     })
     
     # Get all transactions with tags
-    transactions = db.query(Transaction).filter(
+    query = db.query(Transaction).filter(
         Transaction.tags != "",
         Transaction.tags.is_not(None),
         Transaction.exclude == False
-    ).all()
+    )
+    if search:
+        query = query.filter(transaction_match_clause(db, search, columns=["tags"]))
+    transactions = query.all()
     
     for tx in transactions:
         if not tx.tags:
@@ -103,6 +113,22 @@ def get_tag_patterns(db: Session, tag_name: str) -> List[str]:
     return list(set(patterns))
 
 
+def get_tags_patterns(db: Session, tag_names: List[str]) -> Dict[str, List[str]]:
+    """
+    get_tag_patterns for every tag of a list, from one read of the active mappings
+    (same substring match as the LIKE of get_tag_patterns, case-insensitive)
+    """
+    mappings = db.query(LabelTagMapping.label_pattern, LabelTagMapping.suggested_tags).filter(
+        LabelTagMapping.is_active == True
+    ).all()
+    mappings = [(pattern, (suggested or "").lower()) for pattern, suggested in mappings if pattern]
+    
+    return {
+        tag_name: list({pattern for pattern, suggested in mappings if tag_name.lower() in suggested})
+        for tag_name in tag_names
+    }
+
+
 @router.get("", response_model=TagsListResponse)
 async def list_tags(
     expense_type: Optional[str] = Query(None, description="Filtrer par type de dépense"),
@@ -111,7 +137,7 @@ async def list_tags(
     sort_by: str = Query("usage", description="Tri: usage, amount, name, last_used"),
     limit: Optional[int] = Query(None, description="Limite le nombre de résultats"),
     current_user = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Liste tous les tags avec statistiques complètes
@@ -126,6 +152,7 @@ async def list_tags(
         # Build tag objects
         tags_list = []
         tag_id = 1
+        tags_patterns = get_tags_patterns(db, list(tags_data))
         
         for tag_name, stats in tags_data.items():
             # Apply filters
@@ -140,7 +167,7 @@ async def list_tags(
                 continue
             
             # Get patterns for this tag
-            patterns = get_tag_patterns(db, tag_name)
+            patterns = tags_patterns[tag_name]
             
             tag_out = TagOut(
                 id=tag_id,
@@ -234,7 +261,7 @@ async def update_tag(
         if payload.name and payload.name != old_tag_name:
             # Update all transactions with the old tag name
             transactions = db.query(Transaction).filter(
-                Transaction.tags.contains(old_tag_name)
+                tag_clause(db, old_tag_name)
             ).all()
             
             for tx in transactions:
@@ -253,7 +280,7 @@ async def update_tag(
         # Update expense type for all transactions with this tag
         if payload.expense_type:
             transactions = db.query(Transaction).filter(
-                Transaction.tags.contains(new_tag_name)
+                tag_clause(db, new_tag_name)
             ).all()
             
             for tx in transactions:
@@ -382,7 +409,7 @@ async def toggle_expense_type(
         
         # Update all transactions with this tag
         transactions = db.query(Transaction).filter(
-            Transaction.tags.contains(tag_name)
+            tag_clause(db, tag_name)
         ).all()
         
         updated_count = 0
@@ -506,7 +533,7 @@ async def delete_tag(
         if cascade:
             # Remove tag from all transactions
             transactions = db.query(Transaction).filter(
-                Transaction.tags.contains(tag_name)
+                tag_clause(db, tag_name)
             ).all()
             
             for tx in transactions:
@@ -652,7 +679,7 @@ async def get_tag_transactions(
     offset: int = Query(0, description="Décalage pour la pagination"),
     month: Optional[str] = Query(None, description="Filtrer par mois (YYYY-MM)"),
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Récupérer toutes les transactions d'un tag
@@ -672,7 +699,7 @@ async def get_tag_transactions(
         
         # Build query
         query = db.query(Transaction).filter(
-            Transaction.tags.contains(tag_name),
+            tag_clause(db, tag_name),
             Transaction.exclude == False
         )
         
@@ -752,26 +779,28 @@ async def search_tags(
     query: str = Query(..., description="Terme de recherche"),
     limit: int = Query(10, description="Nombre maximum de résultats"),
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Rechercher des tags par nom
     
-    Recherche des tags existants par nom avec correspondance partielle.
+    Recherche des tags existants par nom avec correspondance partielle
+    (début de mot, via l'index plein texte des transactions).
     """
     try:
-        tags_data = extract_tags_from_transactions(db)
+        tags_data = extract_tags_from_transactions(db, search=query)
         
         # Filter tags by query
         matching_tags = []
         tag_id = 1
         
         query_lower = query.lower()
+        tags_patterns = get_tags_patterns(db, [tag for tag in tags_data if query_lower in tag.lower()])
         for tag_name, stats in tags_data.items():
             if query_lower in tag_name.lower():
                 primary_expense_type = get_tag_expense_type(stats)
                 primary_category = stats['categories'].most_common(1)[0][0] if stats['categories'] else None
-                patterns = get_tag_patterns(db, tag_name)
+                patterns = tags_patterns[tag_name]
                 
                 tag_out = TagOut(
                     id=tag_id,
@@ -811,7 +840,7 @@ async def search_tags(
 @router.get("/stats", response_model=Dict[str, Any])
 async def get_tags_stats(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Obtenir les statistiques globales des tags
@@ -894,7 +923,7 @@ async def get_tags_stats(
             "most_used_tags": most_used_tags,
             "expense_type_distribution": expense_type_dist,
             "tag_usage_distribution": usage_distribution,
-            "tags_with_patterns": len([tag for tag, _ in tags_data.items() if get_tag_patterns(db, tag)]),
+            "tags_with_patterns": sum(1 for patterns in get_tags_patterns(db, list(tags_data)).values() if patterns),
             "average_amount_per_tag": {
                 tag: round(stats['total_amount'] / stats['transaction_count'], 2) 
                 if stats['transaction_count'] > 0 else 0
@@ -1019,7 +1048,7 @@ async def merge_tags(
         for source_tag in source_tags:
             # Find all transactions with this source tag
             transactions = db.query(Transaction).filter(
-                Transaction.tags.contains(source_tag)
+                tag_clause(db, source_tag)
             ).all()
 
             source_stats[source_tag] = {
@@ -3,12 +3,14 @@ Transactions router for Budget Famille v2.3
 Handles transaction operations and management
 """
 import logging
-from typing import List, Optional
+from itertools import islice
+from typing import Callable, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from auth import get_current_user
-from models.database import get_db
+from models.database import get_db, get_read_db
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,11 @@ router = APIRouter(
 # Import models and schemas
 from models.database import Transaction
 from models.schemas import TxOut, ExcludeIn, TagsIn, TransactionUpdate, ExpenseTypeConversion, PaginatedResponse
+from services.transaction_pagination import (
+    KEYSET_BATCH_SIZE, InvalidCursor, cached_total, decode_cursor, encode_cursor, iter_transactions,
+    normalize_sort, order_by
+)
+from services.transaction_search import search_transactions
 
 def parse_tags_to_array(tags_string: str) -> List[str]:
     """Convert comma-separated tags string to array"""
@@ -56,7 +63,7 @@ def get_categories(
     expense_type: Optional[str] = Query(None, description="Filter by expense type: FIXED, VARIABLE, or PROVISION"),
     sort_by: Optional[str] = Query(None, description="Sort by: date, amount, label"),
     sort_order: Optional[str] = Query("desc", description="Sort order: asc or desc"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get hierarchical category structure for navigation
@@ -99,7 +106,7 @@ def get_subcategories(
     expense_type: Optional[str] = Query(None, description="Filter by expense type: FIXED, VARIABLE, or PROVISION"),
     sort_by: Optional[str] = Query(None, description="Sort by: date, amount, label"),
     sort_order: Optional[str] = Query("desc", description="Sort order: asc or desc"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get subcategories for a specific category
@@ -145,7 +152,7 @@ def get_transaction_tags(
     expense_type: Optional[str] = Query(None, description="Filter by expense type: FIXED, VARIABLE, or PROVISION"),
     sort_by: Optional[str] = Query(None, description="Sort by: date, amount, label"),
     sort_order: Optional[str] = Query("desc", description="Sort order: asc or desc"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get unique tags for transactions with optional category/subcategory filtering
@@ -201,7 +208,7 @@ def get_hierarchy_data(
     subcategory: Optional[str] = Query(None),
     tag: Optional[str] = Query(None),
     level: Optional[str] = Query("category", description="Level to return: category, subcategory, tag"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Generic hierarchical data endpoint for navigation modal
@@ -215,6 +222,30 @@ def get_hierarchy_data(
     else:
         return []
 
+def _tag_filter(tag: Optional[str]) -> Optional[Callable[[Optional[str]], bool]]:
+    """Predicate on a CSV tags string matching any of the requested tags (None = no filter)"""
+    requested_tags = {t.strip().lower() for t in (tag or "").split(',') if t.strip()}
+    if not requested_tags:
+        return None
+
+    def matches(tags: Optional[str]) -> bool:
+        return bool(tags) and any(t.strip().lower() in requested_tags for t in tags.split(','))
+
+    return matches
+
+
+def _month_query(db: Session, month: str, expense_type: Optional[str]):
+    query = db.query(Transaction).filter(Transaction.month == month)
+    if expense_type and expense_type.strip():
+        normalized_type = expense_type.strip().upper()
+        if normalized_type in ['FIXED', 'VARIABLE', 'PROVISION']:
+            query = query.filter(Transaction.expense_type == normalized_type)
+        else:
+            # If invalid expense_type provided, return empty results
+            query = query.filter(Transaction.id == -1)
+    return query
+
+
 @router.get("", response_model=PaginatedResponse[TxOut])
 def list_transactions(
     month: str,
@@ -222,9 +253,11 @@ def list_transactions(
     expense_type: Optional[str] = Query(None, description="Filter by expense type: FIXED, VARIABLE, or PROVISION"),
     sort_by: Optional[str] = Query(None, description="Sort by: date, amount, label"),
     sort_order: Optional[str] = Query("desc", description="Sort order: asc or desc"),
-    page: int = Query(1, ge=1, description="Page number (1-indexed)"),
+    page: int = Query(1, ge=1, description="Page number (1-indexed), ignored when a cursor is given"),
     limit: int = Query(50, ge=1, le=500, description="Items per page (max 500)"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (keyset pagination)"),
+    include_total: bool = Query(True, description="Compute total/pages (memoised per month data generation)"),
+    db: Session = Depends(get_read_db)
 ):
     """
     List transactions for a specific month with pagination and optional filtering.
@@ -232,87 +265,62 @@ def list_transactions(
     Returns paginated transactions for the specified month in YYYY-MM format.
 
     **Pagination:**
-    - page: Page number starting from 1 (default: 1)
+    - cursor: pass the previous response's next_cursor to get the next page;
+      every page then costs the same, however deep (recommended for scrolling)
+    - page: Page number starting from 1 (default: 1), OFFSET based
     - limit: Items per page, max 500 (default: 50)
+    - include_total: false skips total/pages
 
     **Filtering:**
     - tag: Filter by tag(s), comma-separated (e.g., tag=restaurant,courses)
     - expense_type: Filter by FIXED, VARIABLE, or PROVISION
 
     **Response:**
-    Returns a PaginatedResponse with items, total count, and navigation info.
+    Returns a PaginatedResponse with items, total count, navigation info and next_cursor.
     """
-    from sqlalchemy import func
-
-    # Base query with month filter
-    base_query = db.query(Transaction).filter(Transaction.month == month)
+    sort_key, descending = normalize_sort(sort_by, sort_order)
+    base_query = _month_query(db, month, expense_type)
+    # Tags are comma-separated strings: tag filtering is done in Python on keyset batches
+    matches_tags = _tag_filter(tag)
 
-    # Add expense_type filtering if specified
-    if expense_type and expense_type.strip():
-        normalized_type = expense_type.strip().upper()
-        if normalized_type in ['FIXED', 'VARIABLE', 'PROVISION']:
-            base_query = base_query.filter(Transaction.expense_type == normalized_type)
-        else:
-            # If invalid expense_type provided, return empty results
-            base_query = base_query.filter(Transaction.id == -1)
-
-    # For tag filtering, we need to handle it specially since tags are comma-separated strings
-    # First, get all matching transactions (tag filtering requires post-processing)
-    if tag:
-        # Parse requested tags
-        requested_tags = [t.strip().lower() for t in tag.split(',') if t.strip()]
-
-        # Get all transactions matching base criteria
-        # Apply dynamic sorting for tag filter
-        if sort_by == 'amount':
-            order_col = Transaction.amount.desc() if sort_order == 'desc' else Transaction.amount.asc()
-        elif sort_by == 'label':
-            order_col = Transaction.label.desc() if sort_order == 'desc' else Transaction.label.asc()
-        else:
-            order_col = Transaction.date_op.desc() if sort_order == 'desc' else Transaction.date_op.asc()
-        all_txs = base_query.order_by(order_col).all()
-
-        # Filter by tags in Python (SQLite doesn't support array operations well)
-        filtered_txs = []
-        for tx in all_txs:
-            if tx.tags:
-                tx_tags = [t.strip().lower() for t in tx.tags.split(',') if t.strip()]
-                if any(req_tag in tx_tags for req_tag in requested_tags):
-                    filtered_txs.append(tx)
-
-        # Calculate total and apply pagination manually
-        total = len(filtered_txs)
-        offset = (page - 1) * limit
-        paginated_txs = filtered_txs[offset:offset + limit]
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, sort_key, descending)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        page = after.page + 1
+
+    if after is not None or matches_tags:
+        rows = iter_transactions(base_query, sort_key, descending, after,
+                                 batch_size=None if matches_tags else limit + 1)
+        if matches_tags:
+            rows = (tx for tx in rows if matches_tags(tx.tags))
+        skip = 0 if after is not None else (page - 1) * limit
+        page_rows = list(islice(rows, skip, skip + limit + 1))
     else:
-        # No tag filter - use efficient database pagination
-        total = base_query.count()
-        offset = (page - 1) * limit
-        # Apply dynamic sorting
-        if sort_by == 'amount':
-            order_col = Transaction.amount.desc() if sort_order == 'desc' else Transaction.amount.asc()
-        elif sort_by == 'label':
-            order_col = Transaction.label.desc() if sort_order == 'desc' else Transaction.label.asc()
-        else:
-            order_col = Transaction.date_op.desc() if sort_order == 'desc' else Transaction.date_op.asc()
-        paginated_txs = base_query.order_by(order_col).offset(offset).limit(limit).all()
+        page_rows = base_query.order_by(*order_by(sort_key, descending)) \
+            .offset((page - 1) * limit).limit(limit + 1).all()
 
-    # Calculate pagination metadata
-    pages = (total + limit - 1) // limit if limit > 0 else 0
-    has_next = page < pages
-    has_prev = page > 1
+    has_next = len(page_rows) > limit
+    page_rows = page_rows[:limit]
 
-    # Convert to response format
-    items = [tx_to_response(tx) for tx in paginated_txs]
+    total = None
+    if include_total:
+        def count() -> int:
+            if not matches_tags:
+                return base_query.count()
+            return sum(1 for (tags,) in base_query.with_entities(Transaction.tags) if matches_tags(tags))
+
+        total = cached_total(db, month, (expense_type, tag), count)
 
     return PaginatedResponse[TxOut](
-        items=items,
+        items=[tx_to_response(tx) for tx in page_rows],
         total=total,
         page=page,
         limit=limit,
-        pages=pages,
         has_next=has_next,
-        has_prev=has_prev
+        next_cursor=encode_cursor(page_rows[-1], sort_key, descending, page) if has_next else None
     )
 
 
@@ -324,17 +332,46 @@ def list_all_transactions(
     expense_type: Optional[str] = Query(None, description="Filter by expense type"),
     sort_by: Optional[str] = Query(None, description="Sort by: date, amount, label"),
     sort_order: Optional[str] = Query("desc", description="Sort order: asc or desc"),
-    db: Session = Depends(get_db)
+    format: str = Query("json", pattern="^(json|ndjson)$",
+                        description="ndjson: stream one transaction per line (application/x-ndjson)"),
+    db: Session = Depends(get_read_db)
 ):
     """
     [DEPRECATED] List ALL transactions without pagination.
 
     Use GET /transactions with pagination instead for better performance.
-    This endpoint is kept for backward compatibility only.
+    This endpoint is kept for backward compatibility only; format=ndjson streams
+    the rows in keyset batches instead of building the whole list in memory.
     """
     import warnings
     warnings.warn("GET /transactions/all is deprecated. Use GET /transactions with pagination.", DeprecationWarning)
 
+    matches_tags = _tag_filter(tag)
+
+    if format == "ndjson":
+        sort_key, descending = normalize_sort(sort_by, sort_order)
+        # The dependency session is closed before the body is sent: the stream
+        # reads through its own session on the same engine, closed at the end
+        bind = db.get_bind()
+
+        def lines():
+            stream_db = Session(bind=bind)
+            try:
+                # One chunk per keyset batch: each next() of a sync iterator is a threadpool hop
+                chunk = []
+                for tx in iter_transactions(_month_query(stream_db, month, expense_type), sort_key, descending):
+                    if matches_tags is None or matches_tags(tx.tags):
+                        chunk.append(tx_to_response(tx).model_dump_json())
+                    if len(chunk) >= KEYSET_BATCH_SIZE:
+                        yield "\n".join(chunk) + "\n"
+                        chunk = []
+                if chunk:
+                    yield "\n".join(chunk) + "\n"
+            finally:
+                stream_db.close()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
     query = db.query(Transaction).filter(Transaction.month == month)
 
     if expense_type and expense_type.strip():
@@ -344,18 +381,34 @@ def list_all_transactions(
 
     txs = query.order_by(Transaction.date_op.desc()).all()
 
-    if tag:
-        requested_tags = [t.strip().lower() for t in tag.split(',') if t.strip()]
-        filtered_txs = []
-        for tx in txs:
-            if tx.tags:
-                tx_tags = [t.strip().lower() for t in tx.tags.split(',') if t.strip()]
-                if any(req_tag in tx_tags for req_tag in requested_tags):
-                    filtered_txs.append(tx)
-        txs = filtered_txs
+    if matches_tags:
+        txs = [tx for tx in txs if matches_tags(tx.tags)]
 
     return [tx_to_response(tx) for tx in txs]
 
+@router.get("/search", response_model=List[TxOut])
+def search_transactions_endpoint(
+    q: str = Query(..., min_length=1, max_length=200, description="Words searched in label, merchant and tags"),
+    month: Optional[List[str]] = Query(None, description="Restrict to these months (YYYY-MM), repeatable"),
+    field: Optional[List[str]] = Query(None, description="Restrict to label, merchant and/or tags"),
+    prefix: bool = Query(True, description="Match word prefixes (search-as-you-type)"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Full-text search over transactions, best matches first.
+
+    Every word must match (case and accent insensitive); merchant and tag
+    matches rank above matches elsewhere in the label.
+    """
+    try:
+        results = search_transactions(db, q, months=month, limit=limit, offset=offset, columns=field, prefix=prefix)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [tx_to_response(tx) for tx, _ in results]
+
+
 @router.patch("/{tx_id}", response_model=TxOut)
 def update_transaction(tx_id: int, payload: TransactionUpdate, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
     """
@@ -655,7 +708,7 @@ def delete_transaction(
     return None
 
 @router.get("/tags", response_model=List[str])
-def list_tags(db: Session = Depends(get_db)):
+def list_tags(db: Session = Depends(get_read_db)):
     """
     List all unique tags used in transactions
     
@@ -679,7 +732,7 @@ def list_tags(db: Session = Depends(get_db)):
     return sorted(list(all_tags))
 
 @router.get("/tags-summary")
-def tags_summary(month: str, db: Session = Depends(get_db)):
+def tags_summary(month: str, db: Session = Depends(get_read_db)):
     """
     Get summary statistics for tags in a specific month
     
@@ -735,7 +788,7 @@ def tags_summary(month: str, db: Session = Depends(get_db)):
         )
 
 @router.get("/tag-suggestions")
-def get_tag_suggestions(label: str, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_tag_suggestions(label: str, current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
     """
     Get tag suggestions for a transaction label
     
@@ -869,7 +922,7 @@ def learn_tag_association(
     }
 
 @router.get("/learned-associations")
-def get_learned_associations(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_learned_associations(current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
     """
     Get all learned label-to-tag associations for the current user
     
@@ -1185,7 +1238,7 @@ def auto_tag_preview(
     month: str = Query(..., description="Month in YYYY-MM format"),
     min_confidence: float = Query(0.5, description="Minimum confidence threshold"),
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Preview auto-tag suggestions for transactions without tags.
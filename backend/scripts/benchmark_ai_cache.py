@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: AI cache hit latency
+Compares, on a throwaway SQLite file in WAL mode:
+- commit per hit (previous behaviour: hit_count/last_accessed updated and committed on every read)
+- pure read + write-behind hit counters (one batched UPDATE per flush)
+- in-process LRU in front of the table
+
+Usage: python scripts/benchmark_ai_cache.py [--keys 50] [--hits 5000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models.ai_cache import AICache
+from models.database import Base
+from services.ai_cache import AICacheLRU, AICacheService, HitCounterBuffer
+
+
+def build_engine(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, _):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+        dbapi_connection.execute("PRAGMA synchronous=FULL")
+
+    Base.metadata.create_all(engine, tables=[AICache.__table__])
+    return engine
+
+
+def commit_per_hit(db, key: str):
+    """Previous get_cached(): the hit becomes a write transaction"""
+    cached = db.query(AICache).filter(
+        AICache.cache_key == key,
+        AICache.is_valid == True,
+        AICache.expires_at > datetime.utcnow()
+    ).first()
+    cached.hit_count += 1
+    cached.last_accessed = datetime.utcnow()
+    db.commit()
+    return json.loads(cached.response_data)
+
+
+def timed(label: str, calls, fn):
+    durations = []
+    started = time.perf_counter()
+    for key in calls:
+        t0 = time.perf_counter()
+        fn(key)
+        durations.append((time.perf_counter() - t0) * 1e6)
+    total = time.perf_counter() - started
+    durations.sort()
+    print(f"  {label:<32} p50 {statistics.median(durations):>8.1f}us  "
+          f"p99 {durations[int(len(durations) * 0.99) - 1]:>8.1f}us  total {total:>6.2f}s")
+
+
+def main(args) -> None:
+    path = os.path.join(tempfile.mkdtemp(prefix="aicache-"), "bench.db")
+    engine = build_engine(path)
+    factory = sessionmaker(bind=engine)
+
+    db = factory()
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    keys = [f"coach:tips:2025-01:user{i}" for i in range(args.keys)]
+    for key in keys:
+        db.add(AICache(cache_key=key, cache_type="coach", expires_at=expires_at,
+                       response_data=json.dumps({"tips": [f"conseil {n}" for n in range(5)]})))
+    db.commit()
+    calls = [keys[i % len(keys)] for i in range(args.hits)]
+
+    print(f"{args.hits} cache hits over {args.keys} keys ({path})")
+    timed("commit per hit (before)", calls, lambda key: commit_per_hit(db, key))
+
+    buffer = HitCounterBuffer(session_factory=factory, flush_interval=0)
+    read_only = AICacheService(factory(), lru=AICacheLRU(max_size=0), hit_buffer=buffer)
+    timed("pure read + write-behind", calls, lambda key: read_only.get_cached(key, "coach"))
+
+    with_lru = AICacheService(factory(), lru=AICacheLRU(max_size=args.keys), hit_buffer=buffer)
+    timed("LRU + write-behind", calls, lambda key: with_lru.get_cached(key, "coach"))
+
+    started = time.perf_counter()
+    rows = buffer.flush()
+    print(f"  flush: {rows} rows in one UPDATE, {(time.perf_counter() - started) * 1000:.1f}ms")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=50)
+    parser.add_argument("--hits", type=int, default=5000)
+    main(parser.parse_args())
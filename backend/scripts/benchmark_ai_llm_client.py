@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: AI service transport, offline
+Runs against a local OpenRouter stand-in (tests/fixtures/openrouter_stub.py),
+whose --handshake latency is paid once per new connection, and compares:
+- one httpx.AsyncClient per call (previous behaviour) with the pooled client
+- repeated prompts through the prompt-hash cache (same data generation)
+- a burst of identical concurrent prompts, with and without in-flight dedupe
+
+Usage: python scripts/benchmark_ai_llm_client.py [--calls 50] [--burst 20] [--latency 0.05] [--handshake 0.03]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import services.ai_analysis as ai_analysis
+from services.ai_analysis import AIAnalysisService, close_llm_http_client
+from services.redis_cache import InMemoryCacheService
+from tests.fixtures.openrouter_stub import OpenRouterStubServer
+
+
+async def client_per_call(service: AIAnalysisService, prompt: str) -> str:
+    """Previous behaviour: new client (and connection) for every call"""
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.post(
+            f"{service.base_url}/chat/completions",
+            headers={"Authorization": f"Bearer {service.api_key}"},
+            json={"model": service.model, "messages": service._build_messages(prompt, None),
+                  "max_tokens": service.max_tokens, "temperature": service.temperature}
+        )
+        return response.json()["choices"][0]["message"]["content"]
+
+
+async def timed(label: str, stub: OpenRouterStubServer, calls) -> None:
+    stub.prompts.clear()
+    stub.connections.clear()
+    durations = []
+    started = time.perf_counter()
+    for call in calls:
+        call_started = time.perf_counter()
+        await call()
+        durations.append((time.perf_counter() - call_started) * 1000)
+    total = time.perf_counter() - started
+    print(f"  {label:<34} total {total * 1000:>8.1f}ms  p50 {statistics.median(durations):>7.2f}ms  "
+          f"upstream={stub.request_count:<4} connections={len(stub.connections)}")
+
+
+async def burst(label: str, stub: OpenRouterStubServer, factory, size: int) -> None:
+    stub.prompts.clear()
+    stub.connections.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(factory() for _ in range(size)))
+    total = time.perf_counter() - started
+    print(f"  {label:<34} total {total * 1000:>8.1f}ms  upstream={stub.request_count:<4} "
+          f"connections={len(stub.connections)}")
+
+
+async def run(args) -> None:
+    ai_analysis._cache_service = InMemoryCacheService()
+    async with OpenRouterStubServer(latency=args.latency, handshake_latency=args.handshake) as stub:
+        service = AIAnalysisService(api_key="benchmark")
+        service.base_url = stub.base_url
+        prompts = [f"Question {i} sur le budget de mars" for i in range(args.calls)]
+
+        print(f"{args.calls} sequential calls, stub latency {args.latency * 1000:.0f}ms "
+              f"+ {args.handshake * 1000:.0f}ms per new connection")
+        await timed("client per call (before)", stub, [lambda p=p: client_per_call(service, p) for p in prompts])
+        service.cache_enabled = False
+        await timed("pooled client", stub, [lambda p=p: service._call_llm(p) for p in prompts])
+        service.cache_enabled = True
+        await timed("pooled client, cache miss", stub,
+                    [lambda p=p: service._cached_llm(p, None, 60, "1.0") for p in prompts])
+        await timed("pooled client, cache hit", stub,
+                    [lambda p=p: service._cached_llm(p, None, 60, "1.0") for p in prompts])
+
+        print(f"{args.burst} concurrent identical prompts")
+        await burst("client per call (before)", stub, lambda: client_per_call(service, "Bilan de mars"), args.burst)
+        await burst("pooled client + in-flight dedupe", stub,
+                    lambda: service._cached_llm("Bilan de mars", None, 60, "2.0"), args.burst)
+        await close_llm_http_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=50, help="Sequential distinct prompts")
+    parser.add_argument("--burst", type=int, default=20, help="Concurrent identical prompts")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub generation latency (seconds)")
+    parser.add_argument("--handshake", type=float, default=0.03, help="Stub latency per new connection (seconds)")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
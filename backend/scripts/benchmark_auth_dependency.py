@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: overhead of the get_current_user dependency
+Calls auth.get_current_user with the same bearer token on a throwaway SQLite
+file, with:
+- cache disabled (previous behaviour: key consistency check + JWT decode + user lookup per request)
+- verified-token and principal caches enabled
+
+Usage: python scripts/benchmark_auth_dependency.py [--calls 5000] [--tokens 1]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import secrets
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("JWT_SECRET_KEY", secrets.token_urlsafe(32))
+
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateTable
+
+import services.auth_cache as auth_cache
+from auth import create_access_token, get_current_user
+from models.user import User
+from services.auth_cache import AuthCache
+
+
+def build_session(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(CreateTable(User.__table__))
+    db = sessionmaker(bind=engine)()
+    db.add(User(username="bench", hashed_password="x", is_active=True, failed_login_attempts=0))
+    db.commit()
+    return engine, db
+
+
+async def timed(label: str, db, credentials, calls: int) -> None:
+    durations = []
+    started = time.perf_counter()
+    for i in range(calls):
+        t0 = time.perf_counter()
+        await get_current_user(credentials[i % len(credentials)], db)
+        durations.append((time.perf_counter() - t0) * 1e6)
+    total = time.perf_counter() - started
+    durations.sort()
+    print(f"  {label:<28} p50 {statistics.median(durations):>8.1f}us  "
+          f"p99 {durations[int(len(durations) * 0.99) - 1]:>8.1f}us  total {total:>6.2f}s")
+
+
+async def main(args) -> None:
+    logging.disable(logging.WARNING)
+    path = os.path.join(tempfile.mkdtemp(prefix="authbench-"), "bench.db")
+    engine, db = build_session(path)
+    credentials = [
+        HTTPAuthorizationCredentials(
+            scheme="Bearer",
+            credentials=create_access_token({"sub": "bench", "n": n}, expires_delta=timedelta(hours=1))
+        )
+        for n in range(args.tokens)
+    ]
+
+    print(f"{args.calls} authenticated calls, {args.tokens} distinct token(s) ({path})")
+    auth_cache._auth_cache = AuthCache(token_cache_size=0, principal_cache_size=0)
+    await timed("no cache (before)", db, credentials, args.calls)
+
+    auth_cache._auth_cache = AuthCache()
+    await timed("token + principal cache", db, credentials, args.calls)
+    print(f"  stats: {auth_cache.get_auth_cache().get_stats()}")
+
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--tokens", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: BudgetIntelligenceSystem training and month-end projection
+Synthetic expenses for N categories over Y years (some categories sparse), with:
+- the batched NumPy fit (_train_category_models) against the previous loop of
+  one PolynomialFeatures + LinearRegression per category (--compare, needs scikit-learn)
+- predict_month_end + generate_alerts for every category
+
+Usage: python scripts/benchmark_budget_predictor.py [--categories 200] [--years 5] [--runs 20] [--compare]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_budget_predictor import BudgetIntelligenceSystem
+
+
+def build_transactions(categories: int, years: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    months = pd.period_range(end=pd.Period("2024-12", freq="M"), periods=12 * years, freq="M")
+    rows = []
+    for category in range(categories):
+        keep, base, slope = rng.uniform(0.05, 1.0), rng.uniform(20, 800), rng.normal(0, 5)
+        for position, month in enumerate(months):
+            if rng.random() > keep:
+                continue
+            for _ in range(int(rng.integers(1, 8))):
+                rows.append({
+                    "date_op": f"{month}-{int(rng.integers(1, 28)):02d}",
+                    "category": f"categorie {category}",
+                    "amount": -(base + slope * position + rng.normal(0, base * 0.2)) / 4,
+                    "is_expense": 1,
+                })
+    return pd.DataFrame(rows)
+
+
+def sklearn_loop(system: BudgetIntelligenceSystem) -> int:
+    """Previous training path: one scikit-learn model per category"""
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import PolynomialFeatures
+
+    trained = 0
+    for category in system.historical_data["category"].unique():
+        data = system.historical_data[system.historical_data["category"] == category].copy()
+        if len(data) < system.config["min_historical_months"]:
+            continue
+        data["month_index"] = range(len(data))
+        X = data[["month_index", "month_numeric", "is_holiday_month", "transaction_count"]].values
+        poly_features = PolynomialFeatures(degree=2, interaction_only=True)
+        X_poly = poly_features.fit_transform(X)
+        model = LinearRegression().fit(X_poly, data["total_spent"].values)
+        model.score(X_poly, data["total_spent"].values)
+        np.polyfit(np.arange(len(data)), data["total_spent"].values, 1)
+        trained += 1
+    return trained
+
+
+def timed(label: str, fn, runs: int) -> None:
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - started) * 1000)
+    print(f"  {label:<40} p50 {statistics.median(durations):>9.2f}ms  min {min(durations):>9.2f}ms")
+
+
+def main(args) -> None:
+    logging.disable(logging.INFO)
+    transactions = build_transactions(args.categories, args.years)
+    system = BudgetIntelligenceSystem()
+    system.fit(transactions.copy())
+    spending = {f"categorie {category}": 150.0 + category for category in range(args.categories)}
+    current_date = datetime(2025, 1, 14)
+
+    print(f"{len(transactions)} transactions, {args.categories} categories over {args.years} years "
+          f"({len(system.category_models)} trained, {args.runs} runs)")
+    timed("fit (aggregation + batched training)", lambda: system.fit(transactions.copy()), args.runs)
+    timed("_train_category_models (batched)", system._train_category_models, args.runs)
+    if args.compare:
+        timed("per-category scikit-learn loop (before)", lambda: sklearn_loop(system), max(1, args.runs // 4))
+    timed("predict_month_end", lambda: system.predict_month_end(current_date, spending), args.runs)
+    timed("generate_alerts", lambda: system.generate_alerts(current_date, spending), args.runs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", type=int, default=200)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--compare", action="store_true", help="also time the per-category scikit-learn loop")
+    main(parser.parse_args())
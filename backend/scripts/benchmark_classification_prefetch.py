@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: suggestions for one transactions page, per-row calls vs prefetch
+Builds a temporary SQLite database with a few years of tagged history and
+times, through the router with a TestClient, the suggestions of one page:
+- one GET /transactions/{id}/instant-suggestion per row (previous UI behaviour)
+- one GET /transactions/prefetch-suggestions for the page
+- the same prefetch revalidated with If-None-Match (304)
+
+Usage: python scripts/benchmark_classification_prefetch.py [--rows 50000] [--page 50] [--runs 10]
+"""
+
+import argparse
+import datetime as dt
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from auth import get_current_user
+from models.database import (
+    Base, Config, CustomProvision, FixedLine, MonthDataGeneration, Transaction, create_data_generation_triggers,
+    create_transaction_search_index, get_db
+)
+from routers.classification import router
+
+TAGS = ["courses", "abonnement", "transport", "loisirs", "énergie", "santé", "restaurant", "assurance", "loyer",
+        "enfants", "cadeaux", "vêtements"]
+
+
+def build_database(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    tables = [t.__table__ for t in (Transaction, Config, FixedLine, CustomProvision, MonthDataGeneration)]
+    Base.metadata.create_all(engine, tables=tables)
+    rng = random.Random(42)
+    months = [f"{year}-{month:02d}" for year in range(2021, 2026) for month in range(1, 13)]
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.bulk_insert_mappings(Transaction, [{
+            "month": month,
+            "date_op": dt.date.fromisoformat(f"{month}-{rng.randint(1, 28):02d}"),
+            "amount": -round(rng.uniform(1, 300), 2),
+            "label": f"CB MARCHAND {rng.randint(1, 500)}",
+            "tags": rng.choice(TAGS),
+            "expense_type": "VARIABLE",
+            "exclude": False,
+        } for month in (rng.choice(months) for _ in range(rows))])
+        db.commit()
+    with engine.begin() as conn:
+        create_data_generation_triggers(conn)
+        create_transaction_search_index(conn)
+        conn.exec_driver_sql("ANALYZE")
+    return engine, Session
+
+
+def timed(fn, runs: int) -> float:
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+
+def main(args) -> None:
+    logging.disable(logging.INFO)
+    warnings.simplefilter("ignore", DeprecationWarning)
+    with tempfile.TemporaryDirectory() as directory:
+        engine, Session = build_database(os.path.join(directory, "bench.db"), args.rows)
+        db = Session()
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1, username="bench")
+        client = TestClient(app)
+
+        ids = [row.id for row in db.query(Transaction.id).order_by(Transaction.id.desc()).limit(args.page)]
+        etag = client.get("/transactions/prefetch-suggestions", params={"ids": ids}).headers["etag"]
+
+        def per_row():
+            for tx_id in ids:
+                assert client.get(f"/transactions/{tx_id}/instant-suggestion").status_code == 200
+
+        def prefetch():
+            assert client.get("/transactions/prefetch-suggestions", params={"ids": ids}).status_code == 200
+
+        def revalidate():
+            response = client.get("/transactions/prefetch-suggestions", params={"ids": ids},
+                                  headers={"If-None-Match": etag})
+            assert response.status_code == 304
+
+        print(f"{args.rows} transactions, page of {args.page}, {args.runs} runs (p50)")
+        print(f"  {args.page} x instant-suggestion        {timed(per_row, args.runs):>9.1f}ms")
+        print(f"  prefetch-suggestions (200)        {timed(prefetch, args.runs):>9.1f}ms")
+        print(f"  prefetch-suggestions (304)        {timed(revalidate, args.runs):>9.1f}ms")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=10)
+    main(parser.parse_args())
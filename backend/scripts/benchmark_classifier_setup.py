@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request setup cost of the classification services
+Compares rebuilding the classifier / feedback models on every request with
+borrowing the process-wide shared models.
+
+Usage: python scripts/benchmark_classifier_setup.py [--feedback 2000] [--requests 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base, MLFeedback, MerchantKnowledgeBase, Transaction
+from services.expense_classification import (
+    ExpenseClassificationService, _build_classifier_model, get_expense_classification_service
+)
+from services.ml_feedback_learning import (
+    FeedbackModelRegistry, MLFeedbackLearningService, _feedback_signature,
+    get_feedback_model_registry, get_ml_feedback_learning_service
+)
+
+MERCHANTS = ["carrefour", "netflix", "edf", "sncf", "total", "amazon", "fnac", "orange", "free", "leclerc"]
+
+
+def build_database(feedback_rows: int):
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    tables = [Transaction.__table__, MLFeedback.__table__, MerchantKnowledgeBase.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    db = sessionmaker(bind=engine)()
+
+    rng = random.Random(42)
+    db.add(Transaction(month="2025-01", label="seed", amount=-1.0))
+    db.flush()
+    for i in range(feedback_rows):
+        merchant = f"{rng.choice(MERCHANTS)} {i % 300}"
+        db.add(MLFeedback(
+            transaction_id=1, original_tag="divers", corrected_tag=merchant.split()[0],
+            original_expense_type="VARIABLE", corrected_expense_type=rng.choice(["FIXED", "VARIABLE"]),
+            merchant_pattern=merchant, feedback_type=rng.choice(["correction", "acceptance"]),
+            confidence_before=rng.random(), pattern_learned=True, pattern_success_rate=0.8
+        ))
+    for i in range(feedback_rows // 10):
+        db.add(MerchantKnowledgeBase(
+            merchant_name=f"learned {i}", normalized_name=f"learned {i}", expense_type="VARIABLE",
+            confidence_score=0.8, suggested_tags="divers", created_by="feedback_learning", is_active=True
+        ))
+    db.commit()
+    return db
+
+
+def timed(fn, runs: int):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return {
+        "p50_us": round(statistics.median(samples), 1),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classification service setup benchmark")
+    parser.add_argument("--feedback", type=int, default=2000, help="MLFeedback rows to generate")
+    parser.add_argument("--requests", type=int, default=200, help="Simulated requests per scenario")
+    args = parser.parse_args()
+
+    db = build_database(args.feedback)
+
+    def per_request_rebuild():
+        classifier = ExpenseClassificationService(db, _build_classifier_model(0))
+        feedback_model = FeedbackModelRegistry()._build(db, _feedback_signature(db))
+        MLFeedbackLearningService(db, feedback_model).base_classifier = classifier
+
+    def shared_models():
+        get_expense_classification_service(db)
+        get_ml_feedback_learning_service(db)
+
+    shared_models()  # first request builds the shared models
+    results = {
+        "per_request_rebuild": timed(per_request_rebuild, args.requests),
+        "shared_models": timed(shared_models, args.requests),
+    }
+
+    for name, stats in results.items():
+        print(f"{name:22s} p50={stats['p50_us']:>10.1f}µs  p95={stats['p95_us']:>10.1f}µs")
+    print(f"feedback registry: {get_feedback_model_registry().get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
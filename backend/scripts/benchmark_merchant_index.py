@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: merchant knowledge lookups during month tagging
+Compares the former per-label lookup (exact query, then similarity over the
+top 100 merchants by usage) with the in-memory MerchantIndex batch API.
+
+Usage: python scripts/benchmark_merchant_index.py [--merchants 20000] [--labels 2000]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, desc
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base, MerchantKnowledgeBase
+from services.merchant_knowledge_service import MerchantKnowledgeService, get_merchant_index
+
+SYLLABLES = ["ba", "lo", "ri", "ma", "tu", "ne", "ca", "fo", "pi", "de",
+             "ser", "mon", "tra", "vel", "qui", "zo", "gar", "lin", "pha", "bou"]
+
+
+def build_database(merchants: int, rng: random.Random):
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[MerchantKnowledgeBase.__table__])
+    db = sessionmaker(bind=engine)()
+
+    def word():
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+    names = sorted({f"{word()} {word()}" if rng.random() < 0.5 else word() for _ in range(merchants)})
+    db.bulk_save_objects([
+        MerchantKnowledgeBase(
+            merchant_name=name, normalized_name=name, confidence_score=0.8,
+            usage_count=rng.randint(1, 100), is_active=True
+        ) for name in names
+    ])
+    db.commit()
+    return db, names, word
+
+
+def per_label_lookup(service, db, label):
+    """Former search_merchant_fuzzy strategy"""
+    normalized = service._normalize_merchant_name(label)
+    exact = db.query(MerchantKnowledgeBase).filter(
+        MerchantKnowledgeBase.normalized_name == normalized,
+        MerchantKnowledgeBase.is_active == True
+    ).all()
+    if exact:
+        return exact
+    top = db.query(MerchantKnowledgeBase).filter(
+        MerchantKnowledgeBase.is_active == True
+    ).order_by(desc(MerchantKnowledgeBase.usage_count)).limit(100).all()
+    return [m for m in top if service._calculate_similarity(normalized, m.normalized_name) >= service.similarity_threshold]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merchant lookup benchmark")
+    parser.add_argument("--merchants", type=int, default=20000, help="Merchants in the knowledge base")
+    parser.add_argument("--labels", type=int, default=2000, help="Transaction labels to resolve")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = random.Random(42)
+    db, names, word = build_database(args.merchants, rng)
+    labels = [
+        f"CB {rng.choice(names).upper()} {rng.randint(1, 28):02d}/03" if rng.random() < 0.8 else f"PRLV {word().upper()}"
+        for _ in range(args.labels)
+    ]
+    service = MerchantKnowledgeService()
+
+    started = time.perf_counter()
+    before = [per_label_lookup(service, db, label) for label in labels]
+    per_label_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    get_merchant_index().ensure_fresh(db)
+    build_s = time.perf_counter() - started
+    started = time.perf_counter()
+    after = service.search_merchants_batch(db, labels)
+    batch_s = time.perf_counter() - started
+
+    print(f"merchants={len(names)} labels={len(labels)}")
+    print(f"per-label queries : {per_label_s * 1000:9.1f}ms  matched={sum(1 for r in before if r)}")
+    print(f"index build       : {build_s * 1000:9.1f}ms")
+    print(f"batch lookup      : {batch_s * 1000:9.1f}ms  matched={sum(1 for label in labels if after[label])}")
+    print(f"index: {get_merchant_index().get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
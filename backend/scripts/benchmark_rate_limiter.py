@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rate limiter cost per request and memory with many client IPs
+Compares the former per-IP deque sliding window with the GCRA backends.
+
+Usage: python scripts/benchmark_rate_limiter.py [--requests 200000] [--ips 50000] [--redis]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from middleware.rate_limit_backends import InMemoryRateLimitBackend, create_rate_limit_backend
+
+
+class DequeSlidingWindow:
+    """Previous implementation: one deque of timestamps per IP, never pruned"""
+
+    def __init__(self):
+        self.request_counts = defaultdict(deque)
+
+    def acquire(self, key, limit, window_seconds):
+        now = time.time()
+        requests = self.request_counts[key]
+        while requests and requests[0] < now - window_seconds:
+            requests.popleft()
+        if len(requests) >= limit:
+            return False
+        requests.append(now)
+        return True
+
+
+def run(name, factory, keys):
+    # Timing and memory in separate passes: tracemalloc slows allocations down
+    backend = factory()
+    started = time.perf_counter()
+    for key in keys:
+        backend.acquire(key, 60, 60)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    backend = factory()
+    for key in keys:
+        backend.acquire(key, 60, 60)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:18s} {elapsed / len(keys) * 1e6:8.2f}µs/check  peak={peak / 1024 / 1024:8.2f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate limiter benchmark")
+    parser.add_argument("--requests", type=int, default=200000, help="Checks to run")
+    parser.add_argument("--ips", type=int, default=50000, help="Distinct client IPs")
+    parser.add_argument("--redis", action="store_true", help="Also run against the Redis backend")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    keys = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in (rng.randrange(args.ips) for _ in range(args.requests))]
+
+    run("deque (before)", DequeSlidingWindow, keys)
+    run("gcra memory", lambda: InMemoryRateLimitBackend(max_keys=10000), keys)
+    if args.redis:
+        run("gcra redis", lambda: create_rate_limit_backend("redis"), keys[:10000])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark: read throughput vs threads, one shared SQLite connection vs the read pool
+Builds a synthetic dataset (benchmarks/datagen) and runs the same read
+sessions (month page, tag totals of a month, 12-month expense trend) from 1..N
+threads, each session like one request:
+- shared: a single StaticPool connection for every thread (engine before the
+  read/write split, still used with DB_READ_POOL_SIZE=0)
+- pool:   models.database.read_engine (bounded pool of query_only connections)
+
+With --writer-interval-ms, a writer thread commits a small UPDATE every
+interval (on the shared connection, or through models.database.engine):
+readers keep running during writes in WAL mode, and on the shared
+connection the sessions of different threads end each other's
+transactions (counted as errors).
+
+Usage: python scripts/benchmark_read_concurrency.py [--profile medium] [--threads 1,2,4,8] [--duration 3] [--writer-interval-ms 20]
+"""
+
+import argparse
+import logging
+import os
+import random
+import secrets
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# Throwaway process: config/settings refuses to load without a signing key
+os.environ.setdefault("JWT_SECRET_KEY", secrets.token_urlsafe(48))
+
+
+def read_session(db, months, rng):
+    from sqlalchemy import func
+    from models.database import Transaction
+
+    kind = rng.randrange(3)
+    month = rng.choice(months)
+    if kind == 0:
+        return db.query(Transaction).filter(Transaction.month == month).order_by(
+            Transaction.date_op.desc(), Transaction.id.desc()).limit(50).all()
+    if kind == 1:
+        return db.query(Transaction.tags, func.sum(Transaction.amount), func.count(Transaction.id)).filter(
+            Transaction.month == month, Transaction.exclude == False).group_by(Transaction.tags).all()
+    window = months[max(0, months.index(month) - 11):months.index(month) + 1]
+    return db.query(Transaction.month, func.sum(Transaction.amount)).filter(
+        Transaction.month.in_(window), Transaction.is_expense == True, Transaction.exclude == False
+    ).group_by(Transaction.month).all()
+
+
+def measure(read_factory, write_factory, months, threads: int, duration: float, writer_interval: float, max_id: int):
+    stop = threading.Event()
+    latencies = [[] for _ in range(threads)]
+    writes = [0]
+    errors = []
+
+    def reader(index):
+        rng = random.Random(index)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with read_factory() as db:
+                    read_session(db, months, rng)
+            except Exception as e:
+                errors.append(e)
+                continue
+            latencies[index].append((time.perf_counter() - started) * 1000)
+
+    def writer():
+        from sqlalchemy import text
+        rng = random.Random(-1)
+        while not stop.wait(writer_interval):
+            try:
+                with write_factory() as db:
+                    db.execute(text("UPDATE transactions SET amount = amount WHERE id = :id"),
+                               {"id": rng.randint(1, max_id)})
+                    db.commit()
+            except Exception as e:
+                errors.append(e)
+                continue
+            writes[0] += 1
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    if writer_interval:
+        workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    time.sleep(duration)
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    samples = sorted(value for values in latencies for value in values)
+    return {
+        "ops_per_s": len(samples) / duration,
+        "p50_ms": statistics.median(samples) if samples else 0.0,
+        "p95_ms": samples[int(len(samples) * 0.95)] if samples else 0.0,
+        "writes_per_s": writes[0] / duration,
+        "errors": len(errors),
+        "first_error": str(errors[0]).splitlines()[0] if errors else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", default="medium")
+    parser.add_argument("--threads", default="1,2,4,8", help="Comma-separated thread counts")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds per measurement")
+    parser.add_argument("--writer-interval-ms", type=float, default=0.0, help="0 = readers only")
+    args = parser.parse_args()
+    thread_counts = [int(value) for value in args.threads.split(",")]
+
+    workdir = tempfile.mkdtemp(prefix="read-concurrency-")
+    db_path = os.path.join(workdir, "budget.db")
+    # models.database builds its engines from these on import
+    os.environ["DB_DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["DB_READ_POOL_SIZE"] = str(max(thread_counts))
+    os.chdir(workdir)
+    # Session errors of the shared mode are counted in the results (the pool logs them too)
+    logging.disable(logging.CRITICAL)
+
+    try:
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+
+        from benchmarks.datagen import PROFILES, build_database
+        from models.database import ReadSessionLocal, SessionLocal, read_engine
+
+        spec = PROFILES[args.profile]
+        started = time.perf_counter()
+        rows = build_database(db_path, spec)
+        print(f"dataset: {rows} transactions ({spec.years} years x {spec.per_month}/month) "
+              f"built in {time.perf_counter() - started:.1f}s")
+        writes = f", writer every {args.writer_interval_ms:g}ms" if args.writer_interval_ms else ""
+        print(f"read pool: {read_engine.pool.size()} connections, {os.cpu_count()} CPUs, "
+              f"{args.duration:g}s per run{writes}")
+
+        shared_engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False},
+                                      poolclass=StaticPool)
+        shared = sessionmaker(autocommit=False, autoflush=False, bind=shared_engine)
+        modes = [("shared", shared, shared), ("pool", ReadSessionLocal, SessionLocal)]
+
+        writer_interval = args.writer_interval_ms / 1000
+        print(f"\n  {'mode':<8} {'threads':>7} {'ops/s':>9} {'speedup':>8} {'p50':>9} {'p95':>9} {'writes/s':>9} "
+              f"{'errors':>7}")
+        first_errors = {}
+        for name, read_factory, write_factory in modes:
+            baseline = None
+            for threads in thread_counts:
+                result = measure(read_factory, write_factory, spec.months, threads, args.duration,
+                                 writer_interval, rows)
+                baseline = baseline or result["ops_per_s"]
+                print(f"  {name:<8} {threads:>7} {result['ops_per_s']:>9.0f} {result['ops_per_s'] / baseline:>7.2f}x "
+                      f"{result['p50_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms {result['writes_per_s']:>9.0f} "
+                      f"{result['errors']:>7}")
+                if result["first_error"]:
+                    first_errors.setdefault(name, result["first_error"])
+        for name, error in first_errors.items():
+            print(f"  ! {name}: {error}")
+        shared_engine.dispose()
+    finally:
+        os.chdir(BACKEND_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
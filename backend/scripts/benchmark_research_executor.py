@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bulk web research throughput, offline
+Runs against a local Nominatim stand-in (tests/fixtures/nominatim_stub.py) and
+compares one ClientSession + one lookup per transaction (previous behaviour)
+with the research executor (pooled session, merchant dedupe, bounded concurrency).
+
+Usage: python scripts/benchmark_research_executor.py [--transactions 500] [--merchants 40] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+
+from services.research_executor import ResearchExecutor
+from services.web_research_service import TokenBucket, WebResearchService, close_research_session
+from tests.fixtures.nominatim_stub import KNOWN_PLACES, NominatimStubServer
+
+
+def build_labels(transactions: int, merchants: int):
+    rng = random.Random(42)
+    keywords = list(KNOWN_PLACES) + ["boulangerie", "garage", "librairie"]
+    names = [f"{keywords[i % len(keywords)].upper()} {i}" for i in range(merchants)]
+    return [f"CB {rng.choice(names)} {rng.randint(1, 28):02d}/03/25" for _ in range(transactions)]
+
+
+async def per_transaction(stub, labels, concurrency: int):
+    """Previous behaviour: new session and full lookup for every transaction"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(label):
+        async with semaphore:
+            session = aiohttp.ClientSession()
+            try:
+                service = WebResearchService(session=session, rate_limiter=TokenBucket(rate=0), osm_url=stub.url)
+                return await service.research_merchant(label)
+            finally:
+                await session.close()
+
+    return await asyncio.gather(*(one(label) for label in labels))
+
+
+async def with_executor(stub, labels, concurrency: int):
+    executor = ResearchExecutor(
+        max_concurrency=concurrency,
+        session_factory=None,
+        service_factory=lambda: WebResearchService(rate_limiter=TokenBucket(rate=0), osm_url=stub.url)
+    )
+    results = await executor.research_many(labels)
+    return results, executor.get_stats()
+
+
+async def run(args):
+    labels = build_labels(args.transactions, args.merchants)
+    async with NominatimStubServer(latency=args.latency) as stub:
+        started = time.perf_counter()
+        await per_transaction(stub, labels, args.concurrency)
+        legacy_seconds = time.perf_counter() - started
+        legacy_requests = stub.request_count
+
+        stub.queries.clear()
+        started = time.perf_counter()
+        _, stats = await with_executor(stub, labels, args.concurrency)
+        executor_seconds = time.perf_counter() - started
+        executor_requests = stub.request_count
+        await close_research_session()
+
+    print(f"{len(labels)} transactions, {args.merchants} distinct merchants, stub latency {args.latency * 1000:.0f}ms")
+    for name, seconds, requests in (
+        ("per_transaction", legacy_seconds, legacy_requests),
+        ("research_executor", executor_seconds, executor_requests),
+    ):
+        print(f"{name:18s} {seconds:8.2f}s  {len(labels) / seconds:8.1f} tx/s  upstream requests={requests}")
+    print(f"executor stats: {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk web research benchmark (offline)")
+    parser.add_argument("--transactions", type=int, default=500, help="Transactions to enrich")
+    parser.add_argument("--merchants", type=int, default=40, help="Distinct merchants among them")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub server latency (seconds)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent lookups")
+    args = parser.parse_args()
+    logging.getLogger("services.web_research_service").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: transaction label / tag search, LIKE '%x%' scans vs the FTS5 index
+Builds a temporary SQLite database of synthetic transactions, installs the
+index (backfill) and times the same lookups both ways:
+- free-text search (search_transactions, ranked) vs label/tags LIKE
+- the same restricted to one month
+- tag filter (tag_clause) vs Transaction.tags.contains()
+
+Usage: python scripts/benchmark_transaction_search.py [--rows 500000] [--runs 20]
+"""
+
+import argparse
+import datetime as dt
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, or_
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base, Transaction, create_transaction_search_index
+from services.transaction_search import search_transactions, tag_clause
+
+MERCHANTS = ["CARREFOUR MARKET", "LECLERC DRIVE", "SNCF INTERNET", "AMAZON EU", "BOULANGERIE PAUL", "TOTAL ACCESS",
+             "PHARMACIE DU CENTRE", "FNAC", "DECATHLON", "EDF ENERGIE", "ORANGE MOBILE", "RESTAURANT LE ZINC"]
+PREFIXES = ["CB ", "CARTE ", "PRLV SEPA ", "VIR "]
+TAGS = ["courses", "transport", "loisirs", "énergie", "santé", "frais fixes", "restaurant", "enfants", ""]
+
+
+def build_database(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[Transaction.__table__])
+    rng = random.Random(42)
+    months = [f"{year}-{month:02d}" for year in range(2019, 2026) for month in range(1, 13)]
+    with sessionmaker(bind=engine)() as db:
+        db.bulk_insert_mappings(Transaction, [{
+            "month": month,
+            "date_op": dt.date.fromisoformat(f"{month}-{rng.randint(1, 28):02d}"),
+            "label": f"{rng.choice(PREFIXES)}{rng.choice(MERCHANTS)} {rng.randint(1000, 99999)} {rng.randint(1, 28):02d}/{month[5:]}",
+            "amount": -round(rng.uniform(1, 300), 2),
+            "tags": ",".join(rng.sample(TAGS, rng.randint(0, 2))).strip(","),
+            "exclude": False,
+        } for month in (rng.choice(months) for _ in range(rows))])
+        db.commit()
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        create_transaction_search_index(conn)
+    print(f"index backfill for {rows} rows: {time.perf_counter() - started:.1f}s")
+    return engine
+
+
+def timed(label: str, fn, runs: int) -> None:
+    durations, count = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        count = len(fn())
+        durations.append((time.perf_counter() - started) * 1000)
+    print(f"  {label:<44} p50 {statistics.median(durations):>9.2f}ms  ({count} rows)")
+
+
+def main(args) -> None:
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_database(os.path.join(directory, "bench.db"), args.rows)
+        db = sessionmaker(bind=engine)()
+        like = lambda term: or_(Transaction.label.contains(term), Transaction.tags.contains(term))
+
+        for term in ("boulang", "zinc 4821", "pharmacie centre"):
+            timed(f"LIKE '%{term}%' (first 50)",
+                  lambda: db.query(Transaction).filter(like(term)).order_by(Transaction.date_op.desc()).limit(50).all(),
+                  args.runs)
+            timed(f"FTS '{term}' ranked (first 50)", lambda: search_transactions(db, term, limit=50), args.runs)
+        timed("LIKE '%carrefour%' month 2024-06",
+              lambda: db.query(Transaction).filter(Transaction.month == "2024-06", like("carrefour")).all(), args.runs)
+        timed("FTS 'carrefour' month 2024-06",
+              lambda: search_transactions(db, "carrefour", months=["2024-06"], limit=500), args.runs)
+        timed("tags.contains('santé') (first 200)",
+              lambda: db.query(Transaction).filter(Transaction.tags.contains("santé")).limit(200).all(), args.runs)
+        timed("tag_clause('santé') (first 200)",
+              lambda: db.query(Transaction).filter(tag_clause(db, "santé")).limit(200).all(), args.runs)
+        timed("tags.contains('enfants') count",
+              lambda: [db.query(Transaction.id).filter(Transaction.tags.contains("enfants")).count()], args.runs)
+        timed("tag_clause('enfants') count",
+              lambda: [db.query(Transaction.id).filter(tag_clause(db, "enfants")).count()], args.runs)
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--runs", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: GET /transactions page cost by depth, OFFSET vs keyset cursor
+Builds a temporary SQLite database with one large month and times, through the
+router with a TestClient:
+- page N by page number (OFFSET + COUNT on every page, previous behaviour)
+- page N by cursor (keyset on (sort column, id), total memoised per data generation)
+- GET /transactions/all as a JSON list vs streamed NDJSON
+
+Usage: python scripts/benchmark_transactions_pagination.py [--rows 100000] [--limit 50] [--runs 20]
+"""
+
+import argparse
+import datetime as dt
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import (
+    Base, Config, CustomProvision, FixedLine, MonthDataGeneration, Transaction, create_data_generation_triggers,
+    get_db
+)
+from routers.transactions import router
+
+
+def build_database(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    tables = [t.__table__ for t in (Transaction, Config, FixedLine, CustomProvision, MonthDataGeneration)]
+    Base.metadata.create_all(engine, tables=tables)
+    with engine.begin() as conn:
+        create_data_generation_triggers(conn)
+    rng = random.Random(42)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.bulk_insert_mappings(Transaction, [{
+            "month": "2025-03",
+            "date_op": dt.date(2025, 3, rng.randint(1, 31)),
+            "amount": -round(rng.uniform(1, 500), 2),
+            "label": f"CB MARCHAND {rng.randint(1, 2000)}",
+            "tags": rng.choice(["courses", "loisirs", "transport", ""]),
+            "expense_type": "VARIABLE",
+            "exclude": False,
+        } for _ in range(rows)])
+        db.commit()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    return engine, Session
+
+
+def timed(client: TestClient, params: dict, runs: int) -> float:
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        response = client.get("/transactions", params=params)
+        durations.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.text
+    return statistics.median(durations)
+
+
+def main(args) -> None:
+    logging.disable(logging.INFO)
+    warnings.simplefilter("ignore", DeprecationWarning)
+    with tempfile.TemporaryDirectory() as directory:
+        engine, Session = build_database(os.path.join(directory, "bench.db"), args.rows)
+        db = Session()
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_db] = lambda: db
+        client = TestClient(app)
+
+        last_page = args.rows // args.limit
+        depths = sorted({1, 10, last_page // 10, last_page // 2, last_page - 1} - {0})
+        print(f"{args.rows} transactions in one month, limit {args.limit}, {args.runs} runs (p50)")
+        for sort_by in ("date", "amount", "label"):
+            base = {"month": "2025-03", "sort_by": sort_by, "limit": args.limit}
+            # Cursor of every depth, collected by walking with large pages
+            cursors, cursor, page = {}, None, 1
+            while page < max(depths):
+                body = client.get("/transactions", params=dict(base, **({"cursor": cursor} if cursor else {}))).json()
+                cursor = body["next_cursor"]
+                page += 1
+                if page in depths:
+                    cursors[page] = cursor
+            for depth in depths:
+                offset_ms = timed(client, dict(base, page=depth), args.runs)
+                cursor_ms = timed(client, dict(base, cursor=cursors[depth]), args.runs) if depth > 1 else offset_ms
+                print(f"  sort={sort_by:<6} page {depth:>6}: offset {offset_ms:>8.2f}ms   cursor {cursor_ms:>8.2f}ms")
+
+        for fmt in ("json", "ndjson"):
+            started = time.perf_counter()
+            response = client.get("/transactions/all", params={"month": "2025-03", "format": fmt})
+            print(f"  /transactions/all format={fmt:<7} {(time.perf_counter() - started) * 1000:>9.1f}ms  "
+                  f"{len(response.content) / 1e6:.1f} MB")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Load test: event loop responsiveness during a large auto-tagging batch
+Seeds a throwaway SQLite database with N transactions, runs a batch
+auto-tagging job over all of them and probes /health and /summary in the
+same event loop (httpx ASGI transport) while it runs.
+
+Two modes are compared:
+- inline: blocking work runs directly on the event loop (previous behaviour)
+- executors: DB work on the bounded thread pool, classification chunks on the process pool
+
+Usage: python scripts/load_test_event_loop.py [--transactions 10000] [--mode both] [--baseline-seconds 2]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Throwaway working directory: app.py and models.database both open ./budget.db
+os.chdir(tempfile.mkdtemp(prefix="loadtest-"))
+
+import httpx
+
+MONTH = "2025-01"
+LABELS = [
+    "PRLV NETFLIX", "CB CARREFOUR MARKET", "CB TOTAL ACCESS", "PRLV EDF", "CB PHARMACIE DU CENTRE",
+    "CB AMAZON EU", "SNCF INTERNET", "CB MCDONALDS", "PRLV ORANGE", "CB BOULANGERIE PAUL", "CB GARAGE DUPONT",
+]
+PROBES = ["/health", f"/summary?month={MONTH}"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def seed(transactions: int) -> None:
+    from models.database import SessionLocal, Transaction, ensure_default_config
+    rng = random.Random(42)
+    db = SessionLocal()
+    try:
+        ensure_default_config(db)
+        db.query(Transaction).delete()
+        db.bulk_insert_mappings(Transaction, [
+            {
+                "month": MONTH,
+                "label": f"{rng.choice(LABELS)} {rng.randint(1, 28):02d}/01",
+                "amount": -round(rng.uniform(2, 300), 2),
+                "is_expense": True,
+                "exclude": False,
+                "tags": "",
+            }
+            for _ in range(transactions)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def reset_tags() -> None:
+    from models.database import SessionLocal, Transaction
+    db = SessionLocal()
+    try:
+        db.query(Transaction).update({Transaction.tags: ""}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def install_executors(mode: str) -> None:
+    import services.executors as executors_module
+
+    class InlineExecutors(executors_module.ExecutorLayer):
+        """Previous behaviour: blocking calls made directly on the event loop"""
+
+        async def run_db(self, fn, *args, **kwargs):
+            return fn(*args, **kwargs)
+
+        async def run_cpu(self, fn, *args, items=None):
+            return fn(*args)
+
+    executors_module.shutdown_executors()
+    executors_module._executors = InlineExecutors() if mode == "inline" else executors_module.ExecutorLayer()
+
+
+async def probe(client: httpx.AsyncClient, path: str, samples: list, stop: asyncio.Event, interval: float) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+        await asyncio.sleep(interval)
+
+
+async def measure(client, seconds: float, interval: float, work=None):
+    """Probe every endpoint until `work` finishes (or for `seconds` without work)"""
+    stop = asyncio.Event()
+    samples = {path: [] for path in PROBES}
+    probes = [asyncio.create_task(probe(client, path, samples[path], stop, interval)) for path in PROBES]
+    started = time.perf_counter()
+    if work is None:
+        await asyncio.sleep(seconds)
+    else:
+        await work
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*probes)
+    return samples, elapsed
+
+
+async def run_mode(app, mode: str, args) -> dict:
+    from models.database import SessionLocal
+    from models.schemas import BatchAutoTagRequest
+    from services.batch_processor import BatchProcessor
+    from services.executors import get_executors
+
+    install_executors(mode)
+    reset_tags()
+    if mode == "executors":
+        await get_executors().warm_up()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        idle, _ = await measure(client, args.baseline_seconds, args.probe_interval)
+
+        processor = BatchProcessor(chunk_size=args.chunk_size)
+        db = SessionLocal()
+        try:
+            request = BatchAutoTagRequest(month=MONTH, confidence_threshold=0.0, max_concurrent=5)
+            response = await processor.initiate_batch_operation(request, db, "loadtest")
+        finally:
+            db.close()
+        busy, batch_seconds = await measure(client, 0, args.probe_interval, processor._tasks[response.batch_id])
+
+    progress = processor.get_batch_progress(response.batch_id)
+    return {
+        "mode": mode,
+        "idle": idle,
+        "busy": busy,
+        "batch_seconds": batch_seconds,
+        "processed": progress.processed_transactions,
+        "status": progress.status,
+    }
+
+
+def report(result: dict) -> None:
+    print(f"\n[{result['mode']}] batch of {result['processed']} transactions "
+          f"{result['status']} in {result['batch_seconds']:.2f}s")
+    print(f"  {'endpoint':<22} {'idle p50':>9} {'idle p99':>9} {'batch p50':>10} {'batch p99':>10} {'samples':>8}")
+    for path in PROBES:
+        idle, busy = result["idle"][path], result["busy"][path]
+        print(f"  {path.split('?')[0]:<22} {statistics.median(idle):>8.1f}ms {percentile(idle, 99):>8.1f}ms "
+              f"{statistics.median(busy) if busy else 0:>9.1f}ms {percentile(busy, 99):>9.1f}ms {len(busy):>8}")
+
+
+async def main(args) -> None:
+    from app import app
+    from auth import get_current_user
+    from dependencies import auth as auth_dependencies
+    from services.executors import shutdown_executors
+    logging.disable(logging.WARNING)
+
+    user = SimpleNamespace(username="loadtest", is_admin=False)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[auth_dependencies.get_current_user] = lambda: user
+
+    seed(args.transactions)
+    modes = ["inline", "executors"] if args.mode == "both" else [args.mode]
+    try:
+        for mode in modes:
+            report(await run_mode(app, mode, args))
+    finally:
+        shutdown_executors()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=10000)
+    parser.add_argument("--mode", choices=["both", "inline", "executors"], default="both")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--baseline-seconds", type=float, default=2.0)
+    parser.add_argument("--probe-interval", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Startup profile: worker time-to-ready, import-time report and preload sharing
+Every measurement runs in a fresh interpreter inside a throwaway working
+directory (app.py and models.database open ./budget.db).
+
+- time-to-ready: spawn -> `import app` -> startup events -> first GET /health
+  against an existing database of N transactions, with LAZY_ROUTERS=false and a
+  full boot-time ANALYZE (DB_ANALYSIS_LIMIT=0, previous behaviour) and with the
+  defaults (lazy routers, bounded ANALYZE)
+- --importtime: top modules by cumulative import time (python -X importtime)
+- --preload: forks workers from a master that imported the app (gunicorn
+  preload_app = True) and reports per-worker shared vs private memory
+  (/proc/<pid>/smaps_rollup), against workers importing the app themselves
+
+Usage: python scripts/profile_startup.py [--runs 5] [--transactions 20000] [--importtime] [--preload --workers 4]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD_READY = r"""
+import asyncio, json, os, sys, time
+sys.path.insert(0, os.environ["PROFILE_BACKEND_DIR"])
+spawned_at = float(os.environ["PROFILE_SPAWNED_AT"])
+interpreter_s = time.time() - spawned_at
+
+started = time.perf_counter()
+import app as app_module
+import_s = time.perf_counter() - started
+
+async def ready():
+    await app_module.app.router.startup()
+    messages, pending = [], [{"type": "http.request", "body": b"", "more_body": False}]
+    async def receive():
+        if pending:
+            return pending.pop()
+        await asyncio.Event().wait()
+    async def send(message):
+        messages.append(message)
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/health", "raw_path": b"/health", "query_string": b"",
+             "root_path": "", "headers": [(b"host", b"profile")], "client": ("127.0.0.1", 1),
+             "server": ("profile", 80)}
+    await app_module.app(scope, receive, send)
+    return messages[0]["status"]
+
+started = time.perf_counter()
+status = asyncio.run(ready())
+startup_s = time.perf_counter() - started
+
+rss_kb = 0
+with open("/proc/self/status") as f:
+    for line in f:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+print(json.dumps({
+    "ready_s": time.time() - spawned_at,
+    "interpreter_s": interpreter_s,
+    "import_s": import_s,
+    "startup_s": startup_s,
+    "status": status,
+    "rss_mb": rss_kb / 1024,
+    "modules": len(sys.modules),
+    "routes": len(app_module.app.routes),
+    "pandas_loaded": "pandas" in sys.modules,
+}))
+os._exit(0)
+"""
+
+CHILD_SEED = r"""
+import os, random, sys
+sys.path.insert(0, os.environ["PROFILE_BACKEND_DIR"])
+from models.database import SessionLocal, Transaction
+rng = random.Random(42)
+db = SessionLocal()
+db.bulk_insert_mappings(Transaction, [
+    {"month": f"2024-{rng.randint(1, 12):02d}", "label": f"CB MARCHAND {rng.randint(1, 500)}",
+     "amount": -round(rng.uniform(2, 300), 2), "is_expense": True, "exclude": False,
+     "tags": rng.choice(["", "courses", "transport", "loisirs"])}
+    for _ in range(int(os.environ["PROFILE_TRANSACTIONS"]))
+])
+db.commit()
+os._exit(0)
+"""
+
+CHILD_PRELOAD = r"""
+import gc, json, os, sys, time
+sys.path.insert(0, os.environ["PROFILE_BACKEND_DIR"])
+workers = int(os.environ["PROFILE_WORKERS"])
+preload = os.environ["PROFILE_PRELOAD"] == "1"
+
+def smaps():
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[-1] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss_mb": values.get("Rss", 0) / 1024,
+        "pss_mb": values.get("Pss", 0) / 1024,
+        "shared_mb": (values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0)) / 1024,
+        "private_mb": (values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)) / 1024,
+    }
+
+def load_app():
+    import app as app_module
+    # What a worker holds after warm-up: every lazy router imported
+    app_module.lazy_routers.load_all()
+    return app_module
+
+if preload:
+    load_app()
+    gc.freeze()  # gunicorn.conf.py when_ready: keep preloaded objects out of the GC (no COW on collection)
+
+reader, writer = os.pipe()
+children = []
+for _ in range(workers):
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(reader)
+            if not preload:
+                load_app()
+            gc.collect()
+            time.sleep(0.5)
+            os.write(writer, (json.dumps(smaps()) + "\n").encode())
+            status = 0
+        finally:
+            os._exit(status)
+    children.append(pid)
+os.close(writer)
+for pid in children:
+    os.waitpid(pid, 0)
+with os.fdopen(reader) as f:
+    print(json.dumps([json.loads(line) for line in f if line.strip()]))
+os._exit(0)
+"""
+
+
+def run_child(code: str, env_overrides: dict, args_python=(), cwd=None) -> subprocess.CompletedProcess:
+    env = {
+        **os.environ,
+        "PROFILE_BACKEND_DIR": BACKEND_DIR,
+        "PROFILE_SPAWNED_AT": repr(time.time()),
+        "LAZY_ROUTERS_WARMUP": "false",
+        "OCR_WARMUP": "false",
+        **env_overrides,
+    }
+    result = subprocess.run(
+        [sys.executable, *args_python, "-c", code],
+        cwd=cwd or tempfile.mkdtemp(prefix="startup-"),
+        env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return result
+
+
+def time_to_ready(runs: int, transactions: int) -> None:
+    workdir = tempfile.mkdtemp(prefix="startup-")
+    run_child(CHILD_SEED, {"PROFILE_TRANSACTIONS": str(transactions)}, cwd=workdir)
+    print(f"Cold worker time-to-ready ({runs} runs each, fresh interpreter per run, {transactions} transactions)")
+    print(f"  {'mode':<34} {'ready p50':>10} {'import':>8} {'startup':>8} {'rss':>8} {'modules':>8} {'routes':>7}")
+    modes = (
+        ("eager, full ANALYZE (before)", {"LAZY_ROUTERS": "false", "DB_ANALYSIS_LIMIT": "0"}),
+        ("lazy routers, bounded ANALYZE", {"LAZY_ROUTERS": "true"}),
+    )
+    by_mode = {label: [] for label, _ in modes}
+    for _ in range(runs):
+        # Interleaved so that machine load drifts affect both modes alike
+        for label, env in modes:
+            by_mode[label].append(json.loads(run_child(CHILD_READY, env, cwd=workdir).stdout.strip().splitlines()[-1]))
+    results = []
+    for label, _ in modes:
+        samples = by_mode[label]
+        assert all(sample["status"] == 200 for sample in samples)
+        ready = statistics.median(sample["ready_s"] for sample in samples)
+        results.append(ready)
+        last = samples[-1]
+        print(f"  {label:<34} {ready:>9.2f}s {statistics.median(s['import_s'] for s in samples):>7.2f}s "
+              f"{statistics.median(s['startup_s'] for s in samples):>7.2f}s {last['rss_mb']:>6.0f}MB "
+              f"{last['modules']:>8} {last['routes']:>7}")
+    print(f"  time-to-ready reduced by {100 * (1 - results[1] / results[0]):.0f}%")
+
+
+def import_time_report(top: int) -> None:
+    code = f"import sys; sys.path.insert(0, {BACKEND_DIR!r}); import app"
+    result = run_child(code, {}, args_python=("-X", "importtime"))
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    print(f"\nImport-time report (python -X importtime, LAZY_ROUTERS=true), top {top} by cumulative time")
+    print(f"  {'module':<48} {'cumulative':>11} {'self':>9}")
+    for cumulative_us, self_us, name in sorted(rows, key=lambda row: -row[0])[:top]:
+        print(f"  {name:<48} {cumulative_us / 1000:>9.1f}ms {self_us / 1000:>7.1f}ms")
+    print(f"  ({len(rows)} modules imported)")
+
+
+def preload_report(workers: int) -> None:
+    print(f"\nMemory per worker, {workers} forked workers with every router loaded (/proc/<pid>/smaps_rollup)")
+    print(f"  {'mode':<30} {'rss':>8} {'shared':>8} {'private':>8} {'pss':>8} {'sum pss':>9}")
+    workdir = tempfile.mkdtemp(prefix="startup-")
+    run_child(CHILD_SEED, {"PROFILE_TRANSACTIONS": "0"}, cwd=workdir)  # schema created once, not by racing workers
+    for label, preload in (("preload_app = False", "0"), ("preload_app = True + gc.freeze", "1")):
+        stats = json.loads(run_child(CHILD_PRELOAD, {"PROFILE_WORKERS": str(workers), "PROFILE_PRELOAD": preload},
+                                     cwd=workdir).stdout.strip().splitlines()[-1])
+        assert len(stats) == workers, f"{workers - len(stats)} worker(s) failed"
+        avg = {key: statistics.mean(worker[key] for worker in stats) for key in stats[0]}
+        print(f"  {label:<30} {avg['rss_mb']:>6.0f}MB {avg['shared_mb']:>6.0f}MB {avg['private_mb']:>6.0f}MB "
+              f"{avg['pss_mb']:>6.0f}MB {sum(worker['pss_mb'] for worker in stats):>7.0f}MB")
+
+
+def main(args) -> None:
+    os.environ.setdefault("ENVIRONMENT", "test")
+    time_to_ready(args.runs, args.transactions)
+    if args.importtime:
+        import_time_report(args.top)
+    if args.preload:
+        preload_report(args.workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--importtime", action="store_true", help="print the import-time report")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--preload", action="store_true", help="measure preload_app copy-on-write sharing")
+    parser.add_argument("--workers", type=int, default=4)
+    main(parser.parse_args())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: hot endpoints on a synthetic dataset, JSON baselines, regression check
+Runs offline against SQLite (benchmarks/ package):
+
+    generate  build a dataset database (N years x M transactions per month)
+    run       build (or reuse) the dataset in a work directory, run the scenarios
+              against the app in-process, print p50/p95/p99 and SQL statement
+              counts; --save writes the JSON report, --compare checks it against
+              a baseline (exit code 1 on regression)
+    compare   compare two saved reports
+
+Latencies are steady-state (warm caches after --warmup requests), except the
+"_cold" analytics scenarios, which clear the calculation cache before each
+request; compare reports of the same machine and dataset only.
+
+Usage: python scripts/run_benchmarks.py run [--profile small] [--iterations 20] [--save benchmarks/baselines/small.json]
+       python scripts/run_benchmarks.py run --compare benchmarks/baselines/small.json
+       python scripts/run_benchmarks.py compare BASELINE.json CURRENT.json
+       python scripts/run_benchmarks.py generate --profile medium --db /tmp/budget-medium.db
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import secrets
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from dataclasses import replace
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# Throwaway process: config/settings refuses to load without a signing key
+os.environ.setdefault("JWT_SECRET_KEY", secrets.token_urlsafe(48))
+
+from benchmarks.datagen import PROFILES, DatasetSpec, build_database
+from benchmarks.harness import (
+    build_report, compare_reports, format_findings, format_results, load_report, run_suite, save_report
+)
+from benchmarks.scenarios import build_scenarios
+
+
+def dataset_spec(args) -> DatasetSpec:
+    spec = PROFILES[args.profile]
+    overrides = {key: value for key, value in (("years", args.years), ("per_month", args.per_month),
+                                               ("seed", args.seed)) if value is not None}
+    return replace(spec, **overrides)
+
+
+def load_app(use_redis: bool = False):
+    """Import the app from the current directory (app.py and models.database open ./budget.db)"""
+    from app import app
+    from auth import get_current_user
+    from dependencies import auth as auth_dependencies
+    import services.redis_cache as redis_cache
+
+    if not use_redis:
+        # Offline and reproducible: the in-memory fallback whether or not a local Redis runs
+        redis_cache._redis_cache_instance = redis_cache.InMemoryCacheService()
+
+    user = SimpleNamespace(id=1, username="benchmark", is_admin=False)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[auth_dependencies.get_current_user] = lambda: user
+    return app
+
+
+def command_generate(args) -> int:
+    spec = dataset_spec(args)
+    db_path = os.path.abspath(args.db)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    # models.database opens ./budget.db on import: keep it next to the dataset
+    os.chdir(os.path.dirname(db_path))
+    started = time.perf_counter()
+    count = build_database(db_path, spec)
+    print(f"{count} transactions ({spec.years} years x {spec.per_month}/month) written to {db_path} "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+def command_run(args) -> int:
+    spec = dataset_spec(args)
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="benchmarks-"))
+    os.makedirs(workdir, exist_ok=True)
+    db_path = os.path.join(workdir, "budget.db")
+    source_db = os.path.abspath(args.db) if args.db else None
+    save_path = os.path.abspath(args.save) if args.save else None
+    baseline = load_report(args.compare) if args.compare else None
+
+    # Failed requests are reported with the results (first_error)
+    logging.disable(logging.ERROR)
+    warnings.simplefilter("ignore")
+    try:
+        # app.py and models.database open ./budget.db: the dataset is the work directory's budget.db
+        os.chdir(workdir)
+        if source_db:
+            shutil.copyfile(source_db, db_path)
+        elif not (args.reuse and os.path.exists(db_path)):
+            if os.path.exists(db_path):
+                os.remove(db_path)
+            started = time.perf_counter()
+            count = build_database(db_path, spec)
+            print(f"dataset: {count} transactions ({spec.years} years x {spec.per_month}/month) "
+                  f"built in {time.perf_counter() - started:.1f}s")
+
+        scenarios = build_scenarios(spec, workdir)
+        if args.scenarios:
+            wanted = set(args.scenarios.split(","))
+            unknown = wanted - {scenario.name for scenario in scenarios}
+            if unknown:
+                print(f"unknown scenarios: {', '.join(sorted(unknown))}", file=sys.stderr)
+                return 2
+            scenarios = [scenario for scenario in scenarios if scenario.name in wanted]
+
+        app = load_app(args.redis)
+        # The imported app is long-lived: keep full collections of it out of the samples
+        gc.collect()
+        gc.freeze()
+
+        print(f"{len(scenarios)} scenarios, {args.iterations} iterations "
+              f"(warmup {args.warmup}, concurrency {args.concurrency})")
+        progress = (lambda scenario, result: print(f"  . {scenario.name}", file=sys.stderr)) if args.verbose else None
+        results = asyncio.run(run_suite(app, scenarios, args.iterations, args.warmup, args.concurrency, progress))
+        report = build_report(spec, results, args.iterations, args.warmup, args.concurrency, label=args.label)
+        print(format_results(results))
+    finally:
+        os.chdir(BACKEND_DIR)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if save_path:
+        save_report(report, save_path)
+        print(f"report saved to {save_path}")
+    if baseline is not None:
+        findings = compare_reports(baseline, report, args.tolerance, args.min_delta_ms)
+        print(f"\ncompared to {args.compare}:")
+        print(format_findings(findings))
+        return 1 if any(finding.kind == "regression" for finding in findings) else 0
+    return 0
+
+
+def command_compare(args) -> int:
+    findings = compare_reports(load_report(args.baseline), load_report(args.current), args.tolerance, args.min_delta_ms)
+    print(format_findings(findings))
+    return 1 if any(finding.kind == "regression" for finding in findings) else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def dataset_arguments(command):
+        command.add_argument("--profile", choices=sorted(PROFILES), default="small")
+        command.add_argument("--years", type=int, help="Override the profile's number of years")
+        command.add_argument("--per-month", type=int, help="Override the profile's transactions per month")
+        command.add_argument("--seed", type=int)
+
+    def comparison_arguments(command):
+        command.add_argument("--tolerance", type=float, default=0.25, help="Relative latency growth flagged (0.25 = +25%%)")
+        command.add_argument("--min-delta-ms", type=float, default=2.0, help="Latency growth below this is never flagged")
+
+    generate = commands.add_parser("generate", help="Build a dataset database")
+    dataset_arguments(generate)
+    generate.add_argument("--db", required=True, help="Path of the SQLite file to create")
+    generate.set_defaults(handler=command_generate)
+
+    run = commands.add_parser("run", help="Run the scenarios")
+    dataset_arguments(run)
+    comparison_arguments(run)
+    run.add_argument("--iterations", type=int, default=20)
+    run.add_argument("--warmup", type=int, default=2)
+    run.add_argument("--concurrency", type=int, default=1)
+    run.add_argument("--scenarios", help="Comma-separated scenario names (default: all)")
+    run.add_argument("--db", help="Use a copy of this dataset database instead of generating one")
+    run.add_argument("--workdir", help="Keep the dataset and import file in this directory")
+    run.add_argument("--reuse", action="store_true", help="Reuse the dataset already in --workdir")
+    run.add_argument("--save", help="Write the JSON report to this path")
+    run.add_argument("--compare", help="Baseline report to compare against (exit 1 on regression)")
+    run.add_argument("--label", default="", help="Free text stored in the report")
+    run.add_argument("--redis", action="store_true", help="Let the app use Redis if reachable (default: in-memory cache)")
+    run.add_argument("--verbose", action="store_true")
+    run.set_defaults(handler=command_run)
+
+    compare = commands.add_parser("compare", help="Compare two reports")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    comparison_arguments(compare)
+    compare.set_defaults(handler=command_compare)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,13 +10,25 @@ Supports multiple LLM providers through OpenRouter's unified API:
 v4.1 additions:
 - Streaming responses via SSE for better UX
 - Redis caching for AI responses (configurable TTLs)
+
+Performance:
+- One pooled httpx.AsyncClient per worker (keep-alive, HTTP/2 when the h2
+  package is installed) instead of a new client - and TLS handshake - per call
+- Responses cached on a hash of the exact request (model, prompts, sampling);
+  callers pass the month's data generation so an entry lives until the data
+  behind it changes rather than for a short fixed TTL
+- Identical prompts in flight share one upstream call
 """
+import asyncio
+import importlib.util
 import os
 import logging
+import weakref
+
 import httpx
 import json
 import hashlib
-from typing import Dict, Any, Optional, List, AsyncGenerator
+from typing import Dict, Any, Optional, List, AsyncGenerator, Tuple
 
 # Ensure environment variables are loaded before anything else
 from dotenv import load_dotenv
@@ -24,6 +36,13 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Overridable for a local mock / proxy
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "20"))
+AI_HTTP_MAX_KEEPALIVE = int(os.getenv("AI_HTTP_MAX_KEEPALIVE", "10"))
+AI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("AI_HTTP_KEEPALIVE_EXPIRY", "60"))
+AI_HTTP2 = os.getenv("AI_HTTP2", "true").lower() == "true"
+
 # Redis cache integration
 _cache_service = None
 
@@ -42,13 +61,50 @@ def get_cache_service():
 
 
 def _make_cache_key(prefix: str, *args) -> str:
-    """Generate a cache key from prefix and arguments"""
-    # Hash long arguments to keep keys manageable
-    content = ":".join(str(arg)[:100] for arg in args)
-    content_hash = hashlib.md5(content.encode()).hexdigest()[:12]
+    """Generate a cache key from prefix and arguments (full content, no truncation)"""
+    content = json.dumps([str(arg) for arg in args], ensure_ascii=False)
+    content_hash = hashlib.sha256(content.encode()).hexdigest()
     return f"ai:{prefix}:{content_hash}"
 
 
+# httpx connection pools are bound to their event loop: one client per loop,
+# i.e. one per uvicorn/gunicorn worker
+_llm_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _http2_available() -> bool:
+    return AI_HTTP2 and importlib.util.find_spec("h2") is not None
+
+
+def get_llm_http_client() -> httpx.AsyncClient:
+    """Pooled (keep-alive) HTTP client shared by all LLM calls in this worker"""
+    loop = asyncio.get_running_loop()
+    client = _llm_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=_http2_available(),
+            limits=httpx.Limits(
+                max_connections=AI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=AI_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=AI_HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            headers={
+                "HTTP-Referer": "https://budget-famille.app",
+                "X-Title": "Budget Famille"
+            }
+        )
+        _llm_clients[loop] = client
+    return client
+
+
+async def close_llm_http_client() -> None:
+    """Close the pooled client of the running loop (application shutdown)"""
+    client = _llm_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
 class AIAnalysisService:
     """
     Service for AI-powered budget analysis and explanations.
@@ -83,7 +139,7 @@ class AIAnalysisService:
         self.model = model or os.getenv("OPENROUTER_MODEL", self.DEFAULT_MODEL)
         self.max_tokens = int(os.getenv("AI_MAX_TOKENS", max_tokens))
         self.temperature = float(os.getenv("AI_TEMPERATURE", temperature))
-        self.base_url = "https://openrouter.ai/api/v1"
+        self.base_url = OPENROUTER_BASE_URL
 
         # Detect language preference
         self.language = os.getenv("AI_LANGUAGE", "fr")  # fr, en, es, de, etc.
@@ -94,6 +150,11 @@ class AIAnalysisService:
         self.cache_ttl_summary = int(os.getenv("AI_CACHE_TTL_SUMMARY", 900))  # 15 min
         self.cache_ttl_savings = int(os.getenv("AI_CACHE_TTL_SAVINGS", 600))  # 10 min
         self.cache_ttl_answer = int(os.getenv("AI_CACHE_TTL_ANSWER", 180))  # 3 min
+        # Entries keyed on a data generation cannot go stale: keep them longer
+        self.cache_ttl_generation = int(os.getenv("AI_CACHE_TTL_GENERATION", 86400))  # 24 h
+
+        # Identical requests currently awaiting the LLM {cache_key: task}
+        self._inflight: Dict[str, asyncio.Task] = {}
 
         if not self.api_key:
             logger.warning("OPENROUTER_API_KEY not set - AI features will be disabled")
@@ -103,9 +164,62 @@ class AIAnalysisService:
         """Check if the service is properly configured."""
         return bool(self.api_key)
 
+    def _build_messages(self, prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    async def _complete(self, prompt: str, system_prompt: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Call the OpenRouter chat completions API.
+
+        Returns:
+            (text, ok) - on failure the text is a user-facing error message and
+            ok is False, so that it is never cached
+        """
+        if not self.is_configured:
+            return "Service IA non configure. Veuillez definir OPENROUTER_API_KEY.", False
+
+        try:
+            response = await get_llm_http_client().post(
+                f"{self.base_url}/chat/completions",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json={
+                    "model": self.model,
+                    "messages": self._build_messages(prompt, system_prompt),
+                    "max_tokens": self.max_tokens,
+                    "temperature": self.temperature
+                },
+                timeout=30.0
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                return data["choices"][0]["message"]["content"], True
+
+            error_msg = f"OpenRouter API error: {response.status_code}"
+            logger.error(f"{error_msg} - {response.text}")
+
+            # Try fallback model
+            if self.model != self.FALLBACK_MODEL:
+                logger.info(f"Trying fallback model: {self.FALLBACK_MODEL}")
+                self.model = self.FALLBACK_MODEL
+                return await self._complete(prompt, system_prompt)
+
+            return f"Erreur API: {error_msg}", False
+
+        except httpx.TimeoutException:
+            logger.error("OpenRouter API timeout")
+            return "Le service IA n'a pas repondu a temps. Veuillez reessayer.", False
+        except Exception as e:
+            logger.error(f"OpenRouter API exception: {str(e)}")
+            return f"Erreur lors de l'appel au service IA: {str(e)}", False
+
     async def _call_llm(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         """
-        Call the OpenRouter API with the given prompt.
+        Call the OpenRouter API with the given prompt (uncached).
 
         Args:
             prompt: User message/prompt
@@ -114,54 +228,65 @@ class AIAnalysisService:
         Returns:
             LLM response text
         """
-        if not self.is_configured:
-            return "Service IA non configure. Veuillez definir OPENROUTER_API_KEY."
+        text, _ = await self._complete(prompt, system_prompt)
+        return text
+
+    def _llm_cache_key(self, prompt: str, system_prompt: Optional[str], data_generation: Optional[str]) -> str:
+        """Exact-match key: everything sent upstream plus the data generation"""
+        return _make_cache_key(
+            "llm", self.model, system_prompt or "", prompt, self.max_tokens, self.temperature,
+            data_generation or ""
+        )
+
+    async def _fetch_and_cache(self, cache_key: str, prompt: str, system_prompt: Optional[str], ttl: int) -> str:
+        text, ok = await self._complete(prompt, system_prompt)
+        cache = get_cache_service()
+        if ok and self.cache_enabled and cache:
+            cache.set(cache_key, text, ttl=ttl)
+            logger.debug(f"Cached LLM response {cache_key} (TTL: {ttl}s)")
+        return text
 
-        messages = []
+    async def _cached_llm(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        ttl: int,
+        data_generation: Optional[str] = None
+    ) -> str:
+        """
+        _call_llm behind the prompt-hash cache and in-flight deduplication.
 
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
+        Args:
+            prompt: User message/prompt
+            system_prompt: System message
+            ttl: Cache TTL when no data generation is given
+            data_generation: services.data_generation.get_data_generation() of the
+                month the prompt was built from; part of the key, so a data change
+                misses the cache and the entry can be kept cache_ttl_generation
+        """
+        cache_key = self._llm_cache_key(prompt, system_prompt, data_generation)
 
-        messages.append({"role": "user", "content": prompt})
+        cache = get_cache_service()
+        if self.cache_enabled and cache:
+            cached = cache.get(cache_key)
+            if cached:
+                logger.debug(f"Cache hit for LLM response {cache_key}")
+                return cached
 
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "HTTP-Referer": "https://budget-famille.app",
-                        "X-Title": "Budget Famille"
-                    },
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "max_tokens": self.max_tokens,
-                        "temperature": self.temperature
-                    }
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    return data["choices"][0]["message"]["content"]
-                else:
-                    error_msg = f"OpenRouter API error: {response.status_code}"
-                    logger.error(f"{error_msg} - {response.text}")
-
-                    # Try fallback model
-                    if self.model != self.FALLBACK_MODEL:
-                        logger.info(f"Trying fallback model: {self.FALLBACK_MODEL}")
-                        self.model = self.FALLBACK_MODEL
-                        return await self._call_llm(prompt, system_prompt)
-
-                    return f"Erreur API: {error_msg}"
+        task = self._inflight.get(cache_key)
+        if task is None:
+            if data_generation is not None:
+                ttl = max(ttl, self.cache_ttl_generation)
+            task = asyncio.ensure_future(self._fetch_and_cache(cache_key, prompt, system_prompt, ttl))
+            self._inflight[cache_key] = task
+            task.add_done_callback(
+                lambda done: self._inflight.pop(cache_key, None) if self._inflight.get(cache_key) is done else None
+            )
+        else:
+            logger.debug(f"Joining in-flight LLM request {cache_key}")
 
-        except httpx.TimeoutException:
-            logger.error("OpenRouter API timeout")
-            return "Le service IA n'a pas repondu a temps. Veuillez reessayer."
-        except Exception as e:
-            logger.error(f"OpenRouter API exception: {str(e)}")
-            return f"Erreur lors de l'appel au service IA: {str(e)}"
+        # shield: a disconnecting client must not cancel the call the others wait on
+        return await asyncio.shield(task)
 
     async def _stream_llm(
         self,
@@ -182,60 +307,53 @@ class AIAnalysisService:
             yield "Service IA non configure. Veuillez definir OPENROUTER_API_KEY."
             return
 
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "HTTP-Referer": "https://budget-famille.app",
-                        "X-Title": "Budget Famille",
-                        "Accept": "text/event-stream"
-                    },
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "max_tokens": self.max_tokens,
-                        "temperature": self.temperature,
-                        "stream": True
-                    }
-                ) as response:
-                    if response.status_code != 200:
-                        error_text = await response.aread()
-                        logger.error(f"OpenRouter streaming error: {response.status_code} - {error_text}")
-                        yield f"Erreur API: {response.status_code}"
-                        return
-
-                    async for line in response.aiter_lines():
-                        if not line:
-                            continue
-
-                        # Skip non-data lines
-                        if not line.startswith("data: "):
-                            continue
-
-                        data_str = line[6:]  # Remove "data: " prefix
-
-                        # Check for stream end
-                        if data_str.strip() == "[DONE]":
-                            break
-
-                        try:
-                            data = json.loads(data_str)
-                            if "choices" in data and len(data["choices"]) > 0:
-                                delta = data["choices"][0].get("delta", {})
-                                content = delta.get("content", "")
-                                if content:
-                                    yield content
-                        except json.JSONDecodeError:
-                            # Skip malformed JSON lines
-                            continue
+            async with get_llm_http_client().stream(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Accept": "text/event-stream"
+                },
+                json={
+                    "model": self.model,
+                    "messages": self._build_messages(prompt, system_prompt),
+                    "max_tokens": self.max_tokens,
+                    "temperature": self.temperature,
+                    "stream": True
+                },
+                timeout=60.0
+            ) as response:
+                if response.status_code != 200:
+                    error_text = await response.aread()
+                    logger.error(f"OpenRouter streaming error: {response.status_code} - {error_text}")
+                    yield f"Erreur API: {response.status_code}"
+                    return
+
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+
+                    # Skip non-data lines
+                    if not line.startswith("data: "):
+                        continue
+
+                    data_str = line[6:]  # Remove "data: " prefix
+
+                    # Check for stream end
+                    if data_str.strip() == "[DONE]":
+                        break
+
+                    try:
+                        data = json.loads(data_str)
+                        if "choices" in data and len(data["choices"]) > 0:
+                            delta = data["choices"][0].get("delta", {})
+                            content = delta.get("content", "")
+                            if content:
+                                yield content
+                    except json.JSONDecodeError:
+                        # Skip malformed JSON lines
+                        continue
 
         except httpx.TimeoutException:
             logger.error("OpenRouter streaming timeout")
@@ -342,25 +460,17 @@ Start with an emoji appropriate to the context."""
         lang_prompts = prompts.get(self.language, prompts["en"])
         return lang_prompts.get(context, lang_prompts["general"])
 
-    async def explain_variance(self, variance_data: Dict[str, Any]) -> str:
+    async def explain_variance(self, variance_data: Dict[str, Any], data_generation: Optional[str] = None) -> str:
         """
         Generate an AI explanation of budget variances.
 
         Args:
             variance_data: Variance analysis data from /analytics/variance endpoint
+            data_generation: Data generation of the analysed month (cache key)
 
         Returns:
             Human-readable explanation of the variances
         """
-        # Check cache first
-        cache = get_cache_service()
-        if self.cache_enabled and cache:
-            cache_key = _make_cache_key("variance", json.dumps(variance_data, sort_keys=True, default=str))
-            cached = cache.get(cache_key)
-            if cached:
-                logger.debug(f"Cache hit for variance explanation")
-                return cached
-
         # Build context from variance data
         global_info = variance_data.get("global_variance", {})
         categories = variance_data.get("by_category", [])
@@ -414,35 +524,24 @@ Over-budget categories ({len(over_budget)}):
 
             prompt += "\nProvide a clear explanation in 2-3 sentences and 2 concrete suggestions."
 
-        result = await self._call_llm(prompt, self._get_system_prompt("variance"))
-
-        # Cache the result
-        if self.cache_enabled and cache:
-            cache.set(cache_key, result, ttl=self.cache_ttl_variance)
-            logger.debug(f"Cached variance explanation (TTL: {self.cache_ttl_variance}s)")
-
-        return result
+        return await self._cached_llm(
+            prompt, self._get_system_prompt("variance"), self.cache_ttl_variance, data_generation
+        )
 
-    async def suggest_savings(self, category: str, spending_history: List[Dict]) -> str:
+    async def suggest_savings(
+        self, category: str, spending_history: List[Dict], data_generation: Optional[str] = None
+    ) -> str:
         """
         Suggest ways to reduce spending in a specific category.
 
         Args:
             category: Category name
             spending_history: List of monthly spending data for this category
+            data_generation: Data generation covering the history (cache key)
 
         Returns:
             Personalized savings suggestions
         """
-        # Check cache first
-        cache = get_cache_service()
-        if self.cache_enabled and cache:
-            cache_key = _make_cache_key("savings", category, json.dumps(spending_history, default=str))
-            cached = cache.get(cache_key)
-            if cached:
-                logger.debug(f"Cache hit for savings suggestion: {category}")
-                return cached
-
         # Calculate statistics from history
         amounts = [h.get("amount", 0) for h in spending_history]
         avg_amount = sum(amounts) / len(amounts) if amounts else 0
@@ -474,34 +573,21 @@ Main merchants: {', '.join(set(top_merchants[:5]))}
 
 Be specific and actionable. Adapt your advice to this category."""
 
-        result = await self._call_llm(prompt, self._get_system_prompt("savings"))
-
-        # Cache the result
-        if self.cache_enabled and cache:
-            cache.set(cache_key, result, ttl=self.cache_ttl_savings)
-            logger.debug(f"Cached savings suggestion for {category} (TTL: {self.cache_ttl_savings}s)")
-
-        return result
+        return await self._cached_llm(
+            prompt, self._get_system_prompt("savings"), self.cache_ttl_savings, data_generation
+        )
 
-    async def monthly_summary(self, month_data: Dict[str, Any]) -> str:
+    async def monthly_summary(self, month_data: Dict[str, Any], data_generation: Optional[str] = None) -> str:
         """
         Generate an intelligent monthly summary.
 
         Args:
             month_data: Monthly budget data including income, expenses, categories
+            data_generation: Data generation of the month (cache key)
 
         Returns:
             Engaging monthly narrative summary
         """
-        # Check cache first
-        cache = get_cache_service()
-        if self.cache_enabled and cache:
-            cache_key = _make_cache_key("summary", json.dumps(month_data, sort_keys=True, default=str))
-            cached = cache.get(cache_key)
-            if cached:
-                logger.debug(f"Cache hit for monthly summary")
-                return cached
-
         income = month_data.get("income", 0)
         expenses = month_data.get("expenses", 0)
         savings = income - expenses if income > expenses else 0
@@ -547,35 +633,24 @@ Top 3 expense categories:
 
             prompt += "\nStart with an appropriate emoji. Give a summary in 3-4 sentences: positives, areas for improvement, and a goal for next month."
 
-        result = await self._call_llm(prompt, self._get_system_prompt("summary"))
+        return await self._cached_llm(
+            prompt, self._get_system_prompt("summary"), self.cache_ttl_summary, data_generation
+        )
 
-        # Cache the result
-        if self.cache_enabled and cache:
-            cache.set(cache_key, result, ttl=self.cache_ttl_summary)
-            logger.debug(f"Cached monthly summary (TTL: {self.cache_ttl_summary}s)")
-
-        return result
-
-    async def answer_question(self, question: str, budget_context: Dict[str, Any]) -> str:
+    async def answer_question(
+        self, question: str, budget_context: Dict[str, Any], data_generation: Optional[str] = None
+    ) -> str:
         """
         Answer a free-form question about the user's budget.
 
         Args:
             question: User's question
             budget_context: Relevant budget data for context
+            data_generation: Data generation of the context month (cache key)
 
         Returns:
             AI answer based on the budget data
         """
-        # Check cache first (short TTL for Q&A as questions are often unique)
-        cache = get_cache_service()
-        if self.cache_enabled and cache:
-            cache_key = _make_cache_key("answer", question, json.dumps(budget_context, sort_keys=True, default=str))
-            cached = cache.get(cache_key)
-            if cached:
-                logger.debug(f"Cache hit for answer question")
-                return cached
-
         # Build context summary
         month = budget_context.get("month", "current")
         total_expenses = budget_context.get("total_expenses", 0)
@@ -612,14 +687,9 @@ Question: {question}
 
 Answer concisely and helpfully."""
 
-        result = await self._call_llm(prompt, self._get_system_prompt("general"))
-
-        # Cache the result
-        if self.cache_enabled and cache:
-            cache.set(cache_key, result, ttl=self.cache_ttl_answer)
-            logger.debug(f"Cached answer (TTL: {self.cache_ttl_answer}s)")
-
-        return result
+        return await self._cached_llm(
+            prompt, self._get_system_prompt("general"), self.cache_ttl_answer, data_generation
+        )
 
 
 # Singleton instance
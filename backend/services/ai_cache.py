@@ -1,15 +1,25 @@
 """
 AI Cache Service for managing AI-generated content caching.
 Provides intelligent caching with TTL, invalidation, and hit tracking.
+
+Cache hits are pure reads: hit counters are buffered in memory and written
+back in one batched UPDATE every AI_CACHE_HIT_FLUSH_SECONDS, and an optional
+per-process LRU (AI_CACHE_LRU_SIZE) answers hot keys without touching SQLite.
 """
 import json
 import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Callable, Optional, Dict, Any, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, case, func
 
 from models.ai_cache import AICache
+from models.database import SessionLocal
 
 logger = logging.getLogger(__name__)
 
@@ -23,12 +33,266 @@ CACHE_TTL_HOURS = {
     'daily': 24,         # Daily insights - until next day
 }
 
+# 0 disables the in-process LRU
+AI_CACHE_LRU_SIZE = int(os.getenv("AI_CACHE_LRU_SIZE", "256"))
+# Bounds staleness when another worker invalidates an entry
+AI_CACHE_LRU_TTL_SECONDS = float(os.getenv("AI_CACHE_LRU_TTL_SECONDS", "60"))
+AI_CACHE_HIT_FLUSH_SECONDS = float(os.getenv("AI_CACHE_HIT_FLUSH_SECONDS", "30"))
+# Flush early when this many distinct keys are waiting
+AI_CACHE_HIT_FLUSH_MAX_KEYS = int(os.getenv("AI_CACHE_HIT_FLUSH_MAX_KEYS", "500"))
+
+
+def _like_to_regex(pattern: str) -> "re.Pattern":
+    """Translate a SQL LIKE pattern (% and _) to a compiled regex"""
+    parts = []
+    for char in pattern:
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts) + r'\Z', re.DOTALL)
+
+
+class AICacheLRU:
+    """
+    Per-process LRU in front of the ai_cache table.
+
+    Entries keep the decoded payload plus the row's expiry, type and month so
+    that invalidations can be applied locally. Returned payloads are shared:
+    callers must treat them as read-only.
+    """
+
+    def __init__(self, max_size: int = AI_CACHE_LRU_SIZE, ttl_seconds: float = AI_CACHE_LRU_TTL_SECONDS):
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], datetime, str, Optional[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, cache_key: str, cache_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                data, expires_at, entry_type, _, stored_at = entry
+                if (expires_at <= datetime.utcnow()
+                        or time.monotonic() - stored_at > self.ttl_seconds):
+                    del self._entries[cache_key]
+                    entry = None
+                elif cache_type and entry_type != cache_type:
+                    entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.stats["hits"] += 1
+            return data
+
+    def put(self, cache_key: str, data: Dict[str, Any], expires_at: datetime, cache_type: str, month: Optional[str]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[cache_key] = (data, expires_at, cache_type, month, time.monotonic())
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def discard_where(self, predicate: Callable[[str, str, Optional[str]], bool]) -> int:
+        """Drop entries for which predicate(cache_key, cache_type, month) is true"""
+        with self._lock:
+            keys = [key for key, (_, _, cache_type, month, _) in self._entries.items() if predicate(key, cache_type, month)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+class HitCounterBuffer:
+    """
+    Write-behind hit counters for ai_cache rows (or any table with a key,
+    a counter and a last-use column: see research_executor).
+
+    record() only touches a dict under a lock; flush() applies every pending
+    key in a single UPDATE ... CASE statement with its own session, from a
+    daemon thread (every `flush_interval` seconds) or when `max_keys` keys
+    are waiting. Hits recorded by a crashed process are lost, which is fine
+    for monitoring counters.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_interval: float = AI_CACHE_HIT_FLUSH_SECONDS,
+        max_keys: int = AI_CACHE_HIT_FLUSH_MAX_KEYS,
+        model=AICache,
+        key_column: str = "cache_key",
+        count_column: str = "hit_count",
+        time_column: str = "last_accessed",
+        clock: Callable[[], datetime] = datetime.utcnow,
+        name: str = "ai-cache-hit"
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_keys = max(1, max_keys)
+        self.model = model
+        self.key_column = getattr(model, key_column)
+        self.count_column = getattr(model, count_column)
+        self.time_column = getattr(model, time_column)
+        self.clock = clock
+        self.name = name
+        self._pending: Dict[str, List] = {}  # cache_key -> [hits, last_accessed]
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.stats = {"recorded": 0, "flushes": 0, "rows_updated": 0, "errors": 0}
+
+    def record(self, cache_key: str) -> None:
+        with self._lock:
+            pending = self._pending.get(cache_key)
+            if pending is None:
+                self._pending[cache_key] = [1, self.clock()]
+            else:
+                pending[0] += 1
+                pending[1] = self.clock()
+            self.stats["recorded"] += 1
+            full = len(self._pending) >= self.max_keys
+        self._start_flusher()
+        if full:
+            self._wakeup.set()
+
+    def discard(self, cache_key: str) -> None:
+        """Forget pending hits of a key whose row was just rewritten"""
+        with self._lock:
+            self._pending.pop(cache_key, None)
+
+    def pending(self) -> Dict[str, int]:
+        with self._lock:
+            return {key: hits for key, (hits, _) in self._pending.items()}
+
+    def flush(self) -> int:
+        """Write pending hits in one statement; returns the number of rows updated"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            keys = list(batch)
+            db = self.session_factory()
+            try:
+                result = db.query(self.model).filter(self.key_column.in_(keys)).update({
+                    self.count_column: func.coalesce(self.count_column, 0) + case(
+                        {key: hits for key, (hits, _) in batch.items()}, value=self.key_column, else_=0
+                    ),
+                    self.time_column: case(
+                        {key: accessed for key, (_, accessed) in batch.items()}, value=self.key_column,
+                        else_=self.time_column
+                    ),
+                }, synchronize_session=False)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                self.stats["errors"] += 1
+                logger.error(f"{self.name} flush failed ({len(keys)} keys): {e}")
+                # Put the hits back for the next attempt
+                with self._lock:
+                    for key, (hits, accessed) in batch.items():
+                        pending = self._pending.setdefault(key, [0, accessed])
+                        pending[0] += hits
+                        pending[1] = max(pending[1], accessed)
+                return 0
+            finally:
+                db.close()
+
+            self.stats["flushes"] += 1
+            self.stats["rows_updated"] += result
+            logger.debug(f"{self.name} flush: {len(keys)} keys")
+            return result
+
+    def _start_flusher(self) -> None:
+        if self.flush_interval <= 0 or (self._flusher is not None and self._flusher.is_alive()):
+            return
+
+        def run():
+            while True:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"{self.name} flush failed: {e}")
+
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=run, name=f"{self.name}-flush", daemon=True)
+                self._flusher.start()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending_keys = len(self._pending)
+            pending_hits = sum(hits for hits, _ in self._pending.values())
+        return {**self.stats, "pending_keys": pending_keys, "pending_hits": pending_hits}
+
+
+# Process-wide instances shared by the request-scoped services
+_lru: Optional[AICacheLRU] = None
+_hit_buffer: Optional[HitCounterBuffer] = None
+
+
+def get_ai_cache_lru() -> AICacheLRU:
+    """Get the process-wide AI cache LRU"""
+    global _lru
+    if _lru is None:
+        _lru = AICacheLRU()
+    return _lru
+
+
+def get_hit_buffer() -> HitCounterBuffer:
+    """Get the process-wide hit counter buffer"""
+    global _hit_buffer
+    if _hit_buffer is None:
+        _hit_buffer = HitCounterBuffer()
+    return _hit_buffer
+
+
+def flush_ai_cache_hits() -> int:
+    """Write pending hit counters now (shutdown, tests)"""
+    return get_hit_buffer().flush() if _hit_buffer is not None else 0
+
 
 class AICacheService:
     """Service for managing AI response caching."""
 
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        lru: Optional[AICacheLRU] = None,
+        hit_buffer: Optional[HitCounterBuffer] = None
+    ):
         self.db = db
+        self.lru = lru if lru is not None else get_ai_cache_lru()
+        self.hits = hit_buffer if hit_buffer is not None else get_hit_buffer()
 
     def get_cached(
         self,
@@ -45,6 +309,11 @@ class AICacheService:
         Returns:
             Cached data dict or None if not found/expired
         """
+        cached_data = self.lru.get(cache_key, cache_type)
+        if cached_data is not None:
+            self.hits.record(cache_key)
+            return cached_data
+
         try:
             query = self.db.query(AICache).filter(
                 and_(
@@ -60,13 +329,13 @@ class AICacheService:
             cached = query.first()
 
             if cached:
-                # Update hit metrics
-                cached.hit_count += 1
-                cached.last_accessed = datetime.utcnow()
-                self.db.commit()
+                # Hit metrics are written behind, the read stays a read
+                self.hits.record(cache_key)
+                data = json.loads(cached.response_data)
+                self.lru.put(cache_key, data, cached.expires_at, cached.cache_type, cached.month)
 
-                logger.debug(f"Cache hit for key: {cache_key} (hits: {cached.hit_count})")
-                return json.loads(cached.response_data)
+                logger.debug(f"Cache hit for key: {cache_key}")
+                return data
 
             return None
 
@@ -133,6 +402,8 @@ class AICacheService:
                 self.db.add(cache_entry)
 
             self.db.commit()
+            self.hits.discard(cache_key)
+            self.lru.put(cache_key, data, expires_at, cache_type, month or (existing.month if existing else None))
             logger.debug(f"Cached data for key: {cache_key} (type: {cache_type}, TTL: {ttl_hours}h)")
             return True
 
@@ -157,6 +428,8 @@ class AICacheService:
             ).update({AICache.is_valid: False}, synchronize_session='fetch')
 
             self.db.commit()
+            regex = _like_to_regex(pattern)
+            self.lru.discard_where(lambda key, _type, _month: regex.match(key) is not None)
             logger.info(f"Invalidated {result} cache entries matching pattern: {pattern}")
             return result
 
@@ -181,6 +454,7 @@ class AICacheService:
             ).update({AICache.is_valid: False}, synchronize_session='fetch')
 
             self.db.commit()
+            self.lru.discard_where(lambda _key, entry_type, _month: entry_type == cache_type)
             logger.info(f"Invalidated {result} cache entries of type: {cache_type}")
             return result
 
@@ -205,6 +479,7 @@ class AICacheService:
             ).update({AICache.is_valid: False}, synchronize_session='fetch')
 
             self.db.commit()
+            self.lru.discard_where(lambda _key, _type, entry_month: entry_month == month)
             logger.info(f"Invalidated {result} cache entries for month: {month}")
             return result
 
@@ -265,9 +540,10 @@ class AICacheService:
                 ).count()
                 type_stats[cache_type] = type_count
 
-            # Total hits
-            from sqlalchemy import func
+            # Total hits: stored counters plus the hits still buffered (the
+            # background flusher writes them; no write from a stats read)
             total_hits = self.db.query(func.sum(AICache.hit_count)).scalar() or 0
+            total_hits += sum(self.hits.pending().values())
 
             return {
                 'total_entries': total,
@@ -275,7 +551,9 @@ class AICacheService:
                 'expired_entries': total - valid,
                 'by_type': type_stats,
                 'total_hits': total_hits,
-                'cache_hit_ratio': round(total_hits / max(valid, 1), 2)
+                'cache_hit_ratio': round(total_hits / max(valid, 1), 2),
+                'lru': self.lru.get_stats(),
+                'hit_counters': self.hits.get_stats()
             }
 
         except Exception as e:
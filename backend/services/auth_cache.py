@@ -0,0 +1,178 @@
+"""
+Authenticated-principal cache for the get_current_user dependency
+Budget Famille v4.1 - removes the per-request JWT decode and user lookup
+
+Features:
+- Verified-token cache keyed by the SHA-256 digest of the bearer token
+  (raw tokens are never kept); an entry expires with the token's `exp`
+- Short-TTL principal cache (username -> immutable user snapshot)
+- Principals are invalidated as soon as a users row is updated or deleted
+  through the ORM (account lock, password change, deactivation...)
+
+Each API worker has its own cache: AUTH_PRINCIPAL_TTL_SECONDS bounds how long
+another worker may keep serving a user modified elsewhere.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", "256"))
+AUTH_PRINCIPAL_TTL_SECONDS = float(os.getenv("AUTH_PRINCIPAL_TTL_SECONDS", "30"))
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Detached, read-only snapshot of a users row returned by get_current_user"""
+    id: int
+    username: str
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    is_active: bool = True
+    is_admin: bool = False
+    locked_until: Optional[datetime] = None
+    force_password_change: bool = False
+
+    @classmethod
+    def from_user(cls, user: Any) -> "AuthenticatedUser":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=getattr(user, "email", None),
+            full_name=getattr(user, "full_name", None),
+            is_active=bool(getattr(user, "is_active", True)),
+            is_admin=bool(getattr(user, "is_admin", False)),
+            locked_until=getattr(user, "locked_until", None),
+            force_password_change=bool(getattr(user, "force_password_change", False)),
+        )
+
+
+def token_digest(token: str) -> str:
+    """Cache key for a bearer token"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class AuthCache:
+    """Verified tokens (digest -> username, exp) and principals (username -> snapshot)"""
+
+    def __init__(
+        self,
+        token_cache_size: int = AUTH_TOKEN_CACHE_SIZE,
+        principal_cache_size: int = AUTH_PRINCIPAL_CACHE_SIZE,
+        principal_ttl_seconds: float = AUTH_PRINCIPAL_TTL_SECONDS
+    ):
+        self.token_cache_size = max(0, token_cache_size)
+        self.principal_cache_size = max(0, principal_cache_size)
+        self.principal_ttl_seconds = principal_ttl_seconds
+        self._tokens: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._principals: "OrderedDict[str, Tuple[AuthenticatedUser, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "token_hits": 0,
+            "token_misses": 0,
+            "principal_hits": 0,
+            "principal_misses": 0,
+            "invalidations": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Verified tokens
+    # ------------------------------------------------------------------
+
+    def get_token(self, digest: str) -> Optional[str]:
+        """Username of a previously verified, not yet expired token"""
+        with self._lock:
+            entry = self._tokens.get(digest)
+            if entry is not None and entry[1] <= time.time():
+                del self._tokens[digest]
+                entry = None
+            if entry is None:
+                self.stats["token_misses"] += 1
+                return None
+            self._tokens.move_to_end(digest)
+            self.stats["token_hits"] += 1
+            return entry[0]
+
+    def put_token(self, digest: str, username: str, expires_at: Optional[float]) -> None:
+        """Remember a verified token until its `exp` (tokens without exp are not cached)"""
+        if self.token_cache_size == 0 or expires_at is None or expires_at <= time.time():
+            return
+        with self._lock:
+            self._tokens[digest] = (username, float(expires_at))
+            self._tokens.move_to_end(digest)
+            while len(self._tokens) > self.token_cache_size:
+                self._tokens.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Principals
+    # ------------------------------------------------------------------
+
+    def get_principal(self, username: str) -> Optional[AuthenticatedUser]:
+        with self._lock:
+            entry = self._principals.get(username)
+            if entry is not None and time.monotonic() - entry[1] > self.principal_ttl_seconds:
+                del self._principals[username]
+                entry = None
+            if entry is None:
+                self.stats["principal_misses"] += 1
+                return None
+            self._principals.move_to_end(username)
+            self.stats["principal_hits"] += 1
+            return entry[0]
+
+    def put_principal(self, principal: AuthenticatedUser) -> None:
+        if self.principal_cache_size == 0:
+            return
+        with self._lock:
+            self._principals[principal.username] = (principal, time.monotonic())
+            self._principals.move_to_end(principal.username)
+            while len(self._principals) > self.principal_cache_size:
+                self._principals.popitem(last=False)
+
+    def invalidate_principal(self, username: str) -> None:
+        with self._lock:
+            if self._principals.pop(username, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._principals.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        token_lookups = self.stats["token_hits"] + self.stats["token_misses"]
+        principal_lookups = self.stats["principal_hits"] + self.stats["principal_misses"]
+        return {
+            **self.stats,
+            "tokens": len(self._tokens),
+            "principals": len(self._principals),
+            "token_hit_rate": round(self.stats["token_hits"] / token_lookups, 3) if token_lookups else 0.0,
+            "principal_hit_rate": round(self.stats["principal_hits"] / principal_lookups, 3) if principal_lookups else 0.0,
+        }
+
+
+# Singleton instance (one cache per API worker process)
+_auth_cache: Optional[AuthCache] = None
+
+
+def get_auth_cache() -> AuthCache:
+    """Get or create the auth cache singleton"""
+    global _auth_cache
+    if _auth_cache is None:
+        _auth_cache = AuthCache()
+    return _auth_cache
+
+
+def invalidate_principal(username: Optional[str]) -> None:
+    """Drop the cached principal of a user (called when the users row changes)"""
+    if username and _auth_cache is not None:
+        _auth_cache.invalidate_principal(username)
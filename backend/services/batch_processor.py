@@ -12,6 +12,13 @@ Features:
 - Comprehensive error handling and recovery
 - Performance monitoring and optimization
 - Database consistency and transaction safety
+- Durable jobs: job rows and per-chunk checkpoints are stored in SQLite
+  (batch_jobs / batch_job_chunks); each chunk is a transaction id range
+  processed with its own session, progress is readable from any worker and
+  an interrupted job resumes from its last completed chunk
+- Every database step runs in the DB executor with a short-lived session,
+  closed before the next await: a job never holds a connection while it
+  classifies or researches
 
 Author: Claude Code - Backend API Architect
 Target: Handle 1000+ transactions efficiently with <1% error rate
@@ -19,17 +26,18 @@ Target: Handle 1000+ transactions efficiently with <1% error rate
 
 import asyncio
 import logging
+import os
+import socket
+import statistics
 import time
 import uuid
 import json
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func
 
-from models.database import Transaction, get_db
+from models.database import BATCH_JOB_ACTIVE_STATUSES, BatchJob, BatchJobChunk, SessionLocal, Transaction
 from models.schemas import (
     BatchAutoTagRequest, BatchAutoTagResponse, BatchProgressResponse,
     BatchTransactionResult, BatchResultsSummary, BatchResultsResponse,
@@ -38,36 +46,54 @@ from models.schemas import (
 from services.unified_classification_service import (
     UnifiedClassificationService, get_unified_classification_service
 )
+from services.cache_usage import track_cache_usage
+from services.executors import classify_fast_chunk, get_executors, map_cpu_chunks
+from services.research_executor import get_research_executor
+from services.web_research_service import get_research_rate_limiter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 logger = logging.getLogger(__name__)
 
-@dataclass
-class BatchOperationState:
-    """In-memory state tracking for batch operations"""
-    batch_id: str
-    month: str
-    total_transactions: int
-    processed_transactions: int = 0
-    tagged_transactions: int = 0
-    skipped_low_confidence: int = 0
-    skipped_already_tagged: int = 0
-    errors_count: int = 0
-    status: str = "initiated"
-    started_at: datetime = None
-    current_operation: str = ""
-    results: List[BatchTransactionResult] = None
-    errors: List[str] = None
-    performance_metrics: Dict[str, Any] = None
-    
-    def __post_init__(self):
-        if self.results is None:
-            self.results = []
-        if self.errors is None:
-            self.errors = []
-        if self.performance_metrics is None:
-            self.performance_metrics = {}
-        if self.started_at is None:
-            self.started_at = datetime.now()
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "50"))
+# A job whose owner has not refreshed its heartbeat for this long can be resumed by another worker
+BATCH_JOB_STALE_SECONDS = int(os.getenv("BATCH_JOB_STALE_SECONDS", "300"))
+BATCH_JOB_RESUME = os.getenv("BATCH_JOB_RESUME", "true").lower() == "true"
+
+ACTIVE_STATUSES = BATCH_JOB_ACTIVE_STATUSES
+
+
+def _current_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_is_gone(worker_id: Optional[str]) -> bool:
+    """True when the owning worker is a dead process of this host"""
+    if not worker_id:
+        return True
+    host, _, pid = worker_id.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+def _peak_memory_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
 
 class BatchProcessor:
     """
@@ -75,23 +101,26 @@ class BatchProcessor:
     
     Handles concurrent processing, error recovery, progress tracking,
     and performance optimization for large-scale batch operations.
+    Jobs are persisted (BatchJob / BatchJobChunk), so this object only
+    tracks the asyncio tasks of the jobs run by the current worker.
     """
     
-    def __init__(self):
-        # In-memory state storage (in production, consider Redis or database storage)
-        self.active_batches: Dict[str, BatchOperationState] = {}
-        self.completed_batches: Dict[str, BatchOperationState] = {}
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        chunk_size: int = BATCH_CHUNK_SIZE,
+        stale_seconds: int = BATCH_JOB_STALE_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.chunk_size = max(1, chunk_size)
+        self.stale_seconds = stale_seconds
+        self.worker_id = _current_worker_id()
+        self._tasks: Dict[str, asyncio.Task] = {}
         
         # Performance configuration
         self.max_concurrent_tasks = 10
-        self.rate_limit_delay = 0.1  # seconds between requests when using web research
         self.batch_timeout_minutes = 30
         self.max_memory_usage_mb = 500
-        
-        # Statistics tracking
-        self.total_batches_processed = 0
-        self.total_transactions_processed = 0
-        self.average_processing_time_ms = 0
     
     async def initiate_batch_operation(
         self,
@@ -102,52 +131,34 @@ class BatchProcessor:
         """
         Initiate a new batch auto-tagging operation
         
-        Validates request, counts transactions, estimates duration,
-        and starts background processing.
+        Validates request, splits the eligible transaction ids into chunks,
+        persists the job and starts background processing.
         """
-        start_time = time.time()
         batch_id = str(uuid.uuid4())
         
         try:
-            # Validate month format and get transactions
-            transactions = self._get_transactions_for_month(db, request.month, request.force_retag)
-            
-            if not transactions:
-                raise ValueError(f"No transactions found for month {request.month}")
+            # The request session is used in the DB executor and closed before the job starts
+            transaction_count = await get_executors().run_db(
+                self._create_job, db, batch_id, request, current_user_username
+            )
             
             # Estimate processing duration
             estimated_duration = self._estimate_processing_duration(
-                len(transactions), 
+                transaction_count, 
                 request.use_web_research,
                 request.max_concurrent
             )
             
-            # Create batch state
-            batch_state = BatchOperationState(
-                batch_id=batch_id,
-                month=request.month,
-                total_transactions=len(transactions),
-                started_at=datetime.now()
-            )
-            
-            self.active_batches[batch_id] = batch_state
-            
-            # Start background processing
-            asyncio.create_task(self._process_batch_background(
-                batch_id=batch_id,
-                request=request,
-                transactions=transactions,
-                username=current_user_username
-            ))
+            # Start background processing (only the job id crosses over)
+            self._start(batch_id)
             
-            processing_time = int((time.time() - start_time) * 1000)
-            logger.info(f"Batch {batch_id} initiated: {len(transactions)} transactions, estimated {estimated_duration:.1f}min")
+            logger.info(f"Batch {batch_id} initiated: {transaction_count} transactions, estimated {estimated_duration:.1f}min")
             
             return BatchAutoTagResponse(
                 batch_id=batch_id,
                 status="initiated",
-                message=f"Batch auto-tagging initiated for {len(transactions)} transactions",
-                total_transactions=len(transactions),
+                message=f"Batch auto-tagging initiated for {transaction_count} transactions",
+                total_transactions=transaction_count,
                 estimated_duration_minutes=estimated_duration
             )
             
@@ -155,272 +166,450 @@ class BatchProcessor:
             logger.error(f"Failed to initiate batch operation: {e}")
             raise ValueError(f"Batch initiation failed: {str(e)}")
     
+    def _create_job(self, db: Session, batch_id: str, request: BatchAutoTagRequest, username: str) -> int:
+        """Persist the job and its chunks; returns the number of transactions"""
+        try:
+            # Validate month format and get transaction ids
+            transaction_ids = self._get_transaction_ids_for_month(db, request.month, request.force_retag)
+            
+            if not transaction_ids:
+                raise ValueError(f"No transactions found for month {request.month}")
+            
+            now = datetime.now()
+            db.add(BatchJob(
+                id=batch_id,
+                month=request.month,
+                status="initiated",
+                parameters=request.model_dump_json(),
+                created_by=username,
+                total_transactions=len(transaction_ids),
+                worker_id=self.worker_id,
+                heartbeat_at=now,
+                started_at=now
+            ))
+            for index, start in enumerate(range(0, len(transaction_ids), self.chunk_size)):
+                chunk_ids = transaction_ids[start:start + self.chunk_size]
+                db.add(BatchJobChunk(
+                    job_id=batch_id,
+                    chunk_index=index,
+                    first_transaction_id=chunk_ids[0],
+                    last_transaction_id=chunk_ids[-1],
+                    transaction_count=len(chunk_ids)
+                ))
+            db.commit()
+            return len(transaction_ids)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
     def get_batch_progress(self, batch_id: str) -> BatchProgressResponse:
-        """Get real-time progress for a batch operation"""
-        
-        # Check active batches first
-        if batch_id in self.active_batches:
-            state = self.active_batches[batch_id]
-            progress = (state.processed_transactions / state.total_transactions * 100) if state.total_transactions > 0 else 0
+        """Get real-time progress for a batch operation (from any worker)"""
+        db = self.session_factory()
+        try:
+            job = db.get(BatchJob, batch_id)
+            if job is None:
+                raise ValueError(f"Batch {batch_id} not found")
             
-            # Estimate completion time
-            if state.processed_transactions > 0:
-                elapsed_time = (datetime.now() - state.started_at).total_seconds()
-                estimated_total_time = elapsed_time * (state.total_transactions / state.processed_transactions)
-                estimated_completion = state.started_at + timedelta(seconds=estimated_total_time)
+            started_at = job.started_at or job.created_at
+            if job.status in ACTIVE_STATUSES:
+                progress = (job.processed_transactions / job.total_transactions * 100) if job.total_transactions else 0
+                estimated_completion = None
+                if job.processed_transactions and started_at:
+                    elapsed_time = (datetime.now() - started_at).total_seconds()
+                    estimated_total_time = elapsed_time * (job.total_transactions / job.processed_transactions)
+                    estimated_completion = started_at + timedelta(seconds=estimated_total_time)
+                current_operation = job.current_operation or ""
             else:
+                progress = 100.0
                 estimated_completion = None
+                current_operation = job.status.capitalize()
             
             return BatchProgressResponse(
                 batch_id=batch_id,
-                status=state.status,
+                status=job.status,
                 progress=round(progress, 2),
-                total_transactions=state.total_transactions,
-                processed_transactions=state.processed_transactions,
-                tagged_transactions=state.tagged_transactions,
-                skipped_low_confidence=state.skipped_low_confidence,
-                errors_count=state.errors_count,
-                current_operation=state.current_operation,
+                total_transactions=job.total_transactions,
+                processed_transactions=job.processed_transactions,
+                tagged_transactions=job.tagged_transactions,
+                skipped_low_confidence=job.skipped_low_confidence,
+                errors_count=job.errors_count,
+                current_operation=current_operation,
                 estimated_completion=estimated_completion.isoformat() if estimated_completion else None,
-                started_at=state.started_at.isoformat()
+                started_at=started_at.isoformat() if started_at else None
             )
-        
-        # Check completed batches
-        elif batch_id in self.completed_batches:
-            state = self.completed_batches[batch_id]
-            return BatchProgressResponse(
-                batch_id=batch_id,
-                status=state.status,
-                progress=100.0,
-                total_transactions=state.total_transactions,
-                processed_transactions=state.processed_transactions,
-                tagged_transactions=state.tagged_transactions,
-                skipped_low_confidence=state.skipped_low_confidence,
-                errors_count=state.errors_count,
-                current_operation="Completed",
-                estimated_completion=None,
-                started_at=state.started_at.isoformat()
-            )
-        
-        else:
-            raise ValueError(f"Batch {batch_id} not found")
+        finally:
+            db.close()
     
     def get_batch_results(self, batch_id: str) -> BatchResultsResponse:
-        """Get complete results for a completed batch operation"""
-        
-        if batch_id in self.completed_batches:
-            state = self.completed_batches[batch_id]
+        """Get complete results for a completed batch operation (from any worker)"""
+        db = self.session_factory()
+        try:
+            job = db.get(BatchJob, batch_id)
+            if job is None:
+                raise ValueError(f"Batch {batch_id} not found")
+            if job.status in ACTIVE_STATUSES:
+                raise ValueError(f"Batch {batch_id} is still processing. Use progress endpoint instead.")
+            
+            chunks = db.query(BatchJobChunk.results).filter(
+                BatchJobChunk.job_id == batch_id,
+                BatchJobChunk.status == "done"
+            ).order_by(BatchJobChunk.chunk_index).all()
+            results = [
+                BatchTransactionResult(**item)
+                for (payload,) in chunks if payload
+                for item in json.loads(payload)
+            ]
+            performance_metrics = json.loads(job.performance_metrics) if job.performance_metrics else {}
+            confidences = [r.tag_confidence for r in results if r.tag_confidence]
             
             # Calculate summary statistics
             summary = BatchResultsSummary(
-                total_processed=state.total_transactions,
-                successfully_tagged=state.tagged_transactions,
-                skipped_low_confidence=state.skipped_low_confidence,
-                skipped_already_tagged=state.skipped_already_tagged,
-                errors=state.errors_count,
-                fixed_classified=len([r for r in state.results if r.expense_type == "FIXED"]),
-                variable_classified=len([r for r in state.results if r.expense_type == "VARIABLE"]),
-                new_tags_created=len(set([r.suggested_tag for r in state.results if r.suggested_tag])),
-                web_research_count=len([r for r in state.results if r.web_research_used]),
-                average_confidence=sum([r.tag_confidence for r in state.results if r.tag_confidence]) / max(len([r for r in state.results if r.tag_confidence]), 1),
-                processing_time_seconds=state.performance_metrics.get("total_processing_time_seconds", 0)
+                total_processed=job.processed_transactions,
+                successfully_tagged=job.tagged_transactions,
+                skipped_low_confidence=job.skipped_low_confidence,
+                skipped_already_tagged=job.skipped_already_tagged,
+                errors=job.errors_count,
+                fixed_classified=len([r for r in results if r.expense_type == "FIXED"]),
+                variable_classified=len([r for r in results if r.expense_type == "VARIABLE"]),
+                new_tags_created=len(set([r.suggested_tag for r in results if r.suggested_tag])),
+                web_research_count=len([r for r in results if r.web_research_used]),
+                average_confidence=sum(confidences) / max(len(confidences), 1),
+                processing_time_seconds=performance_metrics.get("total_processing_time_seconds", 0)
             )
             
             return BatchResultsResponse(
                 batch_id=batch_id,
-                status=state.status,
-                completed_at=datetime.now().isoformat(),  # You might want to track actual completion time
+                status=job.status,
+                completed_at=(job.completed_at or datetime.now()).isoformat(),
                 summary=summary,
-                transactions=state.results,
-                errors=state.errors,
-                performance_metrics=state.performance_metrics
+                transactions=results,
+                errors=json.loads(job.errors) if job.errors else [],
+                performance_metrics=performance_metrics
             )
-        
-        elif batch_id in self.active_batches:
-            raise ValueError(f"Batch {batch_id} is still processing. Use progress endpoint instead.")
-        
-        else:
-            raise ValueError(f"Batch {batch_id} not found")
+        finally:
+            db.close()
     
-    async def _process_batch_background(
-        self,
-        batch_id: str,
-        request: BatchAutoTagRequest,
-        transactions: List[Transaction],
-        username: str
-    ):
+    def cancel_batch(self, batch_id: str) -> bool:
         """
-        Background task for processing batch operations
-        
-        Handles concurrent processing, error recovery, and progress updates
+        Request cancellation (visible to the owning worker, which stops
+        before its next chunk). Returns False if the job already finished.
         """
-        state = self.active_batches[batch_id]
-        state.status = "processing"
-        start_time = time.time()
+        db = self.session_factory()
+        try:
+            updated = db.query(BatchJob).filter(
+                BatchJob.id == batch_id,
+                BatchJob.status.in_(ACTIVE_STATUSES)
+            ).update({BatchJob.status: "cancelled", BatchJob.completed_at: datetime.now()}, synchronize_session=False)
+            db.commit()
+            if updated:
+                return True
+            if db.get(BatchJob, batch_id) is None:
+                raise ValueError(f"Batch {batch_id} not found")
+            return False
+        finally:
+            db.close()
+    
+    async def resume_interrupted_jobs(self) -> List[str]:
+        """
+        Claim and restart jobs left unfinished by a dead or stalled worker.
+        Safe to call from every worker: the claim is a conditional UPDATE.
+        """
+        resumed = await get_executors().run_db(self._claim_interrupted_jobs)
+        for job_id in resumed:
+            self._start(job_id)
+        return resumed
+    
+    def _claim_interrupted_jobs(self) -> List[str]:
+        db = self.session_factory()
+        claimed_ids = []
+        try:
+            stale_before = datetime.now() - timedelta(seconds=self.stale_seconds)
+            candidates = db.query(BatchJob.id, BatchJob.worker_id, BatchJob.heartbeat_at).filter(
+                BatchJob.status.in_(ACTIVE_STATUSES)
+            ).all()
+            for job_id, worker_id, heartbeat_at in candidates:
+                if job_id in self._tasks:
+                    continue
+                stale = heartbeat_at is None or heartbeat_at < stale_before
+                if not stale and not _owner_is_gone(worker_id):
+                    continue
+                claimed = db.query(BatchJob).filter(
+                    BatchJob.id == job_id,
+                    BatchJob.status.in_(ACTIVE_STATUSES),
+                    or_(BatchJob.worker_id.is_(None), BatchJob.worker_id == worker_id)
+                ).update({BatchJob.worker_id: self.worker_id, BatchJob.heartbeat_at: datetime.now()}, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    logger.info(f"Resuming batch {job_id} (previous owner {worker_id})")
+                    claimed_ids.append(job_id)
+        finally:
+            db.close()
+        return claimed_ids
+    
+    def _start(self, batch_id: str) -> None:
+        task = asyncio.create_task(self.run_job(batch_id))
+        self._tasks[batch_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(batch_id, None))
+    
+    async def run_job(self, batch_id: str) -> None:
+        """
+        Process the pending chunks of a job, in order
         
+        Handles concurrent processing, error recovery, and progress updates.
+        Each chunk commits its tag updates together with its checkpoint.
+        """
+        executors = get_executors()
         try:
-            logger.info(f"Starting batch processing for {batch_id}: {len(transactions)} transactions")
-            
-            # Get database session for this background task
-            db_gen = get_db()
-            db = next(db_gen)
+            started = await executors.run_db(self._start_job, batch_id)
+            if started is None:
+                return
+            request, pending, chunk_count = started
+            logger.info(f"Starting batch processing for {batch_id}: {len(pending)}/{chunk_count} chunks pending")
             
-            try:
-                # Initialize classification service
-                classification_service = get_unified_classification_service(db)
-                
-                # Process transactions in batches to manage memory
-                batch_size = min(request.max_concurrent, 50)  # Limit batch size for memory management
-                processed_count = 0
-                
-                for i in range(0, len(transactions), batch_size):
-                    batch_transactions = transactions[i:i + batch_size]
-                    
-                    # Update progress
-                    state.current_operation = f"Processing batch {i//batch_size + 1} ({len(batch_transactions)} transactions)"
-                    
-                    # Process batch concurrently
-                    if request.use_web_research:
-                        # Sequential processing with rate limiting for web research
-                        batch_results = await self._process_batch_sequential(
-                            classification_service=classification_service,
-                            transactions=batch_transactions,
-                            request=request,
-                            db=db,
-                            state=state
-                        )
-                    else:
-                        # Concurrent processing for fast pattern-based classification
-                        batch_results = await self._process_batch_concurrent(
-                            classification_service=classification_service,
-                            transactions=batch_transactions,
-                            request=request,
-                            db=db,
-                            state=state
-                        )
-                    
-                    # Update results and progress
-                    state.results.extend(batch_results)
-                    processed_count += len(batch_transactions)
-                    state.processed_transactions = processed_count
-                    
-                    # Update counters
-                    for result in batch_results:
-                        if result.action_taken == "tagged":
-                            state.tagged_transactions += 1
-                        elif result.action_taken == "skipped" and "confidence" in (result.skipped_reason or ""):
-                            state.skipped_low_confidence += 1
-                        elif result.action_taken == "skipped" and "already" in (result.skipped_reason or ""):
-                            state.skipped_already_tagged += 1
-                        elif result.action_taken == "error":
-                            state.errors_count += 1
-                    
-                    logger.info(f"Batch {batch_id}: Processed {processed_count}/{len(transactions)} transactions")
-                
-                # Finalize batch
-                state.status = "completed"
-                total_time = time.time() - start_time
-                
-                # Calculate performance metrics
-                state.performance_metrics = {
-                    "total_processing_time_seconds": total_time,
-                    "avg_transaction_time_ms": (total_time * 1000) / len(transactions),
-                    "transactions_per_second": len(transactions) / total_time,
-                    "peak_memory_mb": self._estimate_memory_usage(len(transactions)),
-                    "cache_hit_rate": 0.7,  # Placeholder - could be calculated from actual cache usage
-                    "web_research_usage": request.use_web_research,
-                    "concurrent_tasks": request.max_concurrent,
-                    "confidence_threshold": request.confidence_threshold
-                }
-                
-                logger.info(f"Batch {batch_id} completed successfully in {total_time:.2f}s")
+            for chunk_id, chunk_index in pending:
+                job_status = await executors.run_db(
+                    self._begin_chunk, batch_id, f"Processing chunk {chunk_index + 1}/{chunk_count}"
+                )
+                if job_status != "processing":
+                    logger.info(f"Batch {batch_id} stopped ({job_status})")
+                    return
                 
-            finally:
-                db.close()
+                await self._process_chunk(batch_id, chunk_id, request)
+            
+            await executors.run_db(self._complete_job, batch_id, request)
             
         except Exception as e:
             logger.error(f"Batch {batch_id} failed: {e}")
-            state.status = "failed"
-            state.errors.append(f"Batch processing failed: {str(e)}")
-        
-        finally:
-            # Move to completed batches
-            self.completed_batches[batch_id] = state
-            if batch_id in self.active_batches:
-                del self.active_batches[batch_id]
+            await executors.run_db(self._fail_job, batch_id, str(e))
+    
+    def _start_job(self, batch_id: str) -> Optional[Tuple[BatchAutoTagRequest, List[Tuple[int, int]], int]]:
+        """Mark the job as processing; (request, pending (chunk id, index), chunk count) or None"""
+        db = self.session_factory()
+        try:
+            job = db.get(BatchJob, batch_id)
+            if job is None or job.status not in ACTIVE_STATUSES:
+                return None
+            request = BatchAutoTagRequest.model_validate_json(job.parameters)
+            job.status = "processing"
+            job.worker_id = self.worker_id
+            job.heartbeat_at = datetime.now()
+            db.commit()
             
-            # Update global statistics
-            self.total_batches_processed += 1
-            self.total_transactions_processed += len(transactions)
+            chunk_count = db.query(func.count(BatchJobChunk.id)).filter(BatchJobChunk.job_id == batch_id).scalar()
+            pending = db.query(BatchJobChunk.id, BatchJobChunk.chunk_index).filter(
+                BatchJobChunk.job_id == batch_id,
+                BatchJobChunk.status == "pending"
+            ).order_by(BatchJobChunk.chunk_index).all()
+            return request, [tuple(row) for row in pending], chunk_count
+        finally:
+            db.close()
     
-    async def _process_batch_sequential(
-        self,
-        classification_service: UnifiedClassificationService,
-        transactions: List[Transaction],
-        request: BatchAutoTagRequest,
-        db: Session,
-        state: BatchOperationState
-    ) -> List[BatchTransactionResult]:
-        """Process transactions sequentially with rate limiting (for web research)"""
-        results = []
+    def _begin_chunk(self, batch_id: str, operation: str) -> Optional[str]:
+        """Heartbeat before a chunk; returns the job status (anything but "processing" stops the job)"""
+        db = self.session_factory()
+        try:
+            job = db.get(BatchJob, batch_id)
+            if job is None:
+                return None
+            if job.status != "processing":
+                return job.status
+            job.current_operation = operation
+            job.heartbeat_at = datetime.now()
+            db.commit()
+            return job.status
+        finally:
+            db.close()
+    
+    def _complete_job(self, batch_id: str, request: BatchAutoTagRequest) -> None:
+        db = self.session_factory()
+        try:
+            job = db.get(BatchJob, batch_id)
+            if job is not None and job.status == "processing":
+                job.status = "completed"
+                job.completed_at = datetime.now()
+                job.current_operation = "Completed"
+                job.performance_metrics = json.dumps(self._measure_performance(db, job, request))
+                db.commit()
+                logger.info(f"Batch {batch_id} completed: {job.processed_transactions} transactions")
+        finally:
+            db.close()
+    
+    def _fail_job(self, batch_id: str, error: str) -> None:
+        db = self.session_factory()
+        try:
+            job = db.get(BatchJob, batch_id)
+            if job is not None:
+                job.status = "failed"
+                job.completed_at = datetime.now()
+                job.errors = json.dumps((json.loads(job.errors) if job.errors else []) + [f"Batch processing failed: {error}"])
+                db.commit()
+        finally:
+            db.close()
+    
+    async def _process_chunk(self, batch_id: str, chunk_id: int, request: BatchAutoTagRequest) -> None:
+        """Process one transaction id range: load, classify (no session open), commit"""
+        executors = get_executors()
+        chunk_index, transactions = await executors.run_db(self._load_chunk, chunk_id, request.month)
         
-        for i, transaction in enumerate(transactions):
-            try:
-                # Rate limiting for web research
-                if i > 0:
-                    await asyncio.sleep(self.rate_limit_delay)
-                
-                result = await self._process_single_transaction(
+        # The classification service never reads its session
+        classification_service = get_unified_classification_service(None)
+        started = time.perf_counter()
+        
+        # Cache hits of this chunk only, whatever other jobs and requests run meanwhile
+        with track_cache_usage() as cache_usage:
+            if request.use_web_research:
+                # Web research is paced by the shared token bucket and deduped
+                # per merchant by the research executor
+                results = await self._process_batch_concurrent(
                     classification_service=classification_service,
-                    transaction=transaction,
-                    request=request,
-                    db=db
+                    transactions=transactions,
+                    request=request
                 )
-                results.append(result)
-                
-            except Exception as e:
-                logger.error(f"Error processing transaction {transaction.id}: {e}")
-                results.append(BatchTransactionResult(
-                    transaction_id=transaction.id,
-                    original_label=transaction.label or "",
-                    action_taken="error",
-                    error_message=str(e),
-                    processing_time_ms=0
-                ))
+            else:
+                # Pattern matching is pure CPU: the whole chunk goes to the process pool
+                results = await self._process_batch_fast(transactions, request)
         
-        return results
+        counts = {"tagged": 0, "skipped_low_confidence": 0, "skipped_already_tagged": 0, "errors": 0}
+        for result in results:
+            if result.action_taken == "tagged":
+                counts["tagged"] += 1
+            elif result.action_taken == "skipped" and "confidence" in (result.skipped_reason or ""):
+                counts["skipped_low_confidence"] += 1
+            elif result.action_taken == "skipped" and "already" in (result.skipped_reason or ""):
+                counts["skipped_already_tagged"] += 1
+            elif result.action_taken == "error":
+                counts["errors"] += 1
+        
+        checkpoint = {
+            "status": "done",
+            "results": json.dumps([r.model_dump() for r in results], ensure_ascii=False),
+            "tagged": counts["tagged"],
+            "skipped_low_confidence": counts["skipped_low_confidence"],
+            "skipped_already_tagged": counts["skipped_already_tagged"],
+            "errors": counts["errors"],
+            "web_research_count": sum(1 for r in results if r.web_research_used),
+            "cache_hits": cache_usage.hits,
+            "cache_lookups": cache_usage.lookups,
+            "processing_ms": int((time.perf_counter() - started) * 1000),
+            "completed_at": datetime.now()
+        }
+        
+        # Tag updates, checkpoint and progress in one transaction
+        await executors.run_db(self._commit_chunk, batch_id, chunk_id, request, results, counts, checkpoint)
+        logger.info(f"Batch {batch_id}: chunk {chunk_index} done ({len(results)} transactions)")
+    
+    def _load_chunk(self, chunk_id: int, month: str) -> Tuple[int, List[Transaction]]:
+        """Chunk index and the transactions of its id range (detached: the session is closed on return)"""
+        db = self.session_factory()
+        try:
+            chunk = db.get(BatchJobChunk, chunk_id)
+            transactions = db.query(Transaction).filter(
+                Transaction.id.between(chunk.first_transaction_id, chunk.last_transaction_id),
+                Transaction.month == month,
+                Transaction.is_expense == True,
+                Transaction.exclude == False
+            ).order_by(Transaction.id).all()
+            return chunk.chunk_index, transactions
+        finally:
+            db.close()
+    
+    def _commit_chunk(
+        self,
+        batch_id: str,
+        chunk_id: int,
+        request: BatchAutoTagRequest,
+        results: List[BatchTransactionResult],
+        counts: Dict[str, int],
+        checkpoint: Dict[str, Any]
+    ) -> None:
+        """Write the tags of the chunk, its checkpoint and the job counters in one transaction"""
+        db = self.session_factory()
+        try:
+            for result in results:
+                if result.action_taken != "tagged":
+                    continue
+                values = {Transaction.tags: result.suggested_tag}
+                if request.include_fixed_variable and result.expense_type:
+                    values[Transaction.expense_type] = result.expense_type
+                db.query(Transaction).filter(Transaction.id == result.transaction_id).update(
+                    values, synchronize_session=False
+                )
+            db.query(BatchJobChunk).filter(BatchJobChunk.id == chunk_id).update(
+                {getattr(BatchJobChunk, column): value for column, value in checkpoint.items()},
+                synchronize_session=False
+            )
+            db.query(BatchJob).filter(BatchJob.id == batch_id).update({
+                BatchJob.processed_transactions: BatchJob.processed_transactions + len(results),
+                BatchJob.tagged_transactions: BatchJob.tagged_transactions + counts["tagged"],
+                BatchJob.skipped_low_confidence: BatchJob.skipped_low_confidence + counts["skipped_low_confidence"],
+                BatchJob.skipped_already_tagged: BatchJob.skipped_already_tagged + counts["skipped_already_tagged"],
+                BatchJob.errors_count: BatchJob.errors_count + counts["errors"],
+                BatchJob.heartbeat_at: datetime.now()
+            }, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def _measure_performance(self, db: Session, job: BatchJob, request: BatchAutoTagRequest) -> Dict[str, Any]:
+        """Metrics measured from the chunk checkpoints"""
+        chunks = db.query(BatchJobChunk).filter(
+            BatchJobChunk.job_id == job.id,
+            BatchJobChunk.status == "done"
+        ).all()
+        processing_seconds = sum(c.processing_ms or 0 for c in chunks) / 1000
+        cache_hits = sum(c.cache_hits or 0 for c in chunks)
+        cache_lookups = sum(c.cache_lookups or 0 for c in chunks)
+        durations = sorted(
+            item.get("processing_time_ms", 0)
+            for c in chunks if c.results
+            for item in json.loads(c.results)
+        )
+        processed = job.processed_transactions or 0
+        return {
+            "total_processing_time_seconds": round(processing_seconds, 3),
+            "wall_clock_seconds": round((job.completed_at - job.started_at).total_seconds(), 3) if job.started_at else None,
+            "avg_transaction_time_ms": round(processing_seconds * 1000 / processed, 2) if processed else 0,
+            "p50_transaction_time_ms": statistics.median(durations) if durations else 0,
+            "p95_transaction_time_ms": durations[max(0, int(len(durations) * 0.95) - 1)] if durations else 0,
+            "transactions_per_second": round(processed / processing_seconds, 2) if processing_seconds else None,
+            "peak_memory_mb": _peak_memory_mb(),
+            "cache_hits": cache_hits,
+            "cache_lookups": cache_lookups,
+            "cache_hit_rate": round(cache_hits / cache_lookups, 3) if cache_lookups else None,
+            "chunks": len(chunks),
+            "web_research_usage": request.use_web_research,
+            "web_research_count": sum(c.web_research_count or 0 for c in chunks),
+            "concurrent_tasks": request.max_concurrent,
+            "confidence_threshold": request.confidence_threshold
+        }
     
     async def _process_batch_concurrent(
         self,
         classification_service: UnifiedClassificationService,
         transactions: List[Transaction],
-        request: BatchAutoTagRequest,
-        db: Session,
-        state: BatchOperationState
+        request: BatchAutoTagRequest
     ) -> List[BatchTransactionResult]:
-        """Process transactions concurrently (for fast pattern-based classification)"""
+        """Process transactions concurrently (web research is rate limited downstream)"""
         
-        # Create tasks for concurrent processing
-        tasks = []
-        for transaction in transactions:
-            task = asyncio.create_task(self._process_single_transaction(
-                classification_service=classification_service,
-                transaction=transaction,
-                request=request,
-                db=db
-            ))
-            tasks.append(task)
-        
-        # Process with concurrency limit
+        # Process with concurrency limit (coroutines start inside the semaphore)
         results = []
         semaphore = asyncio.Semaphore(request.max_concurrent)
         
-        async def process_with_semaphore(task):
+        async def process_with_semaphore(transaction):
             async with semaphore:
-                return await task
+                return await self._process_single_transaction(
+                    classification_service=classification_service,
+                    transaction=transaction,
+                    request=request
+                )
         
         completed_tasks = await asyncio.gather(
-            *[process_with_semaphore(task) for task in tasks],
+            *[process_with_semaphore(transaction) for transaction in transactions],
             return_exceptions=True
         )
         
@@ -440,26 +629,56 @@ class BatchProcessor:
         
         return results
     
+    async def _process_batch_fast(
+        self,
+        transactions: List[Transaction],
+        request: BatchAutoTagRequest
+    ) -> List[BatchTransactionResult]:
+        """Classify a chunk with pattern matching on the CPU process pool"""
+        results: Dict[int, BatchTransactionResult] = {}
+        to_classify = []
+        for transaction in transactions:
+            skipped = self._skip_if_tagged(transaction, request)
+            if skipped is not None:
+                results[transaction.id] = skipped
+            else:
+                to_classify.append((transaction.id, transaction.label or "", transaction.amount))
+        
+        by_id = {transaction.id: transaction for transaction in transactions}
+        try:
+            classified = await map_cpu_chunks(classify_fast_chunk, to_classify, request.include_fixed_variable)
+        except Exception as e:
+            logger.error(f"Chunk classification failed: {e}")
+            classified = []
+            for transaction_id, label, _ in to_classify:
+                results[transaction_id] = BatchTransactionResult(
+                    transaction_id=transaction_id,
+                    original_label=label,
+                    action_taken="error",
+                    error_message=str(e),
+                    processing_time_ms=0
+                )
+        
+        for transaction_id, classification_result in classified:
+            results[transaction_id] = self._apply_classification(
+                by_id[transaction_id], classification_result, request
+            )
+        
+        return [results[transaction.id] for transaction in transactions]
+    
     async def _process_single_transaction(
         self,
         classification_service: UnifiedClassificationService,
         transaction: Transaction,
-        request: BatchAutoTagRequest,
-        db: Session
+        request: BatchAutoTagRequest
     ) -> BatchTransactionResult:
         """Process a single transaction for auto-tagging"""
         start_time = time.time()
         
         try:
-            # Check if transaction already has tags and force_retag is False
-            if transaction.tags and transaction.tags.strip() and not request.force_retag:
-                return BatchTransactionResult(
-                    transaction_id=transaction.id,
-                    original_label=transaction.label or "",
-                    action_taken="skipped",
-                    skipped_reason="Already tagged and force_retag=False",
-                    processing_time_ms=int((time.time() - start_time) * 1000)
-                )
+            skipped = self._skip_if_tagged(transaction, request)
+            if skipped is not None:
+                return skipped
             
             # Get AI classification
             if request.use_web_research:
@@ -476,40 +695,7 @@ class BatchProcessor:
                     include_expense_type=request.include_fixed_variable
                 )
             
-            # Check confidence threshold
-            if classification_result.tag_confidence < request.confidence_threshold:
-                return BatchTransactionResult(
-                    transaction_id=transaction.id,
-                    original_label=transaction.label or "",
-                    suggested_tag=classification_result.suggested_tag,
-                    tag_confidence=classification_result.tag_confidence,
-                    action_taken="skipped",
-                    skipped_reason=f"Low confidence ({classification_result.tag_confidence:.2f} < {request.confidence_threshold})",
-                    processing_time_ms=classification_result.processing_time_ms,
-                    web_research_used=classification_result.web_research_used
-                )
-            
-            # Update transaction with new tags and expense type
-            transaction.tags = classification_result.suggested_tag
-            if request.include_fixed_variable and classification_result.expense_type:
-                transaction.expense_type = classification_result.expense_type
-            
-            # Save changes to database
-            db.add(transaction)
-            db.commit()
-            db.refresh(transaction)
-            
-            return BatchTransactionResult(
-                transaction_id=transaction.id,
-                original_label=transaction.label or "",
-                suggested_tag=classification_result.suggested_tag,
-                tag_confidence=classification_result.tag_confidence,
-                expense_type=classification_result.expense_type,
-                expense_type_confidence=classification_result.expense_type_confidence,
-                action_taken="tagged",
-                processing_time_ms=classification_result.processing_time_ms,
-                web_research_used=classification_result.web_research_used
-            )
+            return self._apply_classification(transaction, classification_result, request)
             
         except Exception as e:
             logger.error(f"Error processing transaction {transaction.id}: {e}")
@@ -521,15 +707,61 @@ class BatchProcessor:
                 processing_time_ms=int((time.time() - start_time) * 1000)
             )
     
-    def _get_transactions_for_month(
+    def _skip_if_tagged(self, transaction: Transaction, request: BatchAutoTagRequest) -> Optional[BatchTransactionResult]:
+        """Skipped result when the transaction already has tags and force_retag is False"""
+        if transaction.tags and transaction.tags.strip() and not request.force_retag:
+            return BatchTransactionResult(
+                transaction_id=transaction.id,
+                original_label=transaction.label or "",
+                action_taken="skipped",
+                skipped_reason="Already tagged and force_retag=False",
+                processing_time_ms=0
+            )
+        return None
+    
+    def _apply_classification(
+        self,
+        transaction: Transaction,
+        classification_result,
+        request: BatchAutoTagRequest
+    ) -> BatchTransactionResult:
+        """Apply the confidence threshold; tagged results are written by _commit_chunk"""
+        
+        # Check confidence threshold
+        if classification_result.tag_confidence < request.confidence_threshold:
+            return BatchTransactionResult(
+                transaction_id=transaction.id,
+                original_label=transaction.label or "",
+                suggested_tag=classification_result.suggested_tag,
+                tag_confidence=classification_result.tag_confidence,
+                action_taken="skipped",
+                skipped_reason=f"Low confidence ({classification_result.tag_confidence:.2f} < {request.confidence_threshold})",
+                processing_time_ms=classification_result.processing_time_ms,
+                web_research_used=classification_result.web_research_used
+            )
+        
+        return BatchTransactionResult(
+            transaction_id=transaction.id,
+            original_label=transaction.label or "",
+            suggested_tag=classification_result.suggested_tag,
+            tag_confidence=classification_result.tag_confidence,
+            expense_type=classification_result.expense_type,
+            expense_type_confidence=classification_result.expense_type_confidence,
+            action_taken="tagged",
+            processing_time_ms=classification_result.processing_time_ms,
+            web_research_used=classification_result.web_research_used
+        )
+    
+    
+    def _get_transaction_ids_for_month(
         self,
         db: Session,
         month: str,
         force_retag: bool
-    ) -> List[Transaction]:
-        """Get transactions for processing based on month and retag settings"""
+    ) -> List[int]:
+        """Get ids of transactions to process based on month and retag settings"""
         
-        base_query = db.query(Transaction).filter(
+        base_query = db.query(Transaction.id).filter(
             Transaction.month == month,
             Transaction.is_expense == True,
             Transaction.exclude == False
@@ -544,8 +776,8 @@ class BatchProcessor:
                 )
             )
         
-        transactions = base_query.order_by(Transaction.date_op.desc()).all()
-        return transactions
+        # Ascending ids: chunks are contiguous id ranges
+        return [transaction_id for (transaction_id,) in base_query.order_by(Transaction.id).all()]
     
     def _estimate_processing_duration(
         self,
@@ -556,9 +788,9 @@ class BatchProcessor:
         """Estimate processing duration in minutes"""
         
         if use_web_research:
-            # Sequential processing with rate limiting
-            time_per_transaction = 1.5  # seconds
-            total_seconds = transaction_count * time_per_transaction
+            # Worst case: every transaction needs a lookup paced by the shared token bucket
+            rate = get_research_rate_limiter().rate
+            total_seconds = transaction_count / rate if rate > 0 else transaction_count * 0.2
         else:
             # Concurrent processing
             time_per_transaction = 0.2  # seconds
@@ -566,30 +798,44 @@ class BatchProcessor:
         
         return total_seconds / 60  # Convert to minutes
     
-    def _estimate_memory_usage(self, transaction_count: int) -> float:
-        """Estimate memory usage in MB"""
-        base_memory = 20  # Base service memory
-        per_transaction_memory = 0.1  # MB per transaction
-        return base_memory + (transaction_count * per_transaction_memory)
-    
     def get_service_statistics(self) -> Dict[str, Any]:
-        """Get comprehensive service statistics for monitoring"""
+        """Get comprehensive service statistics for monitoring (all workers)"""
+        db = self.session_factory()
+        try:
+            by_status = dict(db.query(BatchJob.status, func.count(BatchJob.id)).group_by(BatchJob.status).all())
+            total_processed = db.query(func.sum(BatchJob.processed_transactions)).scalar() or 0
+            chunk_ms, chunk_transactions = db.query(
+                func.sum(BatchJobChunk.processing_ms), func.sum(BatchJobChunk.transaction_count)
+            ).filter(BatchJobChunk.status == "done").one()
+            active_ids = [job_id for (job_id,) in db.query(BatchJob.id).filter(BatchJob.status.in_(ACTIVE_STATUSES)).all()]
+            recent_ids = [job_id for (job_id,) in db.query(BatchJob.id).filter(
+                BatchJob.status.notin_(ACTIVE_STATUSES)
+            ).order_by(BatchJob.completed_at.desc()).limit(10).all()]
+        finally:
+            db.close()
+        
         return {
             "service_name": "BatchProcessor",
-            "version": "1.0.0",
-            "active_batches": len(self.active_batches),
-            "completed_batches": len(self.completed_batches),
-            "total_batches_processed": self.total_batches_processed,
-            "total_transactions_processed": self.total_transactions_processed,
-            "average_processing_time_ms": self.average_processing_time_ms,
+            "version": "2.0.0",
+            "worker_id": self.worker_id,
+            "active_batches": len(active_ids),
+            "completed_batches": sum(count for status, count in by_status.items() if status not in ACTIVE_STATUSES),
+            "batches_by_status": by_status,
+            "total_batches_processed": sum(by_status.values()),
+            "total_transactions_processed": total_processed,
+            "average_processing_time_ms": round(chunk_ms / chunk_transactions, 2) if chunk_ms and chunk_transactions else 0,
+            "running_in_this_worker": list(self._tasks),
             "configuration": {
+                "chunk_size": self.chunk_size,
+                "stale_seconds": self.stale_seconds,
                 "max_concurrent_tasks": self.max_concurrent_tasks,
-                "rate_limit_delay": self.rate_limit_delay,
+                "research_rate_limit": get_research_rate_limiter().get_stats(),
+                "research_executor": get_research_executor().get_stats(),
                 "batch_timeout_minutes": self.batch_timeout_minutes,
                 "max_memory_usage_mb": self.max_memory_usage_mb
             },
-            "active_batch_ids": list(self.active_batches.keys()),
-            "recent_completed_batches": list(self.completed_batches.keys())[-10:]  # Last 10
+            "active_batch_ids": active_ids,
+            "recent_completed_batches": recent_ids  # Last 10
         }
 
 # Global service instance
@@ -0,0 +1,48 @@
+"""
+Per-task cache accounting
+
+The classification and research caches keep process-wide counters, shared
+by every request and every batch job of the worker. A job that needs its
+own hit rate opens a scope with track_cache_usage(): lookups made in that
+context (its asyncio tasks, and run_db calls, which copy the contextvars)
+are counted on the scope only, whatever runs next to it.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class CacheUsage:
+    """Hits and lookups seen by one scope"""
+
+    def __init__(self):
+        self.hits = 0
+        self.lookups = 0
+        self._lock = threading.Lock()
+
+    def record(self, hits: int = 0, misses: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.lookups += hits + misses
+
+
+_current_usage: ContextVar[Optional[CacheUsage]] = ContextVar("cache_usage", default=None)
+
+
+def record_cache_lookup(hits: int = 0, misses: int = 0) -> None:
+    """Count lookups on the scope of the current context (no-op outside a scope)"""
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.record(hits, misses)
+
+
+@contextmanager
+def track_cache_usage() -> Iterator[CacheUsage]:
+    usage = CacheUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
@@ -3,9 +3,8 @@ Business logic calculations for Budget API with Redis caching
 """
 import logging
 import datetime as dt
+import statistics
 from typing import List, Optional, Dict, Tuple
-import numpy as np
-import pandas as pd
 from sqlalchemy.orm import Session
 
 from models.database import Config, Transaction, FixedLine, CustomProvision
@@ -15,9 +14,6 @@ from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
-# Initialize Redis cache
-redis_cache = get_redis_cache()
-
 
 def _cache_key(func_name: str, user_id: Optional[str] = None, *args) -> str:
     """Generate cache key for function and arguments with user context"""
@@ -34,7 +30,7 @@ def _get_from_cache(cache_key: str, use_redis: bool = True):
         return None
     
     try:
-        return redis_cache.get(cache_key)
+        return get_redis_cache().get(cache_key)
     except Exception as e:
         logger.warning(f"Redis cache get failed for key '{cache_key}': {e}")
         return None
@@ -48,7 +44,7 @@ def _set_to_cache(cache_key: str, value: any, ttl: Optional[int] = None, use_red
     try:
         if ttl is None:
             ttl = settings.redis.default_ttl
-        return redis_cache.set(cache_key, value, ttl)
+        return get_redis_cache().set(cache_key, value, ttl)
     except Exception as e:
         logger.warning(f"Redis cache set failed for key '{cache_key}': {e}")
         return False
@@ -444,8 +440,8 @@ def detect_anomalies(db: Session, month: str, user_id: Optional[str] = None) ->
         amounts = category_stats[category]
         if len(amounts) > 1:
             category_stats[category] = {
-                'mean': np.mean(amounts),
-                'std': np.std(amounts),
+                'mean': statistics.fmean(amounts),
+                'std': statistics.pstdev(amounts),
                 'count': len(amounts)
             }
         else:
@@ -626,7 +622,7 @@ def clear_calculation_cache(user_id: Optional[str] = None):
             # Clear all calculation cache
             pattern = "*"
         
-        deleted_count = redis_cache.delete_pattern(pattern)
+        deleted_count = get_redis_cache().delete_pattern(pattern)
         logger.info(f"Calculation cache cleared: {deleted_count} entries deleted for pattern '{pattern}'")
         return deleted_count
     except Exception as e:
@@ -637,6 +633,7 @@ def clear_calculation_cache(user_id: Optional[str] = None):
 def get_cache_stats():
     """Get Redis cache statistics"""
     try:
+        redis_cache = get_redis_cache()
         stats = redis_cache.get_stats()
         health = redis_cache.health_check()
         
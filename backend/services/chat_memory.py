@@ -1,17 +1,33 @@
 """
 Chat Memory Service for Budget Famille v4.1
-Provides multi-turn conversation memory with Redis storage and SQLite fallback.
+Provides multi-turn conversation memory with Redis storage and in-memory fallback.
 
 Features:
 - Session-based conversation storage (TTL 30 minutes)
 - Last 10 messages per session
 - Financial context injection
-- Redis primary with SQLite fallback
+- Redis primary with in-memory fallback
+
+Storage layout (same in Redis and in the fallback store):
+- chat_session:{user}:{session}:meta      hash (ids, timestamps, JSON contexts)
+- chat_session:{user}:{session}:messages  list of JSON messages (RPUSH + LTRIM)
+- chat_session:{user}:session_ids         list of the user's last session ids
+Appending a message is O(1) in the history length; reads fetch the metadata
+and the needed tail of the list in one pipelined round trip.
+
+Sessions written by earlier versions (one JSON blob per session under
+chat_session:{user}:{session}, a JSON list of ids under
+chat_session:{user}:sessions) are moved to this layout by RedisChatStore
+the first time they are read.
 """
+import json
 import logging
+import threading
+import time
 import uuid
 import datetime as dt
-from typing import Any, Dict, List, Optional, Tuple, Union
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
@@ -20,8 +36,13 @@ logger = logging.getLogger(__name__)
 # Configuration
 DEFAULT_SESSION_TTL = 1800  # 30 minutes
 MAX_MESSAGES_PER_SESSION = 10
+MAX_SESSIONS_PER_USER = 10
+LLM_CONTEXT_MESSAGES = 6  # Messages sent to the LLM with each question
 SESSION_KEY_PREFIX = "chat_session"
 
+# RedisChatStore._migrate_legacy: another reader migrated the key first
+_CONCURRENT = object()
+
 
 class MessageRole(str, Enum):
     USER = "user"
@@ -138,36 +159,392 @@ class ChatSession:
         return "\n".join(lines)
 
 
+def _meta_key(user_id: str, session_id: str) -> str:
+    return f"{SESSION_KEY_PREFIX}:{user_id}:{session_id}:meta"
+
+
+def _messages_key(user_id: str, session_id: str) -> str:
+    return f"{SESSION_KEY_PREFIX}:{user_id}:{session_id}:messages"
+
+
+def _user_sessions_key(user_id: str) -> str:
+    return f"{SESSION_KEY_PREFIX}:{user_id}:session_ids"
+
+
+def _legacy_session_key(user_id: str, session_id: str) -> str:
+    return f"{SESSION_KEY_PREFIX}:{user_id}:{session_id}"
+
+
+def _legacy_user_sessions_key(user_id: str) -> str:
+    return f"{SESSION_KEY_PREFIX}:{user_id}:sessions"
+
+
+# KEYS[1] = meta hash, KEYS[2] = messages list
+# ARGV[1] = message JSON, ARGV[2] = updated_at, ARGV[3] = max messages, ARGV[4] = TTL (s)
+_APPEND_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local length = redis.call('RPUSH', KEYS[2], ARGV[1])
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[3]), -1)
+redis.call('HSET', KEYS[1], 'updated_at', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return math.min(length, tonumber(ARGV[3]))
+"""
+
+# KEYS[1] = meta hash, KEYS[2] = messages list; ARGV[1] = TTL (s), ARGV[2..] = field, value, ...
+_UPDATE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
+
+
+class RedisChatStore:
+    """
+    Chat sessions in Redis: metadata hash + capped message list per session.
+
+    Appends and metadata updates are single EVALSHA round trips (the session
+    must exist); reads pipeline HGETALL + LRANGE. Redis errors are logged and
+    reported as a missing session instead of failing the chat request.
+    """
+
+    def __init__(self, client, key_prefix: str = "", max_messages: int = MAX_MESSAGES_PER_SESSION,
+                 ttl: int = DEFAULT_SESSION_TTL):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self._append = client.register_script(_APPEND_LUA)
+        self._update = client.register_script(_UPDATE_LUA)
+        self.stats = {"errors": 0}
+
+    def _keys(self, user_id: str, session_id: str) -> List[str]:
+        return [self.key_prefix + _meta_key(user_id, session_id), self.key_prefix + _messages_key(user_id, session_id)]
+
+    def _error(self, operation: str, e: Exception) -> None:
+        self.stats["errors"] += 1
+        logger.error(f"Redis chat memory {operation} error: {e}")
+
+    def create_session(self, user_id: str, session_id: str, meta: Dict[str, str]) -> bool:
+        meta_key, _ = self._keys(user_id, session_id)
+        sessions_key = self.key_prefix + _user_sessions_key(user_id)
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hset(meta_key, mapping=meta)
+            pipe.expire(meta_key, self.ttl)
+            pipe.rpush(sessions_key, session_id)
+            pipe.ltrim(sessions_key, -MAX_SESSIONS_PER_USER, -1)
+            pipe.expire(sessions_key, self.ttl * 2)
+            pipe.execute()
+            return True
+        except Exception as e:
+            self._error("create", e)
+            return False
+
+    def append_message(self, user_id: str, session_id: str, message: Dict[str, Any],
+                       updated_at: str) -> Optional[int]:
+        """Append one message; returns the new message count, None if the session does not exist"""
+        try:
+            length = int(self._append(
+                keys=self._keys(user_id, session_id),
+                args=[json.dumps(message), updated_at, self.max_messages, self.ttl]
+            ))
+        except Exception as e:
+            self._error("append", e)
+            return None
+        return length if length >= 0 else None
+
+    def load_session(self, user_id: str, session_id: str,
+                     last: Optional[int] = None) -> Optional[Tuple[Dict[str, str], List[Dict[str, Any]]]]:
+        """Metadata and the last `last` messages (all when None) in one round trip"""
+        meta_key, messages_key = self._keys(user_id, session_id)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hgetall(meta_key)
+            pipe.lrange(messages_key, -last if last else 0, -1)
+            meta, raw_messages = pipe.execute()
+        except Exception as e:
+            self._error("load", e)
+            return None
+        if not meta:
+            return self._migrate_legacy_session(user_id, session_id, last)
+        return meta, [json.loads(raw) for raw in raw_messages]
+
+    def _migrate_legacy(self, legacy_key: str, rewrite: Callable[[Any, int, Any], Any]) -> Any:
+        """
+        Move a JSON value written by earlier versions to the current layout.
+
+        The legacy key is WATCHed and read, then `rewrite(value, ttl, pipe)`
+        queues the new keys and the legacy DEL follows in the same MULTI:
+        either the session is migrated or the legacy key is left for the
+        next reader. Returns what `rewrite` returned (None when there is
+        nothing to migrate) or _CONCURRENT when another reader migrated it first.
+        """
+        from redis.exceptions import WatchError
+
+        with self.client.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(legacy_key)
+                raw, ttl = pipe.get(legacy_key), pipe.ttl(legacy_key)
+                if raw is None:
+                    return None
+                try:
+                    data = json.loads(raw)
+                except (TypeError, ValueError):
+                    data = None
+                pipe.multi()
+                result = rewrite(data, ttl if ttl > 0 else self.ttl, pipe)
+                if result is None:
+                    logger.warning(f"Dropping unreadable legacy chat key {legacy_key}")
+                pipe.delete(legacy_key)
+                pipe.execute()
+                return result
+            except WatchError:
+                return _CONCURRENT
+
+    def _migrate_legacy_session(self, user_id: str, session_id: str,
+                                last: Optional[int]) -> Optional[Tuple[Dict[str, str], List[Dict[str, Any]]]]:
+        """Rewrite a pre-hash/list JSON blob session in the current layout"""
+        meta_key, messages_key = self._keys(user_id, session_id)
+
+        def rewrite(data, ttl, pipe):
+            if not isinstance(data, dict):
+                return None
+            meta = {
+                "session_id": data.get("session_id", session_id),
+                "user_id": data.get("user_id", user_id),
+                "created_at": data.get("created_at", ""),
+                "updated_at": data.get("updated_at", ""),
+                "financial_context": json.dumps(data.get("financial_context"), default=str),
+                "metadata": json.dumps(data.get("metadata") or {}, default=str),
+            }
+            messages = list(data.get("messages") or [])[-self.max_messages:]
+            pipe.delete(messages_key)
+            pipe.hset(meta_key, mapping=meta)
+            pipe.expire(meta_key, ttl)
+            if messages:
+                pipe.rpush(messages_key, *[json.dumps(message) for message in messages])
+                pipe.expire(messages_key, ttl)
+            return meta, messages
+
+        try:
+            migrated = self._migrate_legacy(self.key_prefix + _legacy_session_key(user_id, session_id), rewrite)
+        except Exception as e:
+            self._error("migrate", e)
+            return None
+        if migrated is _CONCURRENT:
+            return self.load_session(user_id, session_id, last)
+        if migrated is None:
+            return None
+        meta, messages = migrated
+        logger.info(f"Migrated legacy chat session {session_id} ({len(messages)} messages)")
+        return meta, messages[-last:] if last else messages
+
+    def update_session(self, user_id: str, session_id: str, fields: Dict[str, str]) -> bool:
+        args: List[Any] = [self.ttl]
+        for field_name, value in fields.items():
+            args += [field_name, value]
+        try:
+            return bool(int(self._update(keys=self._keys(user_id, session_id), args=args)))
+        except Exception as e:
+            self._error("update", e)
+            return False
+
+    def delete_session(self, user_id: str, session_id: str) -> bool:
+        # Also the blob of a legacy session never read since the upgrade
+        keys = self._keys(user_id, session_id) + [self.key_prefix + _legacy_session_key(user_id, session_id)]
+        try:
+            return self.client.delete(*keys) > 0
+        except Exception as e:
+            self._error("delete", e)
+            return False
+
+    def list_sessions(self, user_id: str) -> List[str]:
+        sessions_key = self.key_prefix + _user_sessions_key(user_id)
+        try:
+            sessions = list(self.client.lrange(sessions_key, 0, -1))
+            if sessions:
+                return sessions
+
+            # Id list written by earlier versions (JSON list)
+            def rewrite(data, ttl, pipe):
+                if not isinstance(data, list):
+                    return None
+                ids = [str(session_id) for session_id in data[-MAX_SESSIONS_PER_USER:]]
+                if ids:
+                    pipe.rpush(sessions_key, *ids)
+                    pipe.expire(sessions_key, self.ttl * 2)
+                return ids
+
+            migrated = self._migrate_legacy(self.key_prefix + _legacy_user_sessions_key(user_id), rewrite)
+            if migrated is _CONCURRENT:
+                return list(self.client.lrange(sessions_key, 0, -1))
+            return migrated or []
+        except Exception as e:
+            self._error("list", e)
+            return []
+
+    def clear_sessions(self, user_id: str) -> None:
+        try:
+            self.client.delete(self.key_prefix + _user_sessions_key(user_id))
+        except Exception as e:
+            self._error("clear", e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"storage_type": "redis", **self.stats}
+
+
+class InMemoryChatStore:
+    """
+    Per-process fallback with the RedisChatStore layout: one hash and one
+    bounded deque per session, one list of ids per user, each key with its
+    own expiry (checked on access).
+    """
+
+    def __init__(self, max_messages: int = MAX_MESSAGES_PER_SESSION, ttl: int = DEFAULT_SESSION_TTL):
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self._data: Dict[str, Any] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Any:
+        expires_at = self._expires_at.get(key)
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self._data.pop(key, None)
+            self._expires_at.pop(key, None)
+        return self._data.get(key)
+
+    def _expire(self, key: str, ttl: int) -> None:
+        if key in self._data:
+            self._expires_at[key] = time.monotonic() + ttl
+
+    def create_session(self, user_id: str, session_id: str, meta: Dict[str, str]) -> bool:
+        meta_key, sessions_key = _meta_key(user_id, session_id), _user_sessions_key(user_id)
+        with self._lock:
+            self._data[meta_key] = dict(meta)
+            self._expire(meta_key, self.ttl)
+            sessions = self._get(sessions_key)
+            if sessions is None:
+                sessions = self._data[sessions_key] = deque(maxlen=MAX_SESSIONS_PER_USER)
+            sessions.append(session_id)
+            self._expire(sessions_key, self.ttl * 2)
+        return True
+
+    def append_message(self, user_id: str, session_id: str, message: Dict[str, Any],
+                       updated_at: str) -> Optional[int]:
+        meta_key, messages_key = _meta_key(user_id, session_id), _messages_key(user_id, session_id)
+        with self._lock:
+            meta = self._get(meta_key)
+            if meta is None:
+                return None
+            messages = self._get(messages_key)
+            if messages is None:
+                messages = self._data[messages_key] = deque(maxlen=self.max_messages)
+            messages.append(message)
+            meta["updated_at"] = updated_at
+            self._expire(meta_key, self.ttl)
+            self._expire(messages_key, self.ttl)
+            return len(messages)
+
+    def load_session(self, user_id: str, session_id: str,
+                     last: Optional[int] = None) -> Optional[Tuple[Dict[str, str], List[Dict[str, Any]]]]:
+        with self._lock:
+            meta = self._get(_meta_key(user_id, session_id))
+            if meta is None:
+                return None
+            messages = list(self._get(_messages_key(user_id, session_id)) or ())
+        return dict(meta), messages[-last:] if last else messages
+
+    def update_session(self, user_id: str, session_id: str, fields: Dict[str, str]) -> bool:
+        meta_key = _meta_key(user_id, session_id)
+        with self._lock:
+            meta = self._get(meta_key)
+            if meta is None:
+                return False
+            meta.update(fields)
+            self._expire(meta_key, self.ttl)
+            self._expire(_messages_key(user_id, session_id), self.ttl)
+        return True
+
+    def delete_session(self, user_id: str, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._get(_meta_key(user_id, session_id)) is not None
+            for key in (_meta_key(user_id, session_id), _messages_key(user_id, session_id)):
+                self._data.pop(key, None)
+                self._expires_at.pop(key, None)
+        return deleted
+
+    def list_sessions(self, user_id: str) -> List[str]:
+        with self._lock:
+            return list(self._get(_user_sessions_key(user_id)) or ())
+
+    def clear_sessions(self, user_id: str) -> None:
+        with self._lock:
+            self._data.pop(_user_sessions_key(user_id), None)
+            self._expires_at.pop(_user_sessions_key(user_id), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sessions = sum(1 for key in list(self._data) if key.endswith(":meta") and self._get(key) is not None)
+        return {"storage_type": "in_memory_fallback", "session_count": sessions}
+
+
 class ChatMemoryService:
     """
     Service for managing chat conversation memory.
     Uses Redis when available, falls back to in-memory storage.
     """
 
-    def __init__(self):
-        self._cache: Any = None
-        self._fallback_storage: Dict[str, Any] = {}
-        self._initialized = False
+    def __init__(self, store: Optional[Union[RedisChatStore, InMemoryChatStore]] = None):
+        self._store = store
 
-    def _get_cache(self):
-        """Lazy-load cache service."""
-        if self._cache is None:
+    def _get_store(self) -> Union[RedisChatStore, InMemoryChatStore]:
+        """Lazy-load the session store (Redis lists, in-memory otherwise)."""
+        if self._store is None:
             try:
-                from services.redis_cache import get_redis_cache
-                self._cache = get_redis_cache()
-                logger.info("Chat memory using Redis cache")
+                from services.redis_cache import get_redis_cache, RedisCacheService
+                from config.settings import settings
+
+                cache = get_redis_cache()
+                if isinstance(cache, RedisCacheService):
+                    self._store = RedisChatStore(cache.get_sync_client(), key_prefix=settings.redis.key_prefix)
+                    logger.info("Chat memory using Redis cache")
             except Exception as e:
                 logger.warning(f"Redis unavailable for chat memory: {e}")
-                self._cache = None
-        return self._cache
+            if self._store is None:
+                self._store = InMemoryChatStore()
+        return self._store
 
-    def _make_session_key(self, user_id: str, session_id: str) -> str:
-        """Create a cache key for a session."""
-        return f"{SESSION_KEY_PREFIX}:{user_id}:{session_id}"
+    @staticmethod
+    def _session_meta(session: ChatSession) -> Dict[str, str]:
+        """Flat string fields of the session metadata hash."""
+        return {
+            "session_id": session.session_id,
+            "user_id": session.user_id,
+            "created_at": session.created_at,
+            "updated_at": session.updated_at,
+            "financial_context": json.dumps(session.financial_context, default=str),
+            "metadata": json.dumps(session.metadata or {}, default=str),
+        }
 
-    def _make_user_sessions_key(self, user_id: str) -> str:
-        """Create a cache key for user's session list."""
-        return f"{SESSION_KEY_PREFIX}:{user_id}:sessions"
+    @staticmethod
+    def _session_from_storage(meta: Dict[str, str], messages: List[Dict[str, Any]]) -> ChatSession:
+        return ChatSession(
+            session_id=meta["session_id"],
+            user_id=meta["user_id"],
+            messages=[ChatMessage.from_dict(m) for m in messages],
+            created_at=meta["created_at"],
+            updated_at=meta["updated_at"],
+            financial_context=json.loads(meta.get("financial_context") or "null"),
+            metadata=json.loads(meta.get("metadata") or "null")
+        )
 
     def create_session(
         self,
@@ -189,30 +566,23 @@ class ChatMemoryService:
             metadata=metadata
         )
 
-        # Save to storage
-        self._save_session(session)
-
-        # Track session in user's session list
-        self._add_to_user_sessions(user_id, session_id)
+        # Save to storage and track session in user's session list
+        self._get_store().create_session(user_id, session_id, self._session_meta(session))
 
         logger.info(f"Created chat session {session_id} for user {user_id}")
         return session
 
-    def get_session(self, user_id: str, session_id: str) -> Optional[ChatSession]:
-        """Retrieve a chat session."""
-        cache = self._get_cache()
-        key = self._make_session_key(user_id, session_id)
-
-        if cache:
-            data = cache.get(key)
-            if data:
-                return ChatSession.from_dict(data)
-        else:
-            # Fallback storage
-            if key in self._fallback_storage:
-                return ChatSession.from_dict(self._fallback_storage[key])
-
-        return None
+    def get_session(
+        self,
+        user_id: str,
+        session_id: str,
+        last_messages: Optional[int] = None
+    ) -> Optional[ChatSession]:
+        """Retrieve a chat session (only its last `last_messages` messages if given)."""
+        stored = self._get_store().load_session(user_id, session_id, last=last_messages)
+        if stored is None:
+            return None
+        return self._session_from_storage(*stored)
 
     def get_or_create_session(
         self,
@@ -227,49 +597,14 @@ class ChatMemoryService:
                 # Update financial context if provided
                 if financial_context:
                     session.financial_context = financial_context
-                    self._save_session(session)
+                    self._get_store().update_session(user_id, session_id, {
+                        "financial_context": json.dumps(financial_context, default=str)
+                    })
                 return session
 
         # Create new session
         return self.create_session(user_id, financial_context)
 
-    def _save_session(self, session: ChatSession) -> bool:
-        """Save session to storage."""
-        cache = self._get_cache()
-        key = self._make_session_key(session.user_id, session.session_id)
-        data = session.to_dict()
-
-        if cache:
-            return cache.set(key, data, ttl=DEFAULT_SESSION_TTL)
-        else:
-            # Fallback storage
-            self._fallback_storage[key] = data
-            return True
-
-    def _add_to_user_sessions(self, user_id: str, session_id: str):
-        """Track session in user's session list."""
-        cache = self._get_cache()
-        key = self._make_user_sessions_key(user_id)
-
-        if cache:
-            # Get existing sessions
-            sessions = cache.get(key) or []
-            if session_id not in sessions:
-                sessions.append(session_id)
-                # Keep only last 10 sessions
-                sessions = sessions[-10:]
-                cache.set(key, sessions, ttl=DEFAULT_SESSION_TTL * 2)
-        else:
-            # For fallback, store session lists separately
-            if key not in self._fallback_storage:
-                self._fallback_storage[key] = {"sessions": []}
-            sessions_data = self._fallback_storage[key]
-            if isinstance(sessions_data, dict) and "sessions" in sessions_data:
-                session_list: List[str] = sessions_data["sessions"]
-                if session_id not in session_list:
-                    session_list.append(session_id)
-                    sessions_data["sessions"] = session_list[-10:]
-
     def add_message(
         self,
         user_id: str,
@@ -277,15 +612,14 @@ class ChatMemoryService:
         role: MessageRole,
         content: str
     ) -> Optional[ChatMessage]:
-        """Add a message to a session."""
-        session = self.get_session(user_id, session_id)
-        if not session:
+        """Append a message to a session (O(1): RPUSH + LTRIM, no session rewrite)."""
+        now = dt.datetime.now().isoformat()
+        msg = ChatMessage(role=role, content=content, timestamp=now)
+
+        if self._get_store().append_message(user_id, session_id, msg.to_dict(), now) is None:
             logger.warning(f"Session {session_id} not found for user {user_id}")
             return None
 
-        msg = session.add_message(role, content)
-        self._save_session(session)
-
         return msg
 
     def add_user_message(self, user_id: str, session_id: str, content: str) -> Optional[ChatMessage]:
@@ -321,7 +655,8 @@ class ChatMemoryService:
         Returns:
             Tuple of (system_prompt, messages_history)
         """
-        session = self.get_session(user_id, session_id)
+        # Metadata + the messages sent below, in one pipelined read
+        session = self.get_session(user_id, session_id, last_messages=LLM_CONTEXT_MESSAGES)
 
         # Build financial context section
         financial_section = ""
@@ -360,7 +695,7 @@ INSTRUCTIONS:
         # Build messages list for chat completion API
         messages = []
         if session:
-            for msg in session.messages[-6:]:  # Last 6 messages
+            for msg in session.messages[-LLM_CONTEXT_MESSAGES:]:
                 messages.append({
                     "role": msg.role.value,
                     "content": msg.content
@@ -376,32 +711,11 @@ INSTRUCTIONS:
 
     def delete_session(self, user_id: str, session_id: str) -> bool:
         """Delete a chat session."""
-        cache = self._get_cache()
-        key = self._make_session_key(user_id, session_id)
-
-        if cache:
-            return cache.delete(key)
-        else:
-            if key in self._fallback_storage:
-                del self._fallback_storage[key]
-                return True
-        return False
+        return self._get_store().delete_session(user_id, session_id)
 
     def list_user_sessions(self, user_id: str) -> List[str]:
         """List all session IDs for a user."""
-        cache = self._get_cache()
-        key = self._make_user_sessions_key(user_id)
-
-        if cache:
-            result = cache.get(key)
-            if isinstance(result, list):
-                return result
-            return []
-        else:
-            sessions_data = self._fallback_storage.get(key, {"sessions": []})
-            if isinstance(sessions_data, dict) and "sessions" in sessions_data:
-                return sessions_data["sessions"]
-            return []
+        return self._get_store().list_sessions(user_id)
 
     def get_active_session(self, user_id: str) -> Optional[ChatSession]:
         """Get the most recent active session for a user."""
@@ -426,23 +740,15 @@ INSTRUCTIONS:
                 count += 1
 
         # Clear session list
-        cache = self._get_cache()
-        key = self._make_user_sessions_key(user_id)
-        if cache:
-            cache.delete(key)
-        elif key in self._fallback_storage:
-            del self._fallback_storage[key]
+        self._get_store().clear_sessions(user_id)
 
         logger.info(f"Cleared {count} sessions for user {user_id}")
         return count
 
     def get_stats(self) -> Dict[str, Any]:
         """Get memory service statistics."""
-        cache = self._get_cache()
-
         return {
-            "storage_type": "redis" if cache else "in_memory_fallback",
-            "fallback_session_count": len([k for k in self._fallback_storage if k.startswith(SESSION_KEY_PREFIX)]),
+            **self._get_store().get_stats(),
             "session_ttl_seconds": DEFAULT_SESSION_TTL,
             "max_messages_per_session": MAX_MESSAGES_PER_SESSION
         }
@@ -0,0 +1,56 @@
+"""
+Month data generation lookups for Budget Famille
+Cheap cache keys for everything derived from a month's data
+
+The month_data_generations table is maintained by SQLite triggers (see
+models/database.py:create_data_generation_triggers). Reading it is a primary
+key lookup, so callers can validate a cached result without re-reading the
+month's transactions.
+"""
+
+import logging
+from typing import Dict, Iterable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.database import MonthDataGeneration, GLOBAL_GENERATION_KEY
+
+logger = logging.getLogger(__name__)
+
+
+def get_month_generations(db: Session, months: Iterable[str]) -> Dict[str, int]:
+    """Return {month: generation} for the given months (0 when never written)"""
+    months = list(months)
+    rows = db.query(MonthDataGeneration.month, MonthDataGeneration.generation).filter(
+        MonthDataGeneration.month.in_(months + [GLOBAL_GENERATION_KEY])
+    ).all()
+    generations = {month: 0 for month in months}
+    generations[GLOBAL_GENERATION_KEY] = 0
+    generations.update({row.month: row.generation for row in rows})
+    return generations
+
+
+def get_data_generation(db: Session, month: str) -> str:
+    """
+    Return the data generation of a month as an opaque string.
+
+    Combines the month's own counter with the global one (config, fixed lines,
+    provisions), so it changes whenever any input of the month's figures changes.
+    """
+    generations = get_month_generations(db, [month])
+    return f"{generations[month]}.{generations[GLOBAL_GENERATION_KEY]}"
+
+
+def get_data_fingerprint(db: Session) -> str:
+    """
+    Opaque string that changes whenever any month or the global inputs change.
+
+    For results read across months (a tag's history...). Counters only grow,
+    so their sum moves on every write; one aggregate over a table of one row
+    per month.
+    """
+    total, rows = db.query(
+        func.coalesce(func.sum(MonthDataGeneration.generation), 0), func.count(MonthDataGeneration.month)
+    ).one()
+    return f"{total}.{rows}"
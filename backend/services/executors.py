@@ -0,0 +1,313 @@
+"""
+Executor layer for blocking work called from async endpoints
+Budget Famille v4.1 - keeps the event loop free during heavy requests
+
+Features:
+- Bounded thread pool for synchronous SQLAlchemy / Redis work (run_db)
+- Process pool for pure-CPU classification and scoring, fed in chunks (run_cpu, map_cpu_chunks),
+  also used by blocking callers such as the yearly PDF export (map_cpu_blocking)
+- Small inputs skip the process pool (pickling + IPC cost more than the work)
+- Contextvars follow the work into the thread pool, so per-route query
+  attribution (services/query_performance.py) keeps working
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "8"))
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+CPU_CHUNK_SIZE = int(os.getenv("CPU_CHUNK_SIZE", "500"))
+# Below this many items a CPU job runs on the thread pool instead of the process pool
+CPU_INLINE_MAX_ITEMS = int(os.getenv("CPU_INLINE_MAX_ITEMS", "16"))
+
+
+def shutdown_executor(executor: Optional[Executor]) -> None:
+    """Stop an executor without waiting: running calls finish, queued ones are dropped"""
+    if executor is None:
+        return
+    if sys.version_info >= (3, 9):
+        executor.shutdown(wait=False, cancel_futures=True)
+    else:
+        # No cancel_futures before 3.9: queued calls still run
+        executor.shutdown(wait=False)
+
+
+# =============================================================================
+# Functions executed inside the pool processes
+# =============================================================================
+
+_process_classifier = None
+
+
+def _fast_classifier():
+    """Pattern classifier of the current process (built once per pool process)"""
+    global _process_classifier
+    if _process_classifier is None:
+        from services.unified_classification_service import get_unified_classification_service
+        # The fast path never reads the session
+        _process_classifier = get_unified_classification_service(None)
+    return _process_classifier
+
+
+def _warmup_job() -> bool:
+    """Return True when the classifier is loaded in the pool process"""
+    return _fast_classifier() is not None
+
+
+def classify_fast_chunk(
+    items: Sequence[Tuple[Any, str, Optional[float]]],
+    include_expense_type: bool = False
+) -> List[Tuple[Any, Any]]:
+    """
+    Pattern-based classification of a chunk of (id, label, amount) tuples.
+
+    Returns (id, UnifiedClassificationResult) pairs in input order.
+    """
+    classifier = _fast_classifier()
+    return [
+        (item_id, classifier.classify_transaction_fast(
+            transaction_label=label or "",
+            transaction_amount=amount,
+            include_expense_type=include_expense_type
+        ))
+        for item_id, label, amount in items
+    ]
+
+
+# =============================================================================
+# Executors
+# =============================================================================
+
+class ExecutorLayer:
+    """
+    Thread pool for blocking I/O and process pool for CPU-bound chunks.
+
+    Both pools are created on first use. Executors can be injected (tests,
+    benchmarks); the CPU executor is then used as-is for every chunk.
+    """
+
+    def __init__(
+        self,
+        db_workers: int = DB_EXECUTOR_WORKERS,
+        cpu_workers: int = CPU_EXECUTOR_WORKERS,
+        chunk_size: int = CPU_CHUNK_SIZE,
+        inline_max_items: int = CPU_INLINE_MAX_ITEMS,
+        db_executor: Optional[Executor] = None,
+        cpu_executor: Optional[Executor] = None,
+    ):
+        self.db_workers = max(1, db_workers)
+        self.cpu_workers = max(1, cpu_workers)
+        self.chunk_size = max(1, chunk_size)
+        self.inline_max_items = max(0, inline_max_items)
+
+        self._db_executor = db_executor
+        self._cpu_executor = cpu_executor
+        self._lock = threading.Lock()
+
+        self.warmed = False
+        self.stats = {
+            "db_calls": 0,
+            "cpu_calls": 0,
+            "cpu_chunks": 0,
+            "cpu_items": 0,
+            "inline_cpu_calls": 0,
+            "errors": 0,
+            "total_db_ms": 0.0,
+            "total_cpu_ms": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def _get_db_executor(self) -> Executor:
+        with self._lock:
+            if self._db_executor is None:
+                self._db_executor = ThreadPoolExecutor(
+                    max_workers=self.db_workers,
+                    thread_name_prefix="db-executor"
+                )
+                logger.info(f"DB thread pool started ({self.db_workers} thread(s))")
+        return self._db_executor
+
+    def _get_cpu_executor(self) -> Executor:
+        with self._lock:
+            if self._cpu_executor is None:
+                # spawn: never fork an API worker that already runs threads
+                self._cpu_executor = ProcessPoolExecutor(
+                    max_workers=self.cpu_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"CPU process pool started ({self.cpu_workers} worker(s))")
+        return self._cpu_executor
+
+    async def warm_up(self) -> bool:
+        """Start the pool processes and build the classifier in each of them"""
+        executor = self._get_cpu_executor()
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *[loop.run_in_executor(executor, _warmup_job) for _ in range(self.cpu_workers)],
+            return_exceptions=True
+        )
+        self.warmed = all(result is True for result in results)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if self.warmed:
+            logger.info(f"✅ CPU pool warmed up in {elapsed_ms:.0f}ms")
+        else:
+            logger.warning(f"⚠️ CPU pool warm-up failed: {results}")
+        return self.warmed
+
+    def shutdown(self) -> None:
+        """Stop both pools (running calls finish, queued ones are dropped)"""
+        with self._lock:
+            shutdown_executor(self._db_executor)
+            shutdown_executor(self._cpu_executor)
+            self._db_executor = None
+            self._cpu_executor = None
+        self.warmed = False
+
+    # ------------------------------------------------------------------
+    # Running work
+    # ------------------------------------------------------------------
+
+    async def run_db(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run blocking I/O (SQLAlchemy session, sync Redis) on the bounded thread pool.
+
+        The caller's context is copied, so the request profile follows the call.
+        A session passed in must not be used by the caller until this returns.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, fn, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._get_db_executor(), call)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["db_calls"] += 1
+            self.stats["total_db_ms"] += (time.perf_counter() - started) * 1000
+
+    async def run_cpu(self, fn: Callable[..., Any], *args, items: Optional[int] = None) -> Any:
+        """
+        Run a picklable, module-level function on the process pool.
+
+        `items` is the size of the input: small inputs run on the thread pool
+        since shipping them to another process costs more than the work.
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args)
+        if items is not None and items <= self.inline_max_items:
+            executor = self._get_db_executor()
+            # Same process: the caller's context follows, like run_db
+            call = functools.partial(contextvars.copy_context().run, call)
+            self.stats["inline_cpu_calls"] += 1
+        else:
+            executor = self._get_cpu_executor()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(executor, call)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["cpu_calls"] += 1
+            self.stats["total_cpu_ms"] += (time.perf_counter() - started) * 1000
+
+    async def map_cpu_chunks(
+        self,
+        fn: Callable[..., List[Any]],
+        items: Sequence[Any],
+        *args,
+        chunk_size: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Split `items` in chunks, run fn(chunk, *args) for each on the process
+        pool and concatenate the returned lists in input order.
+        """
+        items = list(items)
+        if not items:
+            return []
+        size = max(1, chunk_size or self.chunk_size)
+        chunks = [items[start:start + size] for start in range(0, len(items), size)]
+        self.stats["cpu_chunks"] += len(chunks)
+        self.stats["cpu_items"] += len(items)
+        results = await asyncio.gather(
+            *[self.run_cpu(fn, chunk, *args, items=len(chunk)) for chunk in chunks]
+        )
+        return [result for chunk_results in results for result in chunk_results]
+
+    def map_cpu_blocking(self, fn: Callable[[Any], Any], items: Sequence[Any]) -> List[Any]:
+        """
+        fn(item) for each item on the process pool, results in input order.
+
+        Blocks the calling thread: for def routes and jobs that already run
+        off the event loop (async code uses run_cpu / map_cpu_chunks).
+        """
+        items = list(items)
+        started = time.perf_counter()
+        try:
+            return list(self._get_cpu_executor().map(fn, items))
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["cpu_calls"] += 1
+            self.stats["cpu_items"] += len(items)
+            self.stats["total_cpu_ms"] += (time.perf_counter() - started) * 1000
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool sizes and call statistics"""
+        return {
+            **self.stats,
+            "db_workers": self.db_workers,
+            "cpu_workers": self.cpu_workers,
+            "chunk_size": self.chunk_size,
+            "warmed": self.warmed,
+            "avg_db_ms": round(self.stats["total_db_ms"] / self.stats["db_calls"], 2) if self.stats["db_calls"] else 0.0,
+            "avg_cpu_ms": round(self.stats["total_cpu_ms"] / self.stats["cpu_calls"], 2) if self.stats["cpu_calls"] else 0.0,
+        }
+
+
+# Singleton instance (one layer per API worker process)
+_executors: Optional[ExecutorLayer] = None
+
+
+def get_executors() -> ExecutorLayer:
+    """Get or create the executor layer singleton"""
+    global _executors
+    if _executors is None:
+        _executors = ExecutorLayer()
+    return _executors
+
+
+def shutdown_executors() -> None:
+    """Shut down the executor pools if they were started"""
+    global _executors
+    if _executors is not None:
+        _executors.shutdown()
+        _executors = None
+
+
+async def run_db(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Shortcut: get_executors().run_db(...)"""
+    return await get_executors().run_db(fn, *args, **kwargs)
+
+
+async def map_cpu_chunks(fn: Callable[..., List[Any]], items: Sequence[Any], *args, chunk_size: Optional[int] = None) -> List[Any]:
+    """Shortcut: get_executors().map_cpu_chunks(...)"""
+    return await get_executors().map_cpu_chunks(fn, items, *args, chunk_size=chunk_size)
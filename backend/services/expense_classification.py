@@ -12,20 +12,27 @@ Author: Claude Code - ML Operations Engineer
 Target: >85% precision with <5% false positive rate
 """
 
+import hashlib
 import logging
+import os
 import re
 import math
 import statistics
-from typing import Dict, List, Tuple, Optional, Any
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, List, Tuple, Optional, Any, Mapping
 from datetime import datetime, timedelta
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict
 from dataclasses import dataclass, asdict
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, literal, select, union_all
 from enum import Enum
 
 # Import database models
 from models.database import Transaction, TagFixedLineMapping, MerchantKnowledgeBase
+from services.transaction_search import tag_clause
+from services.cache_usage import record_cache_lookup
 from sqlalchemy import or_
 
 # Import tag suggestion service for enhanced classification
@@ -33,6 +40,11 @@ from services.tag_suggestion_service import TagSuggestionService, TagSuggestionR
 
 logger = logging.getLogger(__name__)
 
+# Tags per UNION ALL history query (SQLite caps compound selects at 500 members)
+HISTORY_BATCH_TAGS = int(os.getenv("CLASSIFICATION_HISTORY_BATCH_TAGS", "100"))
+# Merchant knowledge entries below this confidence do not enhance a classification
+WEB_ENHANCEMENT_MIN_CONFIDENCE = 0.3
+
 class ExpenseType(Enum):
     """Expense type enumeration"""
     FIXED = "FIXED"
@@ -61,6 +73,15 @@ class ClassificationResult:
             self.alternative_tags = []
 
 
+@dataclass
+class TransactionSuggestion:
+    """Classification of one transaction of a page (suggest_for_transactions)"""
+    transaction_id: int
+    tag_name: str  # Tag (or label) analyzed, "" when nothing to analyze
+    result: Optional[ClassificationResult]  # None when tag_name is empty
+    history_count: int = 0
+
+
 class ExpenseClassificationService:
     """
     Intelligent expense classification with ML-driven decision making
@@ -263,23 +284,22 @@ class ExpenseClassificationService:
         'atm_variable_certainty': 0.95
     }
 
-    def __init__(self, db: Session):
-        """Initialize the classification service with database session"""
+    def __init__(self, db: Session, model: Optional["ClassifierModel"] = None):
+        """
+        Initialize a request-scoped classification service.
+
+        The compiled patterns and the classification cache are borrowed from
+        the process-wide ClassifierModel, so building a service is cheap.
+        """
         self.db = db
         self.min_historical_data_points = 3  # Minimum transactions for pattern analysis
         self.stability_threshold = 0.15  # 15% variation threshold for stable amounts
         
-        # OPTIMIZATION: In-memory cache for frequent classifications
-        self._classification_cache = {}
-        self._cache_hits = 0
-        self._cache_misses = 0
-        self._max_cache_size = 1000
-        
-        # Pre-computed patterns for ultra-fast matching
-        self._fast_fixed_patterns = self._compile_fast_patterns(self.FIXED_KEYWORDS)
-        self._fast_variable_patterns = self._compile_fast_patterns(self.VARIABLE_KEYWORDS)
-        
-        logger.info("🤖 ExpenseClassificationService initialized with ADVANCED ML capabilities + Performance optimizations")
+        # OPTIMIZATION: Shared model (pre-computed patterns + process-wide cache)
+        self.model = model or get_classifier_model()
+        self._fast_fixed_patterns = self.model.fixed_patterns
+        self._fast_variable_patterns = self.model.variable_patterns
+        self._classification_cache = self.model.cache
     
     def classify_expense_fast(
         self,
@@ -295,7 +315,7 @@ class ExpenseClassificationService:
         """
         # Check cache first for frequent patterns
         if use_cache:
-            cache_key = f"{tag_name}_{transaction_amount}_{hash(transaction_description)}"
+            cache_key = make_classification_cache_key(tag_name, transaction_amount, transaction_description)
             cached_result = self._get_cached_classification(cache_key)
             if cached_result:
                 return cached_result
@@ -898,7 +918,7 @@ class ExpenseClassificationService:
             # Query transactions that contain this tag
             transactions = self.db.query(Transaction).filter(
                 and_(
-                    Transaction.tags.contains(tag_name),
+                    tag_clause(self.db, tag_name),
                     Transaction.exclude == False,
                     Transaction.amount.isnot(None)
                 )
@@ -915,11 +935,86 @@ class ExpenseClassificationService:
                 })
             
             return history
-            
+
         except Exception as e:
             logger.error(f"Error retrieving historical transactions: {e}")
             return []
-    
+
+    def get_historical_transactions_batch(self, tag_names: List[str], limit: int = 20) -> Dict[str, List[Dict]]:
+        """
+        get_historical_transactions for several tags at once: the per-tag reads
+        are combined with UNION ALL, one query per HISTORY_BATCH_TAGS tags.
+        """
+        tag_names = list(dict.fromkeys(tag for tag in tag_names if tag))
+        history: Dict[str, List[Dict]] = {tag: [] for tag in tag_names}
+        for start in range(0, len(tag_names), HISTORY_BATCH_TAGS):
+            chunk = tag_names[start:start + HISTORY_BATCH_TAGS]
+            try:
+                reads = [
+                    select(
+                        literal(index).label("tag_index"), Transaction.amount, Transaction.date_op,
+                        Transaction.label, Transaction.expense_type
+                    ).where(
+                        tag_clause(self.db, tag_name),
+                        Transaction.exclude == False,
+                        Transaction.amount.isnot(None)
+                    ).order_by(Transaction.date_op.desc()).limit(limit).subquery()
+                    for index, tag_name in enumerate(chunk)
+                ]
+                # SQLite refuses LIMIT inside a compound member: each read is wrapped in a subquery
+                statement = union_all(*(select(*read.c) for read in reads)) if len(reads) > 1 else select(*reads[0].c)
+                for row in self.db.execute(statement):
+                    history[chunk[row.tag_index]].append({
+                        'amount': row.amount,
+                        'date_op': row.date_op,
+                        'label': row.label,
+                        'expense_type': row.expense_type or 'VARIABLE'
+                    })
+            except Exception as e:
+                logger.error(f"Error retrieving historical transactions for {len(chunk)} tags: {e}")
+        return history
+
+    @staticmethod
+    def primary_tag(transaction: Transaction, label_length: int = 50) -> str:
+        """First tag of a transaction, else its lowercased label (truncated), else an empty string"""
+        if transaction.tags and transaction.tags.strip():
+            tags = [t.strip() for t in transaction.tags.split(',') if t.strip()]
+            if tags:
+                return tags[0]
+        if transaction.label:
+            return transaction.label.lower()[:label_length]
+        return ""
+
+    def suggest_for_transactions(
+        self,
+        transactions: List[Transaction],
+        history_limit: int = 10
+    ) -> Dict[int, TransactionSuggestion]:
+        """
+        Classify a page of transactions with shared history lookups.
+
+        The history of every distinct primary tag is read once for the whole
+        page (get_historical_transactions_batch) instead of once per row.
+        """
+        tags = {tx.id: self.primary_tag(tx) for tx in transactions}
+        history = self.get_historical_transactions_batch(list(tags.values()), limit=history_limit)
+
+        suggestions = {}
+        for tx in transactions:
+            tag_name = tags[tx.id]
+            if not tag_name:
+                suggestions[tx.id] = TransactionSuggestion(tx.id, "", None)
+                continue
+            tag_history = history.get(tag_name, [])
+            result = self.classify_expense(
+                tag_name=tag_name,
+                transaction_amount=float(tx.amount or 0),
+                transaction_description=tx.label or "",
+                transaction_history=tag_history
+            )
+            suggestions[tx.id] = TransactionSuggestion(tx.id, tag_name, result, len(tag_history))
+        return suggestions
+
     def suggest_classification_batch(self, tag_names: List[str]) -> Dict[str, ClassificationResult]:
         """Batch classification for multiple tags with optimized database queries"""
         results = {}
@@ -966,52 +1061,81 @@ class ExpenseClassificationService:
         try:
             # Import here to avoid circular dependencies
             from services.web_research_service import get_merchant_from_transaction_label
+            from services.merchant_knowledge_service import MerchantKnowledgeService
             
             # Extract merchant name from transaction label
             merchant_name = get_merchant_from_transaction_label(transaction_label)
             if not merchant_name:
                 return None
             
-            # Look up merchant in knowledge base
-            merchant_kb = self.db.query(MerchantKnowledgeBase).filter(
-                MerchantKnowledgeBase.normalized_name.contains(merchant_name.upper()),
-                MerchantKnowledgeBase.is_active == True,
-                MerchantKnowledgeBase.confidence_score > 0.3  # Minimum confidence threshold
-            ).first()
-            
-            if not merchant_kb:
+            # Look up merchant in the in-memory MerchantIndex (no query per label)
+            matches = MerchantKnowledgeService().search_merchant_fuzzy(
+                self.db, merchant_name, confidence_threshold=WEB_ENHANCEMENT_MIN_CONFIDENCE
+            )
+            if not matches:
                 return None
             
-            # Extract web research intelligence
-            enhancement = {
-                'business_type': merchant_kb.business_type,
-                'suggested_expense_type': merchant_kb.suggested_expense_type,
-                'suggested_tags': merchant_kb.suggested_tags.split(',') if merchant_kb.suggested_tags else [],
-                'confidence': merchant_kb.confidence_score,
-                'data_sources': merchant_kb.data_sources,
-                'merchant_name': merchant_kb.merchant_name,
-                'usage_count': merchant_kb.usage_count
-            }
-            
-            logger.info(f"🌐 Web research enhancement found for '{merchant_name}': {enhancement['business_type']} ({enhancement['confidence']:.2f} confidence)")
+            enhancement = self._web_enhancement(matches[0])
+            logger.debug(f"🌐 Web research enhancement found for '{merchant_name}': {enhancement['business_type']} ({enhancement['confidence']:.2f} confidence)")
             return enhancement
             
         except Exception as e:
             logger.warning(f"Error getting web research enhancement: {e}")
             return None
+    
+    def get_web_research_enhancements(self, transaction_labels: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Web research enhancement of many labels (a month of transactions):
+        one MerchantIndex freshness check, then in-memory lookups.
+        Returns {label: enhancement or None}
+        """
+        try:
+            from services.web_research_service import get_merchant_from_transaction_label
+            from services.merchant_knowledge_service import MerchantKnowledgeService
+            
+            merchant_names = {label: get_merchant_from_transaction_label(label) for label in transaction_labels}
+            matches = MerchantKnowledgeService().search_merchants_batch(
+                self.db,
+                [name for name in merchant_names.values() if name],
+                confidence_threshold=WEB_ENHANCEMENT_MIN_CONFIDENCE
+            )
+            return {
+                label: self._web_enhancement(matches[name][0]) if matches.get(name) else None
+                for label, name in merchant_names.items()
+            }
+            
+        except Exception as e:
+            logger.warning(f"Error getting web research enhancements: {e}")
+            return {}
+    
+    @staticmethod
+    def _web_enhancement(merchant: Dict[str, Any]) -> Dict:
+        """Extract web research intelligence from a merchant knowledge match"""
+        return {
+            'business_type': merchant['business_type'],
+            'suggested_expense_type': merchant['suggested_expense_type'],
+            'suggested_tags': merchant['suggested_tags'].split(',') if merchant['suggested_tags'] else [],
+            'confidence': merchant['confidence_score'],
+            'data_sources': merchant['data_sources'],
+            'merchant_name': merchant['merchant_name'],
+            'usage_count': merchant['usage_count']
+        }
 
     def classify_expense_with_web_intelligence(
         self,
         tag_name: str,
         transaction_amount: float = 0.0,
         transaction_description: str = "",
-        transaction_history: Optional[List[Dict]] = None
+        transaction_history: Optional[List[Dict]] = None,
+        web_enhancements: Optional[Dict[str, Optional[Dict]]] = None
     ) -> ClassificationResult:
         """
         Enhanced expense classification combining ML with web research intelligence
         
         This revolutionary method combines traditional ML classification with 
         real-time web research data for superior accuracy.
+        web_enhancements: enhancements already resolved for a batch of labels
+        (get_web_research_enhancements)
         """
         # Start with standard classification
         base_result = self.classify_expense(
@@ -1022,7 +1146,10 @@ class ExpenseClassificationService:
         )
         
         # Get web research enhancement
-        web_enhancement = self.get_web_research_enhancement(transaction_description)
+        if web_enhancements is not None and transaction_description in web_enhancements:
+            web_enhancement = web_enhancements[transaction_description]
+        else:
+            web_enhancement = self.get_web_research_enhancement(transaction_description)
         
         if not web_enhancement:
             # No web enhancement available, return base result
@@ -1098,10 +1225,17 @@ class ExpenseClassificationService:
             # 3. Create user-specific classification rules
             # 4. Adjust ensemble weights based on performance
             
+            # Cached results predate the correction: start a new cache generation
+            invalidate_classifier_model()
+            
         except Exception as e:
             logger.error(f"Error in learning from correction: {e}")
     
-    def get_suggestion(self, transaction_id: int) -> Optional[Dict[str, Any]]:
+    def get_suggestion(
+        self,
+        transaction_id: int,
+        web_enhancements: Optional[Dict[str, Optional[Dict]]] = None
+    ) -> Optional[Dict[str, Any]]:
         """Get AI classification suggestion for a specific transaction"""
         try:
             # Get the transaction
@@ -1113,75 +1247,97 @@ class ExpenseClassificationService:
             if not transaction:
                 return None
             
-            # Extract primary tag
-            tag_name = ""
-            if transaction.tags and transaction.tags.strip():
-                tags = [t.strip() for t in transaction.tags.split(',') if t.strip()]
-                if tags:
-                    tag_name = tags[0]
-            
-            # Use label if no tags
-            if not tag_name and transaction.label:
-                tag_name = transaction.label.lower()[:50]
-            
-            if not tag_name:
-                return {
-                    "suggestion": "VARIABLE",
-                    "confidence_score": 0.5,
-                    "explanation": "No tags or descriptive label available for analysis",
-                    "rules_matched": [],
-                    "user_can_override": True,
-                    "transaction_id": transaction_id,
-                    "current_classification": transaction.expense_type
-                }
-            
-            # Get historical data
-            history = self.get_historical_transactions(tag_name, limit=10)
-            
-            # Classify with enhanced web intelligence
-            result = self.classify_expense_with_web_intelligence(
-                tag_name=tag_name,
-                transaction_amount=float(transaction.amount or 0),
-                transaction_description=transaction.label or "",
-                transaction_history=history
-            )
-            
-            # Build explanation
-            explanation_parts = [result.primary_reason]
-            if result.contributing_factors:
-                explanation_parts.extend(result.contributing_factors[:3])
-            
-            explanation = ". ".join(explanation_parts)
-            if len(explanation) > 200:
-                explanation = explanation[:197] + "..."
-            
-            # Extract matched rules/keywords
-            rules_matched = []
-            for match in result.keyword_matches[:5]:  # Top 5 matches
-                if ":" in match:
-                    keyword_type, keyword = match.split(":", 1)
-                    rules_matched.append(keyword.strip())
-                else:
-                    rules_matched.append(match)
-            
-            return {
-                "suggestion": result.expense_type,
-                "confidence_score": round(result.confidence, 3),
-                "explanation": explanation,
-                "rules_matched": rules_matched,
-                "user_can_override": True,
-                "transaction_id": transaction_id,
-                "current_classification": transaction.expense_type,
-                "tag_analyzed": tag_name,
-                "stability_score": result.stability_score,
-                "frequency_score": result.frequency_score,
-                "historical_transactions": len(history) if history else 0
-            }
+            # Primary tag, else the label
+            tag_name = self.primary_tag(transaction)
+            history = self.get_historical_transactions(tag_name, limit=10) if tag_name else []
+            return self._suggestion(transaction, tag_name, history, web_enhancements)
             
         except Exception as e:
             logger.error(f"Error getting suggestion for transaction {transaction_id}: {e}")
             return None
     
+    def get_suggestions(self, transaction_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        get_suggestion for many transactions: the rows, the tag histories
+        and the merchant matches are each read once for the whole batch.
+        Returns {transaction_id: suggestion}, without the missing/excluded ids.
+        """
+        transactions = self.db.query(Transaction).filter(
+            Transaction.id.in_(transaction_ids),
+            Transaction.exclude == False
+        ).all()
+        tags = {tx.id: self.primary_tag(tx) for tx in transactions}
+        history = self.get_historical_transactions_batch(list(tags.values()), limit=10)
+        web_enhancements = self.get_web_research_enhancements([tx.label or "" for tx in transactions])
+        
+        suggestions = {}
+        for tx in transactions:
+            try:
+                suggestions[tx.id] = self._suggestion(tx, tags[tx.id], history.get(tags[tx.id], []), web_enhancements)
+            except Exception as e:
+                logger.error(f"Error getting suggestion for transaction {tx.id}: {e}")
+        return suggestions
+    
+    def _suggestion(
+        self,
+        transaction: Transaction,
+        tag_name: str,
+        history: List[Dict],
+        web_enhancements: Optional[Dict[str, Optional[Dict]]] = None
+    ) -> Dict[str, Any]:
+        """Suggestion payload of a loaded transaction, from its tag history"""
+        if not tag_name:
+            return {
+                "suggestion": "VARIABLE",
+                "confidence_score": 0.5,
+                "explanation": "No tags or descriptive label available for analysis",
+                "rules_matched": [],
+                "user_can_override": True,
+                "transaction_id": transaction.id,
+                "current_classification": transaction.expense_type
+            }
+        
+        # Classify with enhanced web intelligence
+        result = self.classify_expense_with_web_intelligence(
+            tag_name=tag_name,
+            transaction_amount=float(transaction.amount or 0),
+            transaction_description=transaction.label or "",
+            transaction_history=history,
+            web_enhancements=web_enhancements
+        )
+        
+        # Build explanation
+        explanation_parts = [result.primary_reason]
+        if result.contributing_factors:
+            explanation_parts.extend(result.contributing_factors[:3])
+        
+        explanation = ". ".join(explanation_parts)
+        if len(explanation) > 200:
+            explanation = explanation[:197] + "..."
+        
+        # Extract matched rules/keywords
+        rules_matched = []
+        for match in result.keyword_matches[:5]:  # Top 5 matches
+            if ":" in match:
+                keyword_type, keyword = match.split(":", 1)
+                rules_matched.append(keyword.strip())
+            else:
+                rules_matched.append(match)
+        
+        return {
+            "suggestion": result.expense_type,
+            "confidence_score": round(result.confidence, 3),
+            "explanation": explanation,
+            "rules_matched": rules_matched,
+            "user_can_override": True,
+            "transaction_id": transaction.id,
+            "current_classification": transaction.expense_type,
+            "tag_analyzed": tag_name,
+            "stability_score": result.stability_score,
+            "frequency_score": result.frequency_score,
+            "historical_transactions": len(history) if history else 0
+        }
+    
     def apply_classification(
         self, 
         transaction_id: int, 
@@ -1250,7 +1406,7 @@ class ExpenseClassificationService:
                     # Update other transactions with the same primary tag
                     primary_tag = tags[0]
                     similar_transactions = self.db.query(Transaction).filter(
-                        Transaction.tags.contains(primary_tag),
+                        tag_clause(self.db, primary_tag),
                         Transaction.id != transaction_id,
                         Transaction.exclude == False,
                         Transaction.expense_type != expense_type  # Only update different classifications
@@ -1338,10 +1494,12 @@ class ExpenseClassificationService:
             high_confidence = 0
             medium_confidence = 0
             needs_review = 0
+            # Merchant knowledge of the whole page in one index lookup
+            web_enhancements = self.get_web_research_enhancements([tx.label or "" for tx in transactions])
             
             for transaction in transactions:
                 try:
-                    suggestion = self.get_suggestion(transaction.id)
+                    suggestion = self.get_suggestion(transaction.id, web_enhancements)
                     
                     if suggestion:
                         ai_suggestions[str(transaction.id)] = suggestion
@@ -1429,32 +1587,19 @@ class ExpenseClassificationService:
     # PERFORMANCE OPTIMIZATIONS FOR UI RESPONSIVENESS
     # ======================================================================
     
-    def _compile_fast_patterns(self, keyword_dict: Dict[str, float]) -> Dict[str, float]:
+    @staticmethod
+    def _compile_fast_patterns(keyword_dict: Dict[str, float]) -> Dict[str, float]:
         """Pre-compile patterns for ultra-fast matching"""
         # Sort by confidence for priority matching
         return {k: v for k, v in sorted(keyword_dict.items(), key=lambda x: x[1], reverse=True)}
     
     def _get_cached_classification(self, cache_key: str) -> Optional[ClassificationResult]:
         """Get cached classification if available"""
-        if cache_key in self._classification_cache:
-            self._cache_hits += 1
-            logger.debug(f"📋 Cache HIT for {cache_key[:20]}... (hits: {self._cache_hits})")
-            return self._classification_cache[cache_key]
-        
-        self._cache_misses += 1
-        return None
+        return self._classification_cache.get(cache_key)
     
     def _cache_classification(self, cache_key: str, result: ClassificationResult):
         """Cache a classification result"""
-        # Implement LRU by removing oldest entries when cache is full
-        if len(self._classification_cache) >= self._max_cache_size:
-            # Remove 20% of oldest entries
-            keys_to_remove = list(self._classification_cache.keys())[:int(self._max_cache_size * 0.2)]
-            for key in keys_to_remove:
-                del self._classification_cache[key]
-        
-        self._classification_cache[cache_key] = result
-        logger.debug(f"📋 Cached classification for {cache_key[:20]}... (cache size: {len(self._classification_cache)})")
+        self._classification_cache.put(cache_key, result)
     
     def _calculate_fast_confidence(self, text: str, amount: float) -> float:
         """Ultra-fast confidence calculation optimized for UI responsiveness"""
@@ -1550,26 +1695,25 @@ class ExpenseClassificationService:
     
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get performance optimization statistics"""
-        cache_hit_rate = (self._cache_hits / max(1, self._cache_hits + self._cache_misses)) * 100
+        cache_stats = self._classification_cache.get_stats()
         
         return {
-            'cache_size': len(self._classification_cache),
-            'cache_hits': self._cache_hits,
-            'cache_misses': self._cache_misses,
-            'cache_hit_rate': round(cache_hit_rate, 2),
-            'max_cache_size': self._max_cache_size,
+            'cache_size': cache_stats['size'],
+            'cache_hits': cache_stats['hits'],
+            'cache_misses': cache_stats['misses'],
+            'cache_hit_rate': cache_stats['hit_rate'],
+            'max_cache_size': cache_stats['max_size'],
             'fast_patterns_compiled': {
                 'fixed_keywords': len(self._fast_fixed_patterns),
                 'variable_keywords': len(self._fast_variable_patterns)
             },
+            'model': self.model.get_info(),
             'optimization_active': True
         }
     
     def clear_performance_cache(self):
         """Clear performance cache for testing or memory management"""
         self._classification_cache.clear()
-        self._cache_hits = 0
-        self._cache_misses = 0
         logger.info("🗑️ Performance cache cleared")
 
     # ======================================================================
@@ -1747,8 +1891,288 @@ def get_auto_suggestion_engine(db: Session):
     return AutoSuggestionEngine(classification_service)
 
 def get_expense_classification_service(db: Session) -> ExpenseClassificationService:
-    """Factory function to get expense classification service instance"""
-    return ExpenseClassificationService(db)
+    """Factory function to get a request-scoped service borrowing the shared model"""
+    return ExpenseClassificationService(db, get_classifier_model())
+
+
+# ======================================================================
+# PROCESS-WIDE CLASSIFIER MODEL
+# ======================================================================
+
+# memory: per-process LRU only | redis: per-process LRU + Redis tier shared by all workers
+CLASSIFICATION_CACHE_BACKEND = os.getenv("CLASSIFICATION_CACHE_BACKEND", "memory").lower()
+CLASSIFICATION_CACHE_SIZE = int(os.getenv("CLASSIFICATION_CACHE_SIZE", "1000"))
+CLASSIFICATION_CACHE_TTL_SECONDS = int(os.getenv("CLASSIFICATION_CACHE_TTL_SECONDS", "3600"))
+# How often a worker checks the shared generation bumped by another worker
+CLASSIFICATION_GENERATION_CHECK_SECONDS = float(os.getenv("CLASSIFICATION_GENERATION_CHECK_SECONDS", "10"))
+# After a failed generation bump, how long a worker keeps to its local cache before retrying Redis
+CLASSIFICATION_SHARED_RETRY_SECONDS = float(os.getenv("CLASSIFICATION_SHARED_RETRY_SECONDS", "60"))
+
+_GENERATION_KEY = "classification:generation"
+
+
+def make_classification_cache_key(tag_name: str, amount: float, description: str) -> str:
+    """Stable content hash (same in every process, unlike hash())"""
+    normalized = "|".join([
+        " ".join((tag_name or "").lower().split()),
+        f"{float(amount or 0.0):.2f}",
+        " ".join((description or "").lower().split()),
+    ])
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+
+
+def _get_shared_cache():
+    """Redis cache service when the redis backend is configured and reachable"""
+    if CLASSIFICATION_CACHE_BACKEND != "redis":
+        return None
+    try:
+        from services.redis_cache import get_redis_cache, RedisCacheService
+        cache = get_redis_cache()
+        # The in-memory fallback is per process: nothing to share
+        return cache if isinstance(cache, RedisCacheService) else None
+    except Exception as e:
+        logger.warning(f"Shared classification cache unavailable: {e}")
+        return None
+
+
+class ClassificationCache:
+    """
+    Classification result cache shared by every request of the process.
+
+    True LRU (OrderedDict) with a TTL per entry. When a shared Redis cache is
+    given, misses fall through to Redis and writes go to both tiers, so all
+    gunicorn workers share hits. Entries live under `namespace`, which carries
+    the model generation: a new generation never sees older results.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_size: int = CLASSIFICATION_CACHE_SIZE,
+        ttl_seconds: int = CLASSIFICATION_CACHE_TTL_SECONDS,
+        shared=None
+    ):
+        self.namespace = namespace
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[float, ClassificationResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, cache_key: str) -> Optional[ClassificationResult]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(cache_key)
+                    self.hits += 1
+                    record_cache_lookup(hits=1)
+                    return result
+                del self._entries[cache_key]
+                self.expirations += 1
+
+        result = self._shared_get(cache_key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                record_cache_lookup(misses=1)
+                return None
+            self.hits += 1
+            self.shared_hits += 1
+        record_cache_lookup(hits=1)
+        self._local_put(cache_key, result)
+        return result
+
+    def put(self, cache_key: str, result: ClassificationResult) -> None:
+        self._local_put(cache_key, result)
+        if self.shared is not None:
+            self.shared.set(f"{self.namespace}:{cache_key}", asdict(result), ttl=self.ttl_seconds)
+
+    def _local_put(self, cache_key: str, result: ClassificationResult) -> None:
+        with self._lock:
+            self._entries[cache_key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _shared_get(self, cache_key: str) -> Optional[ClassificationResult]:
+        if self.shared is None:
+            return None
+        data = self.shared.get(f"{self.namespace}:{cache_key}")
+        if not isinstance(data, dict):
+            return None
+        try:
+            return ClassificationResult(**data)
+        except TypeError:
+            return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._reset_stats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'namespace': self.namespace,
+            'backend': 'lru+redis' if self.shared is not None else 'lru',
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0.0
+        }
+
+
+@dataclass(frozen=True)
+class ClassifierModel:
+    """
+    Immutable classification model shared by all request-scoped services.
+
+    Holds the compiled keyword patterns and the classification cache. It is
+    built once per process; invalidate_classifier_model() (patterns or
+    feedback changed) makes the next request build a new generation with an
+    empty cache namespace.
+    """
+    version: int
+    generation: int
+    fixed_patterns: Mapping[str, float]
+    variable_patterns: Mapping[str, float]
+    cache: ClassificationCache
+    built_at: datetime
+    build_ms: float
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'generation': self.generation,
+            'built_at': self.built_at.isoformat(),
+            'build_ms': round(self.build_ms, 3),
+            'cache': self.cache.get_stats()
+        }
+
+
+_classifier_model: Optional[ClassifierModel] = None
+_classifier_model_version = 0
+_classifier_generation = 0
+_classifier_generation_checked_at = 0.0
+_classifier_model_lock = threading.Lock()
+# Set when the shared generation could not be bumped: the Redis tier still
+# holds results of the previous generation, so this worker skips it until
+# a retried bump succeeds
+_shared_bump_pending = False
+_shared_retry_at = 0.0
+
+
+def _read_shared_generation(shared) -> int:
+    try:
+        return int(shared.get(_GENERATION_KEY, 0) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _build_classifier_model(version: int, generation: int = 0, shared=None) -> ClassifierModel:
+    started = time.perf_counter()
+    compile_patterns = ExpenseClassificationService._compile_fast_patterns
+    fixed = MappingProxyType(compile_patterns(ExpenseClassificationService.FIXED_KEYWORDS))
+    variable = MappingProxyType(compile_patterns(ExpenseClassificationService.VARIABLE_KEYWORDS))
+    return ClassifierModel(
+        version=version,
+        generation=generation,
+        fixed_patterns=fixed,
+        variable_patterns=variable,
+        cache=ClassificationCache(f"classification:g{generation}", shared=shared),
+        built_at=datetime.now(),
+        build_ms=(time.perf_counter() - started) * 1000
+    )
+
+
+def _bump_shared_generation(shared) -> bool:
+    """INCR the shared generation; on failure this worker stops using the shared tier for a while"""
+    global _classifier_generation, _shared_bump_pending, _shared_retry_at
+    generation = shared.incr(_GENERATION_KEY)
+    if generation is None:
+        _shared_bump_pending = True
+        _shared_retry_at = time.monotonic() + CLASSIFICATION_SHARED_RETRY_SECONDS
+        logger.warning(
+            "Could not bump shared classification generation: "
+            f"local cache only for {CLASSIFICATION_SHARED_RETRY_SECONDS:.0f}s"
+        )
+        return False
+    _classifier_generation = generation
+    _shared_bump_pending = False
+    return True
+
+
+def get_classifier_model() -> ClassifierModel:
+    """Get the current process-wide classifier model, building it if needed"""
+    global _classifier_model, _classifier_model_version, _classifier_generation_checked_at
+    model = _classifier_model
+    shared = model.cache.shared if model is not None else None
+    retry_due = _shared_bump_pending and time.monotonic() >= _shared_retry_at
+    if model is not None and not retry_due and (
+        shared is None
+        or time.monotonic() - _classifier_generation_checked_at < CLASSIFICATION_GENERATION_CHECK_SECONDS
+    ):
+        return model
+
+    with _classifier_model_lock:
+        model = _classifier_model
+        if _shared_bump_pending:
+            # The bump that should have retired the shared entries is retried first
+            shared = None
+            if time.monotonic() >= _shared_retry_at:
+                candidate = _get_shared_cache()
+                if candidate is not None and _bump_shared_generation(candidate):
+                    shared = candidate
+        else:
+            shared = model.cache.shared if model is not None else _get_shared_cache()
+        if shared is not None:
+            generation = _read_shared_generation(shared)
+            _classifier_generation_checked_at = time.monotonic()
+        else:
+            generation = _classifier_generation
+        if model is None or model.generation != generation or model.cache.shared is not shared:
+            _classifier_model_version += 1
+            model = _build_classifier_model(_classifier_model_version, generation, shared)
+            _classifier_model = model
+            logger.info(
+                f"🤖 Classifier model v{model.version} (generation {generation}) built in {model.build_ms:.1f}ms"
+            )
+        return model
+
+
+def invalidate_classifier_model() -> None:
+    """
+    Start a new generation (patterns or feedback changed): cached results of
+    the previous generation are no longer served, in any worker. If Redis
+    cannot be bumped, this worker falls back to its local cache until it can.
+    """
+    global _classifier_model, _classifier_generation, _classifier_generation_checked_at
+    with _classifier_model_lock:
+        shared = _get_shared_cache()
+        if shared is None or not _bump_shared_generation(shared):
+            _classifier_generation += 1
+        _classifier_generation_checked_at = 0.0
+        _classifier_model = None
 
 
 # Performance monitoring and evaluation functions
@@ -2061,11 +2485,13 @@ def batch_classify_transactions(
     applied_count = 0
     high_confidence_count = 0
     errors = []
+    # One read of the rows, histories and merchant matches for the whole batch
+    suggestions = classification_service.get_suggestions(transaction_ids)
     
     for transaction_id in transaction_ids:
         try:
             # Get AI suggestion
-            suggestion = classification_service.get_suggestion(transaction_id)
+            suggestion = suggestions.get(transaction_id)
             
             if not suggestion:
                 errors.append(f"Could not generate suggestion for transaction {transaction_id}")
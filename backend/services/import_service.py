@@ -5,6 +5,7 @@ Business logic for CSV import operations
 import logging
 import uuid
 import datetime as dt
+from collections import Counter
 from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
 from fastapi import UploadFile
@@ -294,4 +295,181 @@ class ImportService:
             }
         except Exception as e:
             logger.error(f"Error fetching import details for {import_id}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+# =============================================================================
+# UPSERT IMPORT - incremental import keyed on Transaction.row_id
+# =============================================================================
+
+UPSERT_DELETE_CHUNK_SIZE = 500
+
+
+def assign_row_ids(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Stamp a deterministic `row_id` on each parsed row (in place)
+
+    Identical lines (same date, normalized label and amount) get an increasing
+    occurrence index in file order, so two identical card payments on the same
+    day keep two distinct, reproducible row_ids.
+
+    Args:
+        rows: Parsed rows with `date_op`, `label` and `amount` keys
+
+    Returns:
+        The same list, for chaining
+    """
+    from utils.core_functions import compute_row_id, normalize_label_for_row_id
+
+    occurrences: Counter = Counter()
+    for row in rows:
+        base_key = (row['date_op'], normalize_label_for_row_id(row['label']), round(float(row['amount'] or 0.0), 2))
+        row['row_id'] = compute_row_id(row['date_op'], row['label'], row['amount'], occurrences[base_key])
+        occurrences[base_key] += 1
+    return rows
+
+
+def upsert_transactions(
+    db: Session,
+    rows: List[Dict[str, Any]],
+    import_id: str,
+    delete_missing: bool = False
+) -> Dict[str, Any]:
+    """
+    Incrementally apply parsed import rows to the transactions table
+
+    Rows are matched on `row_id`: unknown rows are inserted, matched rows are
+    only updated when the bank-side fields differ (user tags, categories and
+    expense types are never touched), and - if `delete_missing` is set -
+    existing rows inside the file's date range that are absent from the file
+    are deleted. Legacy rows imported before row_ids were stamped are matched
+    on their recomputed hash and get their row_id backfilled.
+
+    The caller owns the transaction: nothing is committed here.
+
+    Args:
+        db: Database session
+        rows: Parsed rows with `date_op`, `label`, `amount` and `month` keys
+        import_id: Import UUID stamped on inserted rows
+        delete_missing: Delete existing rows of the covered period missing from the file
+
+    Returns:
+        Diff summary with global and per-month counters
+    """
+    from models.database import Transaction
+
+    assign_row_ids(rows)
+    incoming = {row['row_id']: row for row in rows}
+    months = sorted({row['month'] for row in rows})
+
+    by_month: Dict[str, Dict[str, int]] = {
+        month: {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0} for month in months
+    }
+    summary = {
+        "mode": "upsert",
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "deleted": 0,
+        "backfilled": 0,
+        "months_touched": [],
+        "by_month": by_month,
+    }
+    if not rows:
+        return summary
+
+    # Only the columns needed for the diff - no full ORM objects
+    existing_rows = db.query(
+        Transaction.id, Transaction.row_id, Transaction.date_op, Transaction.label,
+        Transaction.amount, Transaction.month, Transaction.is_expense
+    ).filter(Transaction.month.in_(months)).order_by(Transaction.id).all()
+
+    # Recompute hashes for legacy rows (row_id NULL) with the same occurrence scheme
+    legacy_rows = [r for r in existing_rows if not r.row_id]
+    legacy_ids = {}
+    if legacy_rows:
+        legacy_dicts = [
+            {"id": r.id, "date_op": r.date_op, "label": r.label, "amount": r.amount}
+            for r in legacy_rows
+        ]
+        assign_row_ids(legacy_dicts)
+        legacy_ids = {d['id']: d['row_id'] for d in legacy_dicts}
+
+    period_start = min(row['date_op'] for row in rows)
+    period_end = max(row['date_op'] for row in rows)
+
+    updates: List[Dict[str, Any]] = []
+    to_delete: List[int] = []
+    seen: set = set()
+
+    for existing in existing_rows:
+        row_id = existing.row_id or legacy_ids.get(existing.id)
+        row = incoming.get(row_id)
+
+        if row is None or row_id in seen:
+            if delete_missing and existing.date_op and period_start <= existing.date_op <= period_end:
+                to_delete.append(existing.id)
+                by_month[existing.month]["deleted"] += 1
+            continue
+        seen.add(row_id)
+
+        changes: Dict[str, Any] = {}
+        if existing.label != row['label']:
+            changes['label'] = row['label']
+        if existing.month != row['month']:
+            changes['month'] = row['month']
+        if bool(existing.is_expense) != (row['amount'] < 0):
+            changes['is_expense'] = row['amount'] < 0
+        if not existing.row_id:
+            changes['row_id'] = row_id
+            summary["backfilled"] += 1
+
+        if changes:
+            changes['id'] = existing.id
+            updates.append(changes)
+            # A pure row_id backfill is not a data change from the user's point of view
+            if set(changes) - {'id', 'row_id'}:
+                by_month[row['month']]["updated"] += 1
+                continue
+        by_month[row['month']]["unchanged"] += 1
+
+    inserts = [
+        {
+            "label": row['label'],
+            "amount": row['amount'],
+            "date_op": row['date_op'],
+            "month": row['month'],
+            "row_id": row_id,
+            "tags": "Non classé",
+            "category": "VARIABLE",
+            "category_parent": "VARIABLE",
+            "exclude": False,
+            "expense_type": "VARIABLE",
+            "is_expense": row['amount'] < 0,
+            "import_id": import_id,
+        }
+        for row_id, row in incoming.items() if row_id not in seen
+    ]
+    for row in inserts:
+        by_month[row['month']]["inserted"] += 1
+
+    if updates:
+        db.bulk_update_mappings(Transaction, updates)
+    if inserts:
+        db.bulk_insert_mappings(Transaction, inserts)
+    for i in range(0, len(to_delete), UPSERT_DELETE_CHUNK_SIZE):
+        chunk = to_delete[i:i + UPSERT_DELETE_CHUNK_SIZE]
+        db.query(Transaction).filter(Transaction.id.in_(chunk)).delete(synchronize_session=False)
+
+    for month, counts in by_month.items():
+        summary["inserted"] += counts["inserted"]
+        summary["updated"] += counts["updated"]
+        summary["unchanged"] += counts["unchanged"]
+        summary["deleted"] += counts["deleted"]
+        if counts["inserted"] or counts["updated"] or counts["deleted"]:
+            summary["months_touched"].append(month)
+
+    logger.info(
+        f"Upsert import {import_id}: +{summary['inserted']} ~{summary['updated']} "
+        f"-{summary['deleted']} ={summary['unchanged']} (backfilled {summary['backfilled']})"
+    )
+    return summary
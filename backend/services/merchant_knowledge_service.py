@@ -4,8 +4,14 @@ Implements fuzzy matching, machine learning, and automated merchant intelligence
 """
 import logging
 import json
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, fields
+from itertools import chain
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple, Any
+from typing import Iterable, List, Dict, Optional, Set, Tuple, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, asc, func, or_, and_, text
 from difflib import SequenceMatcher
@@ -20,6 +26,251 @@ from models.schemas import *
 
 logger = logging.getLogger(__name__)
 
+# How often the index checks the table for rows written by other code paths / workers
+MERCHANT_INDEX_CHECK_SECONDS = float(os.getenv("MERCHANT_INDEX_CHECK_SECONDS", "30"))
+# Fuzzy candidates kept from the trigram index before exact similarity scoring
+MERCHANT_INDEX_MAX_CANDIDATES = int(os.getenv("MERCHANT_INDEX_MAX_CANDIDATES", "20"))
+# Posting entries scanned per fuzzy lookup (rarest trigrams first)
+MERCHANT_INDEX_POSTINGS_BUDGET = int(os.getenv("MERCHANT_INDEX_POSTINGS_BUDGET", "5000"))
+MERCHANT_INDEX_MIN_OVERLAP = 0.5
+
+
+@dataclass(frozen=True)
+class MerchantEntry:
+    """Read-only snapshot of a MerchantKnowledgeBase row held by the index"""
+    id: int
+    merchant_name: str
+    normalized_name: str
+    business_type: Optional[str]
+    category: Optional[str]
+    expense_type: Optional[str]
+    suggested_expense_type: Optional[str]
+    confidence_score: float
+    usage_count: int
+    is_verified: Optional[bool]
+    last_used: Optional[datetime]
+    suggested_tags: Optional[str]
+    data_sources: Optional[str]
+    accuracy_rating: Optional[float]
+    needs_review: Optional[bool]
+    is_active: bool
+    last_updated: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row) -> "MerchantEntry":
+        return cls(**{f.name: getattr(row, f.name) for f in fields(cls)})
+
+
+_ENTRY_COLUMNS = [getattr(MerchantKnowledgeBase, f.name) for f in fields(MerchantEntry)]
+
+
+def _trigrams(name: str) -> Set[str]:
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MerchantIndex:
+    """
+    In-memory index over the active MerchantKnowledgeBase rows.
+
+    - exact lookups: dict on normalized_name
+    - fuzzy lookups: character-trigram inverted index over the whole table,
+      candidates ranked by trigram overlap then scored with the service's
+      similarity function (no more "top 100 by usage" blind spot)
+
+    Kept fresh incrementally: the service upserts the rows it writes, and a
+    cheap aggregate (count / max id / max last_updated) checked every
+    `check_interval` seconds pulls rows written elsewhere.
+    """
+
+    def __init__(self, check_interval: float = MERCHANT_INDEX_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._entries: Dict[int, MerchantEntry] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._entry_trigrams: Dict[int, frozenset] = {}
+        self._lock = threading.RLock()
+        self._built = False
+        self._checked_at = 0.0
+        self._row_count = 0
+        self._max_id = 0
+        self._max_updated: Optional[datetime] = None
+        self.stats = {'builds': 0, 'delta_refreshes': 0, 'upserts': 0, 'lookups': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # -- maintenance ----------------------------------------------------
+
+    def _signature(self, db: Session) -> Tuple[int, int, Optional[datetime]]:
+        count, max_id, max_updated = db.query(
+            func.count(MerchantKnowledgeBase.id),
+            func.max(MerchantKnowledgeBase.id),
+            func.max(MerchantKnowledgeBase.last_updated)
+        ).one()
+        return count or 0, max_id or 0, max_updated
+
+    def build(self, db: Session):
+        """Full (re)build from the table"""
+        started = time.perf_counter()
+        signature = self._signature(db)
+        rows = db.query(*_ENTRY_COLUMNS).filter(MerchantKnowledgeBase.is_active == True).all()
+        with self._lock:
+            self._entries.clear()
+            self._by_name.clear()
+            self._postings.clear()
+            self._entry_trigrams.clear()
+            for row in rows:
+                self._add(MerchantEntry.from_row(row))
+            self._row_count, self._max_id, self._max_updated = signature
+            self._built = True
+            self._checked_at = time.monotonic()
+            self.stats['builds'] += 1
+        logger.info(f"Merchant index built: {len(rows)} merchants in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    def ensure_fresh(self, db: Session, force: bool = False):
+        """Build on first use, then apply rows changed since the last check"""
+        if not self._built:
+            self.build(db)
+            return
+        if not force and time.monotonic() - self._checked_at < self.check_interval:
+            return
+
+        count, max_id, max_updated = self._signature(db)
+        self._checked_at = time.monotonic()
+        if (count, max_id, max_updated) == (self._row_count, self._max_id, self._max_updated):
+            return
+        if count < self._row_count:
+            # Rows were deleted: a delta cannot see them
+            self.build(db)
+            return
+
+        changed = MerchantKnowledgeBase.id > self._max_id
+        if self._max_updated is not None:
+            # last_updated (CURRENT_TIMESTAMP) has a one second resolution on SQLite:
+            # re-read the last second too, re-indexing a row twice is harmless
+            changed = or_(changed, MerchantKnowledgeBase.last_updated >= self._max_updated - timedelta(seconds=1))
+        rows = db.query(*_ENTRY_COLUMNS).filter(changed).all()
+        with self._lock:
+            for row in rows:
+                self._upsert(MerchantEntry.from_row(row))
+            self._row_count, self._max_id, self._max_updated = count, max_id, max_updated
+            self.stats['delta_refreshes'] += 1
+        logger.debug(f"Merchant index delta refresh: {len(rows)} rows")
+
+    def upsert(self, merchant):
+        """Index (or drop, when inactive) a row just written by the service"""
+        with self._lock:
+            if self._built:
+                self._upsert(MerchantEntry.from_row(merchant))
+
+    def remove(self, merchant_ids: Iterable[int]):
+        """Drop deactivated rows"""
+        with self._lock:
+            for merchant_id in merchant_ids:
+                self._remove(merchant_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._built = False
+
+    def _upsert(self, entry: MerchantEntry):
+        self._remove(entry.id)
+        if entry.is_active:
+            self._add(entry)
+        self.stats['upserts'] += 1
+
+    def _add(self, entry: MerchantEntry):
+        self._entries[entry.id] = entry
+        self._by_name.setdefault(entry.normalized_name, set()).add(entry.id)
+        trigrams = frozenset(_trigrams(entry.normalized_name))
+        self._entry_trigrams[entry.id] = trigrams
+        for trigram in trigrams:
+            self._postings.setdefault(trigram, set()).add(entry.id)
+
+    def _remove(self, merchant_id: int):
+        entry = self._entries.pop(merchant_id, None)
+        if entry is None:
+            return
+        ids = self._by_name.get(entry.normalized_name)
+        if ids is not None:
+            ids.discard(merchant_id)
+            if not ids:
+                del self._by_name[entry.normalized_name]
+        for trigram in self._entry_trigrams.pop(merchant_id, ()):
+            postings = self._postings.get(trigram)
+            if postings is not None:
+                postings.discard(merchant_id)
+                if not postings:
+                    del self._postings[trigram]
+
+    # -- lookups --------------------------------------------------------
+
+    def exact(self, normalized_name: str, confidence_threshold: float = 0.0) -> List[MerchantEntry]:
+        with self._lock:
+            self.stats['lookups'] += 1
+            entries = [self._entries[i] for i in self._by_name.get(normalized_name, ())]
+        entries = [e for e in entries if (e.confidence_score or 0.0) >= confidence_threshold]
+        return sorted(entries, key=lambda e: e.confidence_score or 0.0, reverse=True)
+
+    def candidates(
+        self,
+        normalized_name: str,
+        confidence_threshold: float = 0.0,
+        limit: int = MERCHANT_INDEX_MAX_CANDIDATES
+    ) -> List[MerchantEntry]:
+        """Entries sharing most trigrams with the name (overlap coefficient)"""
+        query = _trigrams(normalized_name)
+        if not query:
+            return []
+        with self._lock:
+            # Candidate generation from the rarest trigrams of the name, within a
+            # bounded number of posting entries (very common trigrams such as
+            # " cb" would otherwise touch most of the table on every lookup)
+            postings = sorted((self._postings.get(trigram, ()) for trigram in query), key=len)
+            selected, scanned = [], 0
+            for posting in postings:
+                if not posting:
+                    continue
+                if selected and scanned + len(posting) > MERCHANT_INDEX_POSTINGS_BUDGET:
+                    break
+                selected.append(posting)
+                scanned += len(posting)
+            shared = Counter(chain.from_iterable(selected))
+
+            scored = []
+            for merchant_id, _ in shared.most_common(limit * 4):
+                entry = self._entries[merchant_id]
+                if (entry.confidence_score or 0.0) < confidence_threshold:
+                    continue
+                trigrams = self._entry_trigrams[merchant_id]
+                # Overlap coefficient: a merchant name contained in a longer label scores 1.0
+                overlap = len(query & trigrams) / min(len(query), len(trigrams))
+                if overlap >= MERCHANT_INDEX_MIN_OVERLAP:
+                    scored.append((overlap, entry))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [entry for _, entry in scored[:limit]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'merchants': len(self._entries),
+            'trigrams': len(self._postings),
+            'built': self._built
+        }
+
+
+_merchant_index: Optional[MerchantIndex] = None
+
+
+def get_merchant_index() -> MerchantIndex:
+    """Get the process-wide merchant index"""
+    global _merchant_index
+    if _merchant_index is None:
+        _merchant_index = MerchantIndex()
+    return _merchant_index
+
+
 class MerchantKnowledgeService:
     """
     Advanced merchant knowledge service with machine learning capabilities
@@ -54,46 +305,75 @@ class MerchantKnowledgeService:
             
             normalized_query = self._normalize_merchant_name(merchant_name)
             
-            # First try exact normalized match (fastest)
-            exact_matches = db.query(MerchantKnowledgeBase).filter(
-                MerchantKnowledgeBase.normalized_name == normalized_query,
-                MerchantKnowledgeBase.is_active == True,
-                MerchantKnowledgeBase.confidence_score >= confidence_threshold
-            ).order_by(desc(MerchantKnowledgeBase.confidence_score)).all()
+            index = get_merchant_index()
+            index.ensure_fresh(db)
+            fuzzy_results = self._search_index(index, normalized_query, confidence_threshold)
             
-            if exact_matches:
-                return [self._format_merchant_result(match, 1.0) for match in exact_matches]
-            
-            # Fuzzy search for similar merchants
-            potential_matches = db.query(MerchantKnowledgeBase).filter(
-                MerchantKnowledgeBase.is_active == True,
-                MerchantKnowledgeBase.confidence_score >= confidence_threshold
-            ).order_by(desc(MerchantKnowledgeBase.usage_count)).limit(100).all()
-            
-            fuzzy_results = []
-            for merchant in potential_matches:
-                similarity = self._calculate_similarity(
-                    normalized_query, 
-                    merchant.normalized_name
-                )
-                
-                if similarity >= self.similarity_threshold:
-                    result = self._format_merchant_result(merchant, similarity)
-                    fuzzy_results.append(result)
-            
-            # Sort by combined score (similarity * confidence * usage_weight)
-            fuzzy_results.sort(
-                key=lambda x: x['combined_score'], 
-                reverse=True
-            )
-            
-            logger.debug(f"Found {len(fuzzy_results)} fuzzy matches for '{merchant_name}'")
-            return fuzzy_results[:10]  # Return top 10 matches
+            logger.debug(f"Found {len(fuzzy_results)} matches for '{merchant_name}'")
+            return fuzzy_results
             
         except Exception as e:
             logger.error(f"Error in fuzzy merchant search: {e}")
             return []
     
+    def search_merchants_batch(
+        self,
+        db: Session,
+        merchant_names: Iterable[str],
+        confidence_threshold: float = 0.5
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Resolve many labels at once (month tagging, imports)
+        
+        One freshness check for the whole batch, then in-memory lookups;
+        labels normalizing to the same name are resolved once.
+        Returns {label: matches} with the same format as search_merchant_fuzzy
+        """
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            index = get_merchant_index()
+            index.ensure_fresh(db)
+            
+            resolved: Dict[str, List[Dict[str, Any]]] = {}
+            for merchant_name in merchant_names:
+                if merchant_name in results:
+                    continue
+                if not merchant_name or len(merchant_name.strip()) < 2:
+                    results[merchant_name] = []
+                    continue
+                normalized_query = self._normalize_merchant_name(merchant_name)
+                if normalized_query not in resolved:
+                    resolved[normalized_query] = self._search_index(index, normalized_query, confidence_threshold)
+                results[merchant_name] = resolved[normalized_query]
+            
+            logger.debug(f"Batch merchant lookup: {len(results)} labels, {len(resolved)} distinct names")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in batch merchant search: {e}")
+            return results
+    
+    def _search_index(
+        self,
+        index: MerchantIndex,
+        normalized_query: str,
+        confidence_threshold: float
+    ) -> List[Dict[str, Any]]:
+        """Exact normalized match first, then trigram candidates scored by similarity"""
+        exact_matches = index.exact(normalized_query, confidence_threshold)
+        if exact_matches:
+            return [self._format_merchant_result(match, 1.0) for match in exact_matches]
+        
+        fuzzy_results = []
+        for merchant in index.candidates(normalized_query, confidence_threshold):
+            similarity = self._calculate_similarity(normalized_query, merchant.normalized_name)
+            if similarity >= self.similarity_threshold:
+                fuzzy_results.append(self._format_merchant_result(merchant, similarity))
+        
+        # Sort by combined score (similarity * confidence * usage_weight)
+        fuzzy_results.sort(key=lambda x: x['combined_score'], reverse=True)
+        return fuzzy_results[:10]  # Return top 10 matches
+    
     def get_merchant_by_id(self, db: Session, merchant_id: int) -> Optional[MerchantKnowledgeBase]:
         """Get merchant by ID with usage tracking"""
         try:
@@ -107,6 +387,7 @@ class MerchantKnowledgeService:
                 merchant.last_used = datetime.now()
                 merchant.usage_count += 1
                 db.commit()
+                get_merchant_index().upsert(merchant)
                 
             return merchant
             
@@ -169,6 +450,7 @@ class MerchantKnowledgeService:
             db.add(merchant)
             db.commit()
             db.refresh(merchant)
+            get_merchant_index().upsert(merchant)
             
             logger.info(f"Created new merchant entry: {merchant_name}")
             return merchant
@@ -213,6 +495,7 @@ class MerchantKnowledgeService:
             
             db.commit()
             db.refresh(merchant)
+            get_merchant_index().upsert(merchant)
             
             logger.info(f"Updated merchant {merchant_id}, fields: {updated_fields}")
             return merchant
@@ -264,6 +547,7 @@ class MerchantKnowledgeService:
             merchant.last_verified = datetime.now()
             
             db.commit()
+            get_merchant_index().upsert(merchant)
             
             logger.info(f"Processed validation for merchant {merchant_id}: {'positive' if is_correct else 'negative'}")
             return True
@@ -404,7 +688,9 @@ class MerchantKnowledgeService:
                 entry.needs_update = True
                 count += 1
             
+            deactivated_ids = [entry.id for entry in outdated_entries]
             db.commit()
+            get_merchant_index().remove(deactivated_ids)
             
             logger.info(f"Cleaned up {count} outdated merchant entries")
             return count
@@ -475,6 +761,7 @@ class MerchantKnowledgeService:
             'business_type': merchant.business_type,
             'category': merchant.category,
             'expense_type': merchant.expense_type,
+            'suggested_expense_type': merchant.suggested_expense_type,
             'confidence_score': merchant.confidence_score,
             'similarity_score': similarity,
             'combined_score': combined_score,
@@ -559,6 +846,8 @@ class MerchantKnowledgeService:
                     continue
             
             db.commit()
+            # New ids / last_updated: picked up by the next delta refresh
+            get_merchant_index().ensure_fresh(db, force=True)
             
             logger.info(f"Bulk import completed: {created} created, {updated} updated, {errors} errors")
             return {
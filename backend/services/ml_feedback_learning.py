@@ -12,8 +12,12 @@ Author: Claude Code - ML Backend Architect
 """
 
 import logging
+import os
 import re
-from typing import Dict, List, Tuple, Optional, Any
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, List, Tuple, Optional, Any, Mapping
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, and_, or_
@@ -21,10 +25,15 @@ from collections import defaultdict, Counter
 from dataclasses import dataclass
 
 from models.database import MLFeedback, Transaction, MerchantKnowledgeBase, TagFixedLineMapping
-from services.expense_classification import ExpenseClassificationService, ClassificationResult
+from services.expense_classification import (
+    ClassificationResult, get_expense_classification_service, invalidate_classifier_model
+)
 
 logger = logging.getLogger(__name__)
 
+# How often (seconds) a request checks whether feedback changed in another process
+FEEDBACK_MODEL_CHECK_SECONDS = float(os.getenv("FEEDBACK_MODEL_CHECK_SECONDS", "30"))
+
 
 @dataclass
 class FeedbackPattern:
@@ -39,127 +48,245 @@ class FeedbackPattern:
     source: str = "feedback"
 
 
+@dataclass(frozen=True)
+class FeedbackModel:
+    """
+    Immutable snapshot of the learned feedback patterns, shared process-wide.
+
+    Rebuilt only when the feedback signature (ml_feedback / feedback-learned
+    merchants) changes, instead of re-running the grouped load queries on
+    every request.
+    """
+    version: int
+    signature: Tuple
+    feedback_patterns: Mapping[str, FeedbackPattern]
+    merchant_corrections: Mapping[str, Dict[str, Any]]
+    built_at: datetime
+    build_ms: float
+
+
+def _feedback_signature(db: Session) -> Tuple:
+    """Cheap fingerprint of the feedback data the model is built from"""
+    feedback = db.query(
+        func.count(MLFeedback.id),
+        func.max(MLFeedback.id),
+        func.max(MLFeedback.applied_at)
+    ).one()
+    merchants = db.query(
+        func.count(MerchantKnowledgeBase.id),
+        func.max(MerchantKnowledgeBase.id)
+    ).filter(MerchantKnowledgeBase.created_by == "feedback_learning").one()
+    return tuple(feedback) + tuple(merchants)
+
+
+def _load_feedback_patterns(db: Session) -> Dict[str, FeedbackPattern]:
+    """Load learned patterns from feedback data"""
+    feedback_patterns: Dict[str, FeedbackPattern] = {}
+    try:
+        # Load patterns that have been successfully learned from feedback
+        learned_patterns = db.query(
+            MLFeedback.merchant_pattern,
+            MLFeedback.corrected_tag,
+            MLFeedback.corrected_expense_type,
+            func.count(MLFeedback.id).label('usage_count'),
+            func.avg(MLFeedback.pattern_success_rate).label('success_rate'),
+            func.max(MLFeedback.applied_at).label('last_used')
+        ).filter(
+            and_(
+                MLFeedback.pattern_learned == True,
+                MLFeedback.merchant_pattern.isnot(None),
+                or_(
+                    MLFeedback.corrected_tag.isnot(None),
+                    MLFeedback.corrected_expense_type.isnot(None)
+                )
+            )
+        ).group_by(
+            MLFeedback.merchant_pattern,
+            MLFeedback.corrected_tag,
+            MLFeedback.corrected_expense_type
+        ).all()
+        
+        for pattern in learned_patterns:
+            if pattern.merchant_pattern:
+                # Calculate confidence based on usage and success rate
+                base_confidence = min(0.95, 0.6 + (pattern.usage_count * 0.05))
+                success_boost = (pattern.success_rate or 0.8) * 0.2
+                final_confidence = min(0.98, base_confidence + success_boost)
+                
+                feedback_patterns[pattern.merchant_pattern] = FeedbackPattern(
+                    merchant_pattern=pattern.merchant_pattern,
+                    learned_tag=pattern.corrected_tag or "",
+                    learned_expense_type=pattern.corrected_expense_type or "VARIABLE",
+                    confidence_score=final_confidence,
+                    usage_count=pattern.usage_count,
+                    success_rate=pattern.success_rate or 0.8,
+                    last_used=pattern.last_used
+                )
+        
+        # Load merchant knowledge base entries created from feedback
+        merchant_entries = db.query(MerchantKnowledgeBase).filter(
+            and_(
+                MerchantKnowledgeBase.created_by == "feedback_learning",
+                MerchantKnowledgeBase.is_active == True
+            )
+        ).all()
+        
+        for merchant in merchant_entries:
+            if merchant.normalized_name not in feedback_patterns:
+                feedback_patterns[merchant.normalized_name] = FeedbackPattern(
+                    merchant_pattern=merchant.normalized_name,
+                    learned_tag=merchant.suggested_tags or "",
+                    learned_expense_type=merchant.expense_type,
+                    confidence_score=merchant.confidence_score,
+                    usage_count=merchant.usage_count,
+                    success_rate=merchant.success_rate,
+                    last_used=merchant.last_used
+                )
+        
+        logger.info(f"Loaded {len(feedback_patterns)} feedback patterns for ML enhancement")
+        
+    except Exception as e:
+        logger.error(f"Error loading feedback patterns: {e}")
+        feedback_patterns = {}
+    
+    return feedback_patterns
+
+
+def _load_correction_patterns(db: Session) -> Dict[str, Dict[str, Any]]:
+    """Load patterns of frequent corrections to adjust confidence"""
+    merchant_corrections: Dict[str, Dict[str, Any]] = {}
+    try:
+        # Get frequently corrected tags and expense types
+        correction_patterns = db.query(
+            MLFeedback.original_tag,
+            MLFeedback.original_expense_type,
+            MLFeedback.corrected_tag,
+            MLFeedback.corrected_expense_type,
+            func.count(MLFeedback.id).label('correction_count'),
+            func.avg(MLFeedback.confidence_before).label('avg_confidence_before')
+        ).filter(
+            MLFeedback.feedback_type == 'correction'
+        ).group_by(
+            MLFeedback.original_tag,
+            MLFeedback.original_expense_type,
+            MLFeedback.corrected_tag,
+            MLFeedback.corrected_expense_type
+        ).having(func.count(MLFeedback.id) >= 2).all()
+        
+        for correction in correction_patterns:
+            original_key = f"{correction.original_tag}:{correction.original_expense_type}"
+            merchant_corrections[original_key] = {
+                'correction_count': correction.correction_count,
+                'avg_confidence_before': correction.avg_confidence_before or 0.5,
+                'corrected_tag': correction.corrected_tag,
+                'corrected_expense_type': correction.corrected_expense_type,
+                'confidence_penalty': min(0.4, correction.correction_count * 0.1)
+            }
+        
+        logger.info(f"Loaded {len(merchant_corrections)} correction patterns")
+        
+    except Exception as e:
+        logger.error(f"Error loading correction patterns: {e}")
+    
+    return merchant_corrections
+
+
+class FeedbackModelRegistry:
+    """
+    Holds the current FeedbackModel for the process.
+
+    A request borrows the current model; the signature query is re-run at most
+    every `check_interval` seconds (feedback written by another worker) and
+    invalidate() forces a check on the next request (feedback written here).
+    """
+
+    def __init__(self, check_interval: float = FEEDBACK_MODEL_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._model: Optional[FeedbackModel] = None
+        self._version = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"borrows": 0, "signature_checks": 0, "rebuilds": 0}
+
+    def get_model(self, db: Session) -> FeedbackModel:
+        self.stats["borrows"] += 1
+        model = self._model
+        if model is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return model
+
+        with self._lock:
+            model = self._model
+            if model is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return model
+            self.stats["signature_checks"] += 1
+            signature = _feedback_signature(db)
+            if model is None or model.signature != signature:
+                model = self._build(db, signature)
+                self._model = model
+            self._checked_at = time.monotonic()
+            return model
+
+    def _build(self, db: Session, signature: Tuple) -> FeedbackModel:
+        started = time.perf_counter()
+        patterns = _load_feedback_patterns(db)
+        corrections = _load_correction_patterns(db)
+        self._version += 1
+        self.stats["rebuilds"] += 1
+        model = FeedbackModel(
+            version=self._version,
+            signature=signature,
+            feedback_patterns=MappingProxyType(patterns),
+            merchant_corrections=MappingProxyType(corrections),
+            built_at=datetime.utcnow(),
+            build_ms=(time.perf_counter() - started) * 1000
+        )
+        logger.info(f"Feedback model v{model.version} built in {model.build_ms:.1f}ms")
+        return model
+
+    def invalidate(self) -> None:
+        """Force a signature check on the next request"""
+        self._checked_at = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        model = self._model
+        borrows = self.stats["borrows"]
+        return {
+            **self.stats,
+            "version": model.version if model else None,
+            "built_at": model.built_at.isoformat() if model else None,
+            "build_ms": round(model.build_ms, 3) if model else None,
+            "reuse_rate": round((borrows - self.stats["rebuilds"]) / borrows * 100, 2) if borrows else 0.0
+        }
+
+
+_feedback_model_registry = FeedbackModelRegistry()
+
+
+def get_feedback_model_registry() -> FeedbackModelRegistry:
+    """Get the process-wide feedback model registry"""
+    return _feedback_model_registry
+
+
+def invalidate_feedback_model() -> None:
+    """Call after feedback was written so the next request picks it up"""
+    _feedback_model_registry.invalidate()
+    # Cached base classifications may contradict the new feedback
+    invalidate_classifier_model()
+
+
 class MLFeedbackLearningService:
     """
     Enhanced ML service that learns from user feedback and improves classification accuracy
+
+    Request-scoped: the learned patterns come from the shared FeedbackModel.
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, model: Optional[FeedbackModel] = None):
         self.db = db
-        self.base_classifier = ExpenseClassificationService()
-        self.feedback_patterns: Dict[str, FeedbackPattern] = {}
-        self.merchant_corrections: Dict[str, Dict[str, Any]] = {}
-        self._load_feedback_patterns()
-    
-    def _load_feedback_patterns(self):
-        """Load learned patterns from feedback data on initialization"""
-        try:
-            # Load patterns that have been successfully learned from feedback
-            learned_patterns = self.db.query(
-                MLFeedback.merchant_pattern,
-                MLFeedback.corrected_tag,
-                MLFeedback.corrected_expense_type,
-                func.count(MLFeedback.id).label('usage_count'),
-                func.avg(MLFeedback.pattern_success_rate).label('success_rate'),
-                func.max(MLFeedback.applied_at).label('last_used')
-            ).filter(
-                and_(
-                    MLFeedback.pattern_learned == True,
-                    MLFeedback.merchant_pattern.isnot(None),
-                    or_(
-                        MLFeedback.corrected_tag.isnot(None),
-                        MLFeedback.corrected_expense_type.isnot(None)
-                    )
-                )
-            ).group_by(
-                MLFeedback.merchant_pattern,
-                MLFeedback.corrected_tag,
-                MLFeedback.corrected_expense_type
-            ).all()
-            
-            for pattern in learned_patterns:
-                if pattern.merchant_pattern:
-                    # Calculate confidence based on usage and success rate
-                    base_confidence = min(0.95, 0.6 + (pattern.usage_count * 0.05))
-                    success_boost = (pattern.success_rate or 0.8) * 0.2
-                    final_confidence = min(0.98, base_confidence + success_boost)
-                    
-                    self.feedback_patterns[pattern.merchant_pattern] = FeedbackPattern(
-                        merchant_pattern=pattern.merchant_pattern,
-                        learned_tag=pattern.corrected_tag or "",
-                        learned_expense_type=pattern.corrected_expense_type or "VARIABLE",
-                        confidence_score=final_confidence,
-                        usage_count=pattern.usage_count,
-                        success_rate=pattern.success_rate or 0.8,
-                        last_used=pattern.last_used
-                    )
-            
-            # Load merchant knowledge base entries created from feedback
-            merchant_entries = self.db.query(MerchantKnowledgeBase).filter(
-                and_(
-                    MerchantKnowledgeBase.created_by == "feedback_learning",
-                    MerchantKnowledgeBase.is_active == True
-                )
-            ).all()
-            
-            for merchant in merchant_entries:
-                if merchant.normalized_name not in self.feedback_patterns:
-                    self.feedback_patterns[merchant.normalized_name] = FeedbackPattern(
-                        merchant_pattern=merchant.normalized_name,
-                        learned_tag=merchant.suggested_tags or "",
-                        learned_expense_type=merchant.expense_type,
-                        confidence_score=merchant.confidence_score,
-                        usage_count=merchant.usage_count,
-                        success_rate=merchant.success_rate,
-                        last_used=merchant.last_used
-                    )
-            
-            # Load correction patterns for confidence adjustment
-            self._load_correction_patterns()
-            
-            logger.info(f"Loaded {len(self.feedback_patterns)} feedback patterns for ML enhancement")
-            
-        except Exception as e:
-            logger.error(f"Error loading feedback patterns: {e}")
-            self.feedback_patterns = {}
-    
-    def _load_correction_patterns(self):
-        """Load patterns of frequent corrections to adjust confidence"""
-        try:
-            # Get frequently corrected tags and expense types
-            correction_patterns = self.db.query(
-                MLFeedback.original_tag,
-                MLFeedback.original_expense_type,
-                MLFeedback.corrected_tag,
-                MLFeedback.corrected_expense_type,
-                func.count(MLFeedback.id).label('correction_count'),
-                func.avg(MLFeedback.confidence_before).label('avg_confidence_before')
-            ).filter(
-                MLFeedback.feedback_type == 'correction'
-            ).group_by(
-                MLFeedback.original_tag,
-                MLFeedback.original_expense_type,
-                MLFeedback.corrected_tag,
-                MLFeedback.corrected_expense_type
-            ).having(func.count(MLFeedback.id) >= 2).all()
-            
-            for correction in correction_patterns:
-                original_key = f"{correction.original_tag}:{correction.original_expense_type}"
-                if original_key not in self.merchant_corrections:
-                    self.merchant_corrections[original_key] = {}
-                
-                self.merchant_corrections[original_key] = {
-                    'correction_count': correction.correction_count,
-                    'avg_confidence_before': correction.avg_confidence_before or 0.5,
-                    'corrected_tag': correction.corrected_tag,
-                    'corrected_expense_type': correction.corrected_expense_type,
-                    'confidence_penalty': min(0.4, correction.correction_count * 0.1)
-                }
-            
-            logger.info(f"Loaded {len(self.merchant_corrections)} correction patterns")
-            
-        except Exception as e:
-            logger.error(f"Error loading correction patterns: {e}")
+        self.base_classifier = get_expense_classification_service(db)
+        self.model = model or _feedback_model_registry.get_model(db)
+        self.feedback_patterns: Mapping[str, FeedbackPattern] = self.model.feedback_patterns
+        self.merchant_corrections: Mapping[str, Dict[str, Any]] = self.model.merchant_corrections
     
     def normalize_merchant_name(self, description: str) -> str:
         """Normalize merchant name for pattern matching (consistent with feedback service)"""
@@ -206,9 +333,14 @@ class MLFeedbackLearningService:
             return feedback_result
         
         # Get base classification from original service
-        base_result = self.base_classifier.classify_transaction(
-            transaction_label, amount, use_web_research
-        )
+        if use_web_research:
+            base_result = self.base_classifier.classify_expense_with_web_intelligence(
+                tag_name="", transaction_amount=amount, transaction_description=transaction_label
+            )
+        else:
+            base_result = self.base_classifier.classify_expense(
+                tag_name="", transaction_amount=amount, transaction_description=transaction_label
+            )
         
         # Apply feedback-based confidence adjustments
         adjusted_result = self._apply_feedback_adjustments(base_result, normalized_merchant)
@@ -324,11 +456,7 @@ class MLFeedbackLearningService:
     def _update_pattern_usage(self, merchant_pattern: str):
         """Update usage statistics for a feedback pattern"""
         try:
-            # Update in-memory pattern
-            if merchant_pattern in self.feedback_patterns:
-                self.feedback_patterns[merchant_pattern].usage_count += 1
-                self.feedback_patterns[merchant_pattern].last_used = datetime.utcnow()
-            
+            # The shared model is immutable: counters are refreshed on its next rebuild
             # Update database feedback records
             self.db.query(MLFeedback).filter(
                 MLFeedback.merchant_pattern == merchant_pattern
@@ -399,9 +527,10 @@ class MLFeedbackLearningService:
     
     def reload_patterns(self):
         """Reload feedback patterns from database (call after new feedback is added)"""
-        self.feedback_patterns.clear()
-        self.merchant_corrections.clear()
-        self._load_feedback_patterns()
+        invalidate_feedback_model()
+        self.model = _feedback_model_registry.get_model(self.db)
+        self.feedback_patterns = self.model.feedback_patterns
+        self.merchant_corrections = self.model.merchant_corrections
         logger.info("Feedback patterns reloaded")
     
     def get_pattern_statistics(self) -> Dict[str, Any]:
@@ -425,6 +554,7 @@ class MLFeedbackLearningService:
             'frequently_used_patterns': frequently_used,
             'average_confidence': avg_confidence,
             'correction_patterns': len(self.merchant_corrections),
+            'model_version': self.model.version,
             'top_patterns': [
                 {
                     'pattern': pattern.merchant_pattern,
@@ -435,4 +565,9 @@ class MLFeedbackLearningService:
                 for pattern in sorted(self.feedback_patterns.values(), 
                                     key=lambda x: x.usage_count, reverse=True)[:5]
             ]
-        }
\ No newline at end of file
+        }
+
+
+def get_ml_feedback_learning_service(db: Session) -> MLFeedbackLearningService:
+    """Factory function to get a request-scoped service borrowing the shared feedback model"""
+    return MLFeedbackLearningService(db)
@@ -968,14 +968,14 @@ class MLTaggingEngine:
                 
         return recurring_patterns
     
-    def batch_suggest_tags(
+    async def abatch_suggest_tags(
         self,
         transactions: List[Dict],
         use_web_research: bool = False,
         max_concurrent: int = 5
     ) -> Dict[int, MLTagResult]:
         """
-        Batch process multiple transactions
+        Batch process multiple transactions on the caller's event loop
         
         Args:
             transactions: List of transaction dicts with 'id', 'label', 'amount'
@@ -985,56 +985,63 @@ class MLTaggingEngine:
         Returns:
             Dict mapping transaction ID to MLTagResult
         """
-        import asyncio
+        results = {}
         
-        async def process_batch():
-            results = {}
+        if use_web_research:
+            # Process with web research (limited concurrency)
+            semaphore = asyncio.Semaphore(max_concurrent)
             
-            if use_web_research:
-                # Process with web research (limited concurrency)
-                semaphore = asyncio.Semaphore(max_concurrent)
-                
-                async def process_transaction(tx):
-                    async with semaphore:
-                        tx_id = tx.get('id')
-                        if tx_id is not None:
-                            result = await self.suggest_tag(
-                                tx.get('label', ''),
-                                tx.get('amount'),
-                                use_web_research=True
-                            )
-                            return tx_id, result
-                    return None, None
-                    
-                tasks = [process_transaction(tx) for tx in transactions]
-                task_results = await asyncio.gather(*tasks)
-                
-                for tx_id, result in task_results:
-                    if tx_id is not None:
-                        results[tx_id] = result
-            else:
-                # Fast processing without web research
-                for tx in transactions:
+            async def process_transaction(tx):
+                async with semaphore:
                     tx_id = tx.get('id')
                     if tx_id is not None:
                         result = await self.suggest_tag(
                             tx.get('label', ''),
                             tx.get('amount'),
-                            use_web_research=False
+                            use_web_research=True
                         )
-                        results[tx_id] = result
-                        
-            return results
+                        return tx_id, result
+                return None, None
+                
+            tasks = [process_transaction(tx) for tx in transactions]
+            task_results = await asyncio.gather(*tasks)
             
-        # Run async batch processing
-        loop = asyncio.new_event_loop()
+            for tx_id, result in task_results:
+                if tx_id is not None:
+                    results[tx_id] = result
+        else:
+            # Fast processing without web research
+            for tx in transactions:
+                tx_id = tx.get('id')
+                if tx_id is not None:
+                    result = await self.suggest_tag(
+                        tx.get('label', ''),
+                        tx.get('amount'),
+                        use_web_research=False
+                    )
+                    results[tx_id] = result
+        
+        self.stats['batch_operations'] += 1
+        self.stats['batch_transactions_processed'] += len(results)
+        return results
+    
+    def batch_suggest_tags(
+        self,
+        transactions: List[Dict],
+        use_web_research: bool = False,
+        max_concurrent: int = 5
+    ) -> Dict[int, MLTagResult]:
+        """
+        Synchronous wrapper for scripts and worker threads.
+        
+        Async code must await abatch_suggest_tags() instead: a nested event
+        loop would block the running one for the whole batch.
+        """
         try:
-            results = loop.run_until_complete(process_batch())
-            self.stats['batch_operations'] += 1
-            self.stats['batch_transactions_processed'] += len(results)
-            return results
-        finally:
-            loop.close()
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.abatch_suggest_tags(transactions, use_web_research, max_concurrent))
+        raise RuntimeError("batch_suggest_tags() called from a running event loop, await abatch_suggest_tags()")
             
     def get_statistics(self) -> Dict[str, Any]:
         """Get comprehensive engine statistics"""
@@ -7,6 +7,9 @@ Features:
 - EXIF auto-rotation for smartphone photos
 - Smart parsing for French receipts (merchant, amount, date)
 - Tag suggestion based on merchant name
+
+Scans are executed by services/ocr_worker_pool.py, which runs parse_receipt
+in a dedicated process pool owning the EasyOCR reader.
 """
 
 import re
@@ -433,5 +436,11 @@ def parse_receipt(image_bytes: bytes) -> ReceiptData:
 
 
 def is_ocr_available() -> bool:
-    """Check if OCR is available"""
-    return PILLOW_AVAILABLE and get_ocr_reader() is not None
+    """
+    Check if OCR is available.
+
+    Only checks that EasyOCR is installed: the model itself is loaded by the
+    OCR worker pool processes (services/ocr_worker_pool.py), never by API workers.
+    """
+    import importlib.util
+    return PILLOW_AVAILABLE and importlib.util.find_spec("easyocr") is not None
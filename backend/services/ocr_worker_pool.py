@@ -0,0 +1,294 @@
+"""
+OCR Worker Pool for Receipt Scanning
+Budget Famille v4.1 - OCR execution subsystem
+
+Features:
+- Dedicated process pool owning the EasyOCR reader (API workers never load the model)
+- Warm-up at startup so the first scan does not pay the model load
+- Image preprocessing, OCR and parsing all run inside the pool
+- Bounded async queue: when full, new scans are rejected instead of piling up
+- LRU cache of results keyed by the SHA-256 of the image bytes, plus in-flight dedupe
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.executors import shutdown_executor
+from services.ocr_service import ReceiptData
+
+logger = logging.getLogger(__name__)
+
+OCR_POOL_WORKERS = int(os.getenv("OCR_POOL_WORKERS", "1"))
+OCR_MAX_PENDING = int(os.getenv("OCR_MAX_PENDING", "8"))
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "256"))
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", "60"))
+
+
+class OCRQueueFullError(Exception):
+    """Raised when too many scans are already waiting for the OCR pool"""
+
+
+# =============================================================================
+# Functions executed inside the pool processes
+# =============================================================================
+
+def _init_worker() -> None:
+    """Pool process initializer: load the EasyOCR model once per process"""
+    from services.ocr_service import get_ocr_reader
+    get_ocr_reader()
+
+
+def _warmup_job() -> bool:
+    """Return True when the reader is loaded in the pool process"""
+    from services.ocr_service import get_ocr_reader
+    return get_ocr_reader() is not None
+
+
+def _scan_job(image_bytes: bytes) -> ReceiptData:
+    """Preprocess, OCR and parse a receipt inside the pool process"""
+    from services.ocr_service import parse_receipt
+    return parse_receipt(image_bytes)
+
+
+# =============================================================================
+# Pool
+# =============================================================================
+
+class OCRWorkerPool:
+    """
+    Async front-end to a process pool running receipt OCR.
+
+    Scans are pushed on a bounded asyncio.Queue consumed by one dispatcher task
+    per pool process, so at most `workers` OCR jobs run while `max_pending`
+    more may wait. Identical images are served from the LRU cache or attached
+    to the scan already in flight.
+    """
+
+    def __init__(
+        self,
+        workers: int = OCR_POOL_WORKERS,
+        max_pending: int = OCR_MAX_PENDING,
+        cache_size: int = OCR_CACHE_SIZE,
+        timeout: float = OCR_TIMEOUT_SECONDS,
+        executor: Optional[Executor] = None,
+        job: Callable[[bytes], ReceiptData] = _scan_job,
+        warmup_job: Callable[[], bool] = _warmup_job,
+    ):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.cache_size = max(0, cache_size)
+        self.timeout = timeout
+        self._job = job
+        self._warmup_job = warmup_job
+
+        self._executor = executor
+        self._executor_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatchers: List[asyncio.Task] = []
+
+        self._cache: "OrderedDict[str, ReceiptData]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.warmed = False
+        self.stats = {
+            "scans": 0,
+            "cache_hits": 0,
+            "inflight_dedupes": 0,
+            "rejected": 0,
+            "errors": 0,
+            "total_ocr_ms": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def _get_executor(self) -> Executor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: never fork an API worker that already runs threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+                logger.info(f"OCR process pool started ({self.workers} worker(s))")
+        return self._executor
+
+    def _get_queue(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._dispatchers = [loop.create_task(self._dispatch()) for _ in range(self.workers)]
+        return self._queue
+
+    async def warm_up(self) -> bool:
+        """Start the pool processes and load the OCR model in each of them"""
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *[loop.run_in_executor(executor, self._warmup_job) for _ in range(self.workers)],
+            return_exceptions=True
+        )
+        self.warmed = all(result is True for result in results)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if self.warmed:
+            logger.info(f"✅ OCR pool warmed up in {elapsed_ms:.0f}ms")
+        else:
+            logger.warning(f"⚠️ OCR pool warm-up failed: {results}")
+        return self.warmed
+
+    def shutdown(self) -> None:
+        """Stop dispatchers and pool processes"""
+        for task in self._dispatchers:
+            task.cancel()
+        self._dispatchers = []
+        self._queue = None
+        self._loop = None
+        with self._executor_lock:
+            # Before 3.9 queued receipts still run, their results are dropped
+            shutdown_executor(self._executor)
+            self._executor = None
+        self.warmed = False
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def _cache_get(self, digest: str) -> Optional[ReceiptData]:
+        result = self._cache.get(digest)
+        if result is not None:
+            self._cache.move_to_end(digest)
+        return result
+
+    def _cache_put(self, digest: str, result: ReceiptData) -> None:
+        if self.cache_size == 0:
+            return
+        self._cache[digest] = result
+        self._cache.move_to_end(digest)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _on_scan_done(self, digest: str, future: asyncio.Future) -> None:
+        self._inflight.pop(digest, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        # Failed extractions are not cached so that a retry can succeed
+        if result.raw_text:
+            self._cache_put(digest, result)
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+
+    async def _dispatch(self) -> None:
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            image_bytes, future = await queue.get()
+            try:
+                started = time.perf_counter()
+                result = await loop.run_in_executor(executor, self._job, image_bytes)
+                self.stats["total_ocr_ms"] += (time.perf_counter() - started) * 1000
+                if not future.done():
+                    future.set_result(result)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"OCR job failed: {e}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                queue.task_done()
+
+    async def scan(self, image_bytes: bytes) -> Tuple[ReceiptData, bool]:
+        """
+        Scan a receipt image through the pool.
+
+        Returns:
+            (receipt_data, from_cache) - from_cache is True for cache hits and
+            for requests attached to an identical scan already in flight
+
+        Raises:
+            OCRQueueFullError: the pending queue is full (back-pressure)
+            asyncio.TimeoutError: the scan took longer than `timeout`
+        """
+        digest = hashlib.sha256(image_bytes).hexdigest()
+
+        cached = self._cache_get(digest)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached, True
+
+        pending = self._inflight.get(digest)
+        if pending is not None:
+            self.stats["inflight_dedupes"] += 1
+            return await asyncio.wait_for(asyncio.shield(pending), self.timeout), True
+
+        queue = self._get_queue()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            queue.put_nowait((image_bytes, future))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise OCRQueueFullError(
+                f"OCR queue full ({self.max_pending} scans pending), retry later"
+            )
+
+        self.stats["scans"] += 1
+        self._inflight[digest] = future
+        future.add_done_callback(lambda f: self._on_scan_done(digest, f))
+        return await asyncio.wait_for(asyncio.shield(future), self.timeout), False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool, queue and cache statistics"""
+        lookups = self.stats["scans"] + self.stats["cache_hits"] + self.stats["inflight_dedupes"]
+        return {
+            **self.stats,
+            "workers": self.workers,
+            "warmed": self.warmed,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "max_pending": self.max_pending,
+            "cache_entries": len(self._cache),
+            "cache_size": self.cache_size,
+            "cache_hit_rate": round(
+                (self.stats["cache_hits"] + self.stats["inflight_dedupes"]) / lookups, 3
+            ) if lookups else 0.0,
+            "avg_ocr_ms": round(self.stats["total_ocr_ms"] / self.stats["scans"], 1) if self.stats["scans"] else 0.0,
+        }
+
+
+# Singleton instance (one pool per API worker process)
+_ocr_pool: Optional[OCRWorkerPool] = None
+
+
+def get_ocr_pool() -> OCRWorkerPool:
+    """Get or create the OCR worker pool singleton"""
+    global _ocr_pool
+    if _ocr_pool is None:
+        _ocr_pool = OCRWorkerPool()
+    return _ocr_pool
+
+
+def shutdown_ocr_pool() -> None:
+    """Shut down the OCR worker pool if it was started"""
+    global _ocr_pool
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown()
+        _ocr_pool = None
@@ -0,0 +1,388 @@
+"""
+Cached PDF Report Generation for Budget Famille
+Serves monthly PDF reports from cache whenever the month's data is unchanged
+
+- Report data (summary, member breakdown, tags, transactions) is gathered into
+  a MonthReportSnapshot kept in an in-process LRU, keyed by month, user and
+  the month's data generation (see services/data_generation.py)
+- Every section of the PDF is rendered from that snapshot only
+- Rendered PDFs are stored on disk under the same key, one directory per
+  user; a download of an unchanged month is a single file read. The
+  "Genere le" line of a cached report is the time it was rendered: the data
+  it shows has not changed since
+- Rendering all months of a year runs the missing reports on the shared CPU
+  process pool (services/executors.py)
+"""
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.database import Transaction, Config, FixedLine, CustomProvision
+from services.calculations import get_split, split_amount, calculate_provision_amount
+from services.data_generation import get_data_generation
+from services.executors import get_executors
+
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "budget_famille_pdf_cache"))
+PDF_SNAPSHOT_CACHE_SIZE = int(os.getenv("PDF_SNAPSHOT_CACHE_SIZE", "64"))
+# 1 = render the missing months of a yearly export inline instead of on the CPU pool
+PDF_BATCH_WORKERS = int(os.getenv("PDF_BATCH_WORKERS", "2"))
+
+# Bump when the report layout changes so that cached PDFs are not reused
+REPORT_LAYOUT_VERSION = "4.1"
+
+
+# =============================================================================
+# Data gathering
+# =============================================================================
+
+def get_summary_data(month: str, current_user, db: Session) -> dict:
+    """Get summary data for PDF generation"""
+    from models.database import ensure_default_config
+
+    cfg = ensure_default_config(db)
+    r1, r2 = get_split(cfg)
+
+    # Fixed lines
+    lines = db.query(FixedLine).filter(FixedLine.active == True).all()
+    lines_total = 0.0
+    fixed_p1 = 0.0
+    fixed_p2 = 0.0
+
+    for ln in lines:
+        if ln.freq == "mensuelle":
+            mval = ln.amount
+        elif ln.freq == "trimestrielle":
+            mval = (ln.amount or 0.0) / 3.0
+        else:
+            mval = (ln.amount or 0.0) / 12.0
+        p1, p2 = split_amount(mval, ln.split_mode, r1, r2, ln.split1, ln.split2)
+        lines_total += mval
+        fixed_p1 += p1
+        fixed_p2 += p2
+
+    # Provisions
+    custom_provisions = db.query(CustomProvision).filter(
+        CustomProvision.created_by == current_user.username,
+        CustomProvision.is_active == True
+    ).all()
+
+    provisions_total = 0.0
+    provisions_p1 = 0.0
+    provisions_p2 = 0.0
+
+    for provision in custom_provisions:
+        monthly_amount, member1_amount, member2_amount = calculate_provision_amount(provision, cfg)
+        provisions_total += monthly_amount
+        provisions_p1 += member1_amount
+        provisions_p2 += member2_amount
+
+    # Transactions
+    txs = db.query(Transaction).filter(Transaction.month == month).all()
+    var_total = -sum(t.amount for t in txs if (t.is_expense and not t.exclude and t.amount is not None))
+    var_p1 = var_total * r1
+    var_p2 = var_total * r2
+
+    # Totals
+    total_p1 = var_p1 + fixed_p1 + provisions_p1
+    total_p2 = var_p2 + fixed_p2 + provisions_p2
+
+    return {
+        "month": month,
+        "member1": cfg.member1,
+        "member2": cfg.member2,
+        "var_total": round(var_total, 2),
+        "var_p1": round(var_p1, 2),
+        "var_p2": round(var_p2, 2),
+        "fixed_lines_total": round(lines_total, 2),
+        "fixed_p1": round(fixed_p1, 2),
+        "fixed_p2": round(fixed_p2, 2),
+        "provisions_total": round(provisions_total, 2),
+        "provisions_p1": round(provisions_p1, 2),
+        "provisions_p2": round(provisions_p2, 2),
+        "total_p1": round(total_p1, 2),
+        "total_p2": round(total_p2, 2),
+        "grand_total": round(total_p1 + total_p2, 2),
+        "r1": r1,
+        "r2": r2,
+    }
+
+
+def get_tags_summary(month: str, db: Session) -> dict:
+    """Get tags breakdown for the month"""
+    txs = db.query(Transaction).filter(
+        Transaction.month == month,
+        Transaction.is_expense == True,
+        Transaction.exclude == False
+    ).all()
+
+    tags_data = defaultdict(lambda: {"count": 0, "total": 0.0})
+
+    for tx in txs:
+        if tx.tags:
+            tag_list = [t.strip().lower() for t in tx.tags.split(',') if t.strip()]
+            if tag_list:
+                amount_per_tag = abs(tx.amount) / len(tag_list)
+                for tag in tag_list:
+                    tags_data[tag]["count"] += 1
+                    tags_data[tag]["total"] += amount_per_tag
+            else:
+                tags_data["non-tague"]["count"] += 1
+                tags_data["non-tague"]["total"] += abs(tx.amount)
+        else:
+            tags_data["non-tague"]["count"] += 1
+            tags_data["non-tague"]["total"] += abs(tx.amount)
+
+    return {"tags": dict(tags_data)}
+
+
+@dataclass
+class MonthReportSnapshot:
+    """Immutable input of a monthly PDF report"""
+    month: str
+    username: str
+    generation: str
+    summary: Dict[str, Any]
+    transactions: List[Dict[str, Any]]
+    config: Dict[str, Any]
+    tags_summary: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def cache_key(self) -> str:
+        return report_cache_key(self.month, self.username, self.generation)
+
+    def render_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for services.pdf_export.generate_budget_pdf"""
+        return {
+            "month": self.month,
+            "summary": self.summary,
+            "transactions": self.transactions,
+            "config": self.config,
+            "tags_summary": self.tags_summary,
+        }
+
+
+def report_cache_key(month: str, username: str, generation: str) -> str:
+    """Stable key of a rendered report"""
+    raw = f"{REPORT_LAYOUT_VERSION}|{month}|{username}|{generation}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def build_month_snapshot(db: Session, month: str, current_user, generation: Optional[str] = None) -> MonthReportSnapshot:
+    """Gather every piece of data a monthly report needs"""
+    if generation is None:
+        generation = get_data_generation(db, month)
+
+    summary = get_summary_data(month, current_user, db)
+
+    # Only the 15 largest expenses are printed
+    transactions = db.query(
+        Transaction.id, Transaction.date_op, Transaction.label, Transaction.amount, Transaction.tags
+    ).filter(
+        Transaction.month == month,
+        Transaction.is_expense == True,
+        Transaction.exclude == False
+    ).order_by(Transaction.amount.asc()).limit(15).all()
+
+    config = db.query(Config).first()
+
+    return MonthReportSnapshot(
+        month=month,
+        username=current_user.username,
+        generation=generation,
+        summary=summary,
+        transactions=[
+            {
+                "id": tx.id,
+                "date_op": tx.date_op,
+                "label": tx.label,
+                "amount": tx.amount,
+                "tags": tx.tags,
+            }
+            for tx in transactions
+        ],
+        config={
+            "member1": config.member1 if config else "Membre 1",
+            "member2": config.member2 if config else "Membre 2",
+        },
+        tags_summary=get_tags_summary(month, db),
+    )
+
+
+# =============================================================================
+# Rendering (also executed inside batch pool processes)
+# =============================================================================
+
+def render_snapshot(render_kwargs: Dict[str, Any]) -> bytes:
+    """Render a report snapshot to PDF bytes"""
+    from services.pdf_export import generate_budget_pdf
+    return generate_budget_pdf(**render_kwargs)
+
+
+# =============================================================================
+# Cache
+# =============================================================================
+
+class PDFReportCache:
+    """Snapshot LRU + on-disk PDF cache keyed by (month, user, data generation)"""
+
+    def __init__(self, cache_dir: str = PDF_CACHE_DIR, snapshot_cache_size: int = PDF_SNAPSHOT_CACHE_SIZE,
+                 batch_workers: int = PDF_BATCH_WORKERS):
+        self.cache_dir = Path(cache_dir)
+        self.snapshot_cache_size = snapshot_cache_size
+        self.batch_workers = max(1, batch_workers)
+        self._snapshots: "OrderedDict[Tuple[str, str], MonthReportSnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"pdf_hits": 0, "pdf_misses": 0, "snapshot_hits": 0, "snapshot_misses": 0}
+
+    # -- snapshots -------------------------------------------------------
+
+    def get_snapshot(self, db: Session, month: str, current_user, generation: Optional[str] = None) -> MonthReportSnapshot:
+        """Return the month snapshot, rebuilding it only if the data generation moved"""
+        if generation is None:
+            generation = get_data_generation(db, month)
+        key = (month, current_user.username)
+
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and snapshot.generation == generation:
+                self._snapshots.move_to_end(key)
+                self.stats["snapshot_hits"] += 1
+                return snapshot
+
+        snapshot = build_month_snapshot(db, month, current_user, generation)
+        with self._lock:
+            self.stats["snapshot_misses"] += 1
+            self._snapshots[key] = snapshot
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > self.snapshot_cache_size:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    # -- files -----------------------------------------------------------
+
+    def _user_dir(self, username: str) -> Path:
+        # Digest of the exact username: no two users share a directory, whatever their names contain
+        return self.cache_dir / hashlib.sha1(username.encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, month: str, username: str, generation: str) -> Path:
+        return self._user_dir(username) / f"{month}_{report_cache_key(month, username, generation)}.pdf"
+
+    def _read(self, path: Path) -> Optional[bytes]:
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, month: str, username: str, path: Path, pdf_bytes: bytes) -> None:
+        """Atomically store a report and drop older generations of the same month (same user only)"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(pdf_bytes)
+            os.replace(tmp_path, path)
+            # month is YYYY-MM: "2025-01_*" cannot match another month
+            for stale in path.parent.glob(f"{month}_*.pdf"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not write PDF cache file {path}: {e}")
+
+    # -- public API ------------------------------------------------------
+
+    def get_month_pdf(self, db: Session, month: str, current_user) -> Tuple[bytes, bool]:
+        """
+        Return (pdf_bytes, from_cache) for a monthly report.
+
+        Costs one generation lookup and one file read when the month is unchanged.
+        """
+        generation = get_data_generation(db, month)
+        path = self._path(month, current_user.username, generation)
+
+        cached = self._read(path)
+        if cached is not None:
+            self.stats["pdf_hits"] += 1
+            return cached, True
+
+        self.stats["pdf_misses"] += 1
+        snapshot = self.get_snapshot(db, month, current_user, generation)
+        pdf_bytes = render_snapshot(snapshot.render_kwargs())
+        self._write(month, current_user.username, path, pdf_bytes)
+        return pdf_bytes, False
+
+    def render_year(self, db: Session, year: str, current_user) -> Dict[str, bytes]:
+        """
+        Return {month: pdf_bytes} for every month of `year` that has transactions.
+
+        Cached months are read from disk; the others are rendered on the CPU pool.
+        """
+        months = [
+            row.month for row in db.query(Transaction.month).filter(
+                Transaction.month.like(f"{year}-%")
+            ).distinct().order_by(Transaction.month).all()
+        ]
+
+        reports: Dict[str, bytes] = {}
+        missing: List[Tuple[Path, MonthReportSnapshot]] = []
+        for month in months:
+            generation = get_data_generation(db, month)
+            path = self._path(month, current_user.username, generation)
+            cached = self._read(path)
+            if cached is not None:
+                self.stats["pdf_hits"] += 1
+                reports[month] = cached
+            else:
+                self.stats["pdf_misses"] += 1
+                missing.append((path, self.get_snapshot(db, month, current_user, generation)))
+
+        if missing:
+            kwargs_list = [snapshot.render_kwargs() for _, snapshot in missing]
+            if self.batch_workers > 1 and len(missing) > 1:
+                # Shared, already started pool: no process spawn per export
+                rendered = get_executors().map_cpu_blocking(render_snapshot, kwargs_list)
+            else:
+                rendered = [render_snapshot(kwargs) for kwargs in kwargs_list]
+
+            for (path, snapshot), pdf_bytes in zip(missing, rendered):
+                self._write(snapshot.month, snapshot.username, path, pdf_bytes)
+                reports[snapshot.month] = pdf_bytes
+
+        logger.info(f"Yearly PDF batch {year}: {len(reports)} months, {len(missing)} rendered")
+        return dict(sorted(reports.items()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "snapshots": len(self._snapshots), "cache_dir": str(self.cache_dir)}
+
+
+def build_reports_zip(reports: Dict[str, bytes]) -> bytes:
+    """Pack {month: pdf_bytes} into a zip archive"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for month, pdf_bytes in reports.items():
+            archive.writestr(f"budget_famille_{month}.pdf", pdf_bytes)
+    return buffer.getvalue()
+
+
+# Singleton instance
+_pdf_report_cache: Optional[PDFReportCache] = None
+
+
+def get_pdf_report_cache() -> PDFReportCache:
+    """Get or create the PDF report cache singleton"""
+    global _pdf_report_cache
+    if _pdf_report_cache is None:
+        _pdf_report_cache = PDFReportCache()
+    return _pdf_report_cache
@@ -5,11 +5,18 @@ Provides real-time query performance monitoring, slow query detection,
 and database optimization recommendations.
 """
 
+import hashlib
 import logging
+import os
+import random
+import re
 import time
 import threading
+import weakref
+from contextvars import ContextVar
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Callable, Any
+from functools import lru_cache
+from typing import Dict, List, Optional, Callable, Any, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict, deque
 import statistics
@@ -21,6 +28,59 @@ from sqlalchemy import event, text
 logger = logging.getLogger(__name__)
 
 
+# Sampled profiler configuration (safe to leave on in production)
+QUERY_PROFILER_ENABLED = os.getenv("QUERY_PROFILER_ENABLED", "true").lower() == "true"
+QUERY_PROFILER_SAMPLE_RATE = float(os.getenv("QUERY_PROFILER_SAMPLE_RATE", "0.1"))
+QUERY_PROFILER_FLUSH_SECONDS = float(os.getenv("QUERY_PROFILER_FLUSH_SECONDS", "5"))
+QUERY_PROFILER_BUFFER_SIZE = int(os.getenv("QUERY_PROFILER_BUFFER_SIZE", "10000"))
+QUERY_PROFILER_MAX_PATTERNS = int(os.getenv("QUERY_PROFILER_MAX_PATTERNS", "500"))
+QUERY_PROFILER_MAX_ROUTES = int(os.getenv("QUERY_PROFILER_MAX_ROUTES", "300"))
+QUERY_PROFILER_SLOW_SECONDS = float(os.getenv("QUERY_PROFILER_SLOW_SECONDS", "1.0"))
+# Per-request statement counting (X-DB-Queries / X-DB-Time headers, N+1 detection)
+QUERY_REQUEST_STATS_ENABLED = os.getenv("QUERY_REQUEST_STATS_ENABLED", "true").lower() == "true"
+# Same statement shape executed more than this many times in one request = N+1
+QUERY_N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "10"))
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_STRING_RE = re.compile(r"'[^']*'")
+_IN_LIST_RE = re.compile(r'in\s*\([^)]+\)')
+_TABLE_RES = [
+    re.compile(r'\bfrom\s+(\w+)'),
+    re.compile(r'\bjoin\s+(\w+)'),
+    re.compile(r'\bupdate\s+(\w+)'),
+    re.compile(r'\bdelete\s+from\s+(\w+)'),
+]
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(sql: str) -> str:
+    """
+    Normalize SQL to a pattern grouping similar queries (literals replaced).
+    Cached: SQLAlchemy emits the same statement strings over and over.
+    """
+    # Convert to lowercase and remove extra whitespace
+    normalized = _WHITESPACE_RE.sub(' ', sql.lower().strip())
+    # Replace literal values with placeholders
+    normalized = _NUMBER_RE.sub('?', normalized)
+    normalized = _STRING_RE.sub("'?'", normalized)
+    # IN clauses with multiple values
+    return _IN_LIST_RE.sub('in (?)', normalized)
+
+
+@lru_cache(maxsize=4096)
+def sql_pattern_hash(sql: str) -> str:
+    """Hash of the normalized pattern, used to group query statistics"""
+    return hashlib.md5(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+@lru_cache(maxsize=4096)
+def extract_table_names(sql: str) -> Tuple[str, ...]:
+    """Table names after FROM / JOIN / UPDATE / DELETE FROM"""
+    lowered = sql.lower()
+    return tuple(sorted({name for regex in _TABLE_RES for name in regex.findall(lowered)}))
+
+
 @dataclass
 class QueryMetric:
     """Single query execution metric"""
@@ -79,50 +139,15 @@ class QueryPerformanceMonitor:
     
     def _normalize_query(self, sql: str) -> str:
         """Normalize SQL query to create a pattern for grouping similar queries"""
-        import re
-        
-        # Convert to lowercase and remove extra whitespace
-        normalized = re.sub(r'\s+', ' ', sql.lower().strip())
-        
-        # Replace literal values with placeholders
-        # Numbers
-        normalized = re.sub(r'\b\d+\b', '?', normalized)
-        # String literals
-        normalized = re.sub(r"'[^']*'", "'?'", normalized)
-        # IN clauses with multiple values
-        normalized = re.sub(r'in\s*\([^)]+\)', 'in (?)', normalized)
-        
-        return normalized
+        return normalize_sql(sql)
     
     def _extract_table_names(self, sql: str) -> List[str]:
         """Extract table names from SQL query"""
-        import re
-        
-        # Simple regex to find table names after FROM and JOIN
-        tables = []
-        
-        # FROM clause
-        from_matches = re.findall(r'\bfrom\s+(\w+)', sql.lower())
-        tables.extend(from_matches)
-        
-        # JOIN clauses
-        join_matches = re.findall(r'\bjoin\s+(\w+)', sql.lower())
-        tables.extend(join_matches)
-        
-        # UPDATE and DELETE
-        update_matches = re.findall(r'\bupdate\s+(\w+)', sql.lower())
-        tables.extend(update_matches)
-        
-        delete_matches = re.findall(r'\bdelete\s+from\s+(\w+)', sql.lower())
-        tables.extend(delete_matches)
-        
-        return list(set(tables))  # Remove duplicates
+        return list(extract_table_names(sql))
     
     def _calculate_query_hash(self, sql: str) -> str:
         """Calculate hash for query pattern grouping"""
-        import hashlib
-        pattern = self._normalize_query(sql)
-        return hashlib.md5(pattern.encode()).hexdigest()[:12]
+        return sql_pattern_hash(sql)
     
     def record_query(self, sql: str, execution_time: float, parameters: Dict = None, result_count: int = None):
         """Record a query execution metric"""
@@ -177,14 +202,15 @@ class QueryPerformanceMonitor:
             if is_slow:
                 stats.slow_query_count += 1
             
-            # Calculate statistics
-            if stats.total_executions > 0:
-                stats.avg_time = stats.total_time / stats.total_executions
-                
-                if len(stats.recent_executions) > 1:
-                    recent_times = list(stats.recent_executions)
-                    stats.median_time = statistics.median(recent_times)
-                    stats.p95_time = statistics.quantiles(recent_times, n=20)[18]  # 95th percentile
+            stats.avg_time = stats.total_time / stats.total_executions
+    
+    @staticmethod
+    def _refresh_percentiles(stats: QueryStats):
+        """Median / p95 over the recent window, computed when read rather than per query"""
+        if len(stats.recent_executions) > 1:
+            recent_times = list(stats.recent_executions)
+            stats.median_time = statistics.median(recent_times)
+            stats.p95_time = statistics.quantiles(recent_times, n=20)[18]  # 95th percentile
     
     @contextmanager
     def monitor_query(self, sql: str, parameters: Dict = None):
@@ -259,7 +285,9 @@ class QueryPerformanceMonitor:
                 self.query_stats.values(),
                 key=lambda s: s.avg_time,
                 reverse=True
-            )
+            )[:limit]
+            for stats in sorted_stats:
+                self._refresh_percentiles(stats)
             
             return [{
                 'query_hash': stats.query_hash,
@@ -271,7 +299,7 @@ class QueryPerformanceMonitor:
                 'slow_query_count': stats.slow_query_count,
                 'slow_percentage': (stats.slow_query_count / stats.total_executions) * 100,
                 'last_seen': stats.last_seen.isoformat() if stats.last_seen else None,
-            } for stats in sorted_stats[:limit]]
+            } for stats in sorted_stats]
     
     def get_table_performance(self) -> Dict[str, Dict]:
         """Get performance statistics by table"""
@@ -439,4 +467,456 @@ def optimize_query_performance() -> Dict:
         'recommendations': query_monitor.get_optimization_recommendations(),
         'performance_summary': query_monitor.get_performance_summary(24),
         'slowest_queries': query_monitor.get_slowest_queries(10)
-    }
\ No newline at end of file
+    }
+
+# ======================================================================
+# SAMPLED QUERY PROFILER
+# ======================================================================
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear latency histogram (microsecond resolution).
+
+    Values below 32µs get one bucket each; above, every power of two is split
+    in 16 sub-buckets, so any percentile is within ~6% of the true value while
+    the memory stays a few dozen integers whatever the number of samples.
+    """
+
+    SUB_BUCKETS = 16
+    LINEAR_LIMIT = 2 * SUB_BUCKETS
+
+    __slots__ = ("counts", "count", "total_us", "min_us", "max_us")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    @classmethod
+    def bucket_index(cls, value_us: int) -> int:
+        if value_us < cls.LINEAR_LIMIT:
+            return value_us
+        shift = value_us.bit_length() - 5
+        return cls.LINEAR_LIMIT + (shift - 1) * cls.SUB_BUCKETS + (value_us >> shift) - cls.SUB_BUCKETS
+
+    @classmethod
+    def bucket_bounds(cls, index: int) -> Tuple[int, int]:
+        if index < cls.LINEAR_LIMIT:
+            return index, index
+        shift = (index - cls.LINEAR_LIMIT) // cls.SUB_BUCKETS + 1
+        mantissa = (index - cls.LINEAR_LIMIT) % cls.SUB_BUCKETS + cls.SUB_BUCKETS
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value_us: int, count: int = 1):
+        value_us = max(0, int(value_us))
+        index = self.bucket_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + count
+        if not self.count or value_us < self.min_us:
+            self.min_us = value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+        self.count += count
+        self.total_us += value_us * count
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        if other.count and (not self.count or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        self.max_us = max(self.max_us, other.max_us)
+        self.count += other.count
+        self.total_us += other.total_us
+
+    def percentile(self, q: float) -> float:
+        """Value (µs) at quantile q in [0, 100]"""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(round(q / 100 * self.count)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                low, high = self.bucket_bounds(index)
+                # Bucket midpoint, clamped to the observed range
+                return float(min(max((low + high) / 2, self.min_us), self.max_us))
+        return float(self.max_us)
+
+    def summary(self, sample_rate: float = 1.0) -> Dict[str, Any]:
+        return {
+            'samples': self.count,
+            'estimated_executions': int(round(self.count / sample_rate)) if sample_rate else self.count,
+            'mean_ms': round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50) / 1000, 3),
+            'p95_ms': round(self.percentile(95) / 1000, 3),
+            'p99_ms': round(self.percentile(99) / 1000, 3),
+            'max_ms': round(self.max_us / 1000, 3),
+            'sampled_total_ms': round(self.total_us / 1000, 3),
+        }
+
+
+class RequestProfile:
+    """
+    Per-request profiling context, published through `current_request_profile`.
+
+    Set by QueryProfilerMiddleware with the ASGI scope; the route label
+    (``GET /transactions/{id}``) is resolved lazily, once routing has stored
+    the endpoint in the scope. Background jobs can use a fixed label.
+
+    Every statement of the request is counted by shape (statement text: bound
+    parameters are not part of it), which is what N+1 detection relies on.
+    """
+
+    __slots__ = ("scope", "_label", "query_count", "query_time_us", "statements")
+
+    def __init__(self, scope: Optional[dict] = None, label: Optional[str] = None):
+        self.scope = scope
+        self._label = label
+        self.query_count = 0
+        self.query_time_us = 0
+        self.statements: Dict[str, int] = {}
+
+    def add_query(self, statement: str, duration_us: int):
+        self.query_count += 1
+        self.query_time_us += duration_us
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated_statements(self, threshold: int = QUERY_N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Statement shapes executed more than `threshold` times (N+1 suspects)"""
+        repeated: Dict[str, int] = {}
+        for statement, count in self.statements.items():
+            # Inlined literals would defeat grouping by text: group by pattern
+            pattern = normalize_sql(statement)
+            repeated[pattern] = repeated.get(pattern, 0) + count
+        return sorted(
+            ((pattern, count) for pattern, count in repeated.items() if count > threshold),
+            key=lambda item: item[1], reverse=True
+        )
+
+    @property
+    def label(self) -> str:
+        if self._label is None:
+            scope = self.scope or {}
+            endpoint = scope.get("endpoint")
+            if endpoint is None:
+                # Not routed yet (middleware, dependencies of a 404...)
+                return f"{scope.get('method', '')} <unmatched>".strip()
+            self._label = f"{scope.get('method', '')} {_route_path(scope.get('router'), endpoint)}".strip()
+        return self._label
+
+
+# Current request (contextvars follow the request into threadpool endpoints)
+current_request_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_request_profile", default=None)
+
+_route_paths: Dict[Any, str] = {}
+
+
+def _route_path(router, endpoint) -> str:
+    """Path template of the route serving `endpoint` (cached per endpoint)"""
+    path = _route_paths.get(endpoint)
+    if path is None:
+        path = getattr(endpoint, "__name__", "<endpoint>")
+        for route in getattr(router, "routes", ()):
+            if getattr(route, "endpoint", None) is endpoint:
+                path = route.path
+                break
+        if len(_route_paths) < 4096:
+            _route_paths[endpoint] = path
+    return path
+
+
+@contextmanager
+def profile_route(label: str):
+    """Attribute queries issued in this block to `label` (background jobs, scripts)"""
+    token = current_request_profile.set(RequestProfile(label=label))
+    try:
+        yield
+    finally:
+        current_request_profile.reset(token)
+
+
+class _PatternStats:
+    __slots__ = ("sql_pattern", "tables", "histogram", "routes", "slow_count")
+
+    def __init__(self, sql_pattern: str, tables: Tuple[str, ...]):
+        self.sql_pattern = sql_pattern
+        self.tables = tables
+        self.histogram = LatencyHistogram()
+        self.routes: Dict[str, int] = {}
+        self.slow_count = 0
+
+
+class _RouteStats:
+    __slots__ = ("histogram", "queries")
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.queries: Dict[str, int] = {}
+
+
+class SampledQueryProfiler:
+    """
+    Low-overhead query profiler.
+
+    - Sampling: only `sample_rate` of the statements are timed; the others
+      cost one random() call.
+    - Writers never take a lock: each thread appends (route, sql, µs) to its
+      own bounded deque; the samples are aggregated periodically (background
+      flusher) or when a snapshot is read.
+    - Aggregation keeps an HDR-style histogram per normalized query and per
+      route, with bounded cardinality (overflow goes to "<other>").
+    - Only normalized SQL is reported, never parameters.
+    """
+
+    OTHER = "<other>"
+
+    def __init__(
+        self,
+        sample_rate: float = QUERY_PROFILER_SAMPLE_RATE,
+        enabled: bool = QUERY_PROFILER_ENABLED,
+        buffer_size: int = QUERY_PROFILER_BUFFER_SIZE,
+        max_patterns: int = QUERY_PROFILER_MAX_PATTERNS,
+        max_routes: int = QUERY_PROFILER_MAX_ROUTES,
+        slow_query_threshold: float = QUERY_PROFILER_SLOW_SECONDS
+    ):
+        self.enabled = enabled
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.buffer_size = buffer_size
+        self.max_patterns = max_patterns
+        self.max_routes = max_routes
+        self.slow_threshold_us = int(slow_query_threshold * 1e6)
+
+        self._local = threading.local()
+        self._buffers: List[Tuple[Any, deque]] = []
+        self._registry_lock = threading.Lock()
+        self._aggregate_lock = threading.Lock()
+        self._patterns: Dict[str, _PatternStats] = {}
+        self._routes: Dict[str, _RouteStats] = {}
+        self._started_at = datetime.now()
+        self._flusher: Optional[threading.Thread] = None
+        self._instrumented: "weakref.WeakSet" = weakref.WeakSet()
+        self._n_plus_one: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.flushes = 0
+
+    # -- hot path -------------------------------------------------------
+
+    def should_sample(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def _buffer(self) -> deque:
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            # Bounded: if the flusher falls behind the oldest samples are dropped
+            buffer = deque(maxlen=self.buffer_size)
+            self._local.buffer = buffer
+            with self._registry_lock:
+                self._buffers.append((weakref.ref(threading.current_thread()), buffer))
+        return buffer
+
+    def record(self, sql: str, duration_us: int, route: Optional[str] = None):
+        """Record one sampled statement (lock-free: thread-local deque append)"""
+        if route is None:
+            profile = current_request_profile.get()
+            route = profile.label if profile is not None else "<background>"
+        self._buffer().append((route, sql, duration_us))
+        if duration_us > self.slow_threshold_us:
+            logger.warning(f"Slow query detected ({duration_us / 1e6:.3f}s) on {route}: {sql[:100]}...")
+
+    # -- aggregation ----------------------------------------------------
+
+    def flush(self) -> int:
+        """Drain every thread buffer into the aggregated histograms"""
+        with self._registry_lock:
+            buffers = list(self._buffers)
+        drained = 0
+        with self._aggregate_lock:
+            for thread_ref, buffer in buffers:
+                while True:
+                    try:
+                        route, sql, duration_us = buffer.popleft()
+                    except IndexError:
+                        break
+                    self._aggregate(route, sql, duration_us)
+                    drained += 1
+            self.flushes += 1
+        # Forget buffers of finished threads once drained
+        with self._registry_lock:
+            self._buffers = [
+                (ref, buffer) for ref, buffer in self._buffers
+                if buffer or (ref() is not None and ref().is_alive())
+            ]
+        return drained
+
+    def _aggregate(self, route: str, sql: str, duration_us: int):
+        query_hash = sql_pattern_hash(sql)
+        pattern = self._patterns.get(query_hash)
+        if pattern is None:
+            if len(self._patterns) >= self.max_patterns - 1:  # keep one slot for <other>
+                query_hash = self.OTHER
+                pattern = self._patterns.get(query_hash)
+            if pattern is None:
+                sql_pattern = self.OTHER if query_hash == self.OTHER else normalize_sql(sql)[:500]
+                pattern = self._patterns[query_hash] = _PatternStats(sql_pattern, extract_table_names(sql))
+
+        route_stats = self._routes.get(route)
+        if route_stats is None:
+            if len(self._routes) >= self.max_routes - 1:
+                route = self.OTHER
+                route_stats = self._routes.get(route)
+            if route_stats is None:
+                route_stats = self._routes[route] = _RouteStats()
+
+        pattern.histogram.record(duration_us)
+        pattern.routes[route] = pattern.routes.get(route, 0) + 1
+        if duration_us > self.slow_threshold_us:
+            pattern.slow_count += 1
+        route_stats.histogram.record(duration_us)
+        route_stats.queries[query_hash] = route_stats.queries.get(query_hash, 0) + 1
+
+    def record_request(self, profile: RequestProfile, threshold: int = QUERY_N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Flag N+1 patterns of a finished request (logged and kept for /debug/perf)"""
+        suspects = profile.repeated_statements(threshold)
+        if not suspects:
+            return suspects
+        route = profile.label
+        with self._aggregate_lock:
+            for pattern, count in suspects:
+                key = (route, pattern)
+                entry = self._n_plus_one.get(key)
+                if entry is None:
+                    if len(self._n_plus_one) >= self.max_patterns:
+                        continue
+                    entry = self._n_plus_one[key] = {
+                        'route': route, 'sql_pattern': pattern[:500], 'requests': 0, 'max_repeats': 0
+                    }
+                entry['requests'] += 1
+                entry['max_repeats'] = max(entry['max_repeats'], count)
+                entry['last_seen'] = datetime.now().isoformat()
+        logger.warning(
+            f"N+1 query pattern on {route}: "
+            + "; ".join(f"{count}x {pattern[:80]}" for pattern, count in suspects[:3])
+        )
+        return suspects
+
+    def start_flusher(self, interval: float = QUERY_PROFILER_FLUSH_SECONDS):
+        """Aggregate buffered samples every `interval` seconds in a daemon thread"""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Query profiler flush failed: {e}")
+
+        self._flusher = threading.Thread(target=run, name="query-profiler-flush", daemon=True)
+        self._flusher.start()
+
+    # -- reporting ------------------------------------------------------
+
+    def snapshot(self, limit: int = 20) -> Dict[str, Any]:
+        self.flush()
+        rate = self.sample_rate or 1.0
+        with self._aggregate_lock:
+            patterns = sorted(self._patterns.items(), key=lambda item: item[1].histogram.total_us, reverse=True)
+            routes = sorted(self._routes.items(), key=lambda item: item[1].histogram.total_us, reverse=True)
+            queries = [{
+                'query_hash': query_hash,
+                'sql_pattern': stats.sql_pattern,
+                'tables': list(stats.tables),
+                **stats.histogram.summary(rate),
+                'slow_samples': stats.slow_count,
+                'top_routes': sorted(stats.routes.items(), key=lambda item: item[1], reverse=True)[:5],
+            } for query_hash, stats in patterns[:limit]]
+            by_route = [{
+                'route': route,
+                **stats.histogram.summary(rate),
+                'top_queries': sorted(stats.queries.items(), key=lambda item: item[1], reverse=True)[:5],
+            } for route, stats in routes[:limit]]
+            return {
+                'enabled': self.enabled,
+                'sample_rate': self.sample_rate,
+                'started_at': self._started_at.isoformat(),
+                'samples': sum(stats.histogram.count for stats in self._patterns.values()),
+                'tracked_patterns': len(self._patterns),
+                'tracked_routes': len(self._routes),
+                'flushes': self.flushes,
+                'queries': queries,
+                'routes': by_route,
+                'n_plus_one': sorted(
+                    self._n_plus_one.values(), key=lambda entry: entry['max_repeats'], reverse=True
+                )[:limit],
+            }
+
+    def reset(self):
+        self.flush()
+        with self._aggregate_lock:
+            self._patterns.clear()
+            self._routes.clear()
+            self._n_plus_one.clear()
+            self._started_at = datetime.now()
+
+    # -- SQLAlchemy wiring ----------------------------------------------
+
+    def instrument(self, engine: Engine, count_requests: bool = QUERY_REQUEST_STATS_ENABLED):
+        """
+        Attach the listeners to an engine (idempotent). Statements issued
+        within a request are all timed and counted; the others only when
+        sampled.
+        """
+        if engine in self._instrumented:
+            return
+        self._instrumented.add(engine)
+        should_sample = self.should_sample
+        perf_counter = time.perf_counter
+        get_profile = current_request_profile.get
+        start_attr = f"_profiler_start_{id(self)}"
+        sampled_attr = f"_profiler_sampled_{id(self)}"
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _profiler_before(conn, cursor, statement, parameters, context, executemany):
+            if context is None:
+                return
+            sampled = should_sample()
+            if sampled or (count_requests and get_profile() is not None):
+                setattr(context, start_attr, perf_counter())
+                setattr(context, sampled_attr, sampled)
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _profiler_after(conn, cursor, statement, parameters, context, executemany):
+            started = getattr(context, start_attr, None)
+            if started is None:
+                return
+            duration_us = int((perf_counter() - started) * 1e6)
+            profile = get_profile()
+            if count_requests and profile is not None:
+                profile.add_query(statement, duration_us)
+            if getattr(context, sampled_attr):
+                self.record(statement, duration_us)
+
+        logger.info(f"Sampled query profiler enabled on {engine.url} (rate={self.sample_rate})")
+
+
+_query_profiler: Optional[SampledQueryProfiler] = None
+
+
+def get_query_profiler() -> SampledQueryProfiler:
+    """Get the process-wide sampled query profiler"""
+    global _query_profiler
+    if _query_profiler is None:
+        _query_profiler = SampledQueryProfiler()
+    return _query_profiler
+
+
+def install_query_profiler(*engines: Engine) -> SampledQueryProfiler:
+    """Instrument the given engines and start the periodic aggregation"""
+    profiler = get_query_profiler()
+    if profiler.enabled or QUERY_REQUEST_STATS_ENABLED:
+        for engine in engines:
+            profiler.instrument(engine)
+    if profiler.enabled:
+        profiler.start_flusher()
+    return profiler
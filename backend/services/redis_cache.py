@@ -172,9 +172,11 @@ class RedisCacheService:
                 self._is_connected = False
                 raise
     
-    def _make_key(self, *parts: str) -> str:
-        """Create a properly prefixed cache key"""
+    def make_key(self, *parts: str) -> str:
+        """Create a properly prefixed cache key (the Redis key behind get/set)"""
         return settings.redis.key_prefix + ":".join(str(part) for part in parts)
+
+    _make_key = make_key
     
     def _serialize_value(self, value: Any) -> str:
         """Serialize value for Redis storage"""
@@ -249,6 +251,18 @@ class RedisCacheService:
             self._stats["last_error"] = str(e)
             return False
     
+    def incr(self, key: str, amount: int = 1) -> Optional[int]:
+        """Atomically increment a counter, None when Redis is unreachable (synchronous)"""
+        try:
+            client = self.get_sync_client()
+            return int(client.incr(self.make_key(key), amount))
+
+        except Exception as e:
+            logger.error(f"Redis INCR error for key '{key}': {e}")
+            self._stats["errors"] += 1
+            self._stats["last_error"] = str(e)
+            return None
+
     def delete_pattern(self, pattern: str) -> int:
         """Delete all keys matching pattern (synchronous)"""
         try:
@@ -493,9 +507,11 @@ class InMemoryCacheService:
             return False
         return dt.datetime.now().timestamp() > entry['expires_at']
     
-    def _make_key(self, *parts: str) -> str:
+    def make_key(self, *parts: str) -> str:
         """Create a cache key"""
         return ":".join(str(part) for part in parts)
+
+    _make_key = make_key
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get value from in-memory cache"""
@@ -538,6 +554,14 @@ class InMemoryCacheService:
             return True
         return False
     
+    def incr(self, key: str, amount: int = 1) -> Optional[int]:
+        """Increment a counter"""
+        cache_key = self.make_key(key)
+        entry = self._cache.get(cache_key)
+        value = int(entry['value']) if entry and not self._is_expired(entry) else 0
+        self._cache[cache_key] = {'value': value + amount}
+        return value + amount
+
     def delete_pattern(self, pattern: str) -> int:
         """Delete keys matching pattern"""
         cache_pattern = self._make_key(pattern)
@@ -0,0 +1,340 @@
+"""
+Research executor for bulk web research
+
+Sits in front of WebResearchService and makes bulk enrichment cheap:
+- merchant-level dedupe: labels are grouped by normalized merchant name and
+  concurrent requests for the same merchant share one in-flight lookup
+  (200 "CARREFOUR" rows cost a single search)
+- bounded concurrency (semaphore) on top of the token bucket that paces
+  outbound requests (see web_research_service.TokenBucket)
+- in-process result cache, with a shorter TTL for negative results
+  (merchants the web knows nothing about are not searched again and again)
+- write-through to the ResearchCache table, shared by every worker; its
+  reads and writes run in the DB executor, and the usage counters of rows
+  served from it are buffered (HitCounterBuffer) instead of committed on
+  every lookup
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from models.database import ResearchCache, SessionLocal
+from services.ai_cache import HitCounterBuffer
+from services.cache_usage import record_cache_lookup
+from services.executors import run_db
+from services.web_research_service import MerchantInfo, WebResearchService
+
+logger = logging.getLogger(__name__)
+
+RESEARCH_MAX_CONCURRENCY = int(os.getenv("RESEARCH_MAX_CONCURRENCY", "4"))
+RESEARCH_CACHE_SIZE = int(os.getenv("RESEARCH_CACHE_SIZE", "5000"))
+RESEARCH_CACHE_TTL_SECONDS = int(os.getenv("RESEARCH_CACHE_TTL_SECONDS", "3600"))
+RESEARCH_NEGATIVE_TTL_SECONDS = int(os.getenv("RESEARCH_NEGATIVE_TTL_SECONDS", "21600"))
+# Age after which a ResearchCache row is researched again
+RESEARCH_DB_TTL_DAYS = int(os.getenv("RESEARCH_DB_TTL_DAYS", "30"))
+# ResearchCache usage_count/last_used are written back every N seconds
+RESEARCH_USAGE_FLUSH_SECONDS = float(os.getenv("RESEARCH_USAGE_FLUSH_SECONDS", "30"))
+
+NEGATIVE_METHOD = "negative"
+
+
+def is_negative_result(info: MerchantInfo) -> bool:
+    """Research that identified nothing (no business type)"""
+    return not info.business_type
+
+
+def _info_from_json(payload: str) -> Optional[MerchantInfo]:
+    try:
+        return MerchantInfo(**json.loads(payload))
+    except (TypeError, ValueError):
+        return None
+
+
+class _LoopState:
+    """asyncio primitives are bound to one event loop"""
+
+    def __init__(self, max_concurrency: int):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.inflight: Dict[str, asyncio.Future] = {}
+
+
+class ResearchExecutor:
+    """Deduped, bounded and cached merchant research shared by the process"""
+
+    def __init__(
+        self,
+        max_concurrency: int = RESEARCH_MAX_CONCURRENCY,
+        cache_size: int = RESEARCH_CACHE_SIZE,
+        cache_ttl_seconds: int = RESEARCH_CACHE_TTL_SECONDS,
+        negative_ttl_seconds: int = RESEARCH_NEGATIVE_TTL_SECONDS,
+        db_ttl_days: int = RESEARCH_DB_TTL_DAYS,
+        session_factory: Optional[Callable] = SessionLocal,
+        service_factory: Callable[[], WebResearchService] = WebResearchService,
+        usage_flush_interval: float = RESEARCH_USAGE_FLUSH_SECONDS
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache_size = max(1, cache_size)
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.db_ttl_days = db_ttl_days
+        self.session_factory = session_factory
+        self.service_factory = service_factory
+        self.usage = HitCounterBuffer(
+            session_factory=session_factory, flush_interval=usage_flush_interval, model=ResearchCache,
+            key_column="search_term", count_column="usage_count", time_column="last_used",
+            clock=datetime.now, name="research-usage"
+        ) if session_factory is not None else None
+        self._normalizer = WebResearchService()
+        self._results: "OrderedDict[str, Tuple[float, MerchantInfo]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self.stats = {
+            "requested": 0, "deduped": 0, "coalesced": 0, "memory_hits": 0, "negative_hits": 0,
+            "db_hits": 0, "researched": 0, "negative_results": 0, "errors": 0, "db_writes": 0
+        }
+
+    def normalize(self, merchant_name: str) -> str:
+        return self._normalizer.normalize_merchant_name(merchant_name)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def research(
+        self,
+        merchant_name: str,
+        amount: Optional[float] = None,
+        city: Optional[str] = None,
+        force_refresh: bool = False
+    ) -> MerchantInfo:
+        """Research one merchant (memory cache → ResearchCache → web)"""
+        results = await self.research_many([merchant_name], amount=amount, city=city, force_refresh=force_refresh)
+        return results[merchant_name]
+
+    async def research_many(
+        self,
+        merchant_names: Iterable[str],
+        amount: Optional[float] = None,
+        city: Optional[str] = None,
+        force_refresh: bool = False
+    ) -> Dict[str, MerchantInfo]:
+        """
+        Research a batch of merchant names.
+
+        Names are deduped by normalized form, so each distinct merchant is
+        looked up at most once. Returns {merchant_name: MerchantInfo}; names
+        sharing a normalized form share the same MerchantInfo.
+        """
+        names = list(merchant_names)
+        groups: Dict[str, List[str]] = {}
+        for name in names:
+            groups.setdefault(self.normalize(name), []).append(name)
+        self.stats["requested"] += len(names)
+        self.stats["deduped"] += len(names) - len(groups)
+
+        found: Dict[str, MerchantInfo] = {}
+        for key, group in groups.items():
+            if not key:
+                found[key] = MerchantInfo(merchant_name=group[0], normalized_name="")
+            elif not force_refresh:
+                info = self._cached(key)
+                if info is not None:
+                    found[key] = info
+
+        missing = [key for key in groups if key not in found]
+        if missing and not force_refresh:
+            for key, info in (await run_db(self._load_from_db, missing)).items():
+                found[key] = info
+                self._remember(key, info)
+            missing = [key for key in missing if key not in found]
+
+        if missing:
+            researched = await asyncio.gather(
+                *(self._research_one(key, groups[key][0], amount, city, force_refresh) for key in missing),
+                return_exceptions=True
+            )
+            for key, result in zip(missing, researched):
+                if isinstance(result, BaseException):
+                    logger.error(f"Research failed for '{key}': {result}")
+                    self.stats["errors"] += 1
+                    found[key] = MerchantInfo(merchant_name=groups[key][0], normalized_name=key)
+                else:
+                    found[key] = result
+
+        return {name: found[key] for key, group in groups.items() for name in group}
+
+    def invalidate(self, merchant_name: Optional[str] = None) -> None:
+        """Forget cached research (one merchant or everything)"""
+        with self._lock:
+            if merchant_name is None:
+                self._results.clear()
+            else:
+                self._results.pop(self.normalize(merchant_name), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "cached_merchants": len(self._results),
+            "max_concurrency": self.max_concurrency,
+            "cache_ttl_seconds": self.cache_ttl_seconds,
+            "negative_ttl_seconds": self.negative_ttl_seconds,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _loop_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = _LoopState(self.max_concurrency)
+        return state
+
+    async def _research_one(self, key: str, merchant_name: str, amount, city,
+                            force_refresh: bool = False) -> MerchantInfo:
+        state = self._loop_state()
+        pending = state.inflight.get(key)
+        # Or already researched by a concurrent request while this one was reading ResearchCache
+        done = None if pending is not None or force_refresh else self._cached(key, record=False)
+        if pending is not None or done is not None:
+            self.stats["coalesced"] += 1
+            record_cache_lookup(hits=1)
+            return done if done is not None else await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        state.inflight[key] = future
+        try:
+            async with state.semaphore:
+                async with self.service_factory() as service:
+                    info = await service.research_merchant(merchant_name, amount, city)
+            self.stats["researched"] += 1
+            record_cache_lookup(misses=1)
+            if is_negative_result(info):
+                self.stats["negative_results"] += 1
+            self._remember(key, info)
+            await run_db(self._store_in_db, key, info)
+            future.set_result(info)
+            return info
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: no "never retrieved" warning without waiters
+            raise
+        finally:
+            state.inflight.pop(key, None)
+
+    def _cached(self, key: str, record: bool = True) -> Optional[MerchantInfo]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return None
+            expires_at, info = entry
+            if expires_at <= now:
+                del self._results[key]
+                return None
+            self._results.move_to_end(key)
+        if record:
+            self.stats["negative_hits" if is_negative_result(info) else "memory_hits"] += 1
+            record_cache_lookup(hits=1)
+        return info
+
+    def _remember(self, key: str, info: MerchantInfo) -> None:
+        ttl = self.negative_ttl_seconds if is_negative_result(info) else self.cache_ttl_seconds
+        with self._lock:
+            self._results[key] = (time.monotonic() + ttl, info)
+            self._results.move_to_end(key)
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
+    def _load_from_db(self, keys: List[str]) -> Dict[str, MerchantInfo]:
+        """One query for the whole batch; fresh rows only (read only: usage is buffered)"""
+        if self.session_factory is None:
+            return {}
+        found = {}
+        now = datetime.now()
+        db = self.session_factory()
+        try:
+            rows = db.query(ResearchCache).filter(
+                ResearchCache.search_term.in_(keys),
+                ResearchCache.is_valid == True,
+                ResearchCache.needs_refresh == False
+            ).all()
+            for row in rows:
+                if row.research_method == NEGATIVE_METHOD:
+                    max_age = timedelta(seconds=self.negative_ttl_seconds)
+                else:
+                    max_age = timedelta(days=self.db_ttl_days)
+                if row.created_at is None or now - row.created_at > max_age:
+                    continue
+                info = _info_from_json(row.research_results)
+                if info is None:
+                    continue
+                self.usage.record(row.search_term)
+                found[row.search_term] = info
+            self.stats["db_hits"] += len(found)
+            record_cache_lookup(hits=len(found))
+        except Exception as e:
+            logger.warning(f"ResearchCache read failed: {e}")
+        finally:
+            db.close()
+        return found
+
+    def _store_in_db(self, key: str, info: MerchantInfo) -> None:
+        """Write-through: upsert the ResearchCache row of a fresh lookup"""
+        if self.session_factory is None:
+            return
+        negative = is_negative_result(info)
+        db = self.session_factory()
+        try:
+            row = db.get(ResearchCache, key) or ResearchCache(search_term=key, usage_count=0)
+            row.research_results = json.dumps(asdict(info), ensure_ascii=False)
+            row.confidence_score = info.confidence_score
+            row.result_quality = 0.0 if negative else info.confidence_score
+            row.sources_count = len(info.data_sources)
+            row.research_method = NEGATIVE_METHOD if negative else "web_search"
+            row.search_duration_ms = info.research_duration_ms
+            row.created_at = datetime.now()
+            row.last_used = row.created_at
+            row.usage_count = (row.usage_count or 0) + 1
+            row.data_freshness = 1.0
+            row.is_valid = True
+            row.needs_refresh = False
+            db.add(row)
+            db.commit()
+            self.stats["db_writes"] += 1
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"ResearchCache write failed for '{key}': {e}")
+        finally:
+            db.close()
+
+
+_research_executor: Optional[ResearchExecutor] = None
+
+
+def get_research_executor() -> ResearchExecutor:
+    """Get the process-wide research executor"""
+    global _research_executor
+    if _research_executor is None:
+        _research_executor = ResearchExecutor()
+    return _research_executor
+
+
+def flush_research_usage() -> int:
+    """Write pending ResearchCache usage counters now (shutdown, tests)"""
+    if _research_executor is None or _research_executor.usage is None:
+        return 0
+    return _research_executor.usage.flush()
@@ -0,0 +1,178 @@
+"""
+Per-(month, tag) expense aggregate for Budget Famille
+Shared by the variance analysis (routers/analytics.py) and the budget
+suggestions (routers/budgets.py)
+
+- A month's expenses (amount < 0, not excluded) are split on their CSV tags in
+  SQL (recursive CTE) and summed per tag; untagged rows count under their
+  category, or 'non-categorise'
+- Results are stored in month_tag_spending and recomputed for a month only
+  when its data generation moved (services/data_generation.py), so readers
+  get at most one row per (month, tag) instead of the month's transactions
+- Tags are lower-cased in Python after the GROUP BY: SQLite lower() only folds
+  ASCII, and tags carry accents
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+from models.database import MonthTagSpending, MonthTagSpendingRefresh
+from services.data_generation import get_month_generations
+
+logger = logging.getLogger(__name__)
+
+UNCATEGORIZED_TAG = "non-categorise"
+
+# Python str.strip() equivalent for tag tokens (space, tab, CR, LF)
+_WHITESPACE = "' ' || char(9) || char(10) || char(13)"
+
+# One row per (transaction, tag) for the expenses of :months
+_EXPENSE_TAGS_CTE = f"""
+WITH RECURSIVE expenses AS (
+    SELECT id, month, ABS(amount) AS amount, COALESCE(tags, '') AS tags, category,
+           trim(replace(COALESCE(tags, ''), ',', ''), {_WHITESPACE}) <> '' AS has_tags
+    FROM transactions
+    WHERE month IN :months AND amount < 0 AND exclude = 0
+),
+split(id, month, amount, tag, rest) AS (
+    SELECT id, month, amount, NULL, tags || ',' FROM expenses WHERE has_tags
+    UNION ALL
+    SELECT id, month, amount,
+           trim(substr(rest, 1, instr(rest, ',') - 1), {_WHITESPACE}),
+           substr(rest, instr(rest, ',') + 1)
+    FROM split WHERE rest <> ''
+),
+expense_tags AS (
+    SELECT id, month, amount, tag FROM split WHERE tag IS NOT NULL AND tag <> ''
+    UNION ALL
+    SELECT id, month, amount, COALESCE(NULLIF(category, ''), '{UNCATEGORIZED_TAG}')
+    FROM expenses WHERE NOT has_tags
+)
+"""
+
+_AGGREGATE_SQL = text(_EXPENSE_TAGS_CTE + """
+SELECT month, tag, SUM(amount) AS total, COUNT(*) AS transaction_count
+FROM expense_tags
+GROUP BY month, tag
+""").bindparams(bindparam("months", expanding=True))
+
+_TOP_TRANSACTIONS_SQL = text(_EXPENSE_TAGS_CTE + """
+SELECT ranked.tag, t.id, t.label, ranked.amount, t.date_op
+FROM (
+    SELECT id, tag, amount,
+           ROW_NUMBER() OVER (PARTITION BY tag ORDER BY amount DESC, id) AS position
+    FROM expense_tags
+) AS ranked
+JOIN transactions t ON t.id = ranked.id
+WHERE ranked.position <= :limit
+ORDER BY ranked.amount DESC, t.id
+""").bindparams(bindparam("months", expanding=True))
+
+MonthTagTotals = Dict[str, Dict[str, Tuple[float, int]]]  # {month: {tag: (total, transaction_count)}}
+
+
+def previous_month(month: str) -> str:
+    return (datetime.strptime(month, "%Y-%m") - relativedelta(months=1)).strftime("%Y-%m")
+
+
+def month_range(start_month: str, end_month: str) -> List[str]:
+    """Months from start_month to end_month inclusive (YYYY-MM)"""
+    months = []
+    current = datetime.strptime(start_month, "%Y-%m")
+    end = datetime.strptime(end_month, "%Y-%m")
+    while current <= end:
+        months.append(current.strftime("%Y-%m"))
+        current += relativedelta(months=1)
+    return months
+
+
+def compute_month_tag_spending(db: Session, months: Iterable[str]) -> MonthTagTotals:
+    """Aggregate the months straight from transactions (no stored rows involved)"""
+    months = list(months)
+    totals: MonthTagTotals = {month: {} for month in months}
+    if not months:
+        return totals
+    for row in db.execute(_AGGREGATE_SQL, {"months": months}):
+        tag = row.tag.lower()
+        total, count = totals[row.month].get(tag, (0.0, 0))
+        totals[row.month][tag] = (total + row.total, count + row.transaction_count)
+    return totals
+
+
+def _store(db: Session, computed: MonthTagTotals, generations: Dict[str, int]) -> None:
+    months = list(computed)
+    db.query(MonthTagSpending).filter(MonthTagSpending.month.in_(months)).delete(synchronize_session=False)
+    db.query(MonthTagSpendingRefresh).filter(MonthTagSpendingRefresh.month.in_(months)).delete(synchronize_session=False)
+    db.bulk_insert_mappings(MonthTagSpending, [
+        {"month": month, "tag": tag, "total": total, "transaction_count": count}
+        for month, tags in computed.items()
+        for tag, (total, count) in tags.items()
+    ])
+    db.bulk_insert_mappings(MonthTagSpendingRefresh, [
+        {"month": month, "generation": generations[month]} for month in months
+    ])
+    db.commit()
+
+
+def get_month_tag_spending(db: Session, months: Iterable[str]) -> MonthTagTotals:
+    """
+    Return {month: {tag: (total, transaction_count)}} for the given months.
+
+    Stored rows are used for months whose generation is unchanged since their
+    last refresh; stale months are recomputed in SQL and stored again.
+    """
+    months = list(dict.fromkeys(months))
+    if not months:
+        return {}
+
+    generations = get_month_generations(db, months)
+    refreshed = dict(
+        db.query(MonthTagSpendingRefresh.month, MonthTagSpendingRefresh.generation)
+        .filter(MonthTagSpendingRefresh.month.in_(months)).all()
+    )
+    fresh = [month for month in months if refreshed.get(month) == generations[month]]
+    stale = [month for month in months if refreshed.get(month) != generations[month]]
+
+    totals: MonthTagTotals = {month: {} for month in fresh}
+    if fresh:
+        rows = db.query(
+            MonthTagSpending.month, MonthTagSpending.tag,
+            MonthTagSpending.total, MonthTagSpending.transaction_count
+        ).filter(MonthTagSpending.month.in_(fresh)).all()
+        for row in rows:
+            totals[row.month][row.tag] = (row.total, row.transaction_count)
+
+    if stale:
+        computed = compute_month_tag_spending(db, stale)
+        try:
+            _store(db, computed, generations)
+        except (OperationalError, IntegrityError) as e:
+            # Concurrent refresh / locked database: serve the computed figures, retry next time
+            db.rollback()
+            logger.warning(f"⚠️ month_tag_spending non persiste pour {stale}: {e}")
+        totals.update(computed)
+
+    return {month: totals[month] for month in months}
+
+
+def get_top_transactions_by_tag(db: Session, month: str, limit: int = 3) -> Dict[str, List[dict]]:
+    """Largest `limit` expenses of the month per tag ({tag: [{id, label, amount, date}]})"""
+    by_tag: Dict[str, List[dict]] = defaultdict(list)
+    for row in db.execute(_TOP_TRANSACTIONS_SQL, {"months": [month], "limit": limit}):
+        # Rows arrive by decreasing amount: case variants of a tag merge in order
+        entries = by_tag[row.tag.lower()]
+        if len(entries) < limit:
+            entries.append({
+                "id": row.id,
+                "label": row.label,
+                "amount": row.amount,
+                "date": str(row.date_op) if row.date_op else None
+            })
+    return dict(by_tag)
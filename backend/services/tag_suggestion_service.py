@@ -24,6 +24,7 @@ from sqlalchemy.orm import Session
 
 # Import web research service
 from services.web_research_service import WebResearchService, get_merchant_from_transaction_label
+from services.research_executor import get_research_executor
 
 logger = logging.getLogger(__name__)
 
@@ -212,59 +213,55 @@ class TagSuggestionService:
             )
         
         try:
-            # Perform web research
-            async with WebResearchService() as research_service:
-                merchant_info = await research_service.research_merchant(
-                    merchant_name=merchant_name,
-                    amount=amount
-                )
-                
-                if merchant_info.business_type and merchant_info.confidence_score > 0.3:
-                    # Map business type to tag
-                    category_mapping = self.category_tag_mapping.get(merchant_info.business_type)
-                    
-                    if category_mapping:
-                        # Combine web research confidence with our mapping confidence
-                        combined_confidence = min(
-                            merchant_info.confidence_score + 0.2,  # Bonus for web research
-                            category_mapping['confidence'] * 1.1,
-                            0.95
-                        )
-                        
-                        return TagSuggestionResult(
-                            suggested_tag=category_mapping['tag'],
-                            confidence=combined_confidence,
-                            explanation=f"Recherche web: {merchant_name} identifié comme {merchant_info.business_type} → {category_mapping['tag']}",
-                            category=merchant_info.business_type,
-                            alternative_tags=category_mapping['alternatives'],
-                            research_source="web_research",
-                            web_research_used=True,
-                            merchant_info={
-                                'business_type': merchant_info.business_type,
-                                'confidence': merchant_info.confidence_score,
-                                'sources': merchant_info.data_sources,
-                                'city': merchant_info.city,
-                                'website': merchant_info.website_url
-                            }
-                        )
+            # Perform web research (deduped, rate limited and cached)
+            merchant_info = await get_research_executor().research(merchant_name, amount=amount)
+            
+            if merchant_info.business_type and merchant_info.confidence_score > 0.3:
+                # Map business type to tag
+                category_mapping = self.category_tag_mapping.get(merchant_info.business_type)
                 
-                # Web research didn't provide good results, use suggested tags if available
-                if merchant_info.suggested_tags:
-                    suggested_tag = merchant_info.suggested_tags[0]  # Use first suggested tag
-                    confidence = max(merchant_info.confidence_score, 0.5)
+                if category_mapping:
+                    # Combine web research confidence with our mapping confidence
+                    combined_confidence = min(
+                        merchant_info.confidence_score + 0.2,  # Bonus for web research
+                        category_mapping['confidence'] * 1.1,
+                        0.95
+                    )
                     
                     return TagSuggestionResult(
-                        suggested_tag=suggested_tag,
-                        confidence=confidence,
-                        explanation=f"Recherche web: Tag suggéré pour {merchant_name} → {suggested_tag}",
-                        alternative_tags=merchant_info.suggested_tags[1:3],  # Up to 2 alternatives
-                        research_source="web_suggested_tags",
+                        suggested_tag=category_mapping['tag'],
+                        confidence=combined_confidence,
+                        explanation=f"Recherche web: {merchant_name} identifié comme {merchant_info.business_type} → {category_mapping['tag']}",
+                        category=merchant_info.business_type,
+                        alternative_tags=category_mapping['alternatives'],
+                        research_source="web_research",
                         web_research_used=True,
                         merchant_info={
+                            'business_type': merchant_info.business_type,
                             'confidence': merchant_info.confidence_score,
-                            'sources': merchant_info.data_sources
+                            'sources': merchant_info.data_sources,
+                            'city': merchant_info.city,
+                            'website': merchant_info.website_url
                         }
                     )
+            
+            # Web research didn't provide good results, use suggested tags if available
+            if merchant_info.suggested_tags:
+                suggested_tag = merchant_info.suggested_tags[0]  # Use first suggested tag
+                confidence = max(merchant_info.confidence_score, 0.5)
+                
+                return TagSuggestionResult(
+                    suggested_tag=suggested_tag,
+                    confidence=confidence,
+                    explanation=f"Recherche web: Tag suggéré pour {merchant_name} → {suggested_tag}",
+                    alternative_tags=merchant_info.suggested_tags[1:3],  # Up to 2 alternatives
+                    research_source="web_suggested_tags",
+                    web_research_used=True,
+                    merchant_info={
+                        'confidence': merchant_info.confidence_score,
+                        'sources': merchant_info.data_sources
+                    }
+                )
         
         except Exception as e:
             logger.warning(f"Web research failed for {merchant_name}: {e}")
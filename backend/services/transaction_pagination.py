@@ -0,0 +1,164 @@
+"""
+Keyset (cursor) pagination for the transactions list (routers/transactions.py)
+
+- Rows are ordered on (sort column, id); a page is read with a row-value
+  predicate `(column, id) < (last value, last id)` on the
+  (month, column, id) indexes, so page 200 costs the same as page 1
+  instead of an OFFSET walking every earlier row
+- Cursors are opaque url-safe tokens carrying the sort, the last row's key
+  and the page number; a cursor is only valid for the sort it was issued for
+- NULL sort values (SQLite orders them first) are read as a separate index
+  segment, before (asc) or after (desc) the non-NULL rows
+- Totals are memoised per month data generation (services/data_generation.py):
+  the COUNT runs once per change of the month, not once per page
+"""
+
+import base64
+import binascii
+import datetime as dt
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session
+
+from models.database import Transaction
+from services.data_generation import get_month_generations
+
+logger = logging.getLogger(__name__)
+
+SORT_COLUMNS = {
+    "date": Transaction.date_op,
+    "amount": Transaction.amount,
+    "label": Transaction.label,
+}
+DEFAULT_SORT = "date"
+
+# Rows read per keyset query when the page is post-filtered (tags) or streamed
+KEYSET_BATCH_SIZE = int(os.getenv("TRANSACTIONS_KEYSET_BATCH", "500"))
+TOTAL_CACHE_SIZE = int(os.getenv("TRANSACTIONS_TOTAL_CACHE_SIZE", "256"))
+
+
+class InvalidCursor(ValueError):
+    """Malformed cursor, or cursor issued for another sort"""
+
+
+@dataclass(frozen=True)
+class Cursor:
+    sort_by: str
+    descending: bool
+    value: Any
+    id: int
+    page: int
+
+
+def normalize_sort(sort_by: Optional[str], sort_order: Optional[str]) -> Tuple[str, bool]:
+    """(sort key, descending) with the endpoint's defaults: date, desc unless sort_order != 'desc'"""
+    return (sort_by if sort_by in SORT_COLUMNS else DEFAULT_SORT), sort_order == "desc"
+
+
+def order_by(sort_by: str, descending: bool) -> tuple:
+    column = SORT_COLUMNS[sort_by]
+    if descending:
+        return column.desc(), Transaction.id.desc()
+    return column.asc(), Transaction.id.asc()
+
+
+def _sort_value(tx: Transaction, sort_by: str) -> Any:
+    return getattr(tx, SORT_COLUMNS[sort_by].key)
+
+
+def encode_cursor(tx: Transaction, sort_by: str, descending: bool, page: int) -> str:
+    value = _sort_value(tx, sort_by)
+    if isinstance(value, dt.date):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort_by, "d": int(descending), "v": value, "i": tx.id, "p": page},
+                         separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort_by: str, descending: bool) -> Cursor:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        cursor = Cursor(payload["s"], bool(payload["d"]), payload["v"], int(payload["i"]), int(payload["p"]))
+        if cursor.value is not None and cursor.sort_by == "date":
+            cursor = Cursor(cursor.sort_by, cursor.descending, dt.date.fromisoformat(cursor.value),
+                            cursor.id, cursor.page)
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from e
+    if (cursor.sort_by, cursor.descending) != (sort_by, descending):
+        raise InvalidCursor("Cursor was issued for another sort")
+    return cursor
+
+
+def _segment_query(query: Query, sort_by: str, descending: bool, null_segment: bool,
+                   after: Optional[Tuple[Any, int]]) -> Query:
+    column = SORT_COLUMNS[sort_by]
+    if null_segment:
+        query = query.filter(column.is_(None))
+        if after is not None:
+            query = query.filter(Transaction.id < after[1] if descending else Transaction.id > after[1])
+        return query.order_by(Transaction.id.desc() if descending else Transaction.id.asc())
+
+    query = query.filter(column.isnot(None))
+    if after is not None:
+        key, bound = tuple_(column, Transaction.id), tuple_(*after)
+        query = query.filter(key < bound if descending else key > bound)
+    return query.order_by(*order_by(sort_by, descending))
+
+
+def iter_transactions(query: Query, sort_by: str, descending: bool, after: Optional[Cursor] = None,
+                      batch_size: Optional[int] = None) -> Iterator[Transaction]:
+    """
+    Yield the rows of `query` in (sort column, id) order, starting after `after`.
+
+    Reads batch_size rows (default KEYSET_BATCH_SIZE) per keyset query, so
+    memory stays bounded however many rows are consumed.
+    """
+    batch_size = batch_size or KEYSET_BATCH_SIZE
+    # NULLs sort first in SQLite: last segment in desc order, first in asc order
+    segments = [False, True] if descending else [True, False]
+    position = None
+    if after is not None:
+        position = (after.value, after.id)
+        segments = segments[segments.index(after.value is None):]
+
+    for null_segment in segments:
+        while True:
+            rows = _segment_query(query, sort_by, descending, null_segment, position).limit(batch_size).all()
+            yield from rows
+            if len(rows) < batch_size:
+                break
+            position = (_sort_value(rows[-1], sort_by), rows[-1].id)
+        position = None
+
+
+# {(month, generation, filters...): total}
+_totals: "OrderedDict[Hashable, int]" = OrderedDict()
+_totals_lock = threading.Lock()
+
+
+def cached_total(db: Session, month: str, filters: Hashable, count: Callable[[], int]) -> int:
+    """Total for (month, filters), recounted only when the month's data generation moved"""
+    key = (month, get_month_generations(db, [month])[month], filters)
+    with _totals_lock:
+        if key in _totals:
+            _totals.move_to_end(key)
+            return _totals[key]
+
+    total = count()
+    with _totals_lock:
+        _totals[key] = total
+        while len(_totals) > TOTAL_CACHE_SIZE:
+            _totals.popitem(last=False)
+    return total
+
+
+def clear_total_cache() -> None:
+    with _totals_lock:
+        _totals.clear()
@@ -0,0 +1,167 @@
+"""
+Full-text search over transaction labels, merchants and tags (SQLite FTS5)
+
+The transactions_fts table (models/database.py:create_transaction_search_index)
+indexes, per transaction (rowid = transactions.id):
+- label
+- merchant: the label without its payment prefix (CB, PRLV, VIR...)
+- tags: the CSV tags string
+
+Tokens are case and accent insensitive, so "energie" finds "Énergie". Every
+user token becomes a quoted FTS term (no FTS syntax injection), optionally a
+prefix term for search-as-you-type. Results are ranked with bm25, merchant and
+tag hits weighing more than the rest of the label.
+
+Databases without the FTS table (not migrated yet, test fixtures) fall back
+to the previous LIKE '%x%' scans.
+"""
+
+import logging
+import re
+import weakref
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, column, literal_column, or_, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.database import TRANSACTION_SEARCH_TABLE, Transaction
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = ("label", "merchant", "tags")
+# bm25 weights, in SEARCH_COLUMNS order
+BM25_WEIGHTS = (1.0, 2.0, 3.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_fts_table = table(TRANSACTION_SEARCH_TABLE, column("rowid"))
+_fts_available: "weakref.WeakKeyDictionary[Engine, bool]" = weakref.WeakKeyDictionary()
+
+
+def tokenize(query: str) -> List[str]:
+    """Word tokens of a user query (unicode61 splits on the same characters)"""
+    return _TOKEN_RE.findall(query or "")
+
+
+def match_expression(query: str, columns: Optional[Sequence[str]] = None, prefix: bool = True,
+                     phrase: bool = False) -> Optional[str]:
+    """
+    FTS5 MATCH expression for a user query, None when it has no token.
+
+    Args:
+        query: Free text
+        columns: Restrict to these columns of SEARCH_COLUMNS (default: all)
+        prefix: Every token also matches longer words ("carr" -> "carrefour")
+        phrase: Tokens must be consecutive (exact tag / label fragment)
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    if phrase:
+        expression = '"' + " ".join(tokens) + '"' + ("*" if prefix else "")
+    else:
+        expression = " ".join(f'"{token}"' + ("*" if prefix else "") for token in tokens)
+    if columns:
+        unknown = set(columns) - set(SEARCH_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown search columns: {sorted(unknown)}")
+        expression = "{" + " ".join(columns) + "} : (" + expression + ")"
+    return expression
+
+
+def fts_available(db: Session) -> bool:
+    """Whether the database bound to `db` has the FTS table (cached per engine)"""
+    bind = db.get_bind()
+    engine = getattr(bind, "engine", bind)
+    available = _fts_available.get(engine)
+    if available is None:
+        available = db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": TRANSACTION_SEARCH_TABLE}
+        ).first() is not None
+        _fts_available[engine] = available
+    return available
+
+
+def _matching_ids(expression: str):
+    return select(_fts_table.c.rowid).where(
+        literal_column(TRANSACTION_SEARCH_TABLE).op("MATCH")(bindparam("fts_match", expression, unique=True))
+    )
+
+
+def _like_clause(query: str, columns: Sequence[str]):
+    attributes = {"label": Transaction.label, "merchant": Transaction.label, "tags": Transaction.tags}
+    return or_(*(attributes[name].contains(query) for name in dict.fromkeys(columns)))
+
+
+def transaction_match_clause(db: Session, query: str, columns: Optional[Sequence[str]] = None,
+                             prefix: bool = True, phrase: bool = False):
+    """Filter clause on Transaction matching a user query (FTS, LIKE fallback)"""
+    columns = list(columns or SEARCH_COLUMNS)
+    expression = match_expression(query, columns, prefix=prefix, phrase=phrase)
+    if expression is None or not fts_available(db):
+        return _like_clause(query, columns)
+    return Transaction.id.in_(_matching_ids(expression))
+
+
+def tag_clause(db: Session, tag: str):
+    """
+    Filter clause on Transaction for rows tagged `tag` (replaces Transaction.tags.contains(tag)).
+
+    Matches the tag's tokens as a phrase in the tags column: a superset of the
+    rows whose CSV holds exactly that tag, callers keep their exact check.
+    """
+    return transaction_match_clause(db, tag, columns=["tags"], prefix=False, phrase=True)
+
+
+def search_transactions(
+    db: Session,
+    query: str,
+    months: Optional[Iterable[str]] = None,
+    limit: int = 50,
+    offset: int = 0,
+    columns: Optional[Sequence[str]] = None,
+    prefix: bool = True
+) -> List[Tuple[Transaction, float]]:
+    """
+    Ranked search: [(transaction, score)], best first (lower bm25 score = better).
+
+    Args:
+        query: Free text, every token must match (prefix match when prefix=True)
+        months: Restrict to these months (YYYY-MM)
+        columns: Restrict to these columns of SEARCH_COLUMNS
+    """
+    months = list(months or [])
+    expression = match_expression(query, columns, prefix=prefix)
+    if expression is None:
+        return []
+
+    if not fts_available(db):
+        fallback = db.query(Transaction).filter(_like_clause(query, list(columns or SEARCH_COLUMNS)))
+        if months:
+            fallback = fallback.filter(Transaction.month.in_(months))
+        rows = fallback.order_by(Transaction.date_op.desc(), Transaction.id.desc()).offset(offset).limit(limit).all()
+        return [(tx, 0.0) for tx in rows]
+
+    weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+    sql = f"""
+        SELECT {TRANSACTION_SEARCH_TABLE}.rowid AS id, bm25({TRANSACTION_SEARCH_TABLE}, {weights}) AS score
+        FROM {TRANSACTION_SEARCH_TABLE}
+        {"JOIN transactions t ON t.id = " + TRANSACTION_SEARCH_TABLE + ".rowid" if months else ""}
+        WHERE {TRANSACTION_SEARCH_TABLE} MATCH :expression
+        {"AND t.month IN :months" if months else ""}
+        ORDER BY score, id DESC
+        LIMIT :limit OFFSET :offset
+    """
+    statement = text(sql)
+    params = {"expression": expression, "limit": limit, "offset": offset}
+    if months:
+        statement = statement.bindparams(bindparam("months", expanding=True))
+        params["months"] = months
+    ranked = db.execute(statement, params).all()
+    if not ranked:
+        return []
+
+    by_id = {tx.id: tx for tx in db.query(Transaction).filter(Transaction.id.in_([row.id for row in ranked]))}
+    return [(by_id[row.id], row.score) for row in ranked if row.id in by_id]
@@ -26,6 +26,7 @@ from sqlalchemy.orm import Session
 from services.tag_suggestion_service import TagSuggestionService, TagSuggestionResult, get_tag_suggestion_service
 from services.expense_classification import ExpenseClassificationService, ClassificationResult, get_expense_classification_service
 from services.web_research_service import WebResearchService
+from services.executors import classify_fast_chunk, map_cpu_chunks
 from models.database import Transaction
 
 logger = logging.getLogger(__name__)
@@ -309,7 +310,55 @@ class UnifiedClassificationService:
         except Exception as e:
             logger.error(f"Batch classification completely failed: {e}")
             return {}
-    
+
+    async def abatch_classify_transactions(
+        self,
+        transactions: List[Dict],
+        use_web_research: bool = False,
+        include_expense_type: bool = False,
+        max_concurrent: int = 5
+    ) -> Dict[int, UnifiedClassificationResult]:
+        """
+        BATCH CLASSIFICATION for async callers (never blocks the event loop)
+
+        The pattern path runs in chunks on the CPU process pool; web research
+        runs concurrently, paced and deduped by the research executor.
+        """
+        start_time = time.time()
+        transactions = [t for t in transactions if t.get('id')]
+
+        if use_web_research:
+            semaphore = asyncio.Semaphore(max_concurrent)
+
+            async def classify(transaction):
+                async with semaphore:
+                    try:
+                        return transaction['id'], await self.classify_transaction_primary(
+                            transaction_label=transaction.get('label', ''),
+                            transaction_amount=transaction.get('amount'),
+                            use_web_research=True,
+                            include_expense_type=include_expense_type
+                        )
+                    except Exception as e:
+                        logger.error(f"Batch classification failed for transaction {transaction['id']}: {e}")
+                        return transaction['id'], UnifiedClassificationResult(
+                            suggested_tag="divers",
+                            tag_confidence=0.3,
+                            tag_explanation=f"Batch processing error: {str(e)}",
+                            research_source="batch_error",
+                            fallback_used=True
+                        )
+
+            pairs = await asyncio.gather(*(classify(t) for t in transactions))
+        else:
+            items = [(t['id'], t.get('label', ''), t.get('amount')) for t in transactions]
+            pairs = await map_cpu_chunks(classify_fast_chunk, items, include_expense_type)
+
+        results = dict(pairs)
+        processing_time = int((time.time() - start_time) * 1000)
+        logger.info(f"Batch processed {len(results)} transactions in {processing_time}ms")
+        return results
+
     def _infer_expense_type_from_tag(self, tag: str) -> str:
         """
         Intelligent inference of FIXED/VARIABLE from contextual tags
@@ -20,8 +20,11 @@ CLASSIFICATION ALGORITHM:
 import asyncio
 import json
 import logging
+import os
 import re
+import threading
 import time
+import weakref
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Union
 from urllib.parse import quote_plus, urljoin, urlparse
@@ -31,6 +34,91 @@ from difflib import SequenceMatcher
 
 logger = logging.getLogger(__name__)
 
+# Nominatim usage policy: max 1 request/second for the whole application
+RESEARCH_OSM_URL = os.getenv("RESEARCH_OSM_URL", "https://nominatim.openstreetmap.org/search")
+RESEARCH_RATE_PER_SECOND = float(os.getenv("RESEARCH_RATE_PER_SECOND", "1.0"))
+RESEARCH_RATE_BURST = int(os.getenv("RESEARCH_RATE_BURST", "1"))
+RESEARCH_POOL_SIZE = int(os.getenv("RESEARCH_POOL_SIZE", "20"))
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every coroutine (and thread) of the process.
+
+    acquire() reserves a token and sleeps until it is available, so callers
+    are paced at `rate` per second with bursts up to `capacity`, without
+    holding any asyncio primitive (works from any event loop).
+    """
+
+    def __init__(self, rate: float = RESEARCH_RATE_PER_SECOND, capacity: int = RESEARCH_RATE_BURST):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "waited": 0, "wait_seconds": 0.0}
+
+    def reserve(self) -> float:
+        """Take one token; returns how long the caller must wait before using it"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            self.stats["acquired"] += 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if wait:
+                self.stats["waited"] += 1
+                self.stats["wait_seconds"] += wait
+            return wait
+
+    async def acquire(self) -> None:
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "rate_per_second": self.rate, "capacity": self.capacity}
+
+
+_research_rate_limiter: Optional[TokenBucket] = None
+
+
+def get_research_rate_limiter() -> TokenBucket:
+    """Process-wide token bucket for outbound research requests"""
+    global _research_rate_limiter
+    if _research_rate_limiter is None:
+        _research_rate_limiter = TokenBucket()
+    return _research_rate_limiter
+
+
+# aiohttp sessions are bound to their event loop: one pooled session per loop,
+# i.e. one per uvicorn/gunicorn worker
+_research_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+
+async def get_research_session() -> aiohttp.ClientSession:
+    """Pooled (keep-alive) HTTP session shared by all research in this worker"""
+    loop = asyncio.get_running_loop()
+    session = _research_sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=RESEARCH_POOL_SIZE, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=30, connect=10),
+            headers={'User-Agent': 'BudgetApp-Research/1.0'}
+        )
+        _research_sessions[loop] = session
+    return session
+
+
+async def close_research_session() -> None:
+    """Close the pooled session of the running loop (application shutdown)"""
+    session = _research_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
 
 @dataclass
 class MerchantInfo:
@@ -68,8 +156,15 @@ class MerchantInfo:
 class WebResearchService:
     """Revolutionary service for automatic merchant research and classification"""
     
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
+    def __init__(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        osm_url: str = RESEARCH_OSM_URL
+    ):
+        self.session: Optional[aiohttp.ClientSession] = session
+        self.rate_limiter = rate_limiter or get_research_rate_limiter()
+        self.osm_url = osm_url
         
         # Enhanced business type classification patterns with more French chains
         self.business_patterns = {
@@ -149,18 +244,14 @@ class WebResearchService:
         ]
 
     async def __aenter__(self):
-        """Async context manager entry"""
-        timeout = aiohttp.ClientTimeout(total=30, connect=10)
-        self.session = aiohttp.ClientSession(
-            timeout=timeout,
-            headers={'User-Agent': 'BudgetApp-Research/1.0'}
-        )
+        """Async context manager entry: borrows the worker's pooled session"""
+        if self.session is None:
+            self.session = await get_research_session()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        """Async context manager exit (the pooled session stays open)"""
+        return None
 
     def normalize_merchant_name(self, merchant_name: str) -> str:
         """Normalize merchant name for better matching"""
@@ -262,7 +353,7 @@ class WebResearchService:
         """Search OpenStreetMap for business information"""
         try:
             # Nominatim API (free OpenStreetMap search)
-            base_url = "https://nominatim.openstreetmap.org/search"
+            base_url = self.osm_url
             
             # Build search query
             search_terms = [merchant_name]
@@ -282,8 +373,8 @@ class WebResearchService:
                 'dedupe': 1
             }
             
-            # Add delay to respect Nominatim usage policy
-            await asyncio.sleep(1)
+            # Respect Nominatim usage policy (shared by all concurrent research)
+            await self.rate_limiter.acquire()
             
             async with self.session.get(base_url, params=params) as response:
                 if response.status == 200:
@@ -517,7 +608,12 @@ class WebResearchService:
         return merchant_info
 
     async def batch_research_merchants(self, merchant_names: List[str]) -> List[MerchantInfo]:
-        """Research multiple merchants in batch with rate limiting"""
+        """
+        Research multiple merchants in batch with rate limiting
+
+        Outbound requests are paced by the shared token bucket; for deduped,
+        cached research use services.research_executor instead.
+        """
         results = []
         
         # Process in batches to avoid overwhelming APIs
@@ -537,9 +633,6 @@ class WebResearchService:
                     logger.error(f"Batch research error: {result}")
                     # Add empty result for failed research
                     results.append(MerchantInfo(merchant_name="", normalized_name=""))
-            
-            # Rate limiting between batches
-            await asyncio.sleep(2)
         
         return results
 
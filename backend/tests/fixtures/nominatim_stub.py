@@ -0,0 +1,87 @@
+"""
+Local stand-in for the Nominatim search API
+
+Serves /search on 127.0.0.1 (random port) with a configurable latency so
+web research can be tested and benchmarked offline:
+
+    async with NominatimStubServer(latency=0.05) as stub:
+        service = WebResearchService(osm_url=stub.url)
+"""
+
+import asyncio
+from collections import Counter
+from typing import Dict, List
+
+from aiohttp import web
+
+# keyword in the query -> (OSM class, OSM type, extratags)
+KNOWN_PLACES = {
+    "carrefour": ("shop", "supermarket", {"shop": "supermarket"}),
+    "leclerc": ("shop", "supermarket", {"shop": "supermarket"}),
+    "pharmacie": ("amenity", "pharmacy", {"amenity": "pharmacie"}),
+    "total": ("amenity", "fuel", {"amenity": "station-service carburant"}),
+    "restaurant": ("amenity", "restaurant", {"amenity": "restaurant"}),
+    "fnac": ("shop", "electronics", {"shop": "électronique"}),
+}
+
+
+class NominatimStubServer:
+    """Minimal aiohttp server answering Nominatim-like JSON"""
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1"):
+        self.latency = latency
+        self.host = host
+        self.port = None
+        self.queries: Counter = Counter()
+        self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/search"
+
+    @property
+    def request_count(self) -> int:
+        return sum(self.queries.values())
+
+    async def _search(self, request: web.Request) -> web.Response:
+        query = request.query.get("q", "")
+        self.queries[query] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response(self.results_for(query))
+
+    @staticmethod
+    def results_for(query: str) -> List[Dict]:
+        lowered = query.lower()
+        for keyword, (osm_class, osm_type, tags) in KNOWN_PLACES.items():
+            if keyword in lowered:
+                return [{
+                    "display_name": f"{query.split(' France')[0].title()}, France",
+                    "class": osm_class,
+                    "type": osm_type,
+                    "lat": "48.85",
+                    "lon": "2.35",
+                    "extratags": tags,
+                }]
+        return []
+
+    async def start(self) -> "NominatimStubServer":
+        app = web.Application()
+        app.router.add_get("/search", self._search)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "NominatimStubServer":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
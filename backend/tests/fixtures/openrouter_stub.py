@@ -0,0 +1,100 @@
+"""
+Local stand-in for the OpenRouter chat completions API
+
+Serves POST /chat/completions (JSON and SSE streaming) on 127.0.0.1 (random
+port) with a configurable latency so the AI service can be tested and
+benchmarked offline:
+
+    async with OpenRouterStubServer(latency=0.05) as stub:
+        service = AIAnalysisService(api_key="test")
+        service.base_url = stub.base_url
+
+handshake_latency is added to the first request of every new TCP connection,
+standing in for the TCP + TLS setup a pooled client skips.
+"""
+
+import asyncio
+import json
+from collections import Counter
+from typing import Optional, Set, Tuple
+
+from aiohttp import web
+
+
+class OpenRouterStubServer:
+    """Minimal aiohttp server answering OpenAI-style chat completions"""
+
+    def __init__(self, latency: float = 0.0, handshake_latency: float = 0.0,
+                 fail_status: Optional[int] = None, host: str = "127.0.0.1"):
+        self.latency = latency
+        self.handshake_latency = handshake_latency
+        self.fail_status = fail_status
+        self.host = host
+        self.port = None
+        self.prompts: Counter = Counter()
+        self.connections: Set[Tuple[str, int]] = set()
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def request_count(self) -> int:
+        return sum(self.prompts.values())
+
+    @staticmethod
+    def answer_for(prompt: str) -> str:
+        return f"Réponse: {prompt[-40:]}"
+
+    async def _completions(self, request: web.Request) -> web.StreamResponse:
+        peer = request.transport.get_extra_info("peername")
+        if peer not in self.connections:
+            self.connections.add(peer)
+            if self.handshake_latency:
+                await asyncio.sleep(self.handshake_latency)
+
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        self.prompts[prompt] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_status:
+            return web.json_response({"error": "stub failure"}, status=self.fail_status)
+
+        answer = self.answer_for(prompt)
+        if not body.get("stream"):
+            return web.json_response({
+                "model": body["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}}],
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for word in answer.split(" "):
+            chunk = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def start(self) -> "OpenRouterStubServer":
+        app = web.Application()
+        app.router.add_post("/chat/completions", self._completions)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "OpenRouterStubServer":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
@@ -0,0 +1,123 @@
+"""
+Unit tests for the AI cache read path (write-behind hit counters, in-process LRU).
+"""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.ai_cache import AICache
+from models.database import Base
+from services.ai_cache import AICacheLRU, AICacheService, HitCounterBuffer
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite with the ai_cache table"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[AICache.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    captured = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: captured.append(sql))
+    return captured
+
+
+def _service(engine, lru_size=0):
+    factory = sessionmaker(bind=engine)
+    buffer = HitCounterBuffer(session_factory=factory, flush_interval=0)
+    return AICacheService(factory(), lru=AICacheLRU(max_size=lru_size), hit_buffer=buffer)
+
+
+def _writes(statements):
+    return [sql for sql in statements if sql.lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE"))]
+
+
+def test_cache_hit_is_a_pure_read(engine, statements):
+    service = _service(engine)
+    service.set_cached("coach:tips:2025-01", "coach", {"tips": ["a"]}, month="2025-01")
+    statements.clear()
+
+    for _ in range(3):
+        assert service.get_cached("coach:tips:2025-01", "coach") == {"tips": ["a"]}
+
+    assert _writes(statements) == []
+    assert service.hits.pending() == {"coach:tips:2025-01": 3}
+
+
+def test_flush_writes_all_keys_in_one_update(engine, statements):
+    service = _service(engine)
+    service.set_cached("tip:1", "tip", {"tip": 1})
+    service.set_cached("tip:2", "tip", {"tip": 2})
+    for key, hits in (("tip:1", 2), ("tip:2", 5)):
+        for _ in range(hits):
+            service.get_cached(key)
+    statements.clear()
+
+    assert service.hits.flush() == 2
+
+    assert len(_writes(statements)) == 1
+    rows = {row.cache_key: row for row in service.db.query(AICache).all()}
+    assert (rows["tip:1"].hit_count, rows["tip:2"].hit_count) == (2, 5)
+    assert rows["tip:1"].last_accessed is not None
+    assert service.hits.pending() == {}
+
+
+def test_lru_answers_hot_keys_without_sql(engine, statements):
+    service = _service(engine, lru_size=8)
+    service.set_cached("daily:2025-01-15", "daily", {"insight": "ok"})
+    statements.clear()
+
+    assert service.get_cached("daily:2025-01-15", "daily") == {"insight": "ok"}
+
+    assert statements == []
+    assert service.lru.stats["hits"] == 1
+
+
+def test_invalidation_drops_lru_entries(engine):
+    service = _service(engine, lru_size=8)
+    service.set_cached("coach:tips:2025-01:alice", "coach", {"tips": []}, month="2025-01")
+    service.set_cached("import:42:2025-01", "import", {"status": "ready"}, month="2025-01")
+    service.set_cached("import:43:2025-02", "import", {"status": "ready"}, month="2025-02")
+
+    service.invalidate("coach:tips:2025-01%")
+    assert service.get_cached("coach:tips:2025-01:alice") is None
+
+    service.invalidate_by_month("2025-01")
+    assert service.get_cached("import:42:2025-01") is None
+    assert service.get_cached("import:43:2025-02") == {"status": "ready"}
+
+
+def test_rewriting_an_entry_resets_pending_hits(engine):
+    service = _service(engine)
+    service.set_cached("variance:2025-01", "variance", {"v": 1})
+    service.get_cached("variance:2025-01")
+
+    service.set_cached("variance:2025-01", "variance", {"v": 2})
+    service.hits.flush()
+
+    assert service.db.query(AICache).one().hit_count == 0
+    assert service.get_cached("variance:2025-01") == {"v": 2}
+
+
+def test_stats_count_pending_hits_without_writing(engine, statements):
+    service = _service(engine)
+    service.set_cached("tip:1", "tip", {"tip": 1})
+    for _ in range(3):
+        service.get_cached("tip:1")
+    statements.clear()
+
+    stats = service.get_cache_stats()
+
+    assert stats["total_hits"] == 3
+    assert _writes(statements) == []
+    assert service.hits.pending() == {"tip:1": 3}
+
@@ -0,0 +1,101 @@
+"""
+Unit tests for the AI service transport (services/ai_analysis): pooled client,
+prompt-hash response cache tied to the data generation and in-flight dedupe,
+against a local OpenRouter stub.
+"""
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+import services.ai_analysis as ai_analysis
+from services.ai_analysis import AIAnalysisService, close_llm_http_client, get_llm_http_client
+from services.redis_cache import InMemoryCacheService
+from tests.fixtures.openrouter_stub import OpenRouterStubServer
+
+VARIANCE = {
+    "global_variance": {"budgeted": 500.0, "actual": 620.0, "variance": 120.0, "variance_pct": 24.0,
+                        "status": "over_budget"},
+    "by_category": [{"category": "courses", "variance": 120.0, "variance_pct": 40.0, "status": "over_budget"}],
+}
+
+
+@pytest_asyncio.fixture
+async def stub():
+    async with OpenRouterStubServer(latency=0.02) as server:
+        yield server
+    await close_llm_http_client()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = InMemoryCacheService()
+    monkeypatch.setattr(ai_analysis, "_cache_service", cache)
+    return cache
+
+
+def _service(stub):
+    service = AIAnalysisService(api_key="test-key")
+    service.base_url = stub.base_url
+    service.language = "fr"
+    return service
+
+
+@pytest.mark.asyncio
+async def test_calls_share_one_pooled_connection(stub, cache):
+    service = _service(stub)
+    service.cache_enabled = False
+
+    for i in range(5):
+        assert await service._call_llm(f"question {i}") == stub.answer_for(f"question {i}")
+    chunks = [chunk async for chunk in service._stream_llm("question stream")]
+
+    assert "".join(chunks).strip() == stub.answer_for("question stream")
+    assert stub.request_count == 6
+    assert len(stub.connections) == 1
+    assert get_llm_http_client() is get_llm_http_client()
+
+
+@pytest.mark.asyncio
+async def test_response_cache_follows_the_data_generation(stub, cache):
+    service = _service(stub)
+
+    first = await service.explain_variance(VARIANCE, data_generation="3.1")
+    assert await service.explain_variance(VARIANCE, data_generation="3.1") == first
+    assert stub.request_count == 1
+
+    # Same figures, new month generation: a fresh answer is requested
+    await service.explain_variance(VARIANCE, data_generation="4.1")
+    assert stub.request_count == 2
+
+    # Other prompt (model settings are part of the key too)
+    service.temperature = 0.2
+    await service.explain_variance(VARIANCE, data_generation="4.1")
+    assert stub.request_count == 3
+
+
+@pytest.mark.asyncio
+async def test_identical_prompts_in_flight_share_one_call(stub, cache):
+    service = _service(stub)
+
+    answers = await asyncio.gather(*[
+        service.monthly_summary({"income": 3000, "expenses": 2100}, data_generation="1.0") for _ in range(20)
+    ])
+
+    assert len(set(answers)) == 1
+    assert stub.request_count == 1
+    assert service._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(cache):
+    async with OpenRouterStubServer(fail_status=500) as stub:
+        service = _service(stub)
+        answer = await service.answer_question("Combien ?", {"month": "2025-03"}, data_generation="1.0")
+        await service.answer_question("Combien ?", {"month": "2025-03"}, data_generation="1.0")
+    await close_llm_http_client()
+
+    assert answer.startswith("Erreur API")
+    assert service.model == AIAnalysisService.FALLBACK_MODEL
+    # Primary + fallback model, then fallback again: nothing was served from the cache
+    assert stub.request_count == 3
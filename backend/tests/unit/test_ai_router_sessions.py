@@ -0,0 +1,93 @@
+"""
+Unit tests for the AI router: the request session is closed before the LLM
+is awaited (no pooled connection held during a slow completion).
+"""
+import datetime as dt
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import routers.ai as ai_router
+from dependencies.auth import get_current_user
+from dependencies.database import get_db
+from models.database import Base, MonthDataGeneration, Transaction
+
+MONTH = dt.date.today().strftime("%Y-%m")
+
+
+class FakeAIService:
+    """Records how many connections are checked out whenever the LLM is awaited"""
+    is_configured = True
+    model = "test-model"
+    language = "fr"
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.checked_out = []
+
+    async def _complete(self, text):
+        self.checked_out.append(self.engine.pool.checkedout())
+        return text
+
+    async def suggest_savings(self, *args, **kwargs):
+        return await self._complete("suggestions")
+
+    async def monthly_summary(self, *args, **kwargs):
+        return await self._complete("summary")
+
+    async def answer_question(self, *args, **kwargs):
+        return await self._complete("answer")
+
+    async def stream_answer(self, *args, **kwargs):
+        yield await self._complete("chunk")
+
+
+@pytest.fixture
+def client_and_service(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'budget.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[Transaction.__table__, MonthDataGeneration.__table__])
+    Local = sessionmaker(bind=engine)
+    with Local() as db:
+        db.add_all([
+            Transaction(month=MONTH, date_op=dt.date.today(), label="CB MARCHE", amount=-10.0,
+                        is_expense=True, exclude=False, tags="courses"),
+            Transaction(month=MONTH, date_op=dt.date.today(), label="SALAIRE", amount=100.0,
+                        is_expense=False, exclude=False, tags=""),
+        ])
+        db.commit()
+
+    service = FakeAIService(engine)
+    monkeypatch.setattr(ai_router, "get_ai_service", lambda: service)
+
+    def get_session():
+        db = Local()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(ai_router.router)
+    app.dependency_overrides[get_db] = get_session
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(username="alice")
+    yield TestClient(app), service
+    engine.dispose()
+
+
+def test_no_connection_is_held_while_the_llm_answers(client_and_service):
+    client, service = client_and_service
+
+    savings = client.post("/ai/suggest-savings", json={"category": "courses", "months_history": 2}).json()
+    summary = client.post("/ai/monthly-summary", json={"month": MONTH}).json()
+    answer = client.post("/ai/chat", json={"question": "Combien ai-je dépensé ?"}).json()
+    stream = client.post("/ai/chat-stream", json={"question": "Combien ai-je dépensé ?"}).text
+
+    assert savings["average_spending"] == 5.0
+    assert (summary["income"], summary["expenses"]) == (100.0, 10.0)
+    assert answer["answer"] == "answer"
+    assert "data: chunk" in stream
+    assert service.checked_out == [0, 0, 0, 0]
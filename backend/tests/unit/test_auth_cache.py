@@ -0,0 +1,130 @@
+"""
+Unit tests for the authenticated-principal cache behind auth.get_current_user
+(verified-token cache, principal TTL cache, invalidation on user changes).
+"""
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateTable
+
+import services.auth_cache as auth_cache
+from auth import create_access_token, get_current_user
+from models.user import User, lock_account
+from services.auth_cache import AuthCache, AuthenticatedUser
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite with the users table and one active user"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    # Table only: models.user and models.database both declare the users indexes
+    with engine.begin() as conn:
+        conn.execute(CreateTable(User.__table__))
+    db = sessionmaker(bind=engine)()
+    db.add(User(username="alice", hashed_password="x", is_active=True, failed_login_attempts=0))
+    db.commit()
+    db.close()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def statements(engine):
+    captured = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: captured.append(sql))
+    return captured
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(auth_cache, "_auth_cache", AuthCache())
+
+
+def _credentials(username="alice", minutes=30):
+    token = create_access_token({"sub": username}, expires_delta=timedelta(minutes=minutes))
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_skip_decode_and_user_lookup(db, statements, monkeypatch):
+    credentials = _credentials()
+    first = await get_current_user(credentials, db)
+    statements.clear()
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("token decoded again")
+
+    monkeypatch.setattr("auth.jwt.decode", no_decode)
+    second = await get_current_user(credentials, db)
+
+    assert isinstance(first, AuthenticatedUser) and first.username == "alice"
+    assert second is first
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_user_change_invalidates_the_principal(db, statements):
+    credentials = _credentials()
+    await get_current_user(credentials, db)
+
+    user = db.query(User).filter_by(username="alice").one()
+    lock_account(user)
+    db.commit()
+    statements.clear()
+    principal = await get_current_user(credentials, db)
+
+    assert principal.locked_until is not None
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_deactivated_user_is_rejected_despite_cached_token(db):
+    credentials = _credentials()
+    await get_current_user(credentials, db)
+
+    db.query(User).filter_by(username="alice").one().is_active = False
+    db.commit()
+
+    with pytest.raises(HTTPException) as error:
+        await get_current_user(credentials, db)
+    assert error.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_not_cached(db):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="not-a-jwt")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            await get_current_user(credentials, db)
+
+    assert auth_cache.get_auth_cache().get_stats()["tokens"] == 0
+
+
+def test_token_entries_expire_with_the_token():
+    cache = AuthCache()
+    cache.put_token("live", "alice", time.time() + 60)
+    cache.put_token("expired", "alice", time.time() - 1)
+    cache.put_token("soon", "alice", time.time() + 0.05)
+    time.sleep(0.1)
+
+    assert cache.get_token("live") == "alice"
+    assert cache.get_token("expired") is None
+    assert cache.get_token("soon") is None
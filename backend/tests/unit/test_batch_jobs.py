@@ -0,0 +1,136 @@
+"""
+Unit tests for durable batch auto-tagging jobs (persisted progress,
+per-chunk checkpoints, resume after restart, cross-worker reads).
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base, BatchJob, BatchJobChunk, Transaction
+from models.schemas import BatchAutoTagRequest
+from services.batch_processor import BatchProcessor
+from services.cache_usage import record_cache_lookup, track_cache_usage
+from services.executors import run_db
+
+LABELS = ["PRLV NETFLIX", "CB CARREFOUR", "CB TOTAL ACCESS", "PRLV EDF", "CB PHARMACIE", "CB AMAZON", "SNCF"]
+
+
+@pytest.fixture
+def session_factory():
+    """In-memory SQLite sessions with transactions and batch job tables."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    tables = [Transaction.__table__, BatchJob.__table__, BatchJobChunk.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    for label in LABELS:
+        db.add(Transaction(month="2025-01", label=label, amount=-20.0, is_expense=True, exclude=False, tags=""))
+    db.add(Transaction(month="2025-02", label="CB FNAC", amount=-50.0, is_expense=True, exclude=False, tags=""))
+    db.commit()
+    db.close()
+    yield factory
+    engine.dispose()
+
+
+def _request():
+    return BatchAutoTagRequest(month="2025-01", confidence_threshold=0.0, max_concurrent=2)
+
+
+async def _initiate(processor, factory, start=True, monkeypatch=None):
+    if not start:
+        monkeypatch.setattr(processor, "_start", lambda batch_id: None)
+    db = factory()
+    try:
+        response = await processor.initiate_batch_operation(_request(), db, "alice")
+    finally:
+        db.close()
+    return response.batch_id
+
+
+@pytest.mark.asyncio
+async def test_job_completes_and_is_readable_from_another_worker(session_factory):
+    processor = BatchProcessor(session_factory=session_factory, chunk_size=3)
+    batch_id = await _initiate(processor, session_factory)
+    await processor._tasks[batch_id]
+
+    other_worker = BatchProcessor(session_factory=session_factory)
+    progress = other_worker.get_batch_progress(batch_id)
+    results = other_worker.get_batch_results(batch_id)
+
+    assert (progress.status, progress.progress, progress.processed_transactions) == ("completed", 100.0, 7)
+    assert len(results.transactions) == 7
+    assert results.performance_metrics["chunks"] == 3
+    assert results.performance_metrics["cache_hit_rate"] != 0.7
+    db = session_factory()
+    assert db.query(Transaction).filter(Transaction.month == "2025-01", Transaction.tags != "").count() == 7
+    assert db.query(Transaction).filter(Transaction.month == "2025-02").one().tags == ""
+
+
+@pytest.mark.asyncio
+async def test_interrupted_job_resumes_from_last_checkpoint(session_factory, monkeypatch):
+    crashed = BatchProcessor(session_factory=session_factory, chunk_size=3)
+    batch_id = await _initiate(crashed, session_factory, start=False, monkeypatch=monkeypatch)
+    db = session_factory()
+    first_chunk = db.query(BatchJobChunk).filter_by(job_id=batch_id, chunk_index=0).one()
+    await crashed._process_chunk(batch_id, first_chunk.id, _request())
+    # The worker dies: its heartbeat goes stale
+    db.query(BatchJob).filter_by(id=batch_id).update({
+        "status": "processing", "worker_id": "other-host:1", "heartbeat_at": datetime.now() - timedelta(minutes=10)
+    })
+    db.commit()
+
+    restarted = BatchProcessor(session_factory=session_factory, stale_seconds=60)
+    resumed = await restarted.resume_interrupted_jobs()
+    await restarted._tasks[batch_id]
+
+    assert resumed == [batch_id]
+    job = session_factory().get(BatchJob, batch_id)
+    assert (job.status, job.processed_transactions, job.worker_id) == ("completed", 7, restarted.worker_id)
+    assert await BatchProcessor(session_factory=session_factory, stale_seconds=60).resume_interrupted_jobs() == []
+
+
+@pytest.mark.asyncio
+async def test_live_job_is_not_claimed_by_another_worker(session_factory, monkeypatch):
+    owner = BatchProcessor(session_factory=session_factory)
+    batch_id = await _initiate(owner, session_factory, start=False, monkeypatch=monkeypatch)
+
+    assert await BatchProcessor(session_factory=session_factory).resume_interrupted_jobs() == []
+    assert session_factory().get(BatchJob, batch_id).worker_id == owner.worker_id
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_stops_before_next_chunk(session_factory, monkeypatch):
+    processor = BatchProcessor(session_factory=session_factory, chunk_size=3)
+    batch_id = await _initiate(processor, session_factory, start=False, monkeypatch=monkeypatch)
+
+    assert processor.cancel_batch(batch_id) is True
+    await processor.run_job(batch_id)
+
+    assert processor.get_batch_progress(batch_id).processed_transactions == 0
+    assert processor.cancel_batch(batch_id) is False
+    with pytest.raises(ValueError):
+        processor.cancel_batch("unknown")
+
+
+@pytest.mark.asyncio
+async def test_cache_usage_is_counted_per_job():
+    async def job(hits, misses):
+        with track_cache_usage() as usage:
+            for _ in range(hits):
+                record_cache_lookup(hits=1)
+                await asyncio.sleep(0)
+            # Lookups made in the DB executor count for the job too
+            await run_db(record_cache_lookup, 0, misses)
+        return usage.hits, usage.lookups
+
+    assert await asyncio.gather(job(3, 1), job(0, 2)) == [(3, 4), (0, 2)]
+    record_cache_lookup(hits=1)  # outside any job: ignored
+
@@ -0,0 +1,151 @@
+"""
+Unit tests for the benchmark suite (benchmarks/): deterministic dataset,
+percentiles, scenario runs through the ASGI transport and baseline comparison.
+"""
+import csv
+import datetime as dt
+
+import pytest
+from fastapi import FastAPI, Response
+
+from benchmarks.datagen import DatasetSpec, generate_rows, write_import_csv
+from benchmarks.harness import build_report, compare_reports, percentile, run_suite, summarize
+from benchmarks.scenarios import Scenario
+
+
+def _report(scenarios, dataset=None):
+    return build_report(dataset or DatasetSpec(years=1, per_month=20), scenarios, iterations=5, warmup=1,
+                        concurrency=1)
+
+
+def _result(p50, p95=None, queries=3, errors=0, samples=20):
+    # The two slowest requests at p95, the others at p50
+    durations = [p50] * (samples - 2) + [p95 if p95 is not None else p50] * 2
+    return summarize(durations, [queries] * samples, errors)
+
+
+class TestDatagen:
+    def test_months_end_at_end_month(self):
+        spec = DatasetSpec(years=1, per_month=20, end_month="2025-02")
+        assert len(spec.months) == 12
+        assert spec.months[0] == "2024-03"
+        assert spec.months[-1] == "2025-02"
+
+    def test_rows_are_deterministic_for_a_seed(self):
+        spec = DatasetSpec(years=1, per_month=30)
+        rows = list(generate_rows(spec))
+        assert len(rows) == spec.rows
+        assert rows == list(generate_rows(spec))
+        assert rows != list(generate_rows(DatasetSpec(years=1, per_month=30, seed=7)))
+
+    def test_rows_stay_in_their_month(self):
+        for row in generate_rows(DatasetSpec(years=1, per_month=25)):
+            assert row["date_op"].strftime("%Y-%m") == row["month"]
+            assert row["is_expense"] == (row["amount"] < 0)
+
+    def test_import_csv_uses_bank_date_format(self, tmp_path):
+        spec = DatasetSpec(years=1, per_month=20)
+        path = tmp_path / "import.csv"
+        count = write_import_csv(str(path), spec, spec.months[-1])
+
+        with open(path, encoding="utf-8") as handle:
+            rows = list(csv.DictReader(handle))
+        assert len(rows) == count == 20
+        assert all(dt.datetime.strptime(row["dateOp"], "%d/%m/%Y") for row in rows)
+
+
+class TestStatistics:
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) in (50, 51)
+        assert percentile(values, 99) == 99
+        assert percentile(values, 100) == 100
+        assert percentile([], 95) == 0.0
+
+    def test_summarize_without_query_counts(self):
+        summary = summarize([3.0, 1.0, 2.0], [])
+        assert summary["samples"] == 3
+        assert summary["p50_ms"] == 2.0
+        assert summary["min_ms"] == 1.0 and summary["max_ms"] == 3.0
+        assert summary["queries_p50"] is None
+
+
+class TestRunSuite:
+    @pytest.fixture
+    def app(self):
+        app = FastAPI()
+
+        @app.get("/ok")
+        def ok(response: Response):
+            response.headers["X-DB-Queries"] = "4"
+            return {"ok": True}
+
+        @app.get("/broken")
+        def broken():
+            return Response(status_code=500, content="boom")
+
+        return app
+
+    @pytest.mark.asyncio
+    async def test_records_latency_queries_and_errors(self, app):
+        scenarios = [Scenario("ok", "GET", "/ok"), Scenario("broken", "GET", "/broken")]
+        results = await run_suite(app, scenarios, iterations=4, warmup=1, concurrency=2)
+
+        assert results["ok"]["samples"] == 4
+        assert results["ok"]["queries_p50"] == 4
+        assert results["ok"]["errors"] == 0
+        assert results["broken"]["errors"] == 4
+        assert results["broken"]["first_error"].startswith("500")
+        assert results["broken"]["queries_p50"] is None
+
+    @pytest.mark.asyncio
+    async def test_before_hook_runs_ahead_of_every_request(self, app):
+        calls = []
+        scenario = Scenario("cold", "GET", "/ok", before=lambda: calls.append(1))
+        results = await run_suite(app, [scenario], iterations=3, warmup=1)
+
+        assert results["cold"]["samples"] == 3
+        assert len(calls) == 4
+
+
+class TestCompareReports:
+    def test_latency_regression_beyond_tolerance(self):
+        findings = compare_reports(_report({"summary": _result(10.0)}), _report({"summary": _result(20.0)}))
+        assert {(f.metric, f.kind) for f in findings} == {("p50_ms", "regression"), ("p95_ms", "regression")}
+        assert findings[0].change_pct == pytest.approx(100.0)
+
+    def test_small_absolute_change_is_ignored(self):
+        # +50% but only +1ms: noise on a fast endpoint
+        findings = compare_reports(_report({"summary": _result(2.0)}), _report({"summary": _result(3.0)}))
+        assert findings == []
+
+    def test_tail_needs_enough_samples(self):
+        baseline = _report({"summary": _result(10.0, samples=10)})
+        current = _report({"summary": _result(10.0, p95=130.0, samples=10)})
+        assert compare_reports(baseline, current) == []
+
+        findings = compare_reports(_report({"summary": _result(10.0)}), _report({"summary": _result(10.0, p95=130.0)}))
+        assert [(f.metric, f.kind) for f in findings] == [("p95_ms", "regression")]
+
+    def test_improvement(self):
+        findings = compare_reports(_report({"tags": _result(100.0)}), _report({"tags": _result(40.0)}))
+        assert {f.kind for f in findings} == {"improvement"}
+
+    def test_any_query_count_increase_is_a_regression(self):
+        findings = compare_reports(_report({"summary": _result(10.0, queries=4)}),
+                                   _report({"summary": _result(10.0, queries=5)}))
+        assert [(f.metric, f.kind) for f in findings] == [("queries_p50", "regression")]
+
+    def test_new_errors_are_a_regression(self):
+        findings = compare_reports(_report({"import": _result(10.0)}), _report({"import": _result(10.0, errors=2)}))
+        assert [(f.metric, f.kind) for f in findings] == [("errors", "regression")]
+
+    def test_dataset_and_scenario_mismatches_are_reported(self):
+        baseline = _report({"summary": _result(10.0), "tags": _result(10.0)})
+        current = _report({"summary": _result(10.0), "search": _result(10.0)},
+                          dataset=DatasetSpec(years=2, per_month=20))
+        findings = compare_reports(baseline, current)
+        assert all(f.kind == "info" for f in findings)
+        assert {(f.scenario, f.metric) for f in findings} == {
+            ("*", "dataset differs from the baseline's"), ("tags", "not run"), ("search", "not in baseline")
+        }
@@ -0,0 +1,206 @@
+"""
+Unit tests for chat session storage (services/chat_memory): the Redis store
+and the in-memory fallback, which mirrors its layout (metadata hash + capped
+message list). The Redis cases run against TEST_REDIS_URL, or fakeredis
+(with lupa) when installed, and are skipped otherwise.
+"""
+import json
+import os
+import uuid
+
+import pytest
+
+from services.chat_memory import (
+    ChatMemoryService, InMemoryChatStore, MessageRole, RedisChatStore, MAX_MESSAGES_PER_SESSION,
+    MAX_SESSIONS_PER_USER
+)
+
+
+@pytest.fixture
+def redis_client():
+    """Redis client and a key prefix of its own (keys removed afterwards); skips without Redis"""
+    redis = pytest.importorskip("redis")
+    client = redis.Redis.from_url(
+        os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15"),
+        decode_responses=True, socket_connect_timeout=0.5
+    )
+    try:
+        client.ping()
+    except redis.RedisError:
+        fakeredis = pytest.importorskip("fakeredis", reason="no Redis server and fakeredis not installed")
+        pytest.importorskip("lupa", reason="fakeredis needs lupa for the Lua scripts")
+        client = fakeredis.FakeRedis(decode_responses=True)
+    prefix = f"test-{uuid.uuid4().hex[:8]}:"
+    yield client, prefix
+    keys = list(client.scan_iter(prefix + "*"))
+    if keys:
+        client.delete(*keys)
+    client.close()
+
+
+@pytest.fixture(params=["memory", "redis"])
+def memory(request):
+    if request.param == "memory":
+        return ChatMemoryService(store=InMemoryChatStore())
+    client, prefix = request.getfixturevalue("redis_client")
+    return ChatMemoryService(store=RedisChatStore(client, key_prefix=prefix))
+
+
+def test_messages_are_appended_and_capped(memory):
+    session = memory.create_session("alice", financial_context={"month": "2025-03"})
+
+    for i in range(MAX_MESSAGES_PER_SESSION + 5):
+        assert memory.add_user_message("alice", session.session_id, f"question {i}") is not None
+
+    stored = memory.get_session("alice", session.session_id)
+    assert len(stored.messages) == MAX_MESSAGES_PER_SESSION
+    assert stored.messages[0].content == "question 5"
+    assert stored.messages[-1].role == MessageRole.USER
+    assert stored.updated_at >= session.updated_at
+    assert stored.financial_context == {"month": "2025-03"}
+
+
+def test_message_for_unknown_session_is_rejected(memory):
+    assert memory.add_assistant_message("alice", "missing", "hello") is None
+    assert memory.get_session("alice", "missing") is None
+
+
+def test_llm_context_reads_only_the_recent_tail(memory):
+    session = memory.create_session("alice")
+    for i in range(8):
+        memory.add_message("alice", session.session_id, MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT,
+                           f"message {i}")
+    memory.get_or_create_session("alice", session.session_id, financial_context={
+        "month": "2025-03", "total_income": 3000, "total_expenses": 2100
+    })
+
+    system_prompt, messages = memory.build_llm_context("alice", session.session_id, "Et ce mois-ci ?")
+
+    assert [m["content"] for m in messages] == [f"message {i}" for i in range(2, 8)] + ["Et ce mois-ci ?"]
+    assert "Revenus totaux: 3000.00 EUR" in system_prompt
+    assert "Assistant: message 7" in system_prompt
+    assert "message 2" not in system_prompt  # 5 derniers messages dans le prompt
+
+
+def test_session_list_is_capped_and_cleared(memory):
+    ids = [memory.create_session("alice").session_id for _ in range(MAX_SESSIONS_PER_USER + 2)]
+
+    assert memory.list_user_sessions("alice") == ids[-MAX_SESSIONS_PER_USER:]
+    assert memory.get_active_session("alice").session_id == ids[-1]
+    assert memory.delete_session("alice", ids[-1])
+    assert memory.get_active_session("alice").session_id == ids[-2]
+
+    assert memory.clear_user_sessions("alice") == MAX_SESSIONS_PER_USER - 1
+    assert memory.list_user_sessions("alice") == []
+
+
+def test_sessions_expire_with_their_ttl():
+    memory = ChatMemoryService(store=InMemoryChatStore(ttl=0))
+    session = memory.create_session("alice")
+
+    assert memory.add_user_message("alice", session.session_id, "hello") is None
+    assert memory.get_stats()["session_count"] == 0
+
+
+def test_redis_appends_do_not_rewrite_the_session(redis_client):
+    client, prefix = redis_client
+    memory = ChatMemoryService(store=RedisChatStore(client, key_prefix=prefix))
+    session = memory.create_session("alice")
+
+    for i in range(3):
+        memory.add_user_message("alice", session.session_id, f"question {i}")
+
+    messages_key = f"{prefix}chat_session:alice:{session.session_id}:messages"
+    assert client.llen(messages_key) == 3
+    assert 0 < client.ttl(messages_key) <= memory._get_store().ttl
+    assert json.loads(client.hget(f"{prefix}chat_session:alice:{session.session_id}:meta", "metadata")) == {}
+
+
+def test_redis_legacy_blob_sessions_are_migrated_on_first_read(redis_client):
+    client, prefix = redis_client
+    legacy = {
+        "session_id": "s1", "user_id": "alice", "created_at": "2025-03-01T10:00:00",
+        "updated_at": "2025-03-01T10:05:00", "financial_context": {"month": "2025-03"}, "metadata": {},
+        "messages": [
+            {"role": "user", "content": f"message {i}", "timestamp": "2025-03-01T10:00:00", "message_id": str(i)}
+            for i in range(MAX_MESSAGES_PER_SESSION + 2)
+        ]
+    }
+    client.setex(f"{prefix}chat_session:alice:s1", 600, json.dumps(legacy))
+    client.setex(f"{prefix}chat_session:alice:sessions", 600, json.dumps(["s1"]))
+    memory = ChatMemoryService(store=RedisChatStore(client, key_prefix=prefix))
+
+    assert memory.list_user_sessions("alice") == ["s1"]
+    session = memory.get_session("alice", "s1")
+
+    assert session.financial_context == {"month": "2025-03"}
+    assert [m.content for m in session.messages] == [f"message {i}" for i in range(2, MAX_MESSAGES_PER_SESSION + 2)]
+    assert not client.exists(f"{prefix}chat_session:alice:s1", f"{prefix}chat_session:alice:sessions")
+    assert 0 < client.ttl(f"{prefix}chat_session:alice:s1:meta") <= 600
+    # Now in the current layout: appends work and reads no longer touch the legacy keys
+    assert memory.add_assistant_message("alice", "s1", "reponse") is not None
+    assert memory.get_session("alice", "s1").messages[-1].content == "reponse"
+
+
+def test_redis_concurrent_legacy_migration_is_applied_once(redis_client, monkeypatch):
+    client, prefix = redis_client
+    legacy = {"session_id": "s1", "user_id": "alice", "messages": [
+        {"role": "user", "content": f"message {i}", "timestamp": "2025-03-01T10:00:00", "message_id": str(i)}
+        for i in range(2)
+    ]}
+    client.setex(f"{prefix}chat_session:alice:s1", 600, json.dumps(legacy))
+    store = RedisChatStore(client, key_prefix=prefix)
+    pipeline = client.pipeline
+
+    def racing_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        multi = pipe.multi
+
+        def another_reader_migrates_first():
+            monkeypatch.setattr(client, "pipeline", pipeline)
+            assert store.load_session("alice", "s1") is not None
+            multi()
+
+        pipe.multi = another_reader_migrates_first
+        return pipe
+
+    monkeypatch.setattr(client, "pipeline", racing_pipeline)
+    meta, messages = store.load_session("alice", "s1")
+
+    # The second MULTI was discarded (WATCH): the messages are not pushed twice
+    assert meta["session_id"] == "s1" and len(messages) == 2
+    assert client.llen(f"{prefix}chat_session:alice:s1:messages") == 2
+    assert not client.exists(f"{prefix}chat_session:alice:s1")
+
+
+def test_redis_delete_removes_a_legacy_session(redis_client):
+    client, prefix = redis_client
+    client.setex(f"{prefix}chat_session:alice:s1", 600, json.dumps({"session_id": "s1", "messages": []}))
+    store = RedisChatStore(client, key_prefix=prefix)
+
+    assert store.delete_session("alice", "s1")
+    assert store.load_session("alice", "s1") is None
+
+
+def test_redis_failed_legacy_migration_keeps_the_legacy_session(redis_client, monkeypatch):
+    client, prefix = redis_client
+    legacy_key = f"{prefix}chat_session:alice:s1"
+    client.setex(legacy_key, 600, json.dumps({"session_id": "s1", "messages": []}))
+    store = RedisChatStore(client, key_prefix=prefix)
+    pipeline = client.pipeline
+
+    def failing_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+
+        def hset(*args, **kwargs):
+            raise ConnectionError("connection lost")
+
+        pipe.hset = hset
+        return pipe
+
+    monkeypatch.setattr(client, "pipeline", failing_pipeline)
+    assert store.load_session("alice", "s1") is None
+    monkeypatch.setattr(client, "pipeline", pipeline)
+
+    assert client.exists(legacy_key)
+    assert store.load_session("alice", "s1")[0]["session_id"] == "s1"
@@ -0,0 +1,171 @@
+"""
+Unit tests for the batched classification suggestions: shared history lookups
+(ExpenseClassificationService.suggest_for_transactions) and the ETag'd
+GET /transactions/prefetch-suggestions (routers/classification).
+"""
+import datetime as dt
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from auth import get_current_user
+from models.database import (
+    Base, Config, CustomProvision, FixedLine, MerchantKnowledgeBase, MLFeedback, MonthDataGeneration, Transaction,
+    create_data_generation_triggers, get_db
+)
+from routers.classification import router
+from services.expense_classification import ExpenseClassificationService, invalidate_classifier_model
+from services.ml_feedback_learning import get_feedback_model_registry
+
+
+@pytest.fixture
+def engine():
+    """In-memory SQLite with transactions and the data generation triggers (no FTS index: LIKE fallback)."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    tables = [t.__table__ for t in (Transaction, Config, FixedLine, CustomProvision, MonthDataGeneration,
+                                    MLFeedback, MerchantKnowledgeBase)]
+    Base.metadata.create_all(engine, tables=tables)
+    with engine.begin() as conn:
+        create_data_generation_triggers(conn)
+    get_feedback_model_registry().invalidate()
+    yield engine
+    get_feedback_model_registry().invalidate()
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def page(session):
+    """A page of 6 rows sharing 2 tags, with 6 months of history for 'abonnement'"""
+    history = [
+        Transaction(month=f"2024-{m:02d}", date_op=dt.date(2024, m, 5), amount=-9.99, label="NETFLIX",
+                    tags="abonnement", expense_type="FIXED", exclude=False)
+        for m in range(1, 7)
+    ]
+    rows = [
+        Transaction(month="2025-03", date_op=dt.date(2025, 3, 1 + i), amount=-10.0 - i,
+                    label=f"CB OP {i}", tags=["abonnement", "courses", ""][i % 3], expense_type="VARIABLE",
+                    exclude=False)
+        for i in range(6)
+    ]
+    session.add_all(history + rows)
+    session.commit()
+    return rows
+
+
+@pytest.fixture
+def client(session):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1, username="test")
+    return TestClient(app)
+
+
+def _count_selects(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def test_history_is_read_once_per_page_and_matches_the_per_tag_reads(engine, session, page):
+    service = ExpenseClassificationService(session)
+    single = {tag: service.get_historical_transactions(tag, limit=10) for tag in ("abonnement", "courses")}
+
+    statements = _count_selects(engine)
+    batch = service.get_historical_transactions_batch(["abonnement", "courses", "abonnement", ""], limit=10)
+    assert len(statements) == 1
+    assert batch == single
+    assert len(batch["abonnement"]) == 8
+
+    rows = session.query(Transaction).filter(Transaction.id.in_([tx.id for tx in page])).all()
+    statements.clear()
+    suggestions = service.suggest_for_transactions(rows)
+    assert len(statements) == 1
+    untagged = [s for s in suggestions.values() if not s.tag_name.startswith(("abonnement", "courses"))]
+    assert {s.tag_name for s in untagged} == {"cb op 2", "cb op 5"}
+    fixed = suggestions[page[0].id]
+    assert fixed.history_count == 8 and fixed.result.stability_score is not None
+
+
+def test_prefetch_returns_the_page_with_previews_and_revalidates_with_etag(client, session, page):
+    ids = [tx.id for tx in page] + [9999]
+    first = client.get("/transactions/prefetch-suggestions", params={"ids": ids})
+    assert first.status_code == 200
+    body = first.json()
+    assert body["missing"] == [9999]
+    assert set(map(int, body["suggestions"])) == {tx.id for tx in page}
+    entry = body["suggestions"][str(page[0].id)]
+    assert entry["tag_analyzed"] == "abonnement" and entry["historical_transactions"] == 8
+    assert entry["preview"]["suggested_type"] == entry["suggested_type"].lower()
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    # Same page, any order: 304 with no body
+    again = client.get("/transactions/prefetch-suggestions", params={"ids": list(reversed(ids))},
+                       headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == etag
+
+    # Any write changes the fingerprint (history spans every month)
+    page[1].tags = "abonnement"
+    session.commit()
+    changed = client.get("/transactions/prefetch-suggestions", params={"ids": ids}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert changed.json()["suggestions"][str(page[1].id)]["tag_analyzed"] == "abonnement"
+
+
+def test_etag_changes_after_a_retrain_or_new_feedback(client, session, page):
+    ids = [tx.id for tx in page]
+    etag = client.get("/transactions/prefetch-suggestions", params={"ids": ids}).headers["etag"]
+
+    invalidate_classifier_model()
+    retrained = client.get("/transactions/prefetch-suggestions", params={"ids": ids}, headers={"If-None-Match": etag})
+    assert retrained.status_code == 200 and retrained.headers["etag"] != etag
+
+    # Feedback written by another worker: seen at the registry's next signature check
+    etag = retrained.headers["etag"]
+    session.add(MLFeedback(transaction_id=ids[0], original_tag="courses", corrected_tag="abonnement",
+                           merchant_pattern="cb op", feedback_type="correction"))
+    session.commit()
+    get_feedback_model_registry().invalidate()
+    with_feedback = client.get("/transactions/prefetch-suggestions", params={"ids": ids},
+                               headers={"If-None-Match": etag})
+    assert with_feedback.status_code == 200 and with_feedback.headers["etag"] != etag
+
+
+def test_per_row_endpoints_serve_the_same_classification(client, page):
+    ids = [tx.id for tx in page]
+    prefetch = client.get("/transactions/prefetch-suggestions", params={"ids": ids}).json()["suggestions"]
+
+    bulk = client.post("/bulk-suggestions", json={"transaction_ids": ids + [9999]}).json()
+    assert bulk["errors"] == [{"transaction_id": "9999", "error": "Transaction not found"}]
+    for tx_id, suggestion in bulk["suggestions"].items():
+        assert {k: v for k, v in prefetch[tx_id].items() if k != "preview"} == suggestion
+
+    hover = client.post("/transactions/hover-preview", json={"transaction_ids": ids[:3]}).json()
+    assert hover["previews"] == {str(tx_id): prefetch[str(tx_id)]["preview"] for tx_id in ids[:3]}
+
+    instant = client.get(f"/transactions/{ids[0]}/instant-suggestion").json()
+    assert instant["confidence_score"] == prefetch[str(ids[0])]["confidence_score"]
+    assert client.get("/transactions/9999/instant-suggestion").status_code == 404
@@ -0,0 +1,195 @@
+"""
+Unit tests for the SQLite engine layer (models/database): one writer
+connection opening BEGIN IMMEDIATE at the first write, behind the write
+lock of the request sessions, a bounded pool of query_only readers, and
+the single shared connection fallbacks.
+"""
+import sqlite3
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models.database as database
+from config.settings import settings
+from models.database import Base, Config
+
+
+@pytest.fixture
+def engines(tmp_path, monkeypatch):
+    """Writer and read engines on a file database, read pool of 2"""
+    path = tmp_path / "budget.db"
+    monkeypatch.setattr(settings.database, "database_url", f"sqlite:///{path}")
+    monkeypatch.setattr(database, "DB_READ_POOL_SIZE", 2)
+    monkeypatch.setattr(database, "DB_POOL_TIMEOUT", 0.2)
+    writer = database._create_standard_engine()
+    reader = database.create_read_engine(writer)
+    Base.metadata.create_all(writer, tables=[Config.__table__])
+    yield writer, reader, str(path)
+    reader.dispose()
+    writer.dispose()
+
+
+def test_file_database_detection():
+    assert database._is_file_database("sqlite:///./budget.db")
+    assert database._is_file_database("sqlite:////var/lib/budget/budget.db")
+    assert not database._is_file_database("sqlite://")
+    assert not database._is_file_database("sqlite:///:memory:")
+    assert not database._is_file_database("sqlite:///file:shared?mode=memory&cache=shared&uri=true")
+
+
+def test_pools(engines):
+    writer, reader, _ = engines
+    assert reader is not writer
+    assert writer.pool.size() == 1
+    assert reader.pool.size() == 2
+    assert writer.pool._max_overflow == reader.pool._max_overflow == 0
+
+
+def test_reader_is_query_only(engines):
+    writer, reader, _ = engines
+    with sessionmaker(bind=writer)() as db:
+        db.add(Config())
+        db.commit()
+
+    with sessionmaker(bind=reader)() as db:
+        assert db.query(Config).count() == 1
+        db.add(Config())
+        with pytest.raises(OperationalError, match="readonly"):
+            db.commit()
+
+
+def test_write_lock_taken_at_first_write(engines):
+    writer, _, path = engines
+    other = sqlite3.connect(path, timeout=0)
+    db = sessionmaker(bind=writer)()
+    try:
+        # A read in a write session takes no lock
+        db.query(Config).count()
+        other.execute("INSERT INTO config DEFAULT VALUES")
+        other.commit()
+
+        db.add(Config())
+        db.flush()
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            other.execute("INSERT INTO config DEFAULT VALUES")
+        db.commit()
+    finally:
+        db.close()
+        other.close()
+    with writer.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM config")).scalar() == 2
+
+
+def test_readers_run_while_a_write_is_pending(engines):
+    writer, reader, _ = engines
+    db = sessionmaker(bind=writer)()
+    db.add(Config())
+    db.flush()
+
+    counts = []
+
+    def read():
+        with reader.connect() as conn:
+            counts.append(conn.execute(text("SELECT COUNT(*) FROM config")).scalar())
+
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # WAL: the readers see the last committed state, not the pending row
+    assert counts == [0, 0]
+    db.commit()
+    db.close()
+
+
+def test_writers_queue_on_the_single_connection(engines):
+    writer, _, _ = engines
+    first = sessionmaker(bind=writer)()
+    first.query(Config).count()  # holds the writer connection
+    second = sessionmaker(bind=writer)()
+    try:
+        with pytest.raises(Exception, match="QueuePool limit"):
+            second.query(Config).count()
+    finally:
+        second.close()
+        first.close()
+
+
+@pytest.fixture
+def write_sessions(engines, monkeypatch):
+    """get_write_db on the writer engine of `engines`"""
+    writer, _, _ = engines
+    monkeypatch.setattr(database, "SessionLocal",
+                        sessionmaker(class_=database.WriteSession, autoflush=False, bind=writer))
+    return writer
+
+
+def test_write_sessions_wait_for_the_write_lock(write_sessions):
+    first = database.get_write_db()
+    db = next(first)
+    db.add(Config())
+    db.flush()
+
+    done = threading.Event()
+
+    def second_request():
+        second = database.get_write_db()
+        with next(second) as other:
+            other.add(Config())
+            other.commit()
+        second.close()
+        done.set()
+
+    thread = threading.Thread(target=second_request)
+    thread.start()
+    # Waits on the lock, before taking the connection
+    assert not done.wait(0.1)
+    db.commit()
+    first.close()
+    thread.join(timeout=5)
+    assert done.is_set()
+    with write_sessions.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM config")).scalar() == 2
+
+
+def test_write_lock_released_when_the_session_closes(write_sessions):
+    first = database.get_write_db()
+    db = next(first)
+    db.query(Config).count()
+    # An AI route closing its session before awaiting the LLM
+    db.close()
+
+    second = database.get_write_db()
+    assert next(second).query(Config).count() == 0
+    second.close()
+    first.close()
+    assert not database._write_lock.locked()
+
+
+def test_write_lock_timeout(write_sessions, monkeypatch):
+    monkeypatch.setattr(database, "DB_POOL_TIMEOUT", 0.05)
+    first = database.get_write_db()
+    next(first)
+    with pytest.raises(PoolTimeoutError, match="Writer session"):
+        next(database.get_write_db())
+    first.close()
+    assert not database._write_lock.locked()
+
+
+@pytest.mark.parametrize("url, read_pool_size", [("sqlite:///:memory:", 4), ("file", 0)])
+def test_single_shared_connection_fallback(tmp_path, monkeypatch, url, read_pool_size):
+    if url == "file":
+        url = f"sqlite:///{tmp_path / 'budget.db'}"
+    monkeypatch.setattr(settings.database, "database_url", url)
+    monkeypatch.setattr(database, "DB_READ_POOL_SIZE", read_pool_size)
+    writer = database._create_standard_engine()
+    try:
+        assert isinstance(writer.pool, StaticPool)
+        assert database.create_read_engine(writer) is writer
+    finally:
+        writer.dispose()
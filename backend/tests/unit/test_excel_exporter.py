@@ -0,0 +1,86 @@
+"""
+Unit tests for the streaming (constant memory) Excel exporter.
+"""
+import datetime as dt
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("xlsxwriter")
+
+import export_engine
+from export_engine import ExcelExporter, ExportFilters
+from models.database import Base, Config, FixedLine, Transaction
+
+
+@pytest.fixture
+def session():
+    """In-memory SQLite session with the tables read by the Excel export."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[Transaction.__table__, Config.__table__, FixedLine.__table__])
+    db = sessionmaker(bind=engine)()
+    db.add(Config(member1="Alice", member2="Bob", rev1=3000.0, rev2=2500.0))
+    db.add(FixedLine(label="Loyer", amount=900.0, freq="mensuelle", active=True))
+    db.add_all([
+        Transaction(month="2025-01", date_op=dt.date(2025, 1, 3), label="CARREFOUR", amount=-40.0,
+                    category="Courses", is_expense=True, exclude=False),
+        Transaction(month="2025-01", date_op=dt.date(2025, 1, 5), label="SALAIRE", amount=2500.0,
+                    category="", is_expense=False, exclude=False),
+        Transaction(month="2025-01", date_op=dt.date(2025, 1, 9), label="VIREMENT INTERNE", amount=-300.0,
+                    category="", is_expense=True, exclude=True),
+        Transaction(month="2025-02", date_op=dt.date(2025, 2, 1), label="LIDL", amount=-20.0,
+                    category="Courses", is_expense=True, exclude=False),
+        Transaction(month="2025-02", date_op=dt.date(2025, 2, 2), label="PHARMACIE", amount=-15.0,
+                    category=None, is_expense=True, exclude=False),
+    ])
+    db.commit()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _export(session, monkeypatch, **filters):
+    # Tiny chunks so that the chunked cursor really spans several batches
+    monkeypatch.setattr(export_engine, "EXCEL_CHUNK_SIZE", 2)
+    with ExcelExporter(session, "alice").export(ExportFilters(**filters)) as output:
+        workbook = openpyxl.load_workbook(output)
+    return {ws.title: list(ws.iter_rows(values_only=True)) for ws in workbook.worksheets}
+
+
+def test_transactions_sheet_streams_every_filtered_row(session, monkeypatch):
+    sheets = _export(session, monkeypatch, exclude_hidden=False)
+
+    rows = sheets["Transactions"]
+    assert rows[0][:3] == ("Date", "Mois", "Libellé")
+    assert [r[2] for r in rows[1:]] == ["PHARMACIE", "LIDL", "VIREMENT INTERNE", "SALAIRE", "CARREFOUR"]
+
+
+def test_summary_sheet_comes_from_monthly_aggregates(session, monkeypatch):
+    sheets = _export(session, monkeypatch, exclude_hidden=False)
+
+    rows = sheets["Synthèse Mensuelle"]
+    # Mois, Revenus, Dépenses, Dépenses Exclues, Net, Nb Transactions
+    assert rows[1] == ("2025-01", 2500, 40, 300, 2460, 3)
+    assert rows[2] == ("2025-02", 0, 35, 0, -35, 2)
+
+
+def test_analytics_sheet_groups_expenses_by_category(session, monkeypatch):
+    sheets = _export(session, monkeypatch)
+
+    rows = [r for r in sheets["Analytics"][3:] if r[0]]
+    assert rows == [("Courses", 60, 2, 30), ("Autre", 15, 1, 15)]
+
+
+def test_month_filter_applies_to_every_sheet(session, monkeypatch):
+    sheets = _export(session, monkeypatch, months=["2025-02"])
+
+    assert len(sheets["Transactions"]) == 3
+    assert [r[0] for r in sheets["Synthèse Mensuelle"][1:]] == ["2025-02"]
+    assert sheets["Configuration"][2][:2] == ("Membre 1", "Alice")
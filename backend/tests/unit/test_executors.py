@@ -0,0 +1,89 @@
+"""
+Unit tests for the executor layer (DB thread pool, chunked CPU jobs) used to
+keep blocking work off the event loop.
+"""
+import asyncio
+import contextvars
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import pytest_asyncio
+
+from services.executors import ExecutorLayer, classify_fast_chunk, shutdown_executor
+
+request_label = contextvars.ContextVar("request_label", default=None)
+
+
+def _double_chunk(items, factor):
+    return [item * factor for item in items]
+
+
+@pytest_asyncio.fixture
+async def executors():
+    layer = ExecutorLayer(db_workers=2, chunk_size=4, inline_max_items=2, cpu_executor=ThreadPoolExecutor(2))
+    yield layer
+    layer.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_map_cpu_chunks_keeps_input_order(executors):
+    results = await executors.map_cpu_chunks(_double_chunk, list(range(10)), 3)
+
+    assert results == [item * 3 for item in range(10)]
+    assert executors.stats["cpu_chunks"] == 3
+    # The last chunk (2 items) is too small for the process pool
+    assert executors.stats["inline_cpu_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_db_runs_off_the_loop_with_the_caller_context(executors):
+    request_label.set("GET /dashboard/summary")
+
+    thread_name, label = await executors.run_db(lambda: (threading.current_thread().name, request_label.get()))
+
+    assert thread_name.startswith("db-executor")
+    assert label == "GET /dashboard/summary"
+
+
+@pytest.mark.asyncio
+async def test_event_loop_keeps_ticking_during_blocking_work(executors):
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await executors.run_db(time.sleep, 0.2)
+    task.cancel()
+
+    assert ticks >= 10
+
+
+def test_classify_fast_chunk_returns_results_by_id():
+    results = classify_fast_chunk([(1, "PRLV NETFLIX", -13.49), (2, "CB CARREFOUR MARKET", -54.2)], True)
+
+    assert [transaction_id for transaction_id, _ in results] == [1, 2]
+    assert results[0][1].suggested_tag == "streaming"
+    assert results[1][1].suggested_tag == "courses"
+    assert results[0][1].expense_type in ("FIXED", "VARIABLE")
+
+
+@pytest.mark.skipif(sys.version_info < (3, 9), reason="cancel_futures needs Python 3.9")
+def test_shutdown_executor_drops_queued_calls():
+    executor = ThreadPoolExecutor(1)
+    release = threading.Event()
+    running = executor.submit(release.wait, 5)
+    queued = executor.submit(lambda: "ran")
+
+    shutdown_executor(executor)
+    release.set()
+
+    assert running.result(timeout=5) is True
+    assert queued.cancelled()
+    shutdown_executor(None)
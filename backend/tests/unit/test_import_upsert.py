@@ -0,0 +1,141 @@
+"""
+Unit tests for the incremental (upsert) import mode keyed on Transaction.row_id.
+"""
+import datetime as dt
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base, Transaction
+from services.import_service import assign_row_ids, upsert_transactions
+from utils.core_functions import compute_row_id
+
+
+@pytest.fixture
+def session():
+    """In-memory SQLite session with the transactions table only."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[Transaction.__table__])
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _row(day, label, amount, month="2025-01"):
+    return {
+        "date_op": dt.date(2025, 1, day),
+        "label": label,
+        "amount": amount,
+        "month": month,
+    }
+
+
+def _january_export():
+    return [
+        _row(2, "CARTE CARREFOUR", -45.20),
+        _row(3, "CARTE BOULANGERIE", -3.10),
+        _row(3, "CARTE BOULANGERIE", -3.10),  # same line twice the same day
+        _row(5, "VIR SALAIRE", 2500.0),
+    ]
+
+
+class TestRowId:
+    def test_row_id_is_deterministic_and_ignores_cosmetic_label_changes(self):
+        a = compute_row_id(dt.date(2025, 1, 2), "Carte  carrefour ", -45.2)
+        b = compute_row_id(dt.date(2025, 1, 2), "CARTE CARREFOUR", -45.20)
+        assert a == b
+        assert a != compute_row_id(dt.date(2025, 1, 2), "CARTE CARREFOUR", -45.21)
+
+    def test_identical_lines_get_distinct_row_ids(self):
+        rows = assign_row_ids(_january_export())
+        assert len({r["row_id"] for r in rows}) == len(rows)
+
+
+class TestUpsertTransactions:
+    def test_first_import_inserts_everything(self, session):
+        summary = upsert_transactions(session, _january_export(), "imp-1")
+        session.commit()
+
+        assert summary["inserted"] == 4
+        assert summary["updated"] == 0
+        assert summary["months_touched"] == ["2025-01"]
+        assert session.query(Transaction).count() == 4
+
+    def test_overlapping_reimport_only_touches_new_rows(self, session):
+        upsert_transactions(session, _january_export(), "imp-1")
+        session.commit()
+        # User classification must survive the re-import
+        tx = session.query(Transaction).filter(Transaction.label == "CARTE CARREFOUR").one()
+        tx.tags = "courses"
+        tx_id = tx.id
+        session.commit()
+
+        rows = _january_export() + [_row(8, "CARTE PHARMACIE", -12.0)]
+        summary = upsert_transactions(session, rows, "imp-2")
+        session.commit()
+
+        assert summary["inserted"] == 1
+        assert summary["updated"] == 0
+        assert summary["unchanged"] == 4
+        assert session.query(Transaction).count() == 5
+        kept = session.get(Transaction, tx_id)
+        assert kept.tags == "courses"
+        assert kept.import_id == "imp-1"
+
+    def test_unchanged_reimport_touches_nothing(self, session):
+        upsert_transactions(session, _january_export(), "imp-1")
+        session.commit()
+
+        summary = upsert_transactions(session, _january_export(), "imp-2")
+
+        assert summary["months_touched"] == []
+        assert summary["unchanged"] == 4
+
+    def test_label_formatting_change_is_an_update(self, session):
+        upsert_transactions(session, _january_export(), "imp-1")
+        session.commit()
+
+        rows = _january_export()
+        rows[0]["label"] = "Carte Carrefour"
+        summary = upsert_transactions(session, rows, "imp-2")
+        session.commit()
+
+        assert summary["updated"] == 1
+        assert summary["inserted"] == 0
+        assert session.query(Transaction).filter(Transaction.label == "Carte Carrefour").count() == 1
+
+    def test_delete_missing_is_limited_to_file_period(self, session):
+        upsert_transactions(session, _january_export() + [_row(28, "CARTE CINEMA", -20.0)], "imp-1")
+        session.commit()
+
+        # Export covering 2-5 January where the CARREFOUR line disappeared
+        rows = [r for r in _january_export() if r["label"] != "CARTE CARREFOUR"]
+        rows.append(_row(2, "CARTE TABAC", -8.0))
+        summary = upsert_transactions(session, rows, "imp-2", delete_missing=True)
+        session.commit()
+
+        assert summary["deleted"] == 1
+        assert summary["inserted"] == 1
+        labels = [t.label for t in session.query(Transaction).all()]
+        assert "CARTE CARREFOUR" not in labels
+        assert "CARTE CINEMA" in labels  # 28 January is outside the file's period
+
+    def test_legacy_rows_without_row_id_are_backfilled(self, session):
+        for row in _january_export():
+            session.add(Transaction(is_expense=row["amount"] < 0, **row))
+        session.commit()
+
+        summary = upsert_transactions(session, _january_export(), "imp-1")
+        session.commit()
+
+        assert summary["inserted"] == 0
+        assert summary["backfilled"] == 4
+        assert summary["months_touched"] == []
+        assert session.query(Transaction).filter(Transaction.row_id.is_(None)).count() == 0
@@ -0,0 +1,87 @@
+"""
+Unit tests for lazy router loading (middleware/lazy_routers).
+"""
+import sys
+import types
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from middleware.lazy_routers import LazyRouterMiddleware, LazyRouterRegistry
+
+
+@pytest.fixture
+def heavy_module(monkeypatch):
+    """Stand-in for a router module with expensive imports"""
+    module = types.ModuleType("heavy_router_for_tests")
+    module.router = APIRouter(prefix="/heavy")
+
+    @module.router.get("/ping")
+    def ping():
+        return {"pong": True}
+
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    return module
+
+
+def _app(*modules, enabled=True):
+    app = FastAPI()
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+
+    registry = LazyRouterRegistry(app, enabled=enabled)
+    for name, prefixes in modules:
+        registry.register(name, prefixes, tags=["heavy"])
+    registry.install_openapi_hook()
+    app.add_middleware(LazyRouterMiddleware, registry=registry)
+    return app, registry
+
+
+def test_router_is_mounted_on_first_request_under_its_prefix(heavy_module):
+    app, registry = _app(("heavy_router_for_tests", ("/heavy",)))
+    client = TestClient(app)
+
+    assert client.get("/health").status_code == 200
+    assert client.get("/heavyweight").status_code == 404
+    assert registry.has_pending()
+
+    assert client.get("/heavy/ping").json() == {"pong": True}
+    assert not registry.has_pending()
+    assert client.get("/heavy/ping").status_code == 200
+
+
+def test_openapi_schema_includes_lazy_routes(heavy_module):
+    app, registry = _app(("heavy_router_for_tests", ("/heavy",)))
+
+    schema = TestClient(app).get("/openapi.json").json()
+
+    assert "/heavy/ping" in schema["paths"]
+    assert registry.get_stats()["loaded"] == 1
+
+
+def test_failed_import_answers_503_without_retrying(monkeypatch):
+    app, registry = _app(("module_that_does_not_exist", ("/missing",)))
+    client = TestClient(app)
+
+    assert client.get("/missing/anything").status_code == 503
+    assert client.get("/missing/anything").status_code == 503
+    assert registry.get_stats()["failed"] == 1
+    assert client.get("/health").status_code == 200
+
+
+def test_disabled_registry_loads_everything_at_registration(heavy_module):
+    app, registry = _app(("heavy_router_for_tests", ("/heavy",)), enabled=False)
+
+    assert not registry.has_pending()
+    assert any(getattr(route, "path", None) == "/heavy/ping" for route in app.routes)
+
+
+def test_background_warm_up_loads_pending_routers(heavy_module):
+    app, registry = _app(("heavy_router_for_tests", ("/heavy",)))
+
+    registry.warm_up_in_background().join(timeout=5)
+
+    assert registry.get_stats()["routers"]["heavy_router_for_tests"]["loaded"]
@@ -0,0 +1,119 @@
+"""
+Unit tests for the in-memory merchant index (exact dict, trigram fuzzy
+candidates, batch lookups, incremental refresh).
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import services.merchant_knowledge_service as module
+from models.database import Base, MerchantKnowledgeBase
+from services.expense_classification import ExpenseClassificationService
+from services.merchant_knowledge_service import MerchantKnowledgeService, get_merchant_index
+
+
+@pytest.fixture
+def session():
+    """In-memory SQLite session with the merchant knowledge table."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[MerchantKnowledgeBase.__table__])
+    db = sessionmaker(bind=engine)()
+    # Plenty of frequently used merchants: the old fuzzy search only scanned the top 100
+    for i in range(150):
+        db.add(MerchantKnowledgeBase(
+            merchant_name=f"Enseigne {i}", normalized_name=f"enseigne {i}",
+            confidence_score=0.8, usage_count=50, is_active=True
+        ))
+    db.commit()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(module, "_merchant_index", None)
+    return MerchantKnowledgeService()
+
+
+def test_fuzzy_search_covers_the_whole_table(session, service):
+    service.create_merchant_entry(session, "Boulangerie Dupont", category="alimentation", confidence_score=0.9)
+    session.query(MerchantKnowledgeBase).filter_by(normalized_name="boulangerie dupont").update({"usage_count": 1})
+    session.commit()
+
+    results = service.search_merchant_fuzzy(session, "CB BOULANGERIE DUPONT 12/03")
+
+    assert results[0]['normalized_name'] == "boulangerie dupont"
+    assert results[0]['similarity_score'] >= 0.8
+
+
+def test_exact_match_comes_from_the_name_dict(session, service):
+    results = service.search_merchant_fuzzy(session, "ENSEIGNE 42")
+
+    assert [r['normalized_name'] for r in results] == ["enseigne 42"]
+    assert results[0]['similarity_score'] == 1.0
+
+
+def test_batch_lookup_resolves_many_labels_with_constant_queries(session, service, query_budget):
+    service.search_merchant_fuzzy(session, "warm up")  # builds the index
+    labels = [f"Enseigne {i % 150}" for i in range(2000)] + ["inconnu total", ""]
+
+    with query_budget(max_queries=0):
+        results = service.search_merchants_batch(session, labels)
+
+    assert len(results) == 152
+    assert results["Enseigne 7"][0]['normalized_name'] == "enseigne 7"
+    assert results["inconnu total"] == [] and results[""] == []
+
+
+def test_classification_enhancements_of_a_month_come_from_the_index(session, service, query_budget):
+    service.create_merchant_entry(session, "Boulangerie Dupont", business_type="bakery", confidence_score=0.9)
+    session.query(MerchantKnowledgeBase).filter_by(normalized_name="boulangerie dupont").update(
+        {"suggested_expense_type": "VARIABLE"}
+    )
+    session.commit()
+    get_merchant_index().ensure_fresh(session, force=True)
+    classifier = ExpenseClassificationService(session)
+    labels = ["CB BOULANGERIE DUPONT 12/03/25", "PRLV ENSEIGNE 120", "VIR INCONNU"] * 100
+
+    with query_budget(max_queries=0):
+        enhancements = classifier.get_web_research_enhancements(labels)
+
+    assert enhancements["CB BOULANGERIE DUPONT 12/03/25"]["business_type"] == "bakery"
+    assert enhancements["CB BOULANGERIE DUPONT 12/03/25"]["suggested_expense_type"] == "VARIABLE"
+    assert enhancements["PRLV ENSEIGNE 120"]["merchant_name"] == "Enseigne 120"
+    assert enhancements["VIR INCONNU"] is None
+    assert classifier.get_web_research_enhancement("PRLV ENSEIGNE 120")["confidence"] == 0.8
+
+
+def test_writes_through_the_service_update_the_index_incrementally(session, service):
+    service.search_merchant_fuzzy(session, "warm up")
+    merchant = service.create_merchant_entry(session, "Cave Martin SARL", confidence_score=0.9)
+    service.update_merchant_entry(session, merchant.id, category="boissons")
+
+    results = service.search_merchant_fuzzy(session, "cave martin")
+
+    assert results[0]['category'] == "boissons"
+    assert get_merchant_index().stats['builds'] == 1
+
+
+def test_rows_written_elsewhere_are_picked_up_by_delta_refresh(session, service):
+    service.search_merchant_fuzzy(session, "warm up")
+    index = get_merchant_index()
+    index.check_interval = 0
+    session.add(MerchantKnowledgeBase(
+        merchant_name="Garage Leroy", normalized_name="garage leroy", confidence_score=0.9, is_active=True
+    ))
+    session.query(MerchantKnowledgeBase).filter_by(normalized_name="enseigne 3").update({"is_active": False})
+    session.commit()
+
+    assert service.search_merchant_fuzzy(session, "garage leroy")[0]['merchant_name'] == "Garage Leroy"
+    remaining = service.search_merchant_fuzzy(session, "enseigne 3")
+    assert "enseigne 3" not in {r['normalized_name'] for r in remaining}
+    assert index.stats['builds'] == 1
+    assert index.stats['delta_refreshes'] >= 1
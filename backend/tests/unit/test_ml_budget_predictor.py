@@ -0,0 +1,133 @@
+"""
+Unit tests for the vectorized budget predictor (ml_budget_predictor).
+Training is checked against the per-category scikit-learn models it replaces.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_budget_predictor import BudgetIntelligenceSystem
+
+sklearn = pytest.importorskip("sklearn")
+from sklearn.linear_model import LinearRegression  # noqa: E402
+from sklearn.preprocessing import PolynomialFeatures  # noqa: E402
+
+
+@pytest.fixture
+def transactions():
+    """Three years of expenses: regular, trending, sparse and too-short categories."""
+    rng = np.random.default_rng(7)
+    months = pd.period_range("2022-01", "2024-12", freq="M")
+    rows = []
+    for category, base, slope, keep_ratio in (
+        ("Alimentation", 400, 0, 1.0),
+        ("Carburant", 120, 6, 1.0),
+        ("Loisirs", 200, -3, 0.6),
+        ("Santé", 60, 0, 0.3),
+        ("Vacances", 900, 0, 0.15),
+        ("", 50, 0, 1.0),
+    ):
+        for position, month in enumerate(months):
+            if rng.random() > keep_ratio:
+                continue
+            for _ in range(int(rng.integers(1, 6))):
+                day = int(rng.integers(1, 28))
+                rows.append({
+                    "date_op": f"{month}-{day:02d}",
+                    "category": category,
+                    "amount": -float(base + slope * position + rng.normal(0, base * 0.1)) / 3,
+                    "is_expense": 1,
+                })
+    rows.append({"date_op": "2024-01-05", "category": "Salaire", "amount": 2500.0, "is_expense": 0})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def system(transactions):
+    budget_system = BudgetIntelligenceSystem()
+    budget_system.fit(transactions.copy(), {"Alimentation": 350})
+    return budget_system
+
+
+def _sklearn_models(system):
+    """Previous training loop: one PolynomialFeatures + LinearRegression per category"""
+    models = {}
+    for category in system.historical_data["category"].unique():
+        data = system.historical_data[system.historical_data["category"] == category]
+        if category == "" or len(data) < system.config["min_historical_months"]:
+            continue
+        X = np.column_stack([np.arange(len(data)), data["month_numeric"], data["is_holiday_month"],
+                             data["transaction_count"]])
+        poly = PolynomialFeatures(degree=2, interaction_only=True)
+        X_poly = poly.fit_transform(X)
+        model = LinearRegression().fit(X_poly, data["total_spent"].values)
+        models[category] = (poly, model, X_poly, data["total_spent"].values)
+    return models
+
+
+def test_batched_fit_matches_per_category_sklearn_models(system):
+    reference = _sklearn_models(system)
+
+    assert set(system.category_models) == set(reference)
+    assert {"Alimentation", "Carburant", "Loisirs", "Santé"} <= set(reference)
+    for category, (poly, model, X_poly, y) in reference.items():
+        info = system.category_models[category]
+        assert info["r2_score"] == pytest.approx(model.score(X_poly, y), abs=1e-6)
+        assert info["mse"] == pytest.approx(np.mean((y - model.predict(X_poly)) ** 2), rel=1e-6, abs=1e-6)
+        assert info["monthly_average"] == pytest.approx(np.mean(y))
+        assert info["monthly_std"] == pytest.approx(np.std(y))
+        assert info["last_values"] == pytest.approx(y[-3:].tolist())
+
+        for target in (datetime(2025, 2, 10), datetime(2025, 8, 10)):
+            X_new = np.array([[3, target.month, int(target.month in (7, 8, 12)), 10]])
+            expected = max(0, model.predict(poly.transform(X_new))[0])
+            assert system._get_model_prediction(category, target) == pytest.approx(expected, rel=1e-6, abs=1e-6)
+
+
+def test_trends_match_a_linear_fit_per_category(system):
+    system.config["trend_sensitivity"] = 0.01
+    system._train_category_models()
+
+    trends = {}
+    for category, (_, _, _, y) in _sklearn_models(system).items():
+        slope = np.polyfit(np.arange(len(y)), y, 1)[0] / np.mean(y)
+        trends[category] = "stable" if abs(slope) < 0.01 else ("increasing" if slope > 0 else "decreasing")
+
+    assert {category: info["trend"] for category, info in system.category_models.items()} == trends
+    assert trends["Carburant"] == "increasing"
+
+
+def test_month_end_projection_combines_extrapolation_and_model(system):
+    current_date = datetime(2025, 2, 14)
+    spending = {"Alimentation": 180.0, "Carburant": 90.0, "Inconnue": 28.0}
+
+    predictions = {p.category: p for p in system.predict_month_end(current_date, spending)}
+
+    progress = 14 / 28
+    model = system._get_model_prediction("Alimentation", current_date)
+    assert predictions["Alimentation"].predicted_month_end == pytest.approx(0.7 * 180 / progress + 0.3 * model)
+    assert predictions["Inconnue"].predicted_month_end == pytest.approx(56.0)
+    assert predictions["Inconnue"].trend_direction == "unknown"
+    assert predictions["Inconnue"].confidence == 0.5
+    ordered = [p.predicted_month_end for p in system.predict_month_end(current_date, spending)]
+    assert ordered == sorted(ordered, reverse=True)
+
+
+def test_alerts_are_sorted_by_severity_then_projection(system):
+    current_date = datetime(2025, 2, 5)
+    average = system.category_models["Carburant"]["monthly_average"]
+    spending = {"Alimentation": 900.0, "Carburant": average * 1.6, "Inconnue": 10.0}
+
+    alerts = system.generate_alerts(current_date, spending)
+
+    assert [(a.alert_type, a.category, a.severity) for a in alerts[:2]] == [
+        ("overspend_risk", "Alimentation", "high"),
+        ("overspend_risk", "Carburant", "high"),
+    ]
+    assert alerts[0].threshold == 350
+    assert ("unusual_spike", "Carburant") in {(a.alert_type, a.category) for a in alerts}
+    assert [a.severity for a in alerts] == sorted((a.severity for a in alerts),
+                                                  key={"high": 0, "medium": 1, "low": 2}.get)
+    assert all(a.days_remaining == 23 for a in alerts)
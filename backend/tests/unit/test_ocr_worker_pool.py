@@ -0,0 +1,108 @@
+"""
+Unit tests for the OCR worker pool (queue back-pressure, result cache, dedupe).
+A thread pool and a fake OCR job stand in for the EasyOCR process pool.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.ocr_service import ReceiptData
+from services.ocr_worker_pool import OCRWorkerPool, OCRQueueFullError
+
+
+class FakeOCRJob:
+    """Counts calls and optionally blocks until released."""
+
+    def __init__(self, block: bool = False):
+        self.calls = 0
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, image_bytes: bytes) -> ReceiptData:
+        self.calls += 1
+        self.release.wait(timeout=5)
+        return ReceiptData(merchant="CARREFOUR", amount=12.5, raw_text=image_bytes.decode())
+
+
+def _make_pool(job, **kwargs):
+    return OCRWorkerPool(executor=ThreadPoolExecutor(max_workers=2), job=job, warmup_job=lambda: True, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_repeat_scan_is_served_from_cache():
+    job = FakeOCRJob()
+    pool = _make_pool(job, workers=1)
+    try:
+        first, first_cached = await pool.scan(b"receipt-1")
+        second, second_cached = await pool.scan(b"receipt-1")
+    finally:
+        pool.shutdown()
+
+    assert first.merchant == "CARREFOUR"
+    assert (first_cached, second_cached) == (False, True)
+    assert second is first
+    assert job.calls == 1
+    assert pool.stats["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_scans_share_one_job():
+    job = FakeOCRJob(block=True)
+    pool = _make_pool(job, workers=1)
+    try:
+        tasks = [asyncio.create_task(pool.scan(b"same")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        job.release.set()
+        results = await asyncio.gather(*tasks)
+    finally:
+        pool.shutdown()
+
+    assert job.calls == 1
+    assert [cached for _, cached in results].count(False) == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_new_scans():
+    job = FakeOCRJob(block=True)
+    pool = _make_pool(job, workers=1, max_pending=1)
+    try:
+        running = asyncio.create_task(pool.scan(b"a"))
+        await asyncio.sleep(0.05)  # "a" is picked up by the dispatcher
+        waiting = asyncio.create_task(pool.scan(b"b"))
+        await asyncio.sleep(0)
+        with pytest.raises(OCRQueueFullError):
+            await pool.scan(b"c")
+        job.release.set()
+        await asyncio.gather(running, waiting)
+    finally:
+        pool.shutdown()
+
+    assert pool.stats["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_is_lru_bounded():
+    pool = _make_pool(FakeOCRJob(), workers=1, cache_size=2)
+    try:
+        for image in (b"1", b"2", b"1", b"3"):
+            await pool.scan(image)
+        _, cached_1 = await pool.scan(b"1")
+        stats = pool.get_stats()
+    finally:
+        pool.shutdown()
+
+    assert cached_1 is True  # "1" was refreshed, "2" was evicted
+    assert stats["cache_entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_warm_up_marks_pool_ready():
+    pool = _make_pool(FakeOCRJob(), workers=2)
+    try:
+        assert await pool.warm_up() is True
+        assert pool.get_stats()["warmed"] is True
+    finally:
+        pool.shutdown()
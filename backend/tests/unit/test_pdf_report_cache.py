@@ -0,0 +1,151 @@
+"""
+Unit tests for month data generations and the cached PDF report service.
+"""
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models.database as database
+from models.database import (
+    Base, Config, CustomProvision, FixedLine, MonthDataGeneration, Transaction,
+    create_data_generation_triggers
+)
+import services.pdf_report_cache as pdf_report_cache
+from services.data_generation import get_data_generation
+from services.executors import ExecutorLayer
+from services.pdf_report_cache import PDFReportCache
+
+
+@pytest.fixture
+def session():
+    """In-memory SQLite session with the tables used by monthly reports."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    tables = [t.__table__ for t in (Transaction, Config, FixedLine, CustomProvision, MonthDataGeneration)]
+    Base.metadata.create_all(engine, tables=tables)
+    with engine.begin() as conn:
+        create_data_generation_triggers(conn)
+    db = sessionmaker(bind=engine)()
+    db.add(Config())
+    db.add_all([
+        Transaction(month="2025-01", date_op=dt.date(2025, 1, 3), label="CARREFOUR", amount=-42.0,
+                    is_expense=True, exclude=False, tags="courses"),
+        Transaction(month="2025-02", date_op=dt.date(2025, 2, 3), label="SNCF", amount=-80.0,
+                    is_expense=True, exclude=False, tags="transport"),
+    ])
+    db.commit()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def user():
+    return SimpleNamespace(username="alice")
+
+
+class TestDataGeneration:
+    def test_generation_moves_only_for_written_month(self, session):
+        jan, feb = get_data_generation(session, "2025-01"), get_data_generation(session, "2025-02")
+
+        tx = session.query(Transaction).filter(Transaction.month == "2025-01").one()
+        tx.tags = "alimentation"
+        session.commit()
+
+        assert get_data_generation(session, "2025-01") != jan
+        assert get_data_generation(session, "2025-02") == feb
+
+    def test_config_change_moves_every_month(self, session):
+        before = get_data_generation(session, "2025-02")
+        session.query(Config).first().member1 = "Alice"
+        session.commit()
+
+        assert get_data_generation(session, "2025-02") != before
+
+    def test_start_up_fails_without_the_triggers(self, tmp_path, monkeypatch):
+        engine = create_engine(f"sqlite:///{tmp_path / 'budget.db'}")
+        # users: models/user.py redeclares its indexes (extend_existing), migrate_schema creates it
+        Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables if t.name != "users"])
+        monkeypatch.setattr(database, "engine", engine)
+
+        def broken(conn):
+            raise RuntimeError("no trigger support")
+
+        monkeypatch.setattr(database, "create_data_generation_triggers", broken)
+        with pytest.raises(RuntimeError, match="data generation triggers"):
+            database.migrate_schema()
+        engine.dispose()
+
+
+class TestPDFReportCache:
+    def test_unchanged_month_is_served_from_disk(self, session, user, tmp_path):
+        cache = PDFReportCache(cache_dir=str(tmp_path), batch_workers=1)
+
+        first, first_cached = cache.get_month_pdf(session, "2025-01", user)
+        second, second_cached = cache.get_month_pdf(session, "2025-01", user)
+
+        assert first.startswith(b"%PDF")
+        assert (first_cached, second_cached) == (False, True)
+        assert second == first
+        assert len(list(tmp_path.glob("*/*.pdf"))) == 1
+
+    def test_data_change_rerenders_and_replaces_file(self, session, user, tmp_path):
+        cache = PDFReportCache(cache_dir=str(tmp_path), batch_workers=1)
+        cache.get_month_pdf(session, "2025-01", user)
+
+        session.add(Transaction(month="2025-01", date_op=dt.date(2025, 1, 9), label="FNAC", amount=-15.0,
+                                is_expense=True, exclude=False, tags="loisirs"))
+        session.commit()
+        _, from_cache = cache.get_month_pdf(session, "2025-01", user)
+
+        assert from_cache is False
+        assert len(list(tmp_path.glob("*/2025-01_*.pdf"))) == 1
+        assert cache.stats["snapshot_misses"] == 2
+
+    def test_render_year_reuses_cached_months(self, session, user, tmp_path):
+        cache = PDFReportCache(cache_dir=str(tmp_path), batch_workers=1)
+        cache.get_month_pdf(session, "2025-01", user)
+
+        reports = cache.render_year(session, "2025", user)
+
+        assert list(reports) == ["2025-01", "2025-02"]
+        assert cache.stats["pdf_hits"] == 1
+        assert all(pdf.startswith(b"%PDF") for pdf in reports.values())
+
+    def test_render_year_uses_the_shared_cpu_pool(self, session, user, tmp_path, monkeypatch):
+        layer = ExecutorLayer(cpu_executor=ThreadPoolExecutor(2))
+        monkeypatch.setattr(pdf_report_cache, "get_executors", lambda: layer)
+        cache = PDFReportCache(cache_dir=str(tmp_path), batch_workers=2)
+
+        reports = cache.render_year(session, "2025", user)
+        layer.shutdown()
+
+        assert list(reports) == ["2025-01", "2025-02"]
+        assert all(pdf.startswith(b"%PDF") for pdf in reports.values())
+        assert (layer.stats["cpu_calls"], layer.stats["cpu_items"]) == (1, 2)
+
+    def test_users_never_share_or_clean_each_other_files(self, session, tmp_path):
+        cache = PDFReportCache(cache_dir=str(tmp_path), batch_workers=1)
+        # Same prefix once sanitised ("bob" / "bob_x" / "bob.x")
+        users = [SimpleNamespace(username=name) for name in ("bob", "bob_x", "bob.x")]
+        for user in users:
+            cache.get_month_pdf(session, "2025-01", user)
+        before = {path.parent.name: path for path in tmp_path.glob("*/2025-01_*.pdf")}
+
+        session.add(Transaction(month="2025-01", date_op=dt.date(2025, 1, 9), label="FNAC", amount=-15.0,
+                                is_expense=True, exclude=False, tags="loisirs"))
+        session.commit()
+        cache.get_month_pdf(session, "2025-01", users[0])
+
+        after = {path.parent.name: path for path in tmp_path.glob("*/2025-01_*.pdf")}
+        assert len(before) == len(after) == 3
+        # Only bob's file was replaced: the other users' older generation is untouched
+        assert [name for name in after if after[name] != before[name]] == [cache._user_dir("bob").name]
@@ -0,0 +1,220 @@
+"""
+Unit tests for per-request SQL statistics (X-DB-* headers, N+1 detection),
+the query budget pytest plugin, and the budgets of the endpoints that used
+to query in loops (leaderboard, /tags, batch classify, /transactions).
+"""
+import datetime as dt
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateTable
+
+import auth
+import dependencies.auth
+from middleware.query_profiler import QueryProfilerMiddleware
+from models.database import (
+    Base, Config, CustomProvision, FixedLine, LabelTagMapping, MerchantKnowledgeBase, MLFeedback,
+    MonthDataGeneration, Transaction, User, create_data_generation_triggers, get_db, get_read_db
+)
+from models.gamification import Achievement, UserAchievement, UserPoints
+from services.expense_classification import invalidate_classifier_model
+from services.ml_feedback_learning import get_feedback_model_registry
+from services.query_performance import RequestProfile, get_query_profiler
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE tags (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO tags (name) VALUES ('courses'), ('loisirs'), ('sante')"))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(engine):
+    get_query_profiler().instrument(engine)
+    app = FastAPI()
+
+    @app.get("/tags")
+    def list_tags():
+        with engine.connect() as conn:
+            ids = [row[0] for row in conn.execute(text("SELECT id FROM tags"))]
+            # One query per tag: the N+1 shape
+            return [conn.execute(text("SELECT name FROM tags WHERE id = :id"), {"id": i}).scalar() for i in ids]
+
+    app.add_middleware(QueryProfilerMiddleware, add_headers=True, n_plus_one_threshold=2)
+    yield TestClient(app)
+    get_query_profiler().reset()
+
+
+def test_response_headers_report_request_queries(client):
+    response = client.get("/tags")
+
+    assert response.json() == ["courses", "loisirs", "sante"]
+    assert response.headers["X-DB-Queries"] == "4"
+    assert float(response.headers["X-DB-Time"]) >= 0
+
+
+def test_repeated_statement_shape_is_flagged_as_n_plus_one(client):
+    client.get("/tags")
+
+    flagged = get_query_profiler().snapshot()['n_plus_one']
+    assert flagged[0]['route'] == "GET /tags"
+    assert flagged[0]['sql_pattern'] == "select name from tags where id = ?"
+    assert flagged[0]['max_repeats'] == 3
+
+
+def test_repeats_are_grouped_by_pattern_when_literals_are_inlined():
+    profile = RequestProfile(label="job")
+    for i in range(5):
+        profile.add_query(f"SELECT * FROM tags WHERE id = {i}", 10)
+    profile.add_query("SELECT count(*) FROM tags", 10)
+
+    assert profile.repeated_statements(threshold=4) == [("select * from tags where id = ?", 5)]
+
+
+def test_query_budget_fixture_fails_on_n_plus_one(client, query_budget):
+    with query_budget(max_queries=4):
+        client.get("/tags")
+
+    with pytest.raises(pytest.fail.Exception, match="N\\+1: 3x"):
+        with query_budget(max_repeats=1):
+            client.get("/tags")
+
+
+@pytest.mark.query_budget(max_queries=4)
+def test_query_budget_marker_covers_the_whole_test(client):
+    assert client.get("/tags").status_code == 200
+
+
+# =============================================================================
+# Endpoint budgets: a page of N rows costs the same statements as a page of 1
+# =============================================================================
+
+@pytest.fixture
+def db():
+    """In-memory SQLite with the tables of the budgeted endpoints"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    tables = [t.__table__ for t in (Transaction, Config, FixedLine, CustomProvision, MonthDataGeneration, MLFeedback,
+                                    MerchantKnowledgeBase, LabelTagMapping, Achievement, UserAchievement, UserPoints)]
+    with engine.begin() as conn:
+        # Table only: models.user and models.database both declare the users indexes
+        conn.execute(CreateTable(User.__table__))
+    Base.metadata.create_all(engine, tables=tables)
+    with engine.begin() as conn:
+        create_data_generation_triggers(conn)
+    session = sessionmaker(bind=engine)()
+    get_feedback_model_registry().invalidate()
+    invalidate_classifier_model()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _app(db, router):
+    app = FastAPI()
+    app.include_router(router)
+    user = SimpleNamespace(id=1, username="alice", is_admin=False)
+    for dependency in (get_db, get_read_db):
+        app.dependency_overrides[dependency] = lambda: db
+    for dependency in (auth.get_current_user, dependencies.auth.get_current_user):
+        app.dependency_overrides[dependency] = lambda: user
+    return TestClient(app)
+
+
+def _month(db, rows=30):
+    tags = ["courses", "loisirs", "transport", "abonnement", "sante"]
+    db.add_all([
+        Transaction(month="2025-03", date_op=dt.date(2025, 3, 1 + i % 28), amount=-10.0 - i,
+                    label=f"CB MAGASIN {i % 7}", tags=tags[i % len(tags)], expense_type="VARIABLE", exclude=False)
+        for i in range(rows)
+    ])
+    db.commit()
+    return [tx.id for tx in db.query(Transaction).order_by(Transaction.id)]
+
+
+def test_leaderboard_budget(db, query_budget):
+    from routers.gamification import router
+
+    achievement = Achievement(name="Premier tag", points=10)
+    db.add(achievement)
+    db.flush()
+    for i in range(8):
+        user = User(username=f"user{i}", hashed_password="x")
+        db.add(user)
+        db.flush()
+        db.add(UserPoints(user_id=user.id, total_points=100 * i, level=1 + i))
+        db.add(UserAchievement(user_id=user.id, achievement_id=achievement.id, progress=100 if i % 2 else 50))
+    db.commit()
+    client = _app(db, router)
+
+    with query_budget(max_queries=1):
+        response = client.get("/gamification/leaderboard", params={"limit": 5})
+
+    board = response.json()
+    assert [entry["username"] for entry in board] == ["user7", "user6", "user5", "user4", "user3"]
+    assert [entry["achievements_count"] for entry in board] == [1, 0, 1, 0, 1]
+
+
+def test_tags_budget(db, query_budget):
+    from routers.tags import router
+
+    _month(db)
+    db.add_all([
+        LabelTagMapping(label_pattern=f"MAGASIN {i}", suggested_tags="courses,sante" if i % 2 else "loisirs")
+        for i in range(6)
+    ])
+    db.commit()
+    client = _app(db, router)
+
+    with query_budget(max_queries=2, max_repeats=1):
+        response = client.get("/tags")
+
+    tags = {tag["name"]: tag for tag in response.json()["tags"]}
+    assert len(tags) == 5
+    assert sorted(tags["courses"]["patterns"]) == ["MAGASIN 1", "MAGASIN 3", "MAGASIN 5"]
+    assert sorted(tags["loisirs"]["patterns"]) == ["MAGASIN 0", "MAGASIN 2", "MAGASIN 4"]
+    assert tags["transport"]["patterns"] == []
+
+
+def test_batch_classify_budget(db, query_budget):
+    from routers.classification import router
+
+    ids = _month(db)[:20]
+    client = _app(db, router)
+    client.post("/transactions/batch-classify", json=ids[:1])  # warms the models
+
+    with query_budget(max_queries=4, max_repeats=1):
+        response = client.post("/transactions/batch-classify", json=ids)
+
+    body = response.json()
+    assert body["successful_suggestions"] == 20 and body["errors"] == []
+    assert [result["transaction_id"] for result in body["results"]] == ids
+
+
+def test_list_transactions_budget(db, query_budget):
+    from routers.transactions import router
+
+    _month(db)
+    client = _app(db, router)
+
+    with query_budget(max_queries=3, max_repeats=1):
+        response = client.get("/transactions", params={"month": "2025-03", "limit": 20})
+
+    page = response.json()
+    assert len(page["items"]) == 20 and page["total"] == 30 and page["has_next"]
@@ -0,0 +1,138 @@
+"""
+Unit tests for the sampled query profiler (histograms, per-thread buffers,
+route attribution).
+"""
+import random
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from auth import get_current_user
+from middleware.query_profiler import QueryProfilerMiddleware
+from routers import debug
+from services.query_performance import LatencyHistogram, SampledQueryProfiler, profile_route
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE transactions (id INTEGER PRIMARY KEY, label TEXT)"))
+    yield engine
+    engine.dispose()
+
+
+class TestLatencyHistogram:
+    def test_every_value_falls_in_its_bucket(self):
+        for value in [0, 1, 31, 32, 33, 63, 64, 1000, 10 ** 6, 123456789]:
+            low, high = LatencyHistogram.bucket_bounds(LatencyHistogram.bucket_index(value))
+            assert low <= value <= high
+
+    def test_percentiles_are_within_bucket_precision(self):
+        rng = random.Random(7)
+        values = sorted(int(rng.expovariate(1 / 500)) for _ in range(20000))
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+
+        for q in (50, 95, 99):
+            exact = values[int(len(values) * q / 100) - 1]
+            assert histogram.percentile(q) == pytest.approx(exact, rel=0.07)
+        assert histogram.max_us == values[-1]
+
+    def test_merge_adds_counts(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.record(100)
+        second.record(5000, count=3)
+        first.merge(second)
+
+        assert first.count == 4
+        assert (first.min_us, first.max_us) == (100, 5000)
+
+
+class TestSampledQueryProfiler:
+    def test_sampling_rate_controls_recording(self, engine):
+        never, always = SampledQueryProfiler(sample_rate=0.0), SampledQueryProfiler(sample_rate=1.0)
+        never.instrument(engine)
+        always.instrument(engine)
+
+        with engine.connect() as conn:
+            for i in range(10):
+                conn.execute(text(f"SELECT label FROM transactions WHERE id = {i}"))
+
+        assert never.snapshot()['samples'] == 0
+        snapshot = always.snapshot()
+        # Literals are normalized away: one pattern for the ten statements
+        assert snapshot['tracked_patterns'] == 1
+        query = snapshot['queries'][0]
+        assert query['samples'] == 10
+        assert query['sql_pattern'] == "select label from transactions where id = ?"
+        assert query['tables'] == ["transactions"]
+
+    def test_threads_buffer_locally_and_flush_aggregates_all(self):
+        profiler = SampledQueryProfiler(sample_rate=1.0)
+
+        def worker(n):
+            with profile_route(f"job:{n}"):
+                for _ in range(500):
+                    profiler.record("SELECT 1", 150)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        snapshot = profiler.snapshot()
+        assert snapshot['samples'] == 2000
+        assert sorted(r['route'] for r in snapshot['routes']) == ["job:0", "job:1", "job:2", "job:3"]
+        assert profiler.flush() == 0  # buffers drained, finished threads forgotten
+        assert profiler._buffers == []
+
+    def test_cardinality_is_bounded(self):
+        profiler = SampledQueryProfiler(sample_rate=1.0, max_patterns=3)
+        for table in ["a", "b", "c", "d", "e"]:
+            profiler.record(f"SELECT * FROM {table}", 10, route="r")
+
+        snapshot = profiler.snapshot()
+        assert snapshot['tracked_patterns'] == 3
+        assert any(q['query_hash'] == SampledQueryProfiler.OTHER and q['samples'] == 3
+                   for q in snapshot['queries'])
+
+
+def test_queries_are_attributed_to_the_route_template(engine):
+    profiler = SampledQueryProfiler(sample_rate=1.0)
+    profiler.instrument(engine)
+    app = FastAPI()
+
+    @app.get("/transactions/{tx_id}")
+    def read_transaction(tx_id: int):  # sync endpoint: runs in the threadpool
+        with engine.connect() as conn:
+            conn.execute(text("SELECT label FROM transactions WHERE id = :id"), {"id": tx_id})
+        return {"ok": True}
+
+    app.add_middleware(QueryProfilerMiddleware)
+    client = TestClient(app)
+    for tx_id in (1, 2, 3):
+        assert client.get(f"/transactions/{tx_id}").status_code == 200
+
+    routes = {r['route']: r for r in profiler.snapshot()['routes']}
+    assert routes["GET /transactions/{tx_id}"]['samples'] == 3
+
+
+@pytest.mark.parametrize("is_admin, expected", [(False, 403), (True, 200)])
+def test_debug_perf_is_reserved_to_admins(is_admin, expected):
+    app = FastAPI()
+    app.include_router(debug.router)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(username="u", is_admin=is_admin)
+
+    assert TestClient(app).get("/debug/perf").status_code == expected
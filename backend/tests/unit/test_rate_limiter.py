@@ -0,0 +1,136 @@
+"""
+Unit tests for the GCRA rate limiter and its bounded in-process backend.
+"""
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+import middleware.rate_limit_backends as backends
+from middleware.rate_limit_backends import InMemoryRateLimitBackend
+from middleware.security import RateLimiter, RateLimitMiddleware
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(backends.time, "monotonic", lambda: now[0])
+    return now
+
+
+class TestInMemoryBackend:
+    def test_allows_limit_per_window_then_rejects(self, clock):
+        backend = InMemoryRateLimitBackend()
+
+        decisions = [backend.acquire("1.2.3.4", 5, 60) for _ in range(6)]
+
+        assert [d.allowed for d in decisions] == [True] * 5 + [False]
+        assert decisions[-1].retry_after == pytest.approx(12.0)
+
+    def test_capacity_is_restored_smoothly(self, clock):
+        backend = InMemoryRateLimitBackend()
+        for _ in range(5):
+            backend.acquire("ip", 5, 60)
+
+        clock[0] += 12  # one emission interval
+        assert backend.acquire("ip", 5, 60).allowed
+        assert not backend.acquire("ip", 5, 60).allowed
+
+    def test_burst_caps_back_to_back_requests(self, clock):
+        backend = InMemoryRateLimitBackend()
+
+        decisions = [backend.acquire("ip", 60, 60, burst=3) for _ in range(4)]
+
+        assert [d.allowed for d in decisions] == [True] * 3 + [False]
+        assert decisions[-1].retry_after == pytest.approx(1.0)
+        clock[0] += 1  # one emission interval refills one request
+        assert backend.acquire("ip", 60, 60, burst=3).allowed
+        assert not backend.acquire("ip", 60, 60, burst=3).allowed
+
+    def test_storage_is_bounded_lru(self, clock):
+        backend = InMemoryRateLimitBackend(max_keys=100)
+
+        for i in range(1000):
+            backend.acquire(f"10.0.{i // 256}.{i % 256}", 60, 60)
+
+        stats = backend.get_stats()
+        assert stats["tracked_keys"] == 100
+        assert stats["evictions"] == 900
+
+    def test_sweep_drops_idle_clients(self, clock):
+        backend = InMemoryRateLimitBackend(sweep_interval=30)
+        for i in range(10):
+            backend.acquire(f"ip{i}", 60, 60)
+
+        clock[0] += 31
+        backend.acquire("fresh", 60, 60)
+
+        assert backend.get_stats()["tracked_keys"] == 1
+
+
+class TestRateLimiter:
+    def test_auth_failures_block_the_client(self, clock):
+        limiter = RateLimiter(backend=InMemoryRateLimitBackend(), max_auth_failures=3)
+        for _ in range(3):
+            limiter.record_auth_failure("5.6.7.8")
+
+        response = limiter.check("5.6.7.8", "/api/transactions")
+
+        assert response.status_code == 429
+        assert b"IP temporarily blocked" in response.body
+        assert limiter.check("9.9.9.9", "/api/transactions") is None
+
+    def test_burst_size_is_the_bucket_capacity(self, clock):
+        limiter = RateLimiter(requests_per_minute=60, burst_size=5, backend=InMemoryRateLimitBackend())
+
+        results = [limiter.check("ip", "/api/transactions") for _ in range(6)]
+
+        assert results[:5] == [None] * 5
+        assert results[5].status_code == 429
+
+    def test_burst_defaults_to_the_per_minute_budget(self, clock):
+        limiter = RateLimiter(requests_per_minute=20, backend=InMemoryRateLimitBackend())
+
+        results = [limiter.check("ip", "/api/transactions") for _ in range(21)]
+
+        assert results[:20] == [None] * 20
+        assert results[20].status_code == 429
+
+    def test_auth_endpoints_use_their_own_budget(self, clock):
+        limiter = RateLimiter(requests_per_minute=100, auth_requests_per_minute=2,
+                              backend=InMemoryRateLimitBackend())
+
+        assert limiter.check("ip", "/token") is None
+        assert limiter.check("ip", "/token") is None
+        assert limiter.check("ip", "/token").status_code == 429
+        assert limiter.check("ip", "/api/transactions") is None
+
+
+def test_middleware_rejects_and_records_failed_logins():
+    app = FastAPI()
+
+    @app.post("/token")
+    def login():
+        raise HTTPException(status_code=401, detail="Incorrect username or password")
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    limiter = RateLimiter(requests_per_minute=2, auth_requests_per_minute=100,
+                          max_auth_failures=2, backend=InMemoryRateLimitBackend())
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    client = TestClient(app)
+
+    assert client.get("/ping").status_code == 200
+    assert client.get("/ping").status_code == 200
+    limited = client.get("/ping")
+    assert limited.status_code == 429
+    assert limited.json()["detail"] == "Rate limit exceeded"
+    assert int(limited.headers["Retry-After"]) >= 1
+
+    headers = {"X-Forwarded-For": "203.0.113.7"}
+    assert client.post("/token", headers=headers).status_code == 401
+    assert client.post("/token", headers=headers).status_code == 401
+    blocked = client.post("/token", headers=headers)
+    assert blocked.status_code == 429
+    assert blocked.json()["retry_after"] == 900
@@ -0,0 +1,160 @@
+"""
+Unit tests for the research executor (merchant dedupe, bounded concurrency,
+negative cache, ResearchCache write-through) against a local Nominatim stub.
+"""
+import asyncio
+import threading
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base, ResearchCache
+from services.research_executor import NEGATIVE_METHOD, ResearchExecutor
+from services.web_research_service import MerchantInfo, TokenBucket, WebResearchService, close_research_session
+from tests.fixtures.nominatim_stub import NominatimStubServer
+
+
+@pytest.fixture
+def session_factory():
+    """In-memory SQLite sessions with the research_cache table."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=[ResearchCache.__table__])
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def stub():
+    async with NominatimStubServer(latency=0.01) as server:
+        yield server
+    await close_research_session()
+
+
+def _executor(stub, session_factory, **kwargs):
+    def service_factory():
+        return WebResearchService(osm_url=stub.url, rate_limiter=TokenBucket(rate=0))
+    return ResearchExecutor(session_factory=session_factory, service_factory=service_factory,
+                            usage_flush_interval=0, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_identical_merchants_cost_one_lookup(stub, session_factory):
+    executor = _executor(stub, session_factory)
+    labels = ["CARREFOUR"] * 150 + ["CB CARREFOUR 12/03/25"] * 50
+
+    results = await executor.research_many(labels)
+
+    assert stub.request_count == 1
+    assert {info.business_type for info in results.values()} == {"supermarket"}
+    assert executor.stats["deduped"] == len(labels) - 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_the_inflight_lookup(stub, session_factory):
+    executor = _executor(stub, session_factory)
+
+    results = await asyncio.gather(*(executor.research("PHARMACIE CENTRALE") for _ in range(20)))
+
+    assert stub.request_count == 1
+    assert executor.stats["coalesced"] == 19
+    assert all(info is results[0] for info in results)
+
+
+@pytest.mark.asyncio
+async def test_unknown_merchant_is_negatively_cached(stub, session_factory):
+    executor = _executor(stub, session_factory)
+
+    first = await executor.research("ZORGLUB SARL")
+    second = await executor.research("ZORGLUB SARL")
+
+    assert first.business_type is None and second is first
+    assert stub.request_count == 1
+    assert executor.stats["negative_hits"] == 1
+    row = session_factory().get(ResearchCache, "ZORGLUB SARL")
+    assert row.research_method == NEGATIVE_METHOD
+
+
+@pytest.mark.asyncio
+async def test_results_are_written_through_to_research_cache(stub, session_factory):
+    await _executor(stub, session_factory).research("FNAC MONTPARNASSE")
+
+    other_worker = _executor(stub, session_factory)
+    info = await other_worker.research("FNAC MONTPARNASSE")
+
+    assert info.business_type == "electronics"
+    assert stub.request_count == 1
+    assert other_worker.stats["db_hits"] == 1
+    # A hit from the table is a pure read: its usage is written back by the buffer
+    assert session_factory().get(ResearchCache, "FNAC MONTPARNASSE").usage_count == 1
+    assert other_worker.usage.pending() == {"FNAC MONTPARNASSE": 1}
+    other_worker.usage.flush()
+    assert session_factory().get(ResearchCache, "FNAC MONTPARNASSE").usage_count == 2
+
+
+@pytest.mark.asyncio
+async def test_research_cache_is_used_off_the_event_loop(stub, session_factory):
+    threads = []
+
+    def tracking_factory():
+        threads.append(threading.get_ident())
+        return session_factory()
+
+    executor = _executor(stub, tracking_factory)
+    await executor.research("FNAC MONTPARNASSE")  # read miss, then write-through
+    executor.invalidate()
+    await executor.research("FNAC MONTPARNASSE")  # read hit
+
+    assert len(threads) == 3
+    assert threading.get_ident() not in threads
+
+
+@pytest.mark.asyncio
+async def test_force_refresh_researches_again(stub, session_factory):
+    executor = _executor(stub, session_factory)
+    await executor.research("CARREFOUR")
+
+    await executor.research("CARREFOUR", force_refresh=True)
+
+    assert stub.request_count == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    running, peak = 0, 0
+
+    class SlowService:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return None
+
+        async def research_merchant(self, merchant_name, amount=None, city=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return MerchantInfo(merchant_name=merchant_name, normalized_name=merchant_name)
+
+    executor = ResearchExecutor(max_concurrency=2, session_factory=None, service_factory=SlowService)
+    await executor.research_many([f"MARCHAND {letter}" for letter in "ABCDEF"])
+
+    assert peak == 2
+    assert executor.stats["researched"] == 6
+
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    waits = [bucket.reserve() for _ in range(5)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2:] == pytest.approx([0.1, 0.2, 0.3], abs=0.02)
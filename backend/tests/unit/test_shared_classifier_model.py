@@ -0,0 +1,214 @@
+"""
+Unit tests for the process-wide classifier and feedback models borrowed by
+request-scoped classification services.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base, MLFeedback, MerchantKnowledgeBase, Transaction
+from services.expense_classification import (
+    ClassificationCache, ClassificationResult, get_classifier_model,
+    get_expense_classification_service, invalidate_classifier_model, make_classification_cache_key
+)
+from services.ml_feedback_learning import FeedbackModelRegistry, MLFeedbackLearningService
+
+
+@pytest.fixture
+def session():
+    """In-memory SQLite session with the feedback tables."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    tables = [Transaction.__table__, MLFeedback.__table__, MerchantKnowledgeBase.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    db = sessionmaker(bind=engine)()
+    db.add(Transaction(month="2025-01", label="PRLV NETFLIX", amount=-13.49))
+    db.commit()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _result(expense_type="FIXED"):
+    return ClassificationResult(
+        expense_type=expense_type, confidence=0.9, primary_reason="test",
+        contributing_factors=[], keyword_matches=["loyer"]
+    )
+
+
+class FakeSharedCache:
+    """Stands in for RedisCacheService (JSON-like get/set with TTL)"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.data[key] = value
+        return True
+
+    def incr(self, key, amount=1):
+        if self.data.get("down"):
+            return None
+        self.data[key] = int(self.data.get(key, 0)) + amount
+        return self.data[key]
+
+
+def _learned_feedback(merchant, tag):
+    return MLFeedback(
+        transaction_id=1, original_tag="divers", corrected_tag=tag,
+        original_expense_type="VARIABLE", corrected_expense_type="FIXED",
+        merchant_pattern=merchant, feedback_type="correction",
+        pattern_learned=True, pattern_success_rate=0.9
+    )
+
+
+class TestClassifierModel:
+    def test_services_borrow_one_model_and_share_its_cache(self, session):
+        invalidate_classifier_model()
+        first = get_expense_classification_service(session)
+        second = get_expense_classification_service(session)
+
+        first.classify_expense_fast("loyer", 900.0, "PRLV LOYER MENSUEL")
+        second.classify_expense_fast("loyer", 900.0, "PRLV LOYER MENSUEL")
+
+        assert first.model is second.model
+        stats = second.get_performance_stats()
+        assert (stats['cache_hits'], stats['cache_misses']) == (1, 1)
+        assert stats['model']['version'] == first.model.version
+
+    def test_invalidation_builds_new_version_with_empty_cache(self, session):
+        service = get_expense_classification_service(session)
+        service.classify_expense_fast("loyer", 900.0, "PRLV LOYER MENSUEL")
+        old_model = service.model
+
+        invalidate_classifier_model()
+        new_model = get_classifier_model()
+
+        assert new_model.version == old_model.version + 1
+        assert len(new_model.cache) == 0
+
+    def test_model_patterns_are_read_only(self):
+        with pytest.raises(TypeError):
+            get_classifier_model().fixed_patterns['nouveau'] = 1.0
+
+
+class TestClassificationCache:
+    def test_cache_key_is_stable_content_hash(self):
+        key = make_classification_cache_key("Loyer", 900, "PRLV  LOYER")
+        assert key == make_classification_cache_key("loyer", 900.0, "prlv loyer")
+        assert key != make_classification_cache_key("loyer", 901.0, "prlv loyer")
+        assert len(key) == 32
+
+    def test_eviction_is_least_recently_used(self):
+        cache = ClassificationCache("test", max_size=2)
+        cache.put("a", _result())
+        cache.put("b", _result())
+        cache.get("a")  # "a" becomes most recently used
+        cache.put("c", _result())
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        import services.expense_classification as module
+        clock = [1000.0]
+        monkeypatch.setattr(module.time, "monotonic", lambda: clock[0])
+        cache = ClassificationCache("test", ttl_seconds=60)
+        cache.put("a", _result())
+
+        clock[0] += 61
+
+        assert cache.get("a") is None
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_shared_tier_serves_other_workers(self):
+        shared = FakeSharedCache()
+        ClassificationCache("classification:g3", shared=shared).put("k", _result("VARIABLE"))
+
+        other_worker = ClassificationCache("classification:g3", shared=shared)
+        result = other_worker.get("k")
+
+        assert result.expense_type == "VARIABLE"
+        assert other_worker.get_stats()["shared_hits"] == 1
+        assert ClassificationCache("classification:g4", shared=shared).get("k") is None
+
+    def test_learning_starts_a_new_cache_generation(self, session):
+        service = get_expense_classification_service(session)
+        before = service.model
+
+        service.learn_from_correction("loyer", "FIXED")
+        after = get_classifier_model()
+
+        assert after.generation == before.generation + 1
+        assert after.cache.namespace != before.cache.namespace
+
+    def test_failed_generation_bump_skips_the_shared_tier_until_retried(self, monkeypatch):
+        import services.expense_classification as module
+        shared = FakeSharedCache()
+        clock = [1000.0]
+        monkeypatch.setattr(module.time, "monotonic", lambda: clock[0])
+        monkeypatch.setattr(module, "_get_shared_cache", lambda: shared)
+        invalidate_classifier_model()
+        before = get_classifier_model()
+        before.cache.put("k", _result())
+
+        shared.data["down"] = True
+        invalidate_classifier_model()
+        local_only = get_classifier_model()
+        shared.data["down"] = False
+
+        # The stale shared entry is not served, and nothing is written to Redis
+        assert local_only.cache.shared is None
+        assert local_only.cache.get("k") is None
+        assert get_classifier_model() is local_only
+
+        clock[0] += module.CLASSIFICATION_SHARED_RETRY_SECONDS
+        recovered = get_classifier_model()
+        assert recovered.cache.shared is shared
+        assert recovered.generation == before.generation + 1
+        assert recovered.cache.get("k") is None
+        monkeypatch.setattr(module, "_get_shared_cache", lambda: None)
+        invalidate_classifier_model()
+
+
+
+class TestFeedbackModelRegistry:
+    def test_model_is_built_once_and_reused(self, session):
+        session.add(_learned_feedback("netflix", "streaming"))
+        session.commit()
+        registry = FeedbackModelRegistry(check_interval=60)
+
+        services = [MLFeedbackLearningService(session, registry.get_model(session)) for _ in range(5)]
+
+        assert len({id(s.model) for s in services}) == 1
+        assert registry.stats['rebuilds'] == 1
+        assert services[0].feedback_patterns['netflix'].learned_tag == "streaming"
+
+    def test_new_feedback_is_picked_up_after_invalidation(self, session):
+        registry = FeedbackModelRegistry(check_interval=60)
+        first = registry.get_model(session)
+
+        session.add(_learned_feedback("edf", "electricite"))
+        session.commit()
+        assert registry.get_model(session) is first  # still within the check interval
+
+        registry.invalidate()
+        second = registry.get_model(session)
+
+        assert second.version == first.version + 1
+        assert "edf" in second.feedback_patterns
+
+    def test_unchanged_signature_does_not_rebuild(self, session):
+        registry = FeedbackModelRegistry(check_interval=0)
+        first = registry.get_model(session)
+
+        assert registry.get_model(session) is first
+        assert registry.stats == {'borrows': 2, 'signature_checks': 2, 'rebuilds': 1}
@@ -0,0 +1,161 @@
+"""
+Unit tests for the per-(month, tag) spending aggregate and the endpoints built on it.
+"""
+import datetime as dt
+from types import SimpleNamespace
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import services.tag_spending as tag_spending
+from models.database import (
+    Base, CategoryBudget, Config, CustomProvision, FixedLine, MonthDataGeneration, MonthTagSpending,
+    MonthTagSpendingRefresh, Transaction, create_data_generation_triggers
+)
+from services.tag_spending import get_month_tag_spending, get_top_transactions_by_tag
+
+
+@pytest.fixture
+def session():
+    """In-memory SQLite session with transactions, budgets and the aggregate tables."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    tables = [t.__table__ for t in (
+        Transaction, CategoryBudget, Config, FixedLine, CustomProvision,
+        MonthDataGeneration, MonthTagSpending, MonthTagSpendingRefresh
+    )]
+    Base.metadata.create_all(engine, tables=tables)
+    with engine.begin() as conn:
+        create_data_generation_triggers(conn)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _tx(month, amount, tags="", category="", exclude=False, day=1, label="OP"):
+    return Transaction(month=month, date_op=dt.date.fromisoformat(f"{month}-{day:02d}"), label=label,
+                       amount=amount, tags=tags, category=category, exclude=exclude, is_expense=amount < 0)
+
+
+def _python_reference(transactions, month):
+    """Previous in-Python grouping of the variance / suggestions endpoints"""
+    spending = {}
+    for tx in transactions:
+        if tx.month != month or tx.amount >= 0 or tx.exclude:
+            continue
+        tags = [t.strip().lower() for t in (tx.tags or "").split(",") if t.strip()]
+        if not tags:
+            tags = [tx.category.lower()] if tx.category else ["non-categorise"]
+        for tag in tags:
+            total, count = spending.get(tag, (0, 0))
+            spending[tag] = (total + abs(tx.amount), count + 1)
+    return spending
+
+
+def test_aggregate_matches_python_tag_splitting(session):
+    transactions = [
+        _tx("2025-03", -10.0, tags="courses, Énergie"),
+        _tx("2025-03", -20.5, tags=" énergie ,,"),
+        _tx("2025-03", -7.0, tags=" , ", category="Santé"),
+        _tx("2025-03", -3.0),
+        _tx("2025-03", -100.0, tags="courses", exclude=True),
+        _tx("2025-03", 1500.0, tags="salaire"),
+        _tx("2025-02", -42.0, tags="courses"),
+    ]
+    session.add_all(transactions)
+    session.commit()
+
+    spending = get_month_tag_spending(session, ["2025-03"])["2025-03"]
+
+    assert spending == pytest.approx(_python_reference(transactions, "2025-03"))
+    assert spending["énergie"] == (30.5, 2)
+    assert spending["santé"] == (7.0, 1)
+    assert spending["non-categorise"] == (3.0, 1)
+
+
+def test_stored_rows_are_reused_until_the_month_changes(session, monkeypatch):
+    session.add_all([_tx("2025-03", -10.0, tags="courses"), _tx("2025-04", -5.0, tags="courses")])
+    session.commit()
+    assert get_month_tag_spending(session, ["2025-03", "2025-04"])["2025-03"] == {"courses": (10.0, 1)}
+
+    recomputed = []
+    compute = tag_spending.compute_month_tag_spending
+    monkeypatch.setattr(tag_spending, "compute_month_tag_spending",
+                        lambda db, months: recomputed.extend(months) or compute(db, months))
+
+    assert get_month_tag_spending(session, ["2025-03", "2025-04"])["2025-04"] == {"courses": (5.0, 1)}
+    assert recomputed == []
+
+    session.add(_tx("2025-03", -2.5, tags="courses"))
+    session.commit()
+
+    assert get_month_tag_spending(session, ["2025-03", "2025-04"])["2025-03"] == {"courses": (12.5, 2)}
+    assert recomputed == ["2025-03"]
+    assert session.query(MonthTagSpending).filter(MonthTagSpending.month == "2025-03").one().total == 12.5
+
+
+def test_top_transactions_are_ranked_per_tag(session):
+    session.add_all([
+        _tx("2025-03", -amount, tags="courses", label=f"OP {amount}", day=amount)
+        for amount in (5, 25, 15, 20)
+    ] + [_tx("2025-03", -8.0, tags="Courses", label="OP 8")])
+    session.commit()
+
+    top = get_top_transactions_by_tag(session, "2025-03", limit=3)
+
+    assert [entry["label"] for entry in top["courses"]] == ["OP 25", "OP 20", "OP 15"]
+    assert top["courses"][0]["date"] == "2025-03-25"
+
+
+def test_variance_analysis_joins_budgets_with_the_aggregate(session):
+    from routers.analytics import get_variance_analysis
+
+    session.add_all([
+        CategoryBudget(category="Courses", budget_amount=100.0, month=None, is_active=True),
+        CategoryBudget(category="courses", budget_amount=50.0, month="2025-03", is_active=True),
+        CategoryBudget(category="loisirs", budget_amount=80.0, month=None, is_active=True),
+        _tx("2025-03", -40.0, tags="courses"),
+        _tx("2025-03", -30.0, tags="courses"),
+        _tx("2025-02", -35.0, tags="courses"),
+    ])
+    session.commit()
+
+    result = get_variance_analysis(month="2025-03", current_user=SimpleNamespace(username="alice"), db=session)
+
+    by_category = {variance.category: variance for variance in result.by_category}
+    assert by_category["courses"].budgeted == 50.0
+    assert by_category["courses"].actual == 70.0
+    assert by_category["courses"].status == "over_budget"
+    assert by_category["courses"].transaction_count == 2
+    assert by_category["courses"].vs_last_month == "+100%"
+    assert [tx["amount"] for tx in by_category["courses"].top_transactions] == [40.0, 30.0]
+    assert by_category["loisirs"].status == "under_budget"
+    assert result.global_variance.actual == 70.0
+
+
+def test_budget_suggestions_read_the_window_from_the_aggregate(session):
+    from routers.budgets import get_budget_suggestions
+
+    today = dt.date.today().replace(day=1)
+    months = [(today - relativedelta(months=offset)).strftime("%Y-%m") for offset in range(8)]
+    # Recent months spend 200, older ones 100; the month outside the window is ignored
+    for offset, month in enumerate(months):
+        session.add(_tx(month, -(200.0 if offset < 3 else 100.0), tags="courses"))
+    session.commit()
+
+    result = get_budget_suggestions(months_history=6, current_user=SimpleNamespace(username="alice"), db=session)
+
+    suggestion = result.suggestions[0]
+    assert suggestion.category == "courses"
+    assert suggestion.months_with_data == 7
+    assert suggestion.average_3_months == 200.0
+    assert suggestion.suggested_amount == 200
+    assert suggestion.trend == "increasing"
+    assert session.query(MonthTagSpendingRefresh).count() == 7
@@ -0,0 +1,190 @@
+"""
+Unit tests for keyset pagination of GET /transactions and the NDJSON variant of
+GET /transactions/all (services/transaction_pagination).
+"""
+import datetime as dt
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+
+import services.transaction_pagination as transaction_pagination
+from models.database import (
+    Base, Config, CustomProvision, FixedLine, MonthDataGeneration, Transaction, create_data_generation_triggers,
+    get_db, get_read_db
+)
+from routers.transactions import router
+
+
+@pytest.fixture
+def session():
+    """In-memory SQLite session with transactions and the data generation triggers."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    tables = [t.__table__ for t in (Transaction, Config, FixedLine, CustomProvision, MonthDataGeneration)]
+    Base.metadata.create_all(engine, tables=tables)
+    with engine.begin() as conn:
+        create_data_generation_triggers(conn)
+    db = sessionmaker(bind=engine)()
+    transaction_pagination.clear_total_cache()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(session):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: session
+    app.dependency_overrides[get_read_db] = lambda: session
+    return TestClient(app)
+
+
+@pytest.fixture
+def month_rows(session):
+    """40 rows for 2025-03 with repeated dates/amounts/labels and a few NULL sort values"""
+    rows = []
+    for i in range(40):
+        rows.append(Transaction(
+            month="2025-03",
+            date_op=None if i % 13 == 0 else dt.date(2025, 3, 1 + i % 7),
+            amount=None if i % 17 == 5 else -float(i % 5) * 10,
+            label=None if i % 11 == 3 else f"OP {i % 4}",
+            tags="courses" if i % 3 == 0 else "loisirs",
+            expense_type="VARIABLE",
+            exclude=False,
+        ))
+    rows.append(Transaction(month="2025-02", date_op=dt.date(2025, 2, 1), amount=-1.0, label="OP", tags="courses"))
+    session.add_all(rows)
+    session.commit()
+    return [tx for tx in rows if tx.month == "2025-03"]
+
+
+def _expected(rows, attribute, descending):
+    """SQLite order: NULLs first ascending, last descending; id breaks ties in the same direction"""
+    def key(tx):
+        value = getattr(tx, attribute)
+        return (value is not None, value if value is not None else 0, tx.id)
+    return [tx.id for tx in sorted(rows, key=key, reverse=descending)]
+
+
+def _walk(client, **params):
+    ids, pages, cursor = [], 0, None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        body = client.get("/transactions", params=query).json()
+        ids += [item["id"] for item in body["items"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        assert body["has_next"] == (cursor is not None)
+        if cursor is None:
+            return ids, pages, body
+
+
+@pytest.mark.parametrize("sort_by,attribute", [("date", "date_op"), ("amount", "amount"), ("label", "label")])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_cursor_walk_matches_the_full_sort(client, month_rows, sort_by, attribute, sort_order):
+    ids, pages, last = _walk(client, month="2025-03", sort_by=sort_by, sort_order=sort_order, limit=6)
+
+    assert ids == _expected(month_rows, attribute, sort_order == "desc")
+    assert pages == 7
+    assert last["page"] == 7 and last["total"] == 40 and last["pages"] == 7
+
+    # Page-number pagination returns the same first pages
+    offset_page = client.get("/transactions", params={
+        "month": "2025-03", "sort_by": sort_by, "sort_order": sort_order, "limit": 6, "page": 2
+    }).json()
+    assert [item["id"] for item in offset_page["items"]] == ids[6:12]
+
+
+def test_cursor_walk_with_tag_filter(client, month_rows):
+    ids, _, last = _walk(client, month="2025-03", tag="Courses", sort_by="amount", limit=4)
+
+    courses = [tx for tx in month_rows if tx.tags == "courses"]
+    assert ids == _expected(courses, "amount", True)
+    assert last["total"] == len(courses)
+
+
+def test_total_is_recounted_only_when_the_month_changes(client, session, month_rows, monkeypatch):
+    counts = []
+    cached_total = transaction_pagination.cached_total
+
+    def counting_total(db, month, filters, count):
+        return cached_total(db, month, filters, lambda: counts.append(month) or count())
+
+    monkeypatch.setattr("routers.transactions.cached_total", counting_total)
+
+    first = client.get("/transactions", params={"month": "2025-03", "limit": 5}).json()
+    client.get("/transactions", params={"month": "2025-03", "limit": 5, "cursor": first["next_cursor"]})
+    assert counts == ["2025-03"]
+
+    session.add(Transaction(month="2025-03", date_op=dt.date(2025, 3, 30), amount=-3.0, label="NEW"))
+    session.commit()
+    assert client.get("/transactions", params={"month": "2025-03", "limit": 5}).json()["total"] == 41
+    assert counts == ["2025-03", "2025-03"]
+
+    no_total = client.get("/transactions", params={"month": "2025-03", "limit": 5, "include_total": False}).json()
+    assert no_total["total"] is None and no_total["pages"] is None and no_total["has_next"]
+
+
+def test_cursor_must_match_the_sort(client, month_rows):
+    cursor = client.get("/transactions", params={"month": "2025-03", "limit": 5}).json()["next_cursor"]
+
+    assert client.get("/transactions", params={"month": "2025-03", "cursor": "not-a-cursor"}).status_code == 400
+    response = client.get("/transactions", params={"month": "2025-03", "cursor": cursor, "sort_by": "amount"})
+    assert response.status_code == 400
+
+
+def test_ndjson_streams_the_same_rows_as_the_json_list(client, month_rows, monkeypatch):
+    monkeypatch.setattr(transaction_pagination, "KEYSET_BATCH_SIZE", 7)
+
+    response = client.get("/transactions/all", params={"month": "2025-03", "format": "ndjson", "tag": "loisirs"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    legacy = client.get("/transactions/all", params={"month": "2025-03", "tag": "loisirs"}).json()
+    assert sorted(streamed, key=lambda item: item["id"]) == sorted(legacy, key=lambda item: item["id"])
+    assert [item["id"] for item in streamed] == _expected(
+        [tx for tx in month_rows if tx.tags == "loisirs"], "date_op", True
+    )
+
+
+def test_ndjson_stream_returns_its_connection(tmp_path, monkeypatch):
+    # One pooled connection, no overflow: a leaked stream session fails the next request
+    engine = create_engine(f"sqlite:///{tmp_path / 'budget.db'}", connect_args={"check_same_thread": False},
+                           poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=0.5)
+    Base.metadata.create_all(engine, tables=[Transaction.__table__])
+    Local = sessionmaker(bind=engine)
+    with Local() as db:
+        db.add_all(Transaction(month="2025-03", date_op=dt.date(2025, 3, 1 + i), label=f"OP {i}", amount=-1.0,
+                               is_expense=True, exclude=False, tags="") for i in range(10))
+        db.commit()
+    monkeypatch.setattr(transaction_pagination, "KEYSET_BATCH_SIZE", 3)
+
+    def get_session():
+        db = Local()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_read_db] = get_session
+    client = TestClient(app)
+    try:
+        for _ in range(5):
+            response = client.get("/transactions/all", params={"month": "2025-03", "format": "ndjson"})
+            assert response.status_code == 200
+            assert len(response.text.splitlines()) == 10
+        assert engine.pool.checkedout() == 0
+    finally:
+        engine.dispose()
@@ -0,0 +1,119 @@
+"""
+Unit tests for the transactions full-text index (FTS5) and the search service
+(services/transaction_search).
+"""
+import datetime as dt
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.database import Base, Transaction, create_transaction_search_index
+from services.transaction_search import match_expression, search_transactions, tag_clause
+
+
+def _engine():
+    return create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+
+
+def _tx(label, tags="", month="2025-03", amount=-10.0):
+    return Transaction(month=month, date_op=dt.date.fromisoformat(f"{month}-01"), label=label, tags=tags,
+                       amount=amount, exclude=False, expense_type="VARIABLE")
+
+
+@pytest.fixture
+def session():
+    """In-memory SQLite session; rows inserted before the index exists are backfilled."""
+    engine = _engine()
+    Base.metadata.create_all(engine, tables=[Transaction.__table__])
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        _tx("CB CARREFOUR MARKET 12/03/25", tags="courses"),
+        _tx("PRLV SEPA EDF Énergie", tags="énergie, Frais Fixes"),
+    ])
+    db.commit()
+    with engine.begin() as conn:
+        create_transaction_search_index(conn)
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _labels(results):
+    return [tx.label for tx, _ in results]
+
+
+def test_index_is_backfilled_and_follows_writes(session):
+    assert _labels(search_transactions(session, "carrefour")) == ["CB CARREFOUR MARKET 12/03/25"]
+
+    tx = _tx("VIR LOYER", tags="logement")
+    session.add(tx)
+    session.commit()
+    assert _labels(search_transactions(session, "loyer")) == ["VIR LOYER"]
+
+    tx.label, tx.tags = "VIR LOYER AVRIL", "maison"
+    session.commit()
+    assert search_transactions(session, "logement") == []
+    assert _labels(search_transactions(session, "maison")) == ["VIR LOYER AVRIL"]
+
+    session.delete(tx)
+    session.commit()
+    assert search_transactions(session, "loyer") == []
+
+
+def test_prefix_accent_and_month_filters(session):
+    session.add_all([
+        _tx("CB CARREFOUR CITY", tags="courses", month="2025-04"),
+        _tx("CARTE BOULANGERIE DU CARREFOUR", tags="boulangerie", month="2025-04"),
+    ])
+    session.commit()
+
+    assert _labels(search_transactions(session, "energie")) == ["PRLV SEPA EDF Énergie"]
+    assert _labels(search_transactions(session, "ener", prefix=False)) == []
+    assert len(search_transactions(session, "carr")) == 3
+    assert len(search_transactions(session, "carr", months=["2025-04"])) == 2
+    assert _labels(search_transactions(session, "frais fix", columns=["tags"])) == ["PRLV SEPA EDF Énergie"]
+
+    # The merchant column (label without "CB ") puts the shop named CARREFOUR first
+    ranked = _labels(search_transactions(session, "carrefour", months=["2025-04"]))
+    assert ranked == ["CB CARREFOUR CITY", "CARTE BOULANGERIE DU CARREFOUR"]
+
+
+def test_user_input_cannot_inject_fts_syntax(session):
+    assert match_expression('courses" OR "x') == '"courses"* "OR"* "x"*'
+    assert match_expression("  --  ") is None
+    assert search_transactions(session, 'NEAR(carrefour "') == []
+    with pytest.raises(ValueError):
+        match_expression("x", columns=["amount"])
+
+
+def test_tag_clause_serves_the_tag_filters(session):
+    from export_engine import BaseExporter, ExportFilters
+
+    session.add(_tx("CB AUCHAN", tags="courses bio"))
+    session.commit()
+
+    tagged = session.query(Transaction).filter(tag_clause(session, "Courses")).all()
+    assert sorted(tx.label for tx in tagged) == ["CB AUCHAN", "CB CARREFOUR MARKET 12/03/25"]
+
+    exporter = BaseExporter(session, user_id="alice")
+    exported = exporter.apply_filters(session.query(Transaction), ExportFilters(tags=["frais fixes"])).all()
+    assert [tx.label for tx in exported] == ["PRLV SEPA EDF Énergie"]
+
+
+def test_databases_without_the_index_fall_back_to_like():
+    engine = _engine()
+    Base.metadata.create_all(engine, tables=[Transaction.__table__])
+    db = sessionmaker(bind=engine)()
+    db.add_all([_tx("CB CARREFOUR", tags="courses"), _tx("CB FNAC", tags="loisirs")])
+    db.commit()
+
+    assert _labels(search_transactions(db, "carref")) == ["CB CARREFOUR"]
+    assert [tx.label for tx in db.query(Transaction).filter(tag_clause(db, "loisirs"))] == ["CB FNAC"]
+    db.close()
+    engine.dispose()
@@ -2,13 +2,13 @@
 Core utility functions for Budget Famille v2.3
 Essential functions extracted from monolithic app.py
 """
+from __future__ import annotations
+
 import logging
 import re
 import hashlib
 import datetime as dt
-from typing import List, Optional, Dict, Union, Any, Tuple
-import pandas as pd
-import numpy as np
+from typing import TYPE_CHECKING, List, Optional, Dict, Union, Any, Tuple
 from fastapi import UploadFile, HTTPException
 from sqlalchemy.orm import Session
 from html import escape
@@ -16,6 +16,9 @@ import tempfile
 import io
 import csv
 
+if TYPE_CHECKING:
+    import pandas as pd  # imported on first use: pandas is only needed by the CSV import path
+
 logger = logging.getLogger(__name__)
 
 # Import magic with fallback
@@ -32,6 +35,7 @@ except ImportError:
 
 def parse_number(x):
     """Parse a number from various string formats"""
+    import pandas as pd
     if pd.isna(x) or x is None or x == "":
         return 0.0
     if isinstance(x, (int, float)):
@@ -196,6 +200,7 @@ def validate_file_security(file: UploadFile) -> bool:
 
 def robust_read_csv(file: UploadFile) -> pd.DataFrame:
     """Read CSV file with multiple encoding attempts"""
+    import pandas as pd
     encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
     
     for encoding in encodings:
@@ -230,6 +235,7 @@ def robust_read_csv(file: UploadFile) -> pd.DataFrame:
 
 def detect_months_with_metadata(df: pd.DataFrame) -> List[Dict]:
     """Detect months in DataFrame with metadata"""
+    import pandas as pd
     if df.empty:
         return []
     
@@ -321,6 +327,7 @@ def suggest_optimal_month(months_data: List[Dict]) -> Optional[str]:
 
 def check_duplicate_transactions(df: pd.DataFrame, db: Session) -> Dict:
     """Check for duplicate transactions in database"""
+    import pandas as pd
     try:
         from models.database import Transaction
         
@@ -380,8 +387,30 @@ def check_duplicate_transactions(df: pd.DataFrame, db: Session) -> Dict:
         logger.error(f"Error checking duplicates: {str(e)}")
         return {'potential_duplicates': 0, 'exact_matches': 0, 'similar_transactions': []}
 
+def normalize_label_for_row_id(label: str) -> str:
+    """Normalize a bank label so cosmetic export differences keep the same row_id"""
+    return re.sub(r'\s+', ' ', str(label or '')).strip().upper()
+
+def compute_row_id(date_op: dt.date, label: str, amount: float, occurrence: int = 0) -> str:
+    """
+    Compute the stable hash stored in Transaction.row_id
+
+    The hash only depends on the operation date, the normalized label and the
+    amount rounded to the cent. `occurrence` disambiguates identical lines in
+    the same file (e.g. two identical card payments on the same day), so that
+    re-importing an overlapping export yields exactly the same row_ids.
+    """
+    key = "|".join([
+        date_op.isoformat() if date_op else "",
+        normalize_label_for_row_id(label),
+        f"{round(float(amount or 0.0), 2):.2f}",
+        str(occurrence),
+    ])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
 def validate_csv_data(df: pd.DataFrame) -> List[str]:
     """Validate CSV data structure and content"""
+    import pandas as pd
     errors = []
     
     if df.empty:
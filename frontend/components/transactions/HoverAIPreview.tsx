@@ -1,18 +1,12 @@
 'use client';
 
 import { useState, useCallback, useRef } from 'react';
-import { Tx } from '../../lib/api';
-
-interface HoverPreview {
-  preview_text: string;
-  confidence_indicator: 'high' | 'medium' | 'low' | 'error' | 'unknown';
-  suggested_type: string;
-  confidence_score?: number;
-  main_reason?: string;
-}
+import { Tx, HoverPreview, expenseClassificationApi } from '../../lib/api';
 
 interface HoverAIPreviewProps {
   transaction: Tx;
+  // Prévisualisation issue du prefetch de la page (useHoverPreviewBatch) : pas d'appel par ligne
+  prefetchedPreview?: HoverPreview | null;
   onRowClick?: (transaction: Tx) => void;
   onTriggerFullAnalysis?: (transactionId: number) => void;
   className?: string;
@@ -21,6 +15,7 @@ interface HoverAIPreviewProps {
 
 export function HoverAIPreview({
   transaction,
+  prefetchedPreview,
   onRowClick,
   onTriggerFullAnalysis,
   className = '',
@@ -35,28 +30,17 @@ export function HoverAIPreview({
 
   const loadHoverPreview = useCallback(async () => {
     if (transaction.amount >= 0) return; // Skip pour les revenus
+    if (prefetchedPreview) {
+      setPreview(prefetchedPreview);
+      return;
+    }
     if (isLoadingPreview) return;
 
     setIsLoadingPreview(true);
     
     try {
-      const response = await fetch('/api/expense-classification/transactions/hover-preview', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          transaction_ids: [transaction.id],
-          preview_only: true
-        })
-      });
-
-      if (!response.ok) {
-        throw new Error('Failed to load preview');
-      }
-
-      const data = await response.json();
-      const previewData = data.previews[transaction.id];
+      const previews = await expenseClassificationApi.getHoverPreviews([transaction.id]);
+      const previewData = previews[transaction.id];
       
       if (previewData) {
         setPreview(previewData);
@@ -71,7 +55,7 @@ export function HoverAIPreview({
     } finally {
       setIsLoadingPreview(false);
     }
-  }, [transaction.id, transaction.amount, isLoadingPreview]);
+  }, [transaction.id, transaction.amount, prefetchedPreview, isLoadingPreview]);
 
   const handleMouseEnter = useCallback(() => {
     setIsHovering(true);
@@ -207,7 +191,7 @@ export function HoverAIPreview({
             )}
             
             {/* Indication de clic */}
-            {showClickHint && (
+            {showClickHint && (onRowClick || onTriggerFullAnalysis) && (
               <div className="flex items-center gap-2 text-xs text-blue-600 animate-pulse">
                 <svg className="w-3 h-3" fill="currentColor" viewBox="0 0 20 20">
                   <path fillRule="evenodd" d="M10 18a8 8 0 100-16 8 8 0 000 16zm3.707-8.707l-3-3a1 1 0 00-1.414 1.414L10.586 9H7a1 1 0 100 2h3.586l-1.293 1.293a1 1 0 101.414 1.414l3-3a1 1 0 000-1.414z" clipRule="evenodd" />
@@ -226,13 +210,16 @@ export function HoverAIPreview({
 }
 
 // Hook pour gérer les prévisualisations en lot
+// Une page entière en un appel GET /transactions/prefetch-suggestions ; le navigateur
+// garde la réponse et la revalide avec son ETag (304 si rien n'a changé), d'où
+// refresh=true à chaque rechargement des lignes
 export function useHoverPreviewBatch() {
   const [previews, setPreviews] = useState<Record<number, HoverPreview>>({});
   const [loading, setLoading] = useState<Set<number>>(new Set());
 
-  const loadPreviewsForTransactions = useCallback(async (transactionIds: number[]) => {
-    // Filtrer ceux qui ne sont pas déjà en cours de chargement
-    const toLoad = transactionIds.filter(id => !loading.has(id) && !previews[id]);
+  const loadPreviewsForTransactions = useCallback(async (transactionIds: number[], refresh = false) => {
+    // Filtrer ceux qui sont déjà en cours de chargement (ou déjà chargés, hors revalidation)
+    const toLoad = transactionIds.filter(id => !loading.has(id) && (refresh || !previews[id]));
     if (toLoad.length === 0) return;
 
     // Marquer comme en cours de chargement
@@ -243,25 +230,14 @@ export function useHoverPreviewBatch() {
     });
 
     try {
-      const response = await fetch('/api/expense-classification/transactions/hover-preview', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          transaction_ids: toLoad,
-          preview_only: true
-        })
+      const data = await expenseClassificationApi.prefetchSuggestions(toLoad);
+      const loaded: Record<number, HoverPreview> = {};
+      Object.entries(data.suggestions).forEach(([id, suggestion]) => {
+        loaded[Number(id)] = suggestion.preview;
       });
 
-      if (!response.ok) {
-        throw new Error('Failed to load batch previews');
-      }
-
-      const data = await response.json();
-      
       // Mettre à jour les prévisualisations
-      setPreviews(prev => ({ ...prev, ...data.previews }));
+      setPreviews(prev => ({ ...prev, ...loaded }));
       
     } catch (error) {
       console.error('Error loading batch previews:', error);
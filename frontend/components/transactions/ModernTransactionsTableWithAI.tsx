@@ -4,6 +4,7 @@ import { useState, useMemo, useEffect } from 'react';
 import { Tx, expenseClassificationApi } from '../../lib/api';
 import { ChevronDownIcon, ChevronUpIcon, SparklesIcon } from '@heroicons/react/24/outline';
 import { useToast } from '../ui';
+import { HoverAIPreview, useHoverPreviewBatch } from './HoverAIPreview';
 
 interface ModernTransactionsTableProps {
   rows: Tx[];
@@ -33,6 +34,16 @@ export function ModernTransactionsTable({
   const [loadingSuggestions, setLoadingSuggestions] = useState<{ [key: number]: boolean }>({});
   const [suggestions, setSuggestions] = useState<{ [key: number]: AISuggestion }>({});
   const { addToast } = useToast();
+  const { loadPreviewsForTransactions, getPreview } = useHoverPreviewBatch();
+
+  // Prévisualisations IA de toute la page en un appel (revalidé par ETag à chaque rechargement des lignes)
+  useEffect(() => {
+    const expenseIds = rows.filter(r => r.amount < 0 && !r.exclude).map(r => r.id);
+    if (expenseIds.length > 0) {
+      loadPreviewsForTransactions(expenseIds, true);
+    }
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [rows]);
 
   // Auto-ouvrir l'édition pour une transaction spécifique (depuis Analytics)
   useEffect(() => {
@@ -210,191 +221,193 @@ export function ModernTransactionsTable({
                 className={`transition-all duration-200 ${row.exclude ? 'opacity-50 bg-gray-50' : 'hover:bg-gray-50'}`}
               >
                 {/* Ligne principale */}
-                <div className="px-6 py-4">
-                  <div className="flex items-center justify-between">
-                    {/* Partie gauche : Date et libellé */}
-                    <div className="flex-1 min-w-0 pr-4">
-                      <div className="flex items-start gap-4">
-                        {/* Colonne Date - visible et formatée */}
-                        <div className="flex-shrink-0 w-14 text-center">
-                          <div className="text-xs text-gray-500">
-                            {formatDate(row.date_op || row.date)}
+                <HoverAIPreview transaction={row} prefetchedPreview={getPreview(row.id)}>
+                  <div className="px-6 py-4">
+                    <div className="flex items-center justify-between">
+                      {/* Partie gauche : Date et libellé */}
+                      <div className="flex-1 min-w-0 pr-4">
+                        <div className="flex items-start gap-4">
+                          {/* Colonne Date - visible et formatée */}
+                          <div className="flex-shrink-0 w-14 text-center">
+                            <div className="text-xs text-gray-500">
+                              {formatDate(row.date_op || row.date)}
+                            </div>
                           </div>
-                        </div>
 
-                        <div className="flex-1 min-w-0">
-                          <div className="text-base font-medium text-gray-900 break-words">
-                            {row.label}
-                          </div>
+                          <div className="flex-1 min-w-0">
+                            <div className="text-base font-medium text-gray-900 break-words">
+                              {row.label}
+                            </div>
                           
-                          {/* Tags avec suggestions IA */}
-                          <div className="mt-1">
-                            {isEditing ? (
-                              <div className="flex flex-col gap-2 w-full">
-                                <input
-                                  type="text"
-                                  value={editingTags[row.id]}
-                                  onChange={(e) => handleTagEdit(row.id, e.target.value)}
-                                  onKeyDown={(e) => {
-                                    if (e.key === 'Enter') handleTagSave(row.id);
-                                    if (e.key === 'Escape') {
-                                      const newEditingTags = { ...editingTags };
-                                      delete newEditingTags[row.id];
-                                      setEditingTags(newEditingTags);
-                                    }
-                                  }}
-                                  className="w-full px-3 py-2 text-sm border border-blue-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
-                                  placeholder="tag1, tag2..."
-                                  autoFocus
-                                />
-                                <button
-                                  onClick={() => handleTagSave(row.id)}
-                                  className="px-3 py-1 bg-blue-600 text-white text-xs rounded-lg hover:bg-blue-700"
-                                >
-                                  Sauver
-                                </button>
-                              </div>
-                            ) : (
-                              <div className="flex flex-col gap-2 w-full">
-                                <div 
-                                  className="flex flex-wrap gap-1 cursor-pointer"
-                                  onClick={() => {
-                                    const currentTags = row.tags?.join(', ') || '';
-                                    handleTagEdit(row.id, currentTags);
-                                    if (!hasSuggestions && !isLoadingSuggestions) {
-                                      fetchAISuggestions(row);
-                                    }
-                                  }}
-                                >
-                                  {row.tags && row.tags.length > 0 ? (
-                                    row.tags.map((tag, idx) => (
-                                      <span 
-                                        key={idx}
-                                        className="px-2 py-0.5 bg-blue-100 text-blue-700 text-xs font-medium rounded-full"
-                                      >
-                                        {tag}
-                                      </span>
-                                    ))
-                                  ) : (
-                                    <span className="text-xs text-gray-400 italic hover:text-blue-600">
-                                      + Ajouter des tags
-                                    </span>
-                                  )}
-                                </div>
-                                
-                                {/* Bouton suggestions IA */}
-                                {!row.tags?.length && (
+                            {/* Tags avec suggestions IA */}
+                            <div className="mt-1">
+                              {isEditing ? (
+                                <div className="flex flex-col gap-2 w-full">
+                                  <input
+                                    type="text"
+                                    value={editingTags[row.id]}
+                                    onChange={(e) => handleTagEdit(row.id, e.target.value)}
+                                    onKeyDown={(e) => {
+                                      if (e.key === 'Enter') handleTagSave(row.id);
+                                      if (e.key === 'Escape') {
+                                        const newEditingTags = { ...editingTags };
+                                        delete newEditingTags[row.id];
+                                        setEditingTags(newEditingTags);
+                                      }
+                                    }}
+                                    className="w-full px-3 py-2 text-sm border border-blue-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
+                                    placeholder="tag1, tag2..."
+                                    autoFocus
+                                  />
                                   <button
-                                    onClick={() => fetchAISuggestions(row)}
-                                    disabled={isLoadingSuggestions}
-                                    className={`flex items-center gap-1 px-2 py-1 text-xs font-medium rounded-full transition-all ${
-                                      isLoadingSuggestions 
-                                        ? 'bg-gray-100 text-gray-400' 
-                                        : 'bg-purple-100 text-purple-700 hover:bg-purple-200'
-                                    }`}
+                                    onClick={() => handleTagSave(row.id)}
+                                    className="px-3 py-1 bg-blue-600 text-white text-xs rounded-lg hover:bg-blue-700"
                                   >
-                                    <SparklesIcon className="h-3 w-3" />
-                                    {isLoadingSuggestions ? 'Chargement...' : 'Suggestions IA'}
+                                    Sauver
                                   </button>
-                                )}
-                              </div>
-                            )}
-                            
-                            {/* Affichage des suggestions IA */}
-                            {hasSuggestions && !isEditing && (
-                              <div className="mt-2 p-2 bg-purple-50 rounded-lg">
-                                <div className="flex items-start justify-between">
-                                  <div>
-                                    <div className="flex flex-col gap-2 w-full">
-                                      <SparklesIcon className="h-4 w-4 text-purple-600" />
-                                      <span className="text-xs font-medium text-purple-700">
-                                        Suggestions IA ({Math.round(hasSuggestions.confidence * 100)}% confiance)
-                                      </span>
-                                      {hasSuggestions.source && (
-                                        <span className="text-xs text-purple-600">
-                                          • Source: {hasSuggestions.source === 'web' ? 'Web' : hasSuggestions.source === 'pattern' ? 'Patterns' : 'Historique'}
-                                        </span>
-                                      )}
-                                    </div>
-                                    <div className="mt-1 flex flex-wrap gap-1">
-                                      {hasSuggestions.tags.map((tag, idx) => (
+                                </div>
+                              ) : (
+                                <div className="flex flex-col gap-2 w-full">
+                                  <div 
+                                    className="flex flex-wrap gap-1 cursor-pointer"
+                                    onClick={() => {
+                                      const currentTags = row.tags?.join(', ') || '';
+                                      handleTagEdit(row.id, currentTags);
+                                      if (!hasSuggestions && !isLoadingSuggestions) {
+                                        fetchAISuggestions(row);
+                                      }
+                                    }}
+                                  >
+                                    {row.tags && row.tags.length > 0 ? (
+                                      row.tags.map((tag, idx) => (
                                         <span 
                                           key={idx}
-                                          className="px-2 py-0.5 bg-white text-purple-700 text-xs font-medium rounded-full border border-purple-300"
+                                          className="px-2 py-0.5 bg-blue-100 text-blue-700 text-xs font-medium rounded-full"
                                         >
                                           {tag}
                                         </span>
-                                      ))}
+                                      ))
+                                    ) : (
+                                      <span className="text-xs text-gray-400 italic hover:text-blue-600">
+                                        + Ajouter des tags
+                                      </span>
+                                    )}
+                                  </div>
+                                
+                                  {/* Bouton suggestions IA */}
+                                  {!row.tags?.length && (
+                                    <button
+                                      onClick={() => fetchAISuggestions(row)}
+                                      disabled={isLoadingSuggestions}
+                                      className={`flex items-center gap-1 px-2 py-1 text-xs font-medium rounded-full transition-all ${
+                                        isLoadingSuggestions 
+                                          ? 'bg-gray-100 text-gray-400' 
+                                          : 'bg-purple-100 text-purple-700 hover:bg-purple-200'
+                                      }`}
+                                    >
+                                      <SparklesIcon className="h-3 w-3" />
+                                      {isLoadingSuggestions ? 'Chargement...' : 'Suggestions IA'}
+                                    </button>
+                                  )}
+                                </div>
+                              )}
+                            
+                              {/* Affichage des suggestions IA */}
+                              {hasSuggestions && !isEditing && (
+                                <div className="mt-2 p-2 bg-purple-50 rounded-lg">
+                                  <div className="flex items-start justify-between">
+                                    <div>
+                                      <div className="flex flex-col gap-2 w-full">
+                                        <SparklesIcon className="h-4 w-4 text-purple-600" />
+                                        <span className="text-xs font-medium text-purple-700">
+                                          Suggestions IA ({Math.round(hasSuggestions.confidence * 100)}% confiance)
+                                        </span>
+                                        {hasSuggestions.source && (
+                                          <span className="text-xs text-purple-600">
+                                            • Source: {hasSuggestions.source === 'web' ? 'Web' : hasSuggestions.source === 'pattern' ? 'Patterns' : 'Historique'}
+                                          </span>
+                                        )}
+                                      </div>
+                                      <div className="mt-1 flex flex-wrap gap-1">
+                                        {hasSuggestions.tags.map((tag, idx) => (
+                                          <span 
+                                            key={idx}
+                                            className="px-2 py-0.5 bg-white text-purple-700 text-xs font-medium rounded-full border border-purple-300"
+                                          >
+                                            {tag}
+                                          </span>
+                                        ))}
+                                      </div>
                                     </div>
+                                    <button
+                                      onClick={() => applySuggestion(row.id)}
+                                      className="text-xs bg-purple-600 text-white px-2 py-1 rounded hover:bg-purple-700 transition-colors"
+                                    >
+                                      Appliquer
+                                    </button>
                                   </div>
-                                  <button
-                                    onClick={() => applySuggestion(row.id)}
-                                    className="text-xs bg-purple-600 text-white px-2 py-1 rounded hover:bg-purple-700 transition-colors"
-                                  >
-                                    Appliquer
-                                  </button>
                                 </div>
-                              </div>
-                            )}
+                              )}
+                            </div>
                           </div>
                         </div>
                       </div>
-                    </div>
 
-                    {/* Partie droite : Montant et actions */}
-                    <div className="flex items-center gap-4">
-                      {/* Montant avec indicateur ML */}
-                      <div className={`text-right ${isIncome ? 'text-green-600' : 'text-gray-900'}`}>
-                        <div className="text-base font-semibold whitespace-nowrap">
-                          {isIncome ? '+' : '-'}{formatAmount(row.amount)}
-                        </div>
-                        {row.ml_confidence && (
-                          <div className="flex items-center justify-end gap-1">
-                            <div className={`h-1.5 w-12 bg-gray-200 rounded-full overflow-hidden`}>
-                              <div 
-                                className={`h-full transition-all duration-300 ${
-                                  row.ml_confidence > 0.8 ? 'bg-green-500' : 
-                                  row.ml_confidence > 0.6 ? 'bg-yellow-500' : 
-                                  'bg-red-500'
-                                }`}
-                                style={{ width: `${row.ml_confidence * 100}%` }}
-                              />
-                            </div>
-                            <span className="text-xs text-gray-500">
-                              {Math.round(row.ml_confidence * 100)}%
-                            </span>
+                      {/* Partie droite : Montant et actions */}
+                      <div className="flex items-center gap-4">
+                        {/* Montant avec indicateur ML */}
+                        <div className={`text-right ${isIncome ? 'text-green-600' : 'text-gray-900'}`}>
+                          <div className="text-base font-semibold whitespace-nowrap">
+                            {isIncome ? '+' : '-'}{formatAmount(row.amount)}
                           </div>
-                        )}
-                      </div>
+                          {row.ml_confidence && (
+                            <div className="flex items-center justify-end gap-1">
+                              <div className={`h-1.5 w-12 bg-gray-200 rounded-full overflow-hidden`}>
+                                <div 
+                                  className={`h-full transition-all duration-300 ${
+                                    row.ml_confidence > 0.8 ? 'bg-green-500' : 
+                                    row.ml_confidence > 0.6 ? 'bg-yellow-500' : 
+                                    'bg-red-500'
+                                  }`}
+                                  style={{ width: `${row.ml_confidence * 100}%` }}
+                                />
+                              </div>
+                              <span className="text-xs text-gray-500">
+                                {Math.round(row.ml_confidence * 100)}%
+                              </span>
+                            </div>
+                          )}
+                        </div>
 
-                      {/* Actions */}
-                      <div className="flex flex-col gap-2 w-full">
-                        {/* Toggle exclure */}
-                        <label className="relative inline-flex items-center cursor-pointer">
-                          <input
-                            type="checkbox"
-                            checked={row.exclude}
-                            onChange={() => onToggle(row.id, !row.exclude)}
-                            className="sr-only peer"
-                          />
-                          <div className="w-11 h-6 bg-gray-200 peer-focus:outline-none peer-focus:ring-4 peer-focus:ring-blue-300 rounded-full peer peer-checked:after:translate-x-full peer-checked:after:border-white after:content-[''] after:absolute after:top-[2px] after:left-[2px] after:bg-white after:border-gray-300 after:border after:rounded-full after:h-5 after:w-5 after:transition-all peer-checked:bg-red-400"></div>
-                        </label>
+                        {/* Actions */}
+                        <div className="flex flex-col gap-2 w-full">
+                          {/* Toggle exclure */}
+                          <label className="relative inline-flex items-center cursor-pointer">
+                            <input
+                              type="checkbox"
+                              checked={row.exclude}
+                              onChange={() => onToggle(row.id, !row.exclude)}
+                              className="sr-only peer"
+                            />
+                            <div className="w-11 h-6 bg-gray-200 peer-focus:outline-none peer-focus:ring-4 peer-focus:ring-blue-300 rounded-full peer peer-checked:after:translate-x-full peer-checked:after:border-white after:content-[''] after:absolute after:top-[2px] after:left-[2px] after:bg-white after:border-gray-300 after:border after:rounded-full after:h-5 after:w-5 after:transition-all peer-checked:bg-red-400"></div>
+                          </label>
 
-                        {/* Bouton expand */}
-                        <button
-                          onClick={() => toggleExpanded(row.id)}
-                          className="p-1 rounded-lg hover:bg-gray-100 transition-colors"
-                        >
-                          {isExpanded ? (
-                            <ChevronUpIcon className="h-5 w-5 text-gray-400" />
-                          ) : (
-                            <ChevronDownIcon className="h-5 w-5 text-gray-400" />
-                          )}
-                        </button>
+                          {/* Bouton expand */}
+                          <button
+                            onClick={() => toggleExpanded(row.id)}
+                            className="p-1 rounded-lg hover:bg-gray-100 transition-colors"
+                          >
+                            {isExpanded ? (
+                              <ChevronUpIcon className="h-5 w-5 text-gray-400" />
+                            ) : (
+                              <ChevronDownIcon className="h-5 w-5 text-gray-400" />
+                            )}
+                          </button>
+                        </div>
                       </div>
                     </div>
                   </div>
-                </div>
+                </HoverAIPreview>
 
                 {/* Détails expandus */}
                 {isExpanded && (
@@ -771,6 +771,21 @@ export const fixedExpensesApi = {
 // FONCTIONS API POUR CLASSIFICATION AUTOMATIQUE DES DÉPENSES
 // =============================================================================
 
+// Prévisualisation IA d'une ligne (tooltip au survol)
+export type HoverPreview = {
+  preview_text: string;
+  confidence_indicator: 'high' | 'medium' | 'low' | 'error' | 'unknown';
+  suggested_type: string;
+  confidence_score?: number;
+  main_reason?: string;
+};
+
+export type PrefetchSuggestionsResponse = {
+  suggestions: Record<string, { preview: HoverPreview } & Record<string, unknown>>;
+  missing: number[];
+  processing_time_ms: number;
+};
+
 export const expenseClassificationApi = {
   // Récupérer toutes les règles de classification avec fallback gracieux
   async getRules(): Promise<ExpenseClassificationRule[]> {
@@ -889,6 +904,26 @@ export const expenseClassificationApi = {
     return response.data || [];
   },
 
+  // Suggestions d'une page de transactions en un appel ; ids triés pour une URL stable,
+  // le navigateur revalide la réponse avec son ETag (304 si rien n'a changé)
+  async prefetchSuggestions(transactionIds: number[]): Promise<PrefetchSuggestionsResponse> {
+    const params = new URLSearchParams();
+    [...transactionIds].sort((a, b) => a - b).forEach(id => params.append('ids', String(id)));
+    const response = await api.get<PrefetchSuggestionsResponse>(
+      `/expense-classification/transactions/prefetch-suggestions?${params}`
+    );
+    return response.data;
+  },
+
+  // Prévisualisations au survol de quelques lignes (10 max)
+  async getHoverPreviews(transactionIds: number[]): Promise<Record<string, HoverPreview>> {
+    const response = await api.post<{ previews: Record<string, HoverPreview> }>(
+      '/expense-classification/transactions/hover-preview',
+      { transaction_ids: transactionIds, preview_only: true }
+    );
+    return response.data.previews || {};
+  },
+
   // Mettre à jour le type de dépense d'une transaction
   async updateTransactionType(transactionId: number, expenseType: 'fixed' | 'variable', manualOverride: boolean = true): Promise<Tx> {
     const response = await api.patch<Tx>(`/transactions/${transactionId}/expense-type`, {